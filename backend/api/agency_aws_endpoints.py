@@ -5,7 +5,7 @@ Complete REST API for all 6 feature areas
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from typing import List, Dict, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from datetime import datetime, timezone, timedelta
 import os
 import uuid
@@ -49,7 +49,7 @@ router = APIRouter(prefix="/agency-aws", tags=["AWS Agency Platform"])
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'bigmann_entertainment_production')]
 
 
@@ -11,18 +11,15 @@ from pydantic import BaseModel
 import json
 
 from analytics_service import (
-    AnalyticsService,
     AnalyticsEvent,
     ContentPerformance,
     ROIAnalysis,
     PlatformAnalytics,
     MetricType,
-    Timeframe
+    Timeframe,
+    analytics_service,
 )
 
-# Initialize service
-analytics_service = AnalyticsService()
-
 # Create router
 router = APIRouter(prefix="/api/analytics", tags=["Content Analytics & Performance Monitoring"])
 security = HTTPBearer()
@@ -210,7 +207,7 @@ async def get_roi_analysis(
 ):
     """Get ROI analysis for specific content"""
     try:
-        roi_data = analytics_service.roi_collection.find_one({
+        roi_data = await analytics_service.roi_collection.find_one({
             "content_id": content_id,
             "user_id": user_id
         })
@@ -592,7 +589,7 @@ async def health_check():
     """Health check endpoint for analytics service"""
     try:
         # Test database connection
-        test_query = analytics_service.events_collection.count_documents({})
+        test_query = await analytics_service.events_collection.count_documents({})
         
         health_status = {
             "service": "Content Analytics & Performance Monitoring API",
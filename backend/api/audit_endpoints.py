@@ -5,11 +5,11 @@ Provides secure access to audit logs, metadata snapshots, and compliance reports
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Form, BackgroundTasks, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from fastapi.responses import StreamingResponse, JSONResponse
 from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime, timedelta
-import jwt
 import json
 import io
 import csv
@@ -22,6 +22,7 @@ from audit_models import (
     AuditLogQuery, AuditReport, AuditEventType, AuditSeverity, AuditOutcome
 )
 from audit_service import AuditService
+from config.database import db
 
 logger = logging.getLogger(__name__)
 
@@ -31,29 +32,11 @@ router = APIRouter(prefix="/audit", tags=["Audit Trail & Logging"])
 audit_service = None
 mongo_db = None
 
-# Authentication setup
-SECRET_KEY = "big-mann-entertainment-secret-key-2025"
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    if mongo_db is None:
-        raise HTTPException(status_code=503, detail="Database unavailable")
-    
-    user = await mongo_db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+    return await resolve_principal(credentials.credentials)
 
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)):
     """Get current admin user"""
@@ -83,6 +66,8 @@ def init_audit_service(db, services_dict):
     audit_service = AuditService(mongo_db=db)
     services_dict['audit'] = audit_service
 
+init_audit_service(db, {})
+
 # Audit Log Endpoints
 
 @router.get("/logs")
@@ -11,12 +11,13 @@ from datetime import datetime
 from auth.service import get_current_user, get_current_admin_user as require_admin
 from metadata_models import MetadataValidationConfig
 from batch_processing_service import BatchProcessingService
+from config.database import db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/batch", tags=["Batch Processing"])
 
-# Global service (will be initialized in server.py)
+# Global service (initialized on import, below)
 batch_service = None
 mongo_db = None
 
@@ -27,6 +28,8 @@ def init_batch_service(db, services_dict):
     batch_service = BatchProcessingService(mongo_db=db)
     services_dict['batch_processor'] = batch_service
 
+init_batch_service(db, {})
+
 @router.post("/upload-archive")
 async def upload_archive_batch(
     background_tasks: BackgroundTasks,
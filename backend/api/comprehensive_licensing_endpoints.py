@@ -7,16 +7,16 @@ for audiovisual content identification, and ISRC prefix support for sound record
 
 from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from fastapi.responses import JSONResponse, FileResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import json
-import jwt
 import os
 import uuid
 from pathlib import Path
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from pydantic import BaseModel, Field
 import logging
 
@@ -35,12 +35,9 @@ load_dotenv(ROOT_DIR / '.env')
 
 # Database setup
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 logger = logging.getLogger(__name__)
@@ -84,20 +81,7 @@ class AutomatedWorkflowRequest(BaseModel):
 
 # Authentication functions
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 async def require_admin(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin and current_user.role not in ["admin", "moderator", "super_admin"]:
@@ -5,11 +5,11 @@ Provides API endpoints for file upload, metadata management, and compliance vali
 
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 import json
 import uuid
-import jwt
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -33,11 +33,11 @@ from ddex_metadata_service import DDEXMetadataService
 from compliance_validation_service import ComplianceValidationService
 
 # Import proper authentication
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 # Database connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # User model
@@ -59,26 +59,10 @@ compliance_service = ComplianceValidationService()
 router = APIRouter(prefix="/api/content-ingestion", tags=["Content Ingestion"])
 security = HTTPBearer()
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 
 # Proper authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 # Health and Status Endpoints
 
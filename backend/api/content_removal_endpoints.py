@@ -19,6 +19,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 logger = logging.getLogger(__name__)
 
 from content_removal_service import ContentRemovalService
+from config.database import db
 from content_removal_models import (
     RemovalRequest, RemovalRequestCreate, RemovalRequestUpdate,
     RemovalStatus, RemovalUrgency, RemovalReason,
@@ -28,7 +29,7 @@ from content_removal_models import (
 
 router = APIRouter(prefix="/content-removal", tags=["Content Removal"])
 
-# Dependency injection (will be set by main server)
+# Dependency injection (set on import, below)
 removal_service: ContentRemovalService = None
 
 def init_removal_service(db: AsyncIOMotorDatabase):
@@ -36,6 +37,8 @@ def init_removal_service(db: AsyncIOMotorDatabase):
     global removal_service
     removal_service = ContentRemovalService(db)
 
+init_removal_service(db)
+
 def get_removal_service():
     """Get removal service instance"""
     if removal_service is None:
@@ -81,19 +81,19 @@ async def get_workflow_dashboard(current_user = Depends(get_current_user)):
         user_id = current_user["user_id"]
         
         # Get master content summary
-        master_content_count = workflow_service.master_content_collection.count_documents({
+        master_content_count = await workflow_service.master_content_collection.count_documents({
             "user_id": user_id
         })
         
         # Get versions summary
-        versions_count = workflow_service.content_versions_collection.count_documents({
+        versions_count = await workflow_service.content_versions_collection.count_documents({
             "created_by": user_id
         })
         
         # Get QC results summary
-        qc_results = list(workflow_service.technical_qc_collection.find({
+        qc_results = await workflow_service.technical_qc_collection.find({
             "performed_by": {"$regex": user_id}
-        }))
+        }).to_list(length=None)
         
         qc_summary = {
             "total_qc_runs": len(qc_results),
@@ -103,9 +103,9 @@ async def get_workflow_dashboard(current_user = Depends(get_current_user)):
         }
         
         # Get delivery profiles
-        delivery_profiles = list(workflow_service.delivery_profiles_collection.find({
+        delivery_profiles = await workflow_service.delivery_profiles_collection.find({
             "is_active": True
-        }))
+        }).to_list(length=None)
         
         channels_summary = {}
         for profile in delivery_profiles:
@@ -231,7 +231,7 @@ async def perform_technical_qc(
     
     try:
         # Get version to find content_id
-        version = workflow_service.content_versions_collection.find_one({
+        version = await workflow_service.content_versions_collection.find_one({
             "version_id": version_id
         })
         
@@ -282,7 +282,7 @@ async def get_content_details(
         user_id = current_user["user_id"]
         
         # Get master content
-        master_content = workflow_service.master_content_collection.find_one({
+        master_content = await workflow_service.master_content_collection.find_one({
             "content_id": content_id,
             "user_id": user_id
         })
@@ -291,15 +291,15 @@ async def get_content_details(
             raise HTTPException(status_code=404, detail="Content not found")
         
         # Get all versions
-        versions = list(workflow_service.content_versions_collection.find({
+        versions = await workflow_service.content_versions_collection.find({
             "content_id": content_id,
             "created_by": user_id
-        }).sort("created_at", -1))
+        }).sort("created_at", -1).to_list(length=None)
         
         # Get QC results
-        qc_results = list(workflow_service.technical_qc_collection.find({
+        qc_results = await workflow_service.technical_qc_collection.find({
             "content_id": content_id
-        }).sort("performed_at", -1))
+        }).sort("performed_at", -1).to_list(length=None)
         
         # Clean up MongoDB ObjectIds
         for item in [master_content] + versions + qc_results:
@@ -338,14 +338,14 @@ async def list_user_content(
         }).sort("created_at", -1).skip(offset).limit(limit)
         
         content_list = []
-        for content in cursor:
+        async for content in cursor:
             # Get version count
-            version_count = workflow_service.content_versions_collection.count_documents({
+            version_count = await workflow_service.content_versions_collection.count_documents({
                 "content_id": content["content_id"]
             })
             
             # Get latest QC status
-            latest_qc = workflow_service.technical_qc_collection.find_one({
+            latest_qc = await workflow_service.technical_qc_collection.find_one({
                 "content_id": content["content_id"]
             }, sort=[("performed_at", -1)])
             
@@ -356,7 +356,7 @@ async def list_user_content(
             content_list.append(content)
         
         # Get total count
-        total_count = workflow_service.master_content_collection.count_documents({
+        total_count = await workflow_service.master_content_collection.count_documents({
             "user_id": user_id
         })
         
@@ -382,9 +382,9 @@ async def get_delivery_profiles(current_user = Depends(get_current_user)):
     """Get available delivery profiles for distribution channels"""
     
     try:
-        profiles = list(workflow_service.delivery_profiles_collection.find({
+        profiles = await workflow_service.delivery_profiles_collection.find({
             "is_active": True
-        }))
+        }).to_list(length=None)
         
         # Clean up MongoDB ObjectIds
         for profile in profiles:
@@ -435,7 +435,7 @@ async def create_content_workflow(
         user_id = current_user["user_id"]
         
         # Verify content exists
-        master_content = workflow_service.master_content_collection.find_one({
+        master_content = await workflow_service.master_content_collection.find_one({
             "content_id": content_id,
             "user_id": user_id
         })
@@ -460,7 +460,7 @@ async def create_content_workflow(
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
         
-        workflow_service.content_workflows_collection.insert_one(workflow_data)
+        await workflow_service.content_workflows_collection.insert_one(workflow_data)
         
         return WorkflowResponse(
             success=True,
@@ -491,14 +491,14 @@ async def list_workflows(
         if status:
             query["overall_status"] = status
         
-        workflows = list(workflow_service.content_workflows_collection.find(query).sort("updated_at", -1))
+        workflows = await workflow_service.content_workflows_collection.find(query).sort("updated_at", -1).to_list(length=None)
         
         # Clean up MongoDB ObjectIds and add content info
         for workflow in workflows:
             workflow["_id"] = str(workflow["_id"])
             
             # Get content title
-            content = workflow_service.master_content_collection.find_one({
+            content = await workflow_service.master_content_collection.find_one({
                 "content_id": workflow["content_id"]
             })
             workflow["content_title"] = content.get("title", "Unknown") if content else "Unknown"
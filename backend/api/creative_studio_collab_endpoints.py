@@ -36,19 +36,19 @@ async def collaboration_websocket(websocket: WebSocket, project_id: str,
                     project_id, user_id, data.get("x", 0), data.get("y", 0))
             elif msg_type == "element_update":
                 await service.handle_element_update(
-                    project_id, user_id, data.get("element", {}))
+                    project_id, user_id, data.get("element", {}), data.get("clock", 0))
             elif msg_type == "element_add":
                 await service.handle_element_add(
-                    project_id, user_id, data.get("element", {}))
+                    project_id, user_id, data.get("element", {}), data.get("clock", 0))
             elif msg_type == "element_delete":
                 await service.handle_element_delete(
-                    project_id, user_id, data.get("element_id", ""))
+                    project_id, user_id, data.get("element_id", ""), data.get("clock", 0))
             elif msg_type == "ping":
                 await websocket.send_json({"type": "pong"})
     except WebSocketDisconnect:
-        await service.disconnect(project_id, user_id)
+        await service.disconnect(project_id, user_id, websocket)
     except Exception:
-        await service.disconnect(project_id, user_id)
+        await service.disconnect(project_id, user_id, websocket)
 
 
 # ==================== Activity Feed ====================
@@ -229,7 +229,13 @@ async def smart_resize(request: SmartResizeRequest):
 
 @router.get("/health")
 async def collab_health():
-    return {"status": "healthy", "service": "Creative Studio Collaboration"}
+    service = get_collab_service()
+    return {
+        "status": "healthy",
+        "service": "Creative Studio Collaboration",
+        "presence": service.get_presence_stats() if service else None,
+        "element_log": service.get_oplog_stats() if service else None,
+    }
 
 
 @ai_router.get("/health")
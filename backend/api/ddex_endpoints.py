@@ -7,9 +7,9 @@ import aiofiles
 from pathlib import Path
 
 # Import dependencies without circular import
-import jwt
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
+from auth.service import resolve_principal
+from config.mongo_pool import get_mongo_client
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -19,12 +19,9 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 class User(BaseModel):
@@ -35,19 +32,7 @@ class User(BaseModel):
     role: str = "user"
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin and current_user.role not in ["admin", "moderator", "super_admin"]:
@@ -123,16 +123,16 @@ async def create_bulk_distribution(
         
         for platform_name in bulk_request.platforms:
             # Find matching delivery profile for this platform
-            delivery_profiles = list(distribution_service.db['delivery_profiles'].find({
+            delivery_profiles = await distribution_service.db['delivery_profiles'].find({
                 "channel": {"$regex": platform_name.lower()},
                 "is_active": True
-            }))
+            }).to_list(length=None)
             
             if not delivery_profiles:
                 # Use generic profile if specific one not found
-                delivery_profiles = list(distribution_service.db['delivery_profiles'].find({
+                delivery_profiles = await distribution_service.db['delivery_profiles'].find({
                     "is_active": True
-                }).limit(1))
+                }).limit(1).to_list(length=None)
             
             if delivery_profiles:
                 delivery_profile_id = delivery_profiles[0]["profile_id"]
@@ -242,7 +242,7 @@ async def list_distribution_jobs(
             query["platform_name"] = platform_name
         
         # Get jobs from database
-        jobs_data = list(distribution_service.distribution_jobs_collection.find(query).sort("created_at", -1))
+        jobs_data = await distribution_service.distribution_jobs_collection.find(query).sort("created_at", -1).to_list(length=None)
         
         # Apply pagination
         total_jobs = len(jobs_data)
@@ -353,7 +353,7 @@ async def retry_distribution_job(
             raise HTTPException(status_code=400, detail="Maximum retry attempts exceeded")
         
         # Reset job status and increment retry count
-        distribution_service.distribution_jobs_collection.update_one(
+        await distribution_service.distribution_jobs_collection.update_one(
             {"distribution_id": distribution_id},
             {
                 "$set": {
@@ -455,7 +455,7 @@ async def get_distribution_statistics(current_user = Depends(get_current_user)):
         status_stats = {}
         cursor = distribution_service.distribution_jobs_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             status_stats[result["_id"]] = result["count"]
         
         # Get platform statistics
@@ -479,7 +479,7 @@ async def get_distribution_statistics(current_user = Depends(get_current_user)):
         platform_stats = {}
         cursor = distribution_service.distribution_jobs_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             platform_stats[result["_id"]] = {
                 "total_distributions": result["count"],
                 "successful_distributions": result["success_count"],
@@ -498,7 +498,7 @@ async def get_distribution_statistics(current_user = Depends(get_current_user)):
         delivery_method_stats = {}
         cursor = distribution_service.distribution_jobs_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             delivery_method_stats[result["_id"]] = result["count"]
         
         # Calculate overall success rate
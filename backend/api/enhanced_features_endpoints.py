@@ -9,7 +9,7 @@ Enhanced Features API Endpoints
 
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from datetime import datetime, timezone
 import os
 import uuid
@@ -42,7 +42,7 @@ router = APIRouter(prefix="/enhanced", tags=["Enhanced Features"])
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'bigmann_entertainment_production')]
 
 
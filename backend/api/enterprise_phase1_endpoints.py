@@ -41,9 +41,9 @@ router = APIRouter(prefix="/enterprise", tags=["Enterprise Phase 1"])
 
 # Database dependency
 async def get_db():
-    from motor.motor_asyncio import AsyncIOMotorClient
+    from config.mongo_pool import get_mongo_client
     import os
-    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    client = get_mongo_client(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
     return client[os.environ.get("DB_NAME", "bigmann_entertainment_production")]
 
 
@@ -12,7 +12,7 @@ from eth_account import Account
 import logging
 from datetime import datetime, timezone
 import json
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/ethereum/advanced", tags=["ethereum-advanced"])
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 # Initialize Web3 connection
@@ -18,13 +18,14 @@ from gs1_models import (
     BatchOperationResult
 )
 from gs1_service import GS1Service
+from config.database import db
 
 logger = logging.getLogger(__name__)
 
 # Create router
 router = APIRouter(prefix="/gs1", tags=["GS1 Asset Registry"])
 
-# Global service instance (will be initialized in server.py)
+# Global service instance (initialized on import, below)
 gs1_service: Optional[GS1Service] = None
 
 def get_gs1_service() -> GS1Service:
@@ -39,6 +40,8 @@ def init_gs1_service(database):
     gs1_service = GS1Service(database)
     logger.info("GS1 service initialized successfully")
 
+init_gs1_service(db)
+
 # Asset Management Endpoints
 
 @router.post("/assets", response_model=GS1Asset)
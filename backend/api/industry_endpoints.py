@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime
-import jwt
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -22,12 +22,9 @@ router = APIRouter(prefix="/industry", tags=["Industry Integration"])
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 db_name = os.environ.get('DB_NAME', 'big_mann_entertainment')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[db_name]
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 class User:
@@ -36,19 +33,7 @@ class User:
             setattr(self, key, value)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if not getattr(current_user, 'is_admin', False) and getattr(current_user, 'role', '') not in ["admin", "moderator", "super_admin"]:
@@ -15,12 +15,12 @@ try:
 except ImportError:
     # Fallback authentication (for development)
     from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-    from motor.motor_asyncio import AsyncIOMotorClient
+    from config.mongo_pool import get_mongo_client
     import jwt
     
     # Database connection
     MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/bigmann')
-    client = AsyncIOMotorClient(MONGO_URL)
+    client = get_mongo_client(MONGO_URL)
     db = client.bigmann
     
     # JWT Configuration
@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import json
-import jwt
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from pydantic import BaseModel, Field
 import uuid
 
 from licensing_service import LicensingService
+from blocking_io import run_blocking
 from licensing_models import PlatformLicense, LicensingAgreement
 
 # Load environment
@@ -20,12 +21,9 @@ load_dotenv(ROOT_DIR / '.env')
 
 # Database setup
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 # User Model (local copy to avoid circular imports)
@@ -38,20 +36,7 @@ class User(BaseModel):
 
 # Authentication functions (local copies)
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 async def require_admin(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin and current_user.role not in ["admin", "moderator", "super_admin"]:
@@ -76,16 +61,16 @@ async def initialize_all_platform_licenses(current_user: User = Depends(require_
     """Initialize licenses for all 83+ platforms"""
     try:
         # Initialize licenses for all platforms
-        created_licenses = licensing_service.initialize_all_platform_licenses(DISTRIBUTION_PLATFORMS)
+        created_licenses = await run_blocking(licensing_service.initialize_all_platform_licenses, DISTRIBUTION_PLATFORMS)
         
         # Create master licensing agreement
         license_ids = list(created_licenses.values())
-        master_agreement_id = licensing_service.create_master_licensing_agreement(license_ids)
+        master_agreement_id = await run_blocking(licensing_service.create_master_licensing_agreement, license_ids)
         
         # Activate all platform licenses
         activations = {}
         for platform_id, license_id in created_licenses.items():
-            activation_id = licensing_service.activate_platform_license(
+            activation_id = await run_blocking(licensing_service.activate_platform_license,
                 platform_id, license_id, current_user.email
             )
             activations[platform_id] = activation_id
@@ -107,7 +92,7 @@ async def initialize_all_platform_licenses(current_user: User = Depends(require_
 async def get_licensing_dashboard(current_user: User = Depends(get_current_user)):
     """Get comprehensive licensing dashboard"""
     try:
-        dashboard_data = licensing_service.get_licensing_dashboard()
+        dashboard_data = await run_blocking(licensing_service.get_licensing_dashboard)
         
         return {
             "licensing_overview": {
@@ -151,7 +136,7 @@ async def get_platform_licenses(
 ):
     """Get platform licenses with optional filtering"""
     try:
-        licenses = licensing_service.get_platform_licenses(
+        licenses = await run_blocking(licensing_service.get_platform_licenses,
             status=status, 
             category=category, 
             limit=limit, 
@@ -179,15 +164,15 @@ async def get_platform_license_details(
 ):
     """Get detailed information for a specific platform license"""
     try:
-        license_details = licensing_service.get_platform_license_details(platform_id)
+        license_details = await run_blocking(licensing_service.get_platform_license_details, platform_id)
         
         if not license_details:
             raise HTTPException(status_code=404, detail="Platform license not found")
         
         return {
             "platform_license": license_details,
-            "compliance_status": licensing_service.check_platform_compliance(platform_id),
-            "usage_metrics": licensing_service.get_platform_usage_metrics(platform_id)
+            "compliance_status": await run_blocking(licensing_service.check_platform_compliance, platform_id),
+            "usage_metrics": await run_blocking(licensing_service.get_platform_usage_metrics, platform_id)
         }
         
     except HTTPException:
@@ -202,7 +187,7 @@ async def activate_platform_license(
 ):
     """Activate a platform license (admin only)"""
     try:
-        activation_id = licensing_service.activate_platform_license(
+        activation_id = await run_blocking(licensing_service.activate_platform_license,
             platform_id, 
             platform_id,  # Using platform_id as license_id for simplicity
             current_user.email
@@ -226,7 +211,7 @@ async def deactivate_platform_license(
 ):
     """Deactivate a platform license (admin only)"""
     try:
-        deactivation_id = licensing_service.deactivate_platform_license(
+        deactivation_id = await run_blocking(licensing_service.deactivate_platform_license,
             platform_id,
             current_user.email
         )
@@ -249,7 +234,7 @@ async def check_platform_compliance(
 ):
     """Check compliance status for a specific platform"""
     try:
-        compliance_data = licensing_service.check_platform_compliance(platform_id)
+        compliance_data = await run_blocking(licensing_service.check_platform_compliance, platform_id)
         
         return {
             "platform_id": platform_id,
@@ -267,7 +252,7 @@ async def check_platform_compliance(
 async def get_licensing_status(current_user: User = Depends(get_current_user)):
     """Get overall licensing system status and health"""
     try:
-        status_data = licensing_service.get_licensing_status()
+        status_data = await run_blocking(licensing_service.get_licensing_status)
         
         return {
             "business_entity": "Big Mann Entertainment",
@@ -293,7 +278,7 @@ async def get_licensing_agreements(
 ):
     """Get licensing agreements with optional filtering"""
     try:
-        agreements = licensing_service.get_licensing_agreements(
+        agreements = await run_blocking(licensing_service.get_licensing_agreements,
             agreement_type=agreement_type,
             status=status,
             limit=limit,
@@ -322,7 +307,7 @@ async def update_platform_usage(
 ):
     """Update usage metrics for a platform"""
     try:
-        updated_usage = licensing_service.update_platform_usage(platform_id, usage_data)
+        updated_usage = await run_blocking(licensing_service.update_platform_usage, platform_id, usage_data)
         
         return {
             "message": f"Usage metrics updated for platform {platform_id}",
@@ -344,7 +329,7 @@ async def get_statutory_rates(
 ):
     """Get current statutory rates for music licensing"""
     try:
-        rates = licensing_service.get_statutory_rates(royalty_type=royalty_type, active_only=active_only)
+        rates = await run_blocking(licensing_service.get_statutory_rates, royalty_type=royalty_type, active_only=active_only)
         
         return {
             "statutory_rates": rates,
@@ -373,7 +358,7 @@ async def calculate_daily_compensation(
         if compensation_date:
             comp_date = datetime.fromisoformat(compensation_date.replace('Z', '+00:00'))
         
-        compensation_data = licensing_service.calculate_daily_compensation(comp_date)
+        compensation_data = await run_blocking(licensing_service.calculate_daily_compensation, comp_date)
         
         return {
             "message": "Daily compensation calculated successfully",
@@ -397,7 +382,7 @@ async def process_daily_payouts(
         from decimal import Decimal
         min_amount = Decimal(str(minimum_amount))
         
-        payout_data = licensing_service.process_daily_payouts(minimum_amount=min_amount)
+        payout_data = await run_blocking(licensing_service.process_daily_payouts, minimum_amount=min_amount)
         
         return {
             "message": "Daily payouts processed successfully",
@@ -418,7 +403,7 @@ async def get_compensation_dashboard(
 ):
     """Get comprehensive compensation and payout dashboard"""
     try:
-        dashboard_data = licensing_service.get_compensation_dashboard(period_days=period_days)
+        dashboard_data = await run_blocking(licensing_service.get_compensation_dashboard, period_days=period_days)
         
         return {
             "compensation_dashboard": dashboard_data,
@@ -449,7 +434,7 @@ async def get_compensation_history(
         if platform_id:
             query["platform_id"] = platform_id
         
-        compensations = list(licensing_service.daily_compensations.find(query).sort("compensation_date", -1).limit(limit))
+        compensations = await run_blocking(licensing_service.find_compensations, query, limit)
         
         # Convert ObjectId and Decimal for JSON serialization
         for comp in compensations:
@@ -488,7 +473,7 @@ async def get_payout_history(
         if recipient_type:
             query["recipient_type"] = recipient_type
         
-        payouts = list(licensing_service.compensation_payouts.find(query).sort("payout_date", -1).limit(limit))
+        payouts = await run_blocking(licensing_service.find_payouts, query, limit)
         
         # Convert ObjectId and Decimal for JSON serialization
         for payout in payouts:
@@ -514,12 +499,12 @@ async def get_payout_history(
 async def get_licensing_compliance(current_user: User = Depends(get_current_user)):
     """Get comprehensive licensing compliance status"""
     try:
-        compliance_data = licensing_service.get_comprehensive_compliance_status()
+        compliance_data = await run_blocking(licensing_service.get_comprehensive_compliance_status)
         
         # Get platform compliance breakdown
         platform_compliance = {}
         for platform_id in DISTRIBUTION_PLATFORMS.keys():
-            compliance = licensing_service.check_platform_compliance(platform_id)
+            compliance = await run_blocking(licensing_service.check_platform_compliance, platform_id)
             platform_compliance[platform_id] = {
                 "platform_name": DISTRIBUTION_PLATFORMS[platform_id]["name"],
                 "compliant": compliance.get("compliant", False),
@@ -591,7 +576,7 @@ async def get_usage_tracking(
         for pid in platforms_to_track:
             if pid in DISTRIBUTION_PLATFORMS:
                 # Get usage metrics for this platform (simplified - would integrate with actual platform APIs)
-                platform_usage = licensing_service.get_platform_usage_metrics(pid)
+                platform_usage = await run_blocking(licensing_service.get_platform_usage_metrics, pid)
                 
                 usage_data[pid] = {
                     "platform_name": DISTRIBUTION_PLATFORMS[pid]["name"],
@@ -641,7 +626,7 @@ async def get_licensing_compensation(
 ):
     """Get licensing-based compensation data"""
     try:
-        compensation_data = licensing_service.get_compensation_dashboard(period_days=period_days)
+        compensation_data = await run_blocking(licensing_service.get_compensation_dashboard, period_days=period_days)
         
         return {
             "compensation": {
@@ -683,7 +668,7 @@ async def get_licensing_payouts(
         if status:
             query["status"] = status
         
-        payouts = list(licensing_service.compensation_payouts.find(query).sort("payout_date", -1).limit(limit))
+        payouts = await run_blocking(licensing_service.find_payouts, query, limit)
         
         # Convert ObjectId and Decimal for JSON serialization
         for payout in payouts:
@@ -756,9 +741,9 @@ async def get_licensing_history(
         
         if not history_type or history_type == "calculations":
             # Get compensation calculations
-            calculations = list(licensing_service.daily_compensations.find({
+            calculations = await run_blocking(licensing_service.find_compensations, {
                 "compensation_date": {"$gte": start_date, "$lte": end_date}
-            }).sort("compensation_date", -1).limit(limit))
+            }, limit)
             
             for calc in calculations:
                 calc["_id"] = str(calc["_id"])
@@ -770,9 +755,9 @@ async def get_licensing_history(
         
         if not history_type or history_type == "payouts":
             # Get payout history
-            payouts = list(licensing_service.compensation_payouts.find({
+            payouts = await run_blocking(licensing_service.find_payouts, {
                 "payout_date": {"$gte": start_date, "$lte": end_date}
-            }).sort("payout_date", -1).limit(limit))
+            }, limit)
             
             for payout in payouts:
                 payout["_id"] = str(payout["_id"])
@@ -801,7 +786,7 @@ async def register_license(
         for platform_id in platform_ids:
             if platform_id in DISTRIBUTION_PLATFORMS:
                 # Create license registration
-                license_id = licensing_service.activate_platform_license(
+                license_id = await run_blocking(licensing_service.activate_platform_license,
                     platform_id, 
                     platform_id,  # Using platform_id as license_id
                     current_user.email
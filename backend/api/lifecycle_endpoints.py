@@ -323,7 +323,7 @@ async def list_automation_rules(
         cursor = lifecycle_service.automation_rules_collection.find(query)
         rules = []
         
-        for rule_data in cursor:
+        async for rule_data in cursor:
             try:
                 rule_data['_id'] = str(rule_data['_id'])
                 rules.append(AutomationRule(**rule_data))
@@ -355,7 +355,7 @@ async def update_automation_rule(
         # Update rule in database
         rule_updates["updated_at"] = datetime.now(timezone.utc).isoformat()
         
-        result = lifecycle_service.automation_rules_collection.update_one(
+        result = await lifecycle_service.automation_rules_collection.update_one(
             {"rule_id": rule_id, "user_id": user_id},
             {"$set": rule_updates}
         )
@@ -381,7 +381,7 @@ async def delete_automation_rule(
 ):
     """Delete an automation rule"""
     try:
-        result = lifecycle_service.automation_rules_collection.delete_one({
+        result = await lifecycle_service.automation_rules_collection.delete_one({
             "rule_id": rule_id,
             "user_id": user_id
         })
@@ -447,7 +447,7 @@ async def get_lifecycle_analytics_summary(
         status_activity = {}
         cursor = lifecycle_service.lifecycles_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             status_activity[result["_id"]] = result["count"]
         
         # Get automation activity
@@ -456,7 +456,7 @@ async def get_lifecycle_analytics_summary(
             "last_executed": {"$gte": cutoff_date.isoformat()}
         })
         
-        automation_executions = list(automation_cursor)
+        automation_executions = await automation_cursor.to_list(length=None)
         
         summary = {
             "period_days": days,
@@ -628,9 +628,9 @@ async def health_check():
     """Health check endpoint for lifecycle management service"""
     try:
         # Test database connections
-        lifecycles_count = lifecycle_service.lifecycles_collection.count_documents({})
-        versions_count = lifecycle_service.versions_collection.count_documents({})
-        automation_rules_count = lifecycle_service.automation_rules_collection.count_documents({})
+        lifecycles_count = await lifecycle_service.lifecycles_collection.count_documents({})
+        versions_count = await lifecycle_service.versions_collection.count_documents({})
+        automation_rules_count = await lifecycle_service.automation_rules_collection.count_documents({})
         
         health_status = {
             "service": "Content Lifecycle Management & Automation API",
@@ -17,6 +17,7 @@ from auth.service import get_current_user
 from models.core import User
 from config.database import db
 from services.cloudfront_setup_service import CloudFrontSetupService
+from services.scheduler_service import wake_scheduler
 from services.social_platform_manager import (
     TwitterConnectionManager,
     TikTokConnectionManager,
@@ -428,6 +429,10 @@ async def get_credentials(
 
 # ── Scheduled Posts CRUD ──────────────────────────────────────
 
+# Scheduler bookkeeping stays internal
+SCHEDULED_POST_PROJECTION = {"_id": 0, "due_at": 0, "claim_id": 0, "lease_owner": 0, "lease_expires_at": 0}
+
+
 @router.post("/scheduled-posts")
 async def create_scheduled_post(
     payload: ScheduledPostPayload,
@@ -452,6 +457,7 @@ async def create_scheduled_post(
         "platforms": payload.platforms,
         "media_url": payload.media_url,
         "scheduled_time": sched_dt.isoformat(),
+        "due_at": sched_dt,
         "status": "pending",
         "results": None,
         "succeeded": None,
@@ -460,8 +466,10 @@ async def create_scheduled_post(
         "updated_at": now,
     }
     await db.scheduled_posts.insert_one(doc)
+    wake_scheduler()
 
     doc.pop("_id", None)
+    doc.pop("due_at", None)
     return {"scheduled_post": doc, "message": "Post scheduled successfully."}
 
 
@@ -476,7 +484,7 @@ async def list_scheduled_posts(
     if status:
         query["status"] = status
     posts = []
-    cursor = db.scheduled_posts.find(query, {"_id": 0}).sort("scheduled_time", 1).limit(limit)
+    cursor = db.scheduled_posts.find(query, SCHEDULED_POST_PROJECTION).sort("scheduled_time", 1).limit(limit)
     async for doc in cursor:
         posts.append(doc)
     return {"scheduled_posts": posts, "count": len(posts)}
@@ -513,9 +521,15 @@ async def update_scheduled_post(
         if sched_dt <= datetime.now(timezone.utc):
             raise HTTPException(400, "scheduled_time must be in the future.")
         updates["scheduled_time"] = sched_dt.isoformat()
-
-    await db.scheduled_posts.update_one({"id": post_id}, {"$set": updates})
-    updated = await db.scheduled_posts.find_one({"id": post_id}, {"_id": 0})
+        updates["due_at"] = sched_dt
+
+    # The scheduler may have claimed the post since it was read
+    result = await db.scheduled_posts.update_one({"id": post_id, "status": "pending"}, {"$set": updates})
+    if not result.matched_count:
+        raise HTTPException(400, "Post is already being published and can no longer be updated.")
+    if "due_at" in updates:
+        wake_scheduler()
+    updated = await db.scheduled_posts.find_one({"id": post_id}, SCHEDULED_POST_PROJECTION)
     return {"scheduled_post": updated, "message": "Scheduled post updated."}
 
 
@@ -533,7 +547,9 @@ async def delete_scheduled_post(
     if existing["status"] not in ("pending", "failed"):
         raise HTTPException(400, f"Cannot delete a post with status '{existing['status']}'.")
 
-    await db.scheduled_posts.delete_one({"id": post_id})
+    result = await db.scheduled_posts.delete_one({"id": post_id, "status": {"$in": ["pending", "failed"]}})
+    if not result.deleted_count:
+        raise HTTPException(400, "Post is already being published and can no longer be deleted.")
     return {"message": "Scheduled post deleted.", "id": post_id}
 
 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import Optional, List, Dict, Any
 import logging
 import json
@@ -8,9 +9,8 @@ import os
 import uuid
 from datetime import datetime
 from pathlib import Path
-import jwt
 import asyncio
-import motor.motor_asyncio
+from config.mongo_pool import get_mongo_client
 from pydantic import BaseModel
 import boto3
 from botocore.exceptions import ClientError
@@ -19,10 +19,9 @@ logger = logging.getLogger(__name__)
 
 # Security
 security = HTTPBearer()
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 
 # Database connection
-client = motor.motor_asyncio.AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+client = get_mongo_client(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
 db = client[os.getenv("DB_NAME", "bigmann_entertainment")]
 media_collection = db.media_uploads
 
@@ -64,20 +63,7 @@ class DistributionRequest(BaseModel):
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Get current user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        email = payload.get("email")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        
-        user_doc = await db.users.find_one({"email": email})
-        if user_doc is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        return User(**user_doc)
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return User(**await resolve_principal(credentials.credentials))
 
 from distribution_service import DistributionService
 
@@ -6,8 +6,11 @@ Handles API endpoints for metadata parsing, validation, and duplicate detection
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, status
 from typing import Optional, Dict, Any, List
 import logging
+import uuid
+import xml.etree.ElementTree as ET
 from datetime import datetime
 import json
+from itertools import islice
 
 from auth.service import get_current_user, get_current_admin_user as require_admin
 from metadata_models import (
@@ -16,12 +19,14 @@ from metadata_models import (
 )
 from metadata_parser_service import MetadataParserService
 from metadata_validator_service import MetadataValidatorService
+from config.database import db
+from blocking_io import run_blocking
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/metadata", tags=["Metadata Parser & Validator"])
 
-# Global services (will be initialized in server.py)
+# Global services (initialized on import, below)
 parser_service = None
 validator_service = None
 mongo_db = None
@@ -37,6 +42,9 @@ def init_metadata_services(db, services_dict):
     services_dict['metadata_parser'] = parser_service
     services_dict['metadata_validator'] = validator_service
 
+# The router registry imports this module on first use; wire its services then
+init_metadata_services(db, {})
+
 @router.post("/parse", response_model=Dict[str, Any])
 async def parse_metadata_file(
     file: UploadFile = File(...),
@@ -140,6 +148,136 @@ async def parse_metadata_file(
             detail=f"Failed to parse metadata file: {str(e)}"
         )
 
+DDEX_INGEST_STORE_BATCH = 100
+DDEX_INGEST_REPORT_LIMIT = 50
+DDEX_INGEST_PARSE_BATCH = 50
+
+
+def _read_ddex_batch(parsed_records, size):
+    """Parse up to ``size`` records; a parse error ends the batch and is returned with it"""
+    batch = []
+    try:
+        batch.extend(islice(parsed_records, size))
+    except ET.ParseError as e:
+        return batch, e
+    return batch, None
+
+
+@router.post("/ddex/ingest", response_model=Dict[str, Any])
+async def ingest_ddex_ern(
+    file: UploadFile = File(...),
+    validate_metadata: bool = Form(True),
+    check_duplicates: bool = Form(True),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream a DDEX ERN delivery: every sound recording is validated and stored
+    as its release is read, without loading the whole message. Results are
+    stored in batches under one ingest_id.
+    """
+    ingest_id = str(uuid.uuid4())
+    file_size = file.size or 0
+    validation_config = MetadataValidationConfig(
+        check_duplicates=check_duplicates,
+        duplicate_scope="platform"
+    )
+    statistics = {"valid_records": 0, "warning_records": 0, "error_records": 0}
+    records: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    total_records = 0
+    stored_records = 0
+    parse_error = None
+
+    async def store():
+        nonlocal stored_records
+        if not pending:
+            return
+        try:
+            await mongo_db["metadata_validation_results"].insert_many(pending, ordered=False)
+            stored_records += len(pending)
+        except Exception as e:
+            logger.error(f"Failed to store DDEX ingest results for {ingest_id}: {str(e)}")
+        pending.clear()
+
+    try:
+        # The upload is read and parsed on the blocking-I/O pool, one batch at a time
+        parsed_records = parser_service.iter_ddex_ern_metadata(file.file, file.filename)
+        while True:
+            batch, batch_error = await run_blocking(_read_ddex_batch, parsed_records, DDEX_INGEST_PARSE_BATCH)
+            for parsed_metadata, parsing_errors in batch:
+                if validate_metadata:
+                    validation_result = await validator_service.validate_metadata(
+                        parsed_metadata=parsed_metadata,
+                        file_format=MetadataFormat.DDEX_ERN,
+                        config=validation_config
+                    )
+                else:
+                    validation_result = MetadataValidationResult(
+                        user_id=current_user.id,
+                        file_name=file.filename,
+                        file_size=file_size,
+                        file_format=MetadataFormat.DDEX_ERN,
+                        parsed_metadata=parsed_metadata,
+                        validation_status=ValidationStatus.PENDING
+                    )
+                validation_result.user_id = current_user.id
+                validation_result.file_name = file.filename
+                validation_result.file_size = file_size
+                validation_result.parsing_errors = parsing_errors
+                validation_result.parsing_status = ValidationStatus.VALID if not parsing_errors else ValidationStatus.WARNING
+
+                result_dict = validation_result.dict()
+                result_dict["_id"] = validation_result.id
+                result_dict["ingest_id"] = ingest_id
+                result_dict["created_at"] = datetime.now()
+                pending.append(result_dict)
+                if len(pending) >= DDEX_INGEST_STORE_BATCH:
+                    await store()
+
+                total_records += 1
+                if validation_result.validation_status == ValidationStatus.VALID:
+                    statistics["valid_records"] += 1
+                elif validation_result.validation_status == ValidationStatus.WARNING:
+                    statistics["warning_records"] += 1
+                elif validation_result.validation_status in (ValidationStatus.ERROR, ValidationStatus.INVALID):
+                    statistics["error_records"] += 1
+                if len(records) < DDEX_INGEST_REPORT_LIMIT:
+                    records.append({
+                        "validation_id": validation_result.id,
+                        "title": parsed_metadata.title,
+                        "isrc": parsed_metadata.isrc,
+                        "album": parsed_metadata.album,
+                        "validation_status": validation_result.validation_status,
+                    })
+            if batch_error is not None:
+                raise batch_error
+            if len(batch) < DDEX_INGEST_PARSE_BATCH:
+                break
+    except ET.ParseError as e:
+        # Records read before the malformed part are kept
+        parse_error = f"XML parsing error: {str(e)}"
+    except Exception as e:
+        logger.error(f"Error ingesting DDEX ERN {file.filename}: {str(e)}")
+        await store()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to ingest DDEX ERN file after {total_records} records: {str(e)}"
+        )
+    await store()
+
+    if parse_error and not total_records:
+        raise HTTPException(status_code=400, detail=parse_error)
+
+    return {
+        "success": parse_error is None,
+        "ingest_id": ingest_id,
+        "total_records": total_records,
+        "stored_records": stored_records,
+        "statistics": statistics,
+        "records": records,
+        "parse_error": parse_error,
+    }
+
 @router.post("/validate-json", response_model=Dict[str, Any])
 async def validate_json_metadata(
     metadata_json: Dict[str, Any],
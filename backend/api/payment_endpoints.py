@@ -6,6 +6,7 @@ import os
 from datetime import datetime
 
 from payment_service import PaymentService
+from config.database import db
 from payment_models import (
     CreateCheckoutSessionRequest, CreateCheckoutSessionResponse,
     PaymentStatusResponse, BankAccountRequest, DigitalWalletRequest,
@@ -31,8 +32,8 @@ logger = logging.getLogger(__name__)
 # Create payment router
 payment_router = APIRouter(prefix="/payments", tags=["Payments"])
 
-# Initialize payment service (will be properly initialized in main app)
-payment_service = None
+# Initialize payment service
+payment_service = PaymentService(db)
 
 def get_payment_service():
     """Get payment service instance"""
@@ -12,12 +12,13 @@ import io
 
 from auth.service import get_current_user, get_current_admin_user as require_admin
 from advanced_reporting_service import AdvancedReportingService
+from config.database import db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/reports", tags=["Advanced Reporting"])
 
-# Global service (will be initialized in server.py)
+# Global service (initialized on import, below)
 reporting_service = None
 mongo_db = None
 
@@ -28,6 +29,8 @@ def init_reporting_service(db, services_dict):
     reporting_service = AdvancedReportingService(mongo_db=db)
     services_dict['advanced_reporter'] = reporting_service
 
+init_reporting_service(db, {})
+
 @router.get("/comprehensive")
 async def get_comprehensive_report(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
@@ -5,10 +5,10 @@ Handles territory rights, usage rights validation, and embargo management
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Form
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime, date
-import jwt
 
 from rights_models import (
     TerritoryCode, UsageRightType, RightsOwnership, ComplianceCheckResult,
@@ -16,38 +16,21 @@ from rights_models import (
     ComplianceStatus
 )
 from rights_compliance_service import RightsComplianceService
+from config.database import db
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/rights", tags=["Rights & Compliance"])
 
-# Global service (will be initialized in server.py)
+# Global service (initialized on import, below)
 rights_service = None
 mongo_db = None
 
-# Authentication setup (copied from server.py to avoid circular import)
-SECRET_KEY = "big-mann-entertainment-secret-key-2025"
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    if mongo_db is None:
-        raise HTTPException(status_code=503, detail="Database unavailable")
-    
-    user = await mongo_db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+    return await resolve_principal(credentials.credentials)
 
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)):
     """Get current admin user"""
@@ -62,6 +45,8 @@ def init_rights_service(db, services_dict):
     rights_service = RightsComplianceService(mongo_db=db)
     services_dict['rights_compliance'] = rights_service
 
+init_rights_service(db, {})
+
 @router.post("/check-compliance")
 async def check_rights_compliance(
     content_id: str = Form(...),
@@ -11,6 +11,7 @@ import logging
 import uuid
 import asyncio
 from decimal import Decimal
+from pymongo import ReturnDocument
 
 from royalty_engine_core import (
     royalty_engine,
@@ -73,22 +74,21 @@ async def batch_process_events(
         total_royalties = Decimal("0")
         total_payouts = 0
         
-        for event in events:
-            try:
-                calculation = await royalty_engine.process_transaction_event(event)
+        for outcome in await royalty_engine.process_transaction_batch(events):
+            if outcome.calculation is not None:
                 results.append({
-                    "event_id": event.id,
+                    "event_id": outcome.event.id,
                     "status": "success",
-                    "calculation_id": calculation.id,
-                    "total_royalty": float(calculation.total_royalty)
+                    "calculation_id": outcome.calculation.id,
+                    "total_royalty": float(outcome.calculation.total_royalty)
                 })
-                total_royalties += calculation.total_royalty
-                total_payouts += len(calculation.contributor_payouts)
-            except Exception as e:
+                total_royalties += outcome.calculation.total_royalty
+                total_payouts += len(outcome.calculation.contributor_payouts)
+            else:
                 results.append({
-                    "event_id": event.id,
+                    "event_id": outcome.event.id,
                     "status": "error",
-                    "error": str(e)
+                    "error": outcome.error
                 })
         
         return {
@@ -117,6 +117,7 @@ async def create_contract_term(
     """Create new contract terms for an asset"""
     try:
         await royalty_engine.collection_contracts.insert_one(contract.dict())
+        royalty_engine.invalidate_contract_terms(contract.asset_id)
         return {
             "success": True,
             "message": "Contract terms created successfully",
@@ -159,13 +160,16 @@ async def update_contract_term(
 ):
     """Update contract terms"""
     try:
-        result = await royalty_engine.collection_contracts.update_one(
+        previous = await royalty_engine.collection_contracts.find_one_and_update(
             {"id": contract_id},
-            {"$set": updates}
+            {"$set": updates},
+            projection={"asset_id": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Contract not found")
+        royalty_engine.invalidate_contract_terms(previous.get("asset_id"), updates.get("asset_id"))
         
         return {
             "success": True,
@@ -187,6 +191,7 @@ async def create_contributor_split(
     """Create contributor split configuration"""
     try:
         await royalty_engine.collection_splits.insert_one(split.dict())
+        royalty_engine.invalidate_contributor_splits(split.asset_id)
         return {
             "success": True,
             "message": "Contributor split created successfully",
@@ -228,13 +233,16 @@ async def update_contributor_split(
 ):
     """Update contributor split"""
     try:
-        result = await royalty_engine.collection_splits.update_one(
+        previous = await royalty_engine.collection_splits.find_one_and_update(
             {"id": split_id},
-            {"$set": updates}
+            {"$set": updates},
+            projection={"asset_id": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Contributor split not found")
+        royalty_engine.invalidate_contributor_splits(previous.get("asset_id"), updates.get("asset_id"))
         
         return {
             "success": True,
@@ -246,6 +254,16 @@ async def update_contributor_split(
         logger.error(f"Failed to update contributor split: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update contributor split")
 
+@router.get("/cache/stats", response_model=Dict[str, Any])
+async def get_terms_cache_stats(
+    user_id: str = Depends(get_current_user)
+):
+    """Hit ratios and sizes of the contract terms and contributor split caches"""
+    return {
+        "success": True,
+        "cache": royalty_engine.get_terms_cache_stats()
+    }
+
 # Royalty Calculation and Audit Endpoints
 
 @router.get("/calculations/{calculation_id}", response_model=Dict[str, Any])
@@ -314,16 +332,28 @@ async def get_asset_calculations(
         logger.error(f"Failed to get asset calculations: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get asset calculations")
 
+@router.get("/audit/verify", response_model=Dict[str, Any])
+async def verify_audit_trail(
+    user_id: str = Depends(get_current_user)
+):
+    """Verify the audit ledger batch by batch (Merkle roots and batch chain)"""
+    try:
+        return {
+            "success": True,
+            "verification": await royalty_engine.verify_audit_trail()
+        }
+    except Exception as e:
+        logger.error(f"Failed to verify audit trail: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to verify audit trail")
+
 @router.get("/audit/{transaction_id}", response_model=Dict[str, Any])
 async def get_audit_trail(
     transaction_id: str,
     user_id: str = Depends(get_current_user)
 ):
-    """Get audit trail for a transaction"""
+    """Get audit trail for a transaction, with its Merkle inclusion proof once sealed"""
     try:
-        audit_data = await royalty_engine.collection_audit.find_one({
-            "transaction_event_id": transaction_id
-        })
+        audit_data = await royalty_engine.get_audit_proof(transaction_id)
         
         if not audit_data:
             raise HTTPException(status_code=404, detail="Audit trail not found")
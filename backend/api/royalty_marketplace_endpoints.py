@@ -9,6 +9,7 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from decimal import Decimal
 import logging
+from keyset_pagination import InvalidCursor
 
 from royalty_marketplace_service import (
     marketplace_service,
@@ -65,10 +66,10 @@ async def search_listings(
     featured_only: bool = False,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = None,
     limit: int = Query(20, ge=1, le=100)
 ):
-    """Search and filter marketplace listings"""
+    """Search and filter marketplace listings; page with ``pagination.next_cursor``"""
     try:
         lt = ListingType(listing_type) if listing_type else None
         rt = RoyaltyType(royalty_type) if royalty_type else None
@@ -83,10 +84,12 @@ async def search_listings(
             featured_only=featured_only,
             sort_by=sort_by,
             sort_order=-1 if sort_order == "desc" else 1,
-            page=page,
+            cursor=cursor,
             limit=limit
         )
         return result
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to search listings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to search listings")
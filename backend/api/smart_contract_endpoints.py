@@ -5,10 +5,10 @@ Handles Web3 integration, contract deployment, and DAO voting
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Form, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import Optional, Dict, Any, List
 import logging
 from datetime import datetime
-import jwt
 
 from blockchain_models import (
     BlockchainNetwork, ContractType, TriggerCondition, SmartContractTemplate,
@@ -16,6 +16,8 @@ from blockchain_models import (
     DEFAULT_CONTRACT_TEMPLATES
 )
 from smart_contract_service import SmartContractService
+from config.database import db
+from async_init import schedule_init
 
 logger = logging.getLogger(__name__)
 
@@ -25,29 +27,11 @@ router = APIRouter(prefix="/api/contracts", tags=["Smart Contracts & DAO"])
 contract_service = None
 mongo_db = None
 
-# Authentication setup (copied to avoid circular import)
-SECRET_KEY = "big-mann-entertainment-secret-key-2025"
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    if mongo_db is None:
-        raise HTTPException(status_code=503, detail="Database unavailable")
-    
-    user = await mongo_db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+    return await resolve_principal(credentials.credentials)
 
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)):
     """Get current admin user"""
@@ -63,13 +47,9 @@ def init_contract_service(db, services_dict):
     services_dict['smart_contracts'] = contract_service
     
     # Initialize Web3 connections in background
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-        loop.create_task(contract_service.initialize_web3_connections())
-    except RuntimeError:
-        # If no event loop is running, start one for initialization
-        asyncio.run(contract_service.initialize_web3_connections())
+    schedule_init("Smart contract Web3 connections", contract_service.initialize_web3_connections)
+
+init_contract_service(db, {})
 
 @router.post("/trigger/validation")
 async def trigger_validation_contracts(
@@ -5,7 +5,7 @@ Snapchat Business Integration API Endpoints
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from datetime import datetime, timezone
 import os
 
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/snapchat", tags=["Snapchat Integration"])
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'bigmann_entertainment_production')]
 
 
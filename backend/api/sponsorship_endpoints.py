@@ -1,12 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth.service import resolve_principal
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
 import uuid
-import jwt
 from pathlib import Path
 from pydantic import BaseModel, Field
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 from dotenv import load_dotenv
 
@@ -16,12 +16,9 @@ load_dotenv(ROOT_DIR / '.env')
 
 # Database setup
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Authentication setup
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 security = HTTPBearer()
 
 # User Model (local copy to avoid circular imports)
@@ -41,19 +38,7 @@ class User(BaseModel):
 
 # Authentication functions (local copies)
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return User(**user)
+    return User(**await resolve_principal(credentials.credentials))
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_admin and current_user.role not in ["admin", "moderator", "super_admin"]:
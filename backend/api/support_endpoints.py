@@ -10,8 +10,9 @@ import json
 import logging
 import uuid
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import jwt
+from auth.service import resolve_principal
 from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 
 from support_models import (
@@ -23,6 +24,7 @@ from support_models import (
 )
 from support_service import SupportService
 from websocket_manager import websocket_manager
+from keyset_pagination import InvalidCursor
 from ai_support_service import ai_support_service
 
 logger = logging.getLogger(__name__)
@@ -31,12 +33,10 @@ router = APIRouter(prefix="/api/support", tags=["Support System"])
 
 # Authentication setup
 security = HTTPBearer()
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
 
 # Initialize support service
@@ -44,19 +44,8 @@ support_service = SupportService(db)
 
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return {"id": user_id, "username": user.get("username", ""), "is_admin": user.get("is_admin", False)}
+    user = await resolve_principal(credentials.credentials)
+    return {"id": user["id"], "username": user.get("username", ""), "is_admin": user.get("is_admin", False)}
 
 # WebSocket connection manager for real-time chat
 class ConnectionManager:
@@ -146,32 +135,33 @@ async def search_tickets(
     category: Optional[TicketCategory] = Query(None),
     status: Optional[TicketStatus] = Query(None),
     priority: Optional[TicketPriority] = Query(None),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None),
     page_size: int = Query(20, ge=1, le=100),
     current_user: dict = Depends(get_current_user)
 ):
-    """Search and filter support tickets"""
+    """Search and filter support tickets; page with ``pagination.next_cursor``"""
     try:
         search_query = TicketSearchQuery(
             query=query,
             category=category,
             status=status,
             priority=priority,
-            page=page,
+            cursor=cursor,
             page_size=page_size
         )
         
-        tickets, total_count = await support_service.search_tickets(search_query, current_user["id"])
+        tickets, next_cursor, total_count = await support_service.search_tickets(search_query, current_user["id"])
         
         return {
             "tickets": tickets,
             "pagination": {
                 "total_count": total_count,
-                "page": page,
                 "page_size": page_size,
-                "total_pages": (total_count + page_size - 1) // page_size
+                "next_cursor": next_cursor
             }
         }
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to search tickets: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to search tickets: {str(e)}")
@@ -256,7 +256,7 @@ async def retry_transcoding_job(
             raise HTTPException(status_code=400, detail="Maximum retry attempts exceeded")
         
         # Reset job status and increment retry count
-        transcoding_service.transcoding_jobs_collection.update_one(
+        await transcoding_service.transcoding_jobs_collection.update_one(
             {"job_id": job_id},
             {
                 "$set": {
@@ -308,7 +308,7 @@ async def cancel_transcoding_job(
             raise HTTPException(status_code=400, detail="Cannot cancel completed or failed jobs")
         
         # Update job status to cancelled
-        transcoding_service.transcoding_jobs_collection.update_one(
+        await transcoding_service.transcoding_jobs_collection.update_one(
             {"job_id": job_id},
             {
                 "$set": {
@@ -353,7 +353,7 @@ async def get_transcoding_statistics(current_user = Depends(get_current_user)):
         status_stats = {}
         cursor = transcoding_service.transcoding_jobs_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             status_stats[result["_id"]] = {
                 "count": result["count"],
                 "avg_processing_time_seconds": result.get("avg_processing_time", 0)
@@ -371,11 +371,11 @@ async def get_transcoding_statistics(current_user = Depends(get_current_user)):
         profile_stats = {}
         cursor = transcoding_service.transcoding_jobs_collection.aggregate(pipeline)
         
-        for result in cursor:
+        async for result in cursor:
             profile_stats[result["_id"]] = result["count"]
         
         # Get total jobs count
-        total_jobs = transcoding_service.transcoding_jobs_collection.count_documents({
+        total_jobs = await transcoding_service.transcoding_jobs_collection.count_documents({
             "user_id": user_id
         })
         
@@ -7,7 +7,7 @@ Includes CSV bulk-import for catalog migration.
 
 import json
 import logging
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Query
 from fastapi.responses import Response
 from typing import Dict, Any
 from pydantic import BaseModel, Field
@@ -30,6 +30,7 @@ from services.uln_catalog_distribution_service import (
 from services.catalog_import_service import (
     parse_and_import_csv,
     preview_csv,
+    get_import_job,
     generate_csv_template,
 )
 
@@ -262,16 +263,8 @@ async def preview_csv_upload(
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are accepted")
 
-    content = await file.read()
-    try:
-        csv_text = content.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        try:
-            csv_text = content.decode("latin-1")
-        except Exception:
-            raise HTTPException(status_code=400, detail="Unable to decode CSV file")
-
-    result = await preview_csv(csv_text)
+    # Read from the spooled upload rather than loading it into memory
+    result = await preview_csv(file.file)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -282,21 +275,29 @@ async def import_csv_catalog(
     label_id: str,
     file: UploadFile = File(...),
     skip_duplicates: bool = Form(default=True),
+    resume_job_id: Optional[str] = Form(default=None),
     current_user: User = Depends(get_current_user),
 ):
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are accepted")
 
-    content = await file.read()
-    try:
-        csv_text = content.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        try:
-            csv_text = content.decode("latin-1")
-        except Exception:
-            raise HTTPException(status_code=400, detail="Unable to decode CSV file")
-
-    result = await parse_and_import_csv(label_id, csv_text, current_user.id, skip_duplicates)
+    result = await parse_and_import_csv(
+        label_id, file.file, current_user.id, skip_duplicates, resume_job_id=resume_job_id
+    )
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
+
+
+@router.get("/labels/{label_id}/catalog/import-jobs/{job_id}")
+async def get_catalog_import_job(
+    label_id: str,
+    job_id: str,
+    errors_after_row: int = 0,
+    limit: int = Query(default=100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+):
+    job = await get_import_job(label_id, job_id, errors_after_row, limit)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
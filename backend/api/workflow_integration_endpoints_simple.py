@@ -11,18 +11,16 @@ import logging
 import uuid
 import json
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import jwt
-from motor.motor_asyncio import AsyncIOMotorClient
+from auth.service import resolve_principal
+from config.mongo_pool import get_mongo_client
 import os
 
 # Authentication setup
 security = HTTPBearer()
-SECRET_KEY = os.environ.get("SECRET_KEY", "big-mann-entertainment-secret-key-2025")
-ALGORITHM = "HS256"
 
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
 
 logger = logging.getLogger(__name__)
@@ -31,19 +29,8 @@ router = APIRouter(prefix="/api/workflow-integration", tags=["Workflow Integrati
 
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    user = await db.users.find_one({"id": user_id})
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
-    return {"id": user_id, "username": user.get("username", ""), "is_admin": user.get("is_admin", False)}
+    user = await resolve_principal(credentials.credentials)
+    return {"id": user["id"], "username": user.get("username", ""), "is_admin": user.get("is_admin", False)}
 
 @router.get("/health")
 async def workflow_integration_health():
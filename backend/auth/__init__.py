@@ -2,5 +2,6 @@
 from auth.service import (
     verify_password, get_password_hash, create_access_token,
     create_refresh_token, get_current_user, get_current_admin_user,
-    get_admin_user, log_activity,
+    get_admin_user, log_activity, resolve_principal, invalidate_principal,
+    revoke_user_tokens,
 )
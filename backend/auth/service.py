@@ -1,7 +1,19 @@
 """
 Authentication service functions.
 Extracted from server.py for better organization.
+
+Password hashing and checks run on ``password_hasher``'s bounded thread
+pool rather than on the event loop; when it is saturated they fail fast
+with 503. Authenticated requests resolve their user through ``resolve_principal``,
+which serves user documents from a short-TTL, size-bounded cache. Writes
+to a user call ``invalidate_principal`` (or ``revoke_user_tokens``, which
+also bumps the user's ``token_version`` so every token issued before it
+stops validating), and a change stream on ``users`` carries invalidations
+to the other workers where the deployment supports it.
 """
+import asyncio
+import logging
+import os
 import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
@@ -9,30 +21,59 @@ from typing import Optional, Dict, Any
 import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import bcrypt
-
 from config.database import db
 from config.settings import settings
 from models.core import User, ActivityLog
+from versioned_cache import VersionedLRUCache, MISSING, watch_change_stream
+from password_hasher import PasswordHasher, PasswordHashingBusy
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+principal_cache = VersionedLRUCache("principals", PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS)
+password_hasher = PasswordHasher()
+
+
+def _hashing_overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-in requests in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHashingBusy:
+        raise _hashing_overloaded()
+
+
+async def get_password_hash(password: str) -> str:
     try:
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"), 
-            hashed_password.encode("utf-8")
-        )
-    except Exception:
-        return False
+        return await password_hasher.hash(password)
+    except PasswordHashingBusy:
+        raise _hashing_overloaded()
 
 
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(
-        password.encode("utf-8"), 
-        bcrypt.gensalt(rounds=12)
-    ).decode("utf-8")
+async def upgrade_password_hash(user_id: str, plain_password: str, hashed_password: str):
+    """Re-hash a just-verified password stored with older bcrypt parameters"""
+    if not password_hasher.needs_rehash(hashed_password):
+        return
+    try:
+        new_hash = await password_hasher.hash(plain_password)
+    except PasswordHashingBusy:
+        return  # Upgraded on a later, quieter login
+    # Guarded on the old hash so a concurrent password reset wins
+    await db.users.update_one(
+        {"id": user_id, "password_hash": hashed_password},
+        {"$set": {"password_hash": new_hash}}
+    )
+    invalidate_principal(user_id)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -50,24 +91,59 @@ def create_refresh_token():
     return secrets.token_urlsafe(32)
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_access_token(token: str) -> Dict[str, Any]:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return payload
+
+
+async def load_principal(user_id: str) -> Optional[Dict[str, Any]]:
+    """User document for ``user_id`` (without ``_id``), from the principal cache when possible"""
+    user = principal_cache.get(user_id)
+    if user is not MISSING:
+        return user
+    token = principal_cache.token()
+    user = await db.users.find_one({"id": user_id}, {"_id": 0})
+    principal_cache.put(user_id, user, token)
+    return user
+
+
+def invalidate_principal(user_id: str):
+    """Drop the cached user; call after any write to a user document"""
+    principal_cache.invalidate(user_id)
 
-    user = await db.users.find_one({"id": user_id})
+
+async def revoke_user_tokens(user_id: str):
+    """Invalidate every access token issued to the user so far"""
+    await db.users.update_one({"id": user_id}, {"$inc": {"token_version": 1}})
+    invalidate_principal(user_id)
+
+
+async def resolve_principal(token: str) -> Dict[str, Any]:
+    """The user document a bearer token belongs to; raises 401 for bad, revoked or orphaned tokens"""
+    payload = decode_access_token(token)
+    user = await load_principal(payload["sub"])
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    if payload.get("tv", 0) != user.get("token_version", 0):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    # Callers get their own copy; the cached document is shared
+    return dict(user)
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return User(**await resolve_principal(credentials.credentials))
 
-    if "_id" in user:
-        del user["_id"]
 
-    return User(**user)
+def start_principal_cache_watcher():
+    """Launch change-stream invalidation of the principal cache."""
+    loop = asyncio.get_event_loop()
+    loop.create_task(watch_change_stream(db.users, principal_cache, "id"))
+    logger.info("Principal cache watcher launched")
 
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)):
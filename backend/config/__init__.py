@@ -1,3 +1,4 @@
 # Configuration package
 from config.database import get_db, get_client
 from config.settings import settings
+from config.mongo_pool import get_mongo_client, get_pool_stats, close_mongo_clients
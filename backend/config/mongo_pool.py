@@ -0,0 +1,179 @@
+"""
+Process-wide MongoDB connection pool registry.
+
+Every module that needs a Motor client should call ``get_mongo_client()``
+instead of constructing ``AsyncIOMotorClient`` itself. Clients are shared
+per connection URL, so a worker holds one pool (one set of sockets and one
+server-monitor thread) per cluster instead of one per importing module.
+Pool sizing comes from ``settings`` and can be tuned per deployment.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONGO_URL = "mongodb://localhost:27017"
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Collects checkout counts and wait times for one client's pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[Any, float] = {}
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_failures = 0
+        self.in_use = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pool_clears = 0
+
+    # Pool lifecycle
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    # Connection lifecycle
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    # Checkout lifecycle
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._started[threading.get_ident()] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            started = self._started.pop(threading.get_ident(), None)
+            duration = getattr(event, "duration", None)
+            if duration is not None:
+                wait_ms = duration * 1000
+            elif started is not None:
+                wait_ms = (time.perf_counter() - started) * 1000
+            else:
+                wait_ms = 0.0
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._started.pop(threading.get_ident(), None)
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(0, self.in_use - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "open_connections": self.connections_created - self.connections_closed,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "pool_clears": self.pool_clears,
+            }
+
+
+class MongoPoolRegistry:
+    """Hands out one shared ``AsyncIOMotorClient`` per connection URL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, AsyncIOMotorClient] = {}
+        self._listeners: Dict[str, PoolStatsListener] = {}
+
+    @staticmethod
+    def pool_options() -> Dict[str, int]:
+        return {
+            "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        }
+
+    def get_client(self, mongo_url: Optional[str] = None) -> AsyncIOMotorClient:
+        url = mongo_url or DEFAULT_MONGO_URL
+        client = self._clients.get(url)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(url)
+            if client is None:
+                listener = PoolStatsListener()
+                client = AsyncIOMotorClient(url, event_listeners=[listener], **self.pool_options())
+                self._clients[url] = client
+                self._listeners[url] = listener
+                logger.info("Created shared MongoDB pool (%d registered)", len(self._clients))
+        return client
+
+    def stats(self) -> Dict[str, Any]:
+        pools = []
+        with self._lock:
+            items = list(self._listeners.items())
+        for index, (_url, listener) in enumerate(items):
+            pools.append({"pool": index, **listener.snapshot()})
+        return {"pool_count": len(pools), "options": self.pool_options(), "pools": pools}
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._listeners.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing MongoDB client: {e}")
+
+
+mongo_pool = MongoPoolRegistry()
+
+
+def get_mongo_client(mongo_url: Optional[str] = None) -> AsyncIOMotorClient:
+    """Return the process-wide shared client for ``mongo_url``."""
+    return mongo_pool.get_client(mongo_url)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return mongo_pool.stats()
+
+
+def close_mongo_clients():
+    mongo_pool.close_all()
@@ -73,6 +73,13 @@ class Settings:
     SES_VERIFIED_SENDER = os.environ.get('SES_VERIFIED_SENDER', 'no-reply@bigmannentertainment.com')
     SES_SENDER_NAME = os.environ.get('SES_SENDER_NAME', 'Big Mann Entertainment')
 
+    # MongoDB connection pool (shared by every module via config.mongo_pool)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '50'))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '5'))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '45000'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+
     # Frontend
     FRONTEND_URL = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
 
@@ -12,10 +12,12 @@ from services.secrets_protection_service import sanitize_text
 
 
 async def performance_tracking_middleware(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
     response = await call_next(request)
-    duration = time.time() - start_time
-    endpoint = f"{request.method} {request.url.path}"
+    duration = time.perf_counter() - start_time
+    # Route templates (not raw paths with ids) keep the number of histograms bounded
+    route = request.scope.get("route")
+    endpoint = getattr(route, "path", None) or "unmatched"
     perf_monitor.record_request(endpoint, duration, response.status_code, request.method)
     response.headers['X-Response-Time'] = f"{duration:.3f}s"
     return response
@@ -33,6 +33,8 @@ class User(BaseModel):
     locked_until: Optional[datetime] = None
     password_reset_token: Optional[str] = None
     password_reset_expires: Optional[datetime] = None
+    # Bumped to revoke every access token issued before; tokens carry it as "tv"
+    token_version: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
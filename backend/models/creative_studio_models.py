@@ -227,6 +227,7 @@ class ProjectVersion(BaseModel):
     version_number: int
     name: Optional[str] = None
     elements_snapshot: List[DesignElement] = []
+    op_seq: Optional[int] = None  # Element op-log position; replaces elements_snapshot when set
     created_by: str
     created_at: datetime = Field(default_factory=lambda: datetime.utcnow())
 
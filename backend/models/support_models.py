@@ -353,7 +353,7 @@ class TicketSearchQuery(BaseModel):
     user_id: Optional[str] = None
     agent_id: Optional[str] = None
     tags: Optional[List[str]] = None
-    page: int = Field(default=1, ge=1)
+    cursor: Optional[str] = None
     page_size: int = Field(default=20, ge=1, le=100)
 
 class KnowledgeBaseSearchQuery(BaseModel):
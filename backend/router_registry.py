@@ -0,0 +1,222 @@
+"""
+On-demand router loading.
+
+Importing every endpoint module at startup pulls in pandas, sklearn, web3,
+boto3 and friends, plus their module-level singletons, before the first
+request can be served. ``RouterRegistry`` instead records, for each router,
+the module it lives in and the URL prefixes it serves ("claims"). Nothing
+is imported until a request arrives under one of a router's claims, or the
+background warm-up started after startup gets to it. Requests and the
+warm-up import on the blocking-I/O pool, one module at a time, so a slow
+import never stalls the event loop; modules wire their own services when
+imported.
+
+Routes are kept in registration order however modules get loaded, so path
+matching behaves exactly as with eager includes. ``ROUTER_LOADING=eager``
+imports everything at startup instead (for ``gunicorn --preload`` or to
+surface import errors at boot). ``report()`` lists per-module import
+times; a dependency shared by several modules is charged to the first one
+that imported it.
+"""
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from starlette.responses import JSONResponse
+
+from blocking_io import run_blocking
+
+logger = logging.getLogger(__name__)
+
+ROUTER_LOADING = os.environ.get("ROUTER_LOADING", "lazy").lower()
+ROUTER_WARMUP = os.environ.get("ROUTER_WARMUP", "1") not in ("0", "false", "no")
+ROUTER_WARMUP_DELAY_SECONDS = float(os.environ.get("ROUTER_WARMUP_DELAY_SECONDS", "2"))
+
+
+class RouterSpec:
+    __slots__ = ("module", "attr", "claims", "eager", "routes", "loaded", "error", "profile")
+
+    def __init__(self, module: str, attr: str, claims: Sequence[str], eager: bool):
+        self.module = module
+        self.attr = attr
+        self.claims = tuple(claims)
+        self.eager = eager
+        self.routes: List[Any] = []
+        self.loaded = False
+        self.error: Optional[str] = None
+        self.profile: Dict[str, Any] = {}
+
+    @property
+    def name(self) -> str:
+        return f"{self.module}:{self.attr}"
+
+    def claims_path(self, path: str) -> bool:
+        return any(path == claim or path.startswith(claim.rstrip("/") + "/") for claim in self.claims)
+
+
+class RouterRegistry:
+    """Router metadata up front, router modules imported on first use"""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.specs: List[RouterSpec] = []
+        self.app = None
+        self._pending: List[RouterSpec] = []
+        self._failed: List[RouterSpec] = []
+        self._load_all_paths: set = set()
+        self._import_lock = asyncio.Lock()
+
+    def add(self, module: str, attr: str = "router", claims: Sequence[str] = (), eager: bool = False):
+        """Register ``module.attr``; ``claims`` are the router's URL prefixes relative to ``prefix``"""
+        self.specs.append(RouterSpec(module, attr, [self.prefix + c for c in claims], eager))
+
+    def install(self, app):
+        """Attach to ``app``: include eager routers now and load the rest as requests need them"""
+        self.app = app
+        self._pending = list(self.specs)
+        # The OpenAPI schema has to describe every route
+        self._load_all_paths = {p for p in (app.openapi_url,) if p}
+        app.add_middleware(LazyRouterMiddleware, registry=self)
+        if ROUTER_LOADING == "eager":
+            self.load_all("eager", raise_errors=True)
+        else:
+            for spec in self.specs:
+                if spec.eager:
+                    self._load(spec, "eager", raise_errors=True)
+
+    @property
+    def settled(self) -> bool:
+        """Every router is loaded, so requests need no claim checks"""
+        return not self._pending and not self._failed
+
+    async def load_for_path(self, path: str) -> List[RouterSpec]:
+        """Import every pending router claiming ``path``; returns the claiming routers that failed to load"""
+        if path in self._load_all_paths:
+            await self.load_all_off_loop(f"request:{path}")
+        for spec in [s for s in self._pending if s.claims_path(path)]:
+            await self._load_off_loop(spec, f"request:{path}")
+        return [spec for spec in self._failed if spec.claims_path(path)]
+
+    def load_all(self, reason: str, raise_errors: bool = False) -> List[RouterSpec]:
+        return [spec for spec in list(self._pending) if not self._load(spec, reason, raise_errors)]
+
+    async def load_all_off_loop(self, reason: str) -> List[RouterSpec]:
+        return [spec for spec in list(self._pending) if not await self._load_off_loop(spec, reason)]
+
+    def _load(self, spec: RouterSpec, reason: str, raise_errors: bool = False) -> bool:
+        if spec.loaded or spec.error:
+            return spec.loaded
+        return self._include(spec, self._import(spec), reason, raise_errors)
+
+    async def _load_off_loop(self, spec: RouterSpec, reason: str) -> bool:
+        # Concurrent requests for the same module wait for the one import
+        async with self._import_lock:
+            if spec.loaded or spec.error:
+                return spec.loaded
+            return self._include(spec, await run_blocking(self._import, spec), reason)
+
+    @staticmethod
+    def _import(spec: RouterSpec) -> Dict[str, Any]:
+        modules_before = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            router = getattr(importlib.import_module(spec.module), spec.attr)
+        except Exception as e:
+            return {"error": e, "import_seconds": time.perf_counter() - started}
+        return {"router": router, "import_seconds": time.perf_counter() - started,
+                "modules_imported": len(sys.modules) - modules_before}
+
+    def _include(self, spec: RouterSpec, outcome: Dict[str, Any], reason: str, raise_errors: bool = False) -> bool:
+        """Add an imported router's routes to the app, or record why its import failed"""
+        self._pending.remove(spec)
+        import_seconds = outcome["import_seconds"]
+        if "error" in outcome:
+            e = outcome["error"]
+            spec.error = f"{type(e).__name__}: {e}"
+            self._failed.append(spec)
+            spec.profile = {"import_seconds": round(import_seconds, 4), "loaded_by": reason, "error": spec.error}
+            logger.error(f"Router {spec.name} failed to load: {spec.error}")
+            if raise_errors:
+                raise e
+            return False
+        router = outcome["router"]
+
+        routes = self.app.router.routes
+        first_new = len(routes)
+        self.app.include_router(router, prefix=self.prefix)
+        spec.routes = routes[first_new:]
+        spec.loaded = True
+        self._reorder_routes()
+        self.app.openapi_schema = None
+
+        spec.profile = {
+            "import_seconds": round(import_seconds, 4),
+            "modules_imported": outcome["modules_imported"],
+            "routes": len(spec.routes),
+            "loaded_by": reason,
+            "loaded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        logger.info(f"Router {spec.name} loaded in {import_seconds * 1000:.0f}ms ({reason})")
+        return True
+
+    def _reorder_routes(self):
+        """Registered routers' routes go last, in registration order, after every other route"""
+        lazy_routes = [route for spec in self.specs if spec.loaded for route in spec.routes]
+        lazy_ids = {id(route) for route in lazy_routes}
+        routes = self.app.router.routes
+        routes[:] = [route for route in routes if id(route) not in lazy_ids] + lazy_routes
+
+    async def warm_up(self, delay: float = ROUTER_WARMUP_DELAY_SECONDS):
+        """Load the remaining routers one at a time, yielding to requests in between"""
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        while self._pending:
+            await self._load_off_loop(self._pending[0], "warmup")
+            await asyncio.sleep(0)
+        logger.info(f"Router warm-up finished in {time.perf_counter() - started:.1f}s")
+
+    def start_warmup(self):
+        if self._pending and ROUTER_WARMUP:
+            asyncio.get_event_loop().create_task(self.warm_up())
+
+    def report(self) -> Dict[str, Any]:
+        """Per-router import profile, slowest first"""
+        routers = [{"router": spec.name, "claims": list(spec.claims), "loaded": spec.loaded, **spec.profile}
+                   for spec in self.specs]
+        routers.sort(key=lambda r: r.get("import_seconds", -1), reverse=True)
+        return {
+            "mode": ROUTER_LOADING,
+            "registered": len(self.specs),
+            "loaded": sum(1 for spec in self.specs if spec.loaded),
+            "failed": sum(1 for spec in self.specs if spec.error),
+            "total_import_seconds": round(sum(r.get("import_seconds", 0) for r in routers), 4),
+            "routers": routers,
+        }
+
+
+class LazyRouterMiddleware:
+    """Loads the routers claiming a request's path before routing it"""
+
+    def __init__(self, app, registry: RouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and not self.registry.settled:
+            failed = await self.registry.load_for_path(scope["path"])
+            if failed:
+                if scope["type"] == "websocket":
+                    await send({"type": "websocket.close", "code": 1011})
+                    return
+                response = JSONResponse(
+                    status_code=503,
+                    content={"detail": f"Service module unavailable: {', '.join(s.module for s in failed)}"},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -1,139 +1,135 @@
-from fastapi import APIRouter
+"""
+Router registry: every API router, the module it lives in and the URL
+prefixes it serves. Modules are imported on first use (see router_registry.py),
+so adding a router here costs nothing at startup. Claims are relative to
+``/api``; routers whose own prefix already starts with ``/api`` are served
+under ``/api/api/...``.
+"""
+from router_registry import RouterRegistry
 
-# Router Imports
-from content_removal_endpoints import router as content_removal_router
-from workflow_integration_endpoints_simple import router as workflow_integration_router
-from support_endpoints import router as support_router
-from uln_endpoints import uln_router
-from uln_blockchain_endpoints import router as blockchain_router
-from ethereum_endpoints import router as ethereum_router
-from ethereum_advanced_endpoints import router as ethereum_advanced_router
-from social_oauth_service import router as oauth_router
-from aws_organizations_endpoints import router as aws_organizations_router
-from enterprise_phase1_endpoints import router as enterprise_phase1_router
-from digital_twin_endpoints import router as digital_twin_router
-from royalty_marketplace_endpoints import router as royalty_marketplace_router
-from aws_enterprise_mapping_endpoints import router as aws_enterprise_mapping_router
-from agency_success_automation_endpoints import router as agency_automation_router
-from dao_governance_v2_endpoints import router as dao_v2_router
-from creative_studio_endpoints import router as creative_studio_router
-from macie_endpoints import router as macie_router
-from guardduty_endpoints import router as guardduty_router
-from qldb_endpoints import router as qldb_router
-# agency_router excluded due to local definition/fallback in server.py
-from social_media_strategy_endpoints import router as social_strategy_router
-from social_media_phases_5_10_endpoints import router as social_phases_5_10_router
-from royalty_engine_endpoints import router as royalty_engine_router
-from social_media_royalty_endpoints import router as social_media_royalty_router
-from content_ingestion_endpoints import router as content_ingestion_router
-from comprehensive_platform_endpoints import router as comprehensive_platform_router
-from content_workflow_endpoints import router as content_workflow_router
-from transcoding_endpoints import router as transcoding_router
-from distribution_endpoints import router as distribution_router
-from premium_features_endpoints import router as premium_router
-from mlc_endpoints import router as mlc_router
-from mde_endpoints import router as mde_router
-from gs1_endpoints import router as gs1_router
-from analytics_endpoints import router as analytics_router
-from lifecycle_endpoints import router as lifecycle_router
-from enhanced_features_endpoints import router as enhanced_features_router
-from agency_aws_endpoints import router as agency_aws_router
-from snapchat_endpoints import router as snapchat_router
-from ddex_endpoints import ddex_router
-from music_reports_endpoints import music_reports_router
-from workflow_enhancement_endpoints import workflow_router
-from sponsorship_endpoints import sponsorship_router
-from tax_endpoints import tax_router
-from industry_endpoints import industry_router
-from label_endpoints import label_router
-from stripe_endpoints import stripe_router
-from licensing_endpoints import licensing_router
-from comprehensive_licensing_endpoints import comprehensive_licensing_router
-from pdooh_endpoints import router as pdooh_router
-from metadata_endpoints import router as metadata_router
-from batch_endpoints import router as batch_router
-from reporting_endpoints import router as reporting_router
-from rights_endpoints import router as rights_router
-from smart_contract_endpoints import router as contracts_router
-from audit_endpoints import router as audit_router
-from media_upload_endpoints import media_router
-from paypal_endpoints import paypal_router
-from moderation_endpoints import router as moderation_router
-from creative_studio_collab_endpoints import router as collab_router, ai_router as ai_assets_router
-from usage_analytics_endpoints import router as usage_analytics_router
-from aws_cloudwatch_endpoints import router as cloudwatch_router
-from security_audit_endpoints import router as security_audit_router
-from cve_management_endpoints import router as cve_management_router
-from scanner_endpoints import router as scanner_router
-from remediation_endpoints import router as remediation_router
-from governance_endpoints import router as governance_router
-from notification_endpoints import router as notification_router, reports_router
-from rbac_endpoints import router as rbac_router
-from sla_tracker_endpoints import router as sla_tracker_router
-from cve_reporting_endpoints import router as cve_reporting_router
-from iac_endpoints import router as iac_router
-from ticketing_endpoints import router as ticketing_router
-from tenant_endpoints import router as tenant_router
-from live_integrations_api import router as live_integrations_router
-from uln_enhanced_endpoints import router as uln_enhanced_router
-from uln_label_members_endpoints import router as uln_label_members_router
-from uln_catalog_distribution_endpoints import router as uln_catalog_dist_router
-from uln_governance_disputes_endpoints import router as uln_governance_disputes_router
-from uln_notification_endpoints import router as uln_notification_router
-from dns_health_endpoints import router as dns_health_router
-from cve_monitor_endpoints import router as cve_monitor_router
-from gs1_business_identifiers_endpoints import router as gs1_biz_identifiers_router
-from aws_dns_health_endpoints import router as aws_dns_health_router
-from revenue_tracking_endpoints import router as revenue_tracking_router
+router_registry = RouterRegistry(prefix="/api")
 
-# Main API Router
-api_router = APIRouter(prefix="/api")
+# Core route modules (routes/)
+router_registry.add("routes.licensing_routes", claims=["/licensing", "/rights"])
+router_registry.add("routes.agency_routes", "agency_router", claims=["/agency"])
+router_registry.add("routes.admin_routes", claims=["/admin"])
+router_registry.add("routes.auth_routes", claims=["/auth"])
+router_registry.add("routes.dao_routes", claims=["/dao"])
+router_registry.add("routes.health_routes", claims=["/aws", "/batch", "/mde", "/metadata", "/mlc", "/payment", "/paypal", "/pdooh", "/reporting", "/stripe"])
+router_registry.add("routes.business_routes", claims=["/business"])
+router_registry.add("routes.media_routes", claims=["/content", "/media"])
+router_registry.add("routes.aws_routes", claims=["/aws", "/email", "/media", "/metadata", "/phase2"])
+router_registry.add("routes.domain_routes", claims=["/domain", "/route53"])
+router_registry.add("routes.distribution_routes", claims=["/distribution"])
+# Serves the /api root and the monitoring endpoints, so it is always loaded
+router_registry.add("routes.system_routes", claims=["/auth", "/business", "/database", "/health", "/media", "/metadata", "/metrics", "/performance", "/rights", "/status", "/system"], eager=True)
+router_registry.add("routes.creator_profile_routes", claims=["/creator-profiles"])
+router_registry.add("routes.watermark_routes", claims=["/watermark"])
+router_registry.add("routes.subscription_routes", claims=["/subscriptions"])
+router_registry.add("routes.content_routes", claims=["/user-content"])
+router_registry.add("routes.messaging_routes", claims=["/messages"])
+router_registry.add("routes.analytics_routes", claims=["/analytics"])
+router_registry.add("routes.notification_routes", claims=["/notifications"])
+router_registry.add("routes.websocket_routes", claims=["/ws"])
+router_registry.add("routes.webhook_routes", claims=["/webhook"])
+router_registry.add("routes.social_connections_routes", claims=["/social"])
+router_registry.add("moderation_endpoints", claims=["/moderation"])
+router_registry.add("routes.distribution_hub_routes", claims=["/distribution-hub"])
+router_registry.add("routes.aws_media_processing_routes", claims=["/aws-media"])
+router_registry.add("routes.aws_live_streaming_routes", claims=["/aws-livestream"])
+router_registry.add("routes.aws_workmail_pinpoint_routes", claims=["/aws-comms"])
+router_registry.add("routes.aws_waf_secrets_routes", claims=["/aws-security"])
+router_registry.add("routes.aws_ai_analytics_routes", claims=["/aws-ai"])
+router_registry.add("routes.aws_data_analytics_routes", claims=["/aws-data"])
+router_registry.add("routes.aws_blockchain_routes", claims=["/aws-blockchain"])
+router_registry.add("routes.aws_ai_content_routes", claims=["/aws-ai-content"])
+router_registry.add("routes.aws_messaging_routes", claims=["/aws-messaging"])
+router_registry.add("routes.aws_infrastructure_routes", claims=["/aws-infra"])
+router_registry.add("routes.key_management_routes", claims=["/keys"])
 
-# Include Routers
-routers = [
-    content_removal_router, workflow_integration_router, support_router, uln_router,
-    blockchain_router, ethereum_router, ethereum_advanced_router,
-    oauth_router, aws_organizations_router, enterprise_phase1_router,
-    digital_twin_router, royalty_marketplace_router, aws_enterprise_mapping_router,
-    agency_automation_router, dao_v2_router, creative_studio_router, macie_router,
-    guardduty_router, qldb_router, # agency_router excluded
-    social_strategy_router, social_phases_5_10_router,
-    royalty_engine_router, social_media_royalty_router, content_ingestion_router,
-    comprehensive_platform_router, content_workflow_router, transcoding_router, distribution_router,
-    premium_router, mlc_router, mde_router, gs1_router, analytics_router, lifecycle_router,
-    enhanced_features_router, agency_aws_router, snapchat_router, ddex_router, music_reports_router,
-    workflow_router, sponsorship_router, tax_router, industry_router, label_router,
-    stripe_router, licensing_router, comprehensive_licensing_router, pdooh_router,
-    metadata_router, batch_router, reporting_router, rights_router, contracts_router,
-    audit_router, media_router, paypal_router, moderation_router,
-    collab_router, ai_assets_router,
-    usage_analytics_router,
-    cloudwatch_router,
-    security_audit_router,
-    cve_management_router,
-    scanner_router,
-    remediation_router,
-    governance_router,
-    notification_router,
-    reports_router,
-    rbac_router,
-    sla_tracker_router,
-    cve_reporting_router,
-    iac_router,
-    ticketing_router,
-    tenant_router,
-    live_integrations_router,
-    uln_enhanced_router,
-    uln_label_members_router,
-    uln_catalog_dist_router,
-    uln_governance_disputes_router,
-    uln_notification_router,
-    dns_health_router,
-    cve_monitor_router,
-    gs1_biz_identifiers_router,
-    aws_dns_health_router,
-    revenue_tracking_router,
-]
-
-for router in routers:
-    api_router.include_router(router)
+# External endpoint modules
+router_registry.add("content_removal_endpoints", claims=["/content-removal"])
+router_registry.add("workflow_integration_endpoints_simple", claims=["/api/workflow-integration"])
+router_registry.add("support_endpoints", claims=["/api/support"])
+router_registry.add("uln_endpoints", "uln_router", claims=["/uln"])
+router_registry.add("uln_blockchain_endpoints", claims=["/blockchain"])
+router_registry.add("ethereum_endpoints", claims=["/ethereum"])
+router_registry.add("ethereum_advanced_endpoints", claims=["/ethereum/advanced"])
+router_registry.add("social_oauth_service", claims=["/api/oauth"])
+router_registry.add("aws_organizations_endpoints", claims=["/api/aws-organizations"])
+router_registry.add("enterprise_phase1_endpoints", claims=["/enterprise"])
+router_registry.add("digital_twin_endpoints", claims=["/digital-twin"])
+router_registry.add("royalty_marketplace_endpoints", claims=["/api/marketplace"])
+router_registry.add("aws_enterprise_mapping_endpoints", claims=["/api/aws-enterprise"])
+router_registry.add("agency_success_automation_endpoints", claims=["/api/agency-automation"])
+router_registry.add("dao_governance_v2_endpoints", claims=["/dao-v2"])
+router_registry.add("creative_studio_endpoints", claims=["/creative-studio"])
+router_registry.add("macie_endpoints", claims=["/macie"])
+router_registry.add("guardduty_endpoints", claims=["/guardduty"])
+router_registry.add("qldb_endpoints", claims=["/qldb"])
+router_registry.add("social_media_strategy_endpoints", claims=["/api/social-strategy"])
+router_registry.add("social_media_phases_5_10_endpoints", claims=["/api/social-media-advanced"])
+router_registry.add("royalty_engine_endpoints", claims=["/api/royalty-engine"])
+router_registry.add("social_media_royalty_endpoints", claims=["/api/social-media-royalty"])
+router_registry.add("content_ingestion_endpoints", claims=["/api/content-ingestion"])
+router_registry.add("comprehensive_platform_endpoints", claims=["/platform"])
+router_registry.add("content_workflow_endpoints", claims=["/api/workflow"])
+router_registry.add("transcoding_endpoints", claims=["/api/transcoding"])
+router_registry.add("distribution_endpoints", claims=["/api/distribution"])
+router_registry.add("premium_features_endpoints", claims=["/api/premium"])
+router_registry.add("mlc_endpoints", claims=["/api/mlc"])
+router_registry.add("mde_endpoints", claims=["/api/mde"])
+router_registry.add("gs1_endpoints", claims=["/gs1"])
+router_registry.add("analytics_endpoints", claims=["/api/analytics"])
+router_registry.add("lifecycle_endpoints", claims=["/api/lifecycle"])
+router_registry.add("enhanced_features_endpoints", claims=["/enhanced"])
+router_registry.add("agency_aws_endpoints", claims=["/agency-aws"])
+router_registry.add("snapchat_endpoints", claims=["/snapchat"])
+router_registry.add("ddex_endpoints", "ddex_router", claims=["/ddex"])
+router_registry.add("music_reports_endpoints", "music_reports_router", claims=["/music-reports"])
+router_registry.add("workflow_enhancement_endpoints", "workflow_router", claims=["/user"])
+router_registry.add("sponsorship_endpoints", "sponsorship_router", claims=["/sponsorship"])
+router_registry.add("tax_endpoints", "tax_router", claims=["/tax"])
+router_registry.add("industry_endpoints", "industry_router", claims=["/industry"])
+router_registry.add("label_endpoints", "label_router", claims=["/label"])
+router_registry.add("stripe_endpoints", "stripe_router", claims=["/payments"])
+router_registry.add("licensing_endpoints", "licensing_router", claims=["/licensing"])
+router_registry.add("comprehensive_licensing_endpoints", "comprehensive_licensing_router", claims=["/comprehensive-licensing"])
+router_registry.add("pdooh_endpoints", claims=["/api/pdooh"])
+router_registry.add("metadata_endpoints", claims=["/metadata"])
+router_registry.add("batch_endpoints", claims=["/api/batch"])
+router_registry.add("reporting_endpoints", claims=["/api/reports"])
+router_registry.add("rights_endpoints", claims=["/api/rights"])
+router_registry.add("smart_contract_endpoints", claims=["/api/contracts"])
+router_registry.add("audit_endpoints", claims=["/audit"])
+router_registry.add("media_upload_endpoints", "media_router", claims=["/media"])
+router_registry.add("paypal_endpoints", "paypal_router", claims=["/paypal"])
+router_registry.add("moderation_endpoints", claims=["/moderation"])
+router_registry.add("creative_studio_collab_endpoints", claims=["/creative-studio/collab"])
+router_registry.add("creative_studio_collab_endpoints", "ai_router", claims=["/creative-studio/ai-assets"])
+router_registry.add("usage_analytics_endpoints", claims=["/analytics-tracking"])
+router_registry.add("aws_cloudwatch_endpoints", claims=["/cloudwatch"])
+router_registry.add("security_audit_endpoints", claims=["/security"])
+router_registry.add("cve_management_endpoints", claims=["/cve"])
+router_registry.add("scanner_endpoints", claims=["/cve/scanners"])
+router_registry.add("remediation_endpoints", claims=["/cve/remediation"])
+router_registry.add("governance_endpoints", claims=["/cve/governance"])
+router_registry.add("notification_endpoints", claims=["/cve/notifications"])
+router_registry.add("notification_endpoints", "reports_router", claims=["/cve/reports"])
+router_registry.add("rbac_endpoints", claims=["/cve/rbac"])
+router_registry.add("sla_tracker_endpoints", claims=["/cve/sla"])
+router_registry.add("cve_reporting_endpoints", claims=["/cve/reporting"])
+router_registry.add("iac_endpoints", claims=["/cve/iac"])
+router_registry.add("ticketing_endpoints", claims=["/cve/ticketing"])
+router_registry.add("tenant_endpoints", claims=["/tenants"])
+router_registry.add("live_integrations_api", claims=["/integrations"])
+router_registry.add("uln_enhanced_endpoints", claims=["/uln-enhanced"])
+router_registry.add("uln_label_members_endpoints", claims=["/uln"])
+router_registry.add("uln_catalog_distribution_endpoints", claims=["/uln"])
+router_registry.add("uln_governance_disputes_endpoints", claims=["/uln"])
+router_registry.add("uln_notification_endpoints", claims=["/uln/notifications"])
+router_registry.add("dns_health_endpoints", claims=["/dns"])
+router_registry.add("cve_monitor_endpoints", claims=["/cve-monitor"])
+router_registry.add("gs1_business_identifiers_endpoints", claims=["/gs1-identifiers"])
+router_registry.add("aws_dns_health_endpoints", claims=["/aws-dns"])
+router_registry.add("revenue_tracking_endpoints", claims=["/revenue"])
@@ -4,7 +4,7 @@ from typing import Dict, Any
 from fastapi import APIRouter, HTTPException, Depends, Form
 from config.database import db
 from config.platforms import DISTRIBUTION_PLATFORMS
-from auth.service import get_current_user, get_current_admin_user
+from auth.service import get_current_user, get_current_admin_user, invalidate_principal, revoke_user_tokens
 from models.core import User, MediaContent, UserUpdate, ContentModerationAction
 from models.agency import NotificationRequest
 
@@ -138,6 +138,12 @@ async def update_user(
     if update_data:
         update_data["updated_at"] = datetime.utcnow()
         await db.users.update_one({"id": user_id}, {"$set": update_data})
+        # Deactivation and suspension take effect on tokens already issued; role changes
+        # are read from the user document, so dropping the cached copy is enough
+        if update_fields.get("is_active") is False or update_fields.get("account_status", "active") != "active":
+            await revoke_user_tokens(user_id)
+        else:
+            invalidate_principal(user_id)
     
     # Get updated user
     updated_user_doc = await db.users.find_one({"id": user_id}, {"password_hash": 0})
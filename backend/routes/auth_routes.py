@@ -11,6 +11,7 @@ from config.settings import settings
 from auth.service import (
     verify_password, get_password_hash, create_access_token,
     create_refresh_token, get_current_user, log_activity,
+    invalidate_principal, revoke_user_tokens, upgrade_password_hash,
 )
 from models.core import User, UserSession, UserCreate, UserLogin, Token, TokenRefresh, ForgotPasswordRequest, ResetPasswordRequest
 
@@ -67,7 +68,7 @@ async def register_user(user_data: UserCreate, request: Request):
         raise HTTPException(status_code=400, detail="Must be 18 or older to register")
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     
     # Create user
     user = User(
@@ -105,7 +106,7 @@ async def register_user(user_data: UserCreate, request: Request):
     # Create tokens
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role},
+        data={"sub": user.id, "email": user.email, "role": user.role, "tv": user.token_version},
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token()
@@ -157,6 +158,7 @@ async def login_user(login_data: UserLogin, request: Request):
             {"id": user.id},
             {"$set": {"failed_login_attempts": 0, "locked_until": None}}
         )
+        invalidate_principal(user.id)
         user.failed_login_attempts = 0
         user.locked_until = None
     
@@ -165,7 +167,7 @@ async def login_user(login_data: UserLogin, request: Request):
     if not password_hash:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    if not verify_password(login_data.password, password_hash):
+    if not await verify_password(login_data.password, password_hash):
         # Increment failed attempts
         failed_attempts = user.failed_login_attempts + 1
         locked_until = None
@@ -183,6 +185,7 @@ async def login_user(login_data: UserLogin, request: Request):
                 }
             }
         )
+        invalidate_principal(user.id)
         
         if locked_until:
             raise HTTPException(
@@ -199,6 +202,8 @@ async def login_user(login_data: UserLogin, request: Request):
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account is deactivated")
     
+    await upgrade_password_hash(user.id, login_data.password, password_hash)
+    
     # Reset failed attempts on successful login
     await db.users.update_one(
         {"id": user.id},
@@ -211,6 +216,7 @@ async def login_user(login_data: UserLogin, request: Request):
             }
         }
     )
+    invalidate_principal(user.id)
     
     # Log activity
     await log_activity(user.id, "login", "user", user.id, {"method": "password"}, request)
@@ -218,7 +224,7 @@ async def login_user(login_data: UserLogin, request: Request):
     # Create tokens
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role},
+        data={"sub": user.id, "email": user.email, "role": user.role, "tv": user.token_version},
         expires_delta=access_token_expires
     )
     refresh_token = create_refresh_token()
@@ -310,7 +316,7 @@ async def refresh_token(refresh_data: TokenRefresh, request: Request):
     # Create new tokens
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id, "email": user.email, "role": user.role},
+        data={"sub": user.id, "email": user.email, "role": user.role, "tv": user.token_version},
         expires_delta=access_token_expires
     )
     new_refresh_token = create_refresh_token()
@@ -341,11 +347,12 @@ async def refresh_token(refresh_data: TokenRefresh, request: Request):
 
 @router.post("/auth/logout")
 async def logout_user(current_user: User = Depends(get_current_user), request: Request = None):
-    # Deactivate all user sessions
+    # Deactivate all user sessions and the access tokens issued with them
     await db.user_sessions.update_many(
         {"user_id": current_user.id, "is_active": True},
         {"$set": {"is_active": False}}
     )
+    await revoke_user_tokens(current_user.id)
     
     # Log activity
     if request:
@@ -364,13 +371,15 @@ async def admin_unlock_account(request: Request, current_user: User = Depends(ge
     if not email:
         raise HTTPException(status_code=400, detail="Email is required")
     
-    result = await db.users.update_one(
+    unlocked = await db.users.find_one_and_update(
         {"email": email},
-        {"$set": {"failed_login_attempts": 0, "locked_until": None}}
+        {"$set": {"failed_login_attempts": 0, "locked_until": None}},
+        projection={"_id": 0, "id": 1}
     )
     
-    if result.matched_count == 0:
+    if unlocked is None:
         raise HTTPException(status_code=404, detail="User not found")
+    invalidate_principal(unlocked["id"])
     
     await log_activity(current_user.id, "admin_unlock_account", "user", None, {"unlocked_email": email}, request)
     return {"message": f"Account {email} has been unlocked successfully"}
@@ -422,6 +431,7 @@ async def forgot_password(request_data: ForgotPasswordRequest, request: Request)
             }
         }
     )
+    invalidate_principal(user.id)
     
     # Log activity
     await log_activity(user.id, "password_reset_requested", "user", user.id, {"email": user.email}, request)
@@ -473,7 +483,7 @@ async def reset_password(reset_data: ResetPasswordRequest, request: Request):
     user = User(**user_doc)
     
     # Hash new password
-    hashed_password = get_password_hash(reset_data.new_password)
+    hashed_password = await get_password_hash(reset_data.new_password)
     
     # Update password and clear reset token
     await db.users.update_one(
@@ -491,11 +501,12 @@ async def reset_password(reset_data: ResetPasswordRequest, request: Request):
         }
     )
     
-    # Deactivate all sessions
+    # Deactivate all sessions and revoke outstanding access tokens
     await db.user_sessions.update_many(
         {"user_id": user.id},
         {"$set": {"is_active": False}}
     )
+    await revoke_user_tokens(user.id)
     
     # Log activity
     await log_activity(user.id, "password_reset_completed", "user", user.id, {}, request)
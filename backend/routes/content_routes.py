@@ -15,6 +15,7 @@ from pathlib import Path
 from config.database import db
 from auth.service import get_current_user
 from routes.notification_routes import create_notification
+from content_search import user_content_search
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,6 +46,7 @@ def serialize_content(doc):
     if not doc:
         return None
     doc["id"] = str(doc.pop("_id"))
+    doc.pop("search_prefixes", None)
     for key in ["created_at", "updated_at"]:
         if key in doc and isinstance(doc[key], datetime):
             doc[key] = doc[key].isoformat()
@@ -105,6 +107,7 @@ async def upload_content(
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc),
     }
+    content_doc.update(user_content_search.search_fields(content_doc))
     result = await db.user_content.insert_one(content_doc)
     content_doc["_id"] = result.inserted_id
 
@@ -196,6 +199,8 @@ async def update_content(content_id: str, data: ContentUpdate, current_user=Depe
     if "visibility" in updates and updates["visibility"] not in ["public", "private", "subscribers"]:
         raise HTTPException(status_code=400, detail="Invalid visibility option")
     updates["updated_at"] = datetime.now(timezone.utc)
+    if user_content_search.touches_search_fields(updates):
+        updates.update(user_content_search.search_fields({**doc, **updates}))
 
     await db.user_content.update_one({"_id": ObjectId(content_id)}, {"$set": updates})
     updated = await db.user_content.find_one({"_id": ObjectId(content_id)})
@@ -232,24 +237,26 @@ async def delete_content(content_id: str, current_user=Depends(get_current_user)
 async def browse_public_content(
     content_type: Optional[str] = None,
     search: Optional[str] = None,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 20,
 ):
-    query = {"visibility": "public"}
+    """Public content, newest first or ranked by relevance to ``search``; page with ``next_cursor``"""
+    filters = {"visibility": "public"}
     if content_type and content_type in ALLOWED_TYPES:
-        query["content_type"] = content_type
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"tags": {"$in": [search]}},
-        ]
-
-    cursor = db.user_content.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    items = []
-    async for doc in cursor:
-        items.append(serialize_content(doc))
-    total = await db.user_content.count_documents(query)
-    return {"items": items, "total": total}
+        filters["content_type"] = content_type
+    try:
+        result = await user_content_search.search(db, search or "", filters, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["items"] = [serialize_content(doc) for doc in result["items"]]
+    return result
+
+
+@router.get("/public/suggest")
+async def suggest_public_content(q: str, limit: int = 10):
+    """Autocomplete: public content titles with words starting with each typed word"""
+    suggestions = await user_content_search.suggest(db, q, {"visibility": "public"}, limit=limit)
+    return {"suggestions": [serialize_content(doc) for doc in suggestions], "query": q}
 
 
 # ── Comments ──────────────────────────────────────────────────
@@ -21,6 +21,7 @@ from services.delivery_engine import (
     process_delivery_batch,
     retry_failed_delivery,
     get_batch_progress,
+    delivery_queue,
 )
 from services.platform_adapters import get_supported_platform_ids, get_app_base_url
 
@@ -334,6 +335,12 @@ async def retry_delivery(
     return {"message": "Retry initiated", "delivery_id": delivery_id}
 
 
+@router.get("/delivery-queue/stats")
+async def get_delivery_queue_stats(current_user: User = Depends(get_current_user)):
+    """Job counts by state (including dead-lettered) and in-flight jobs per platform."""
+    return await delivery_queue.stats()
+
+
 @router.get("/adapters")
 async def get_live_adapters():
     """Get list of platform IDs that have real delivery adapters."""
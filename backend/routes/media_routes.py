@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
 from config.database import db
 from auth.service import get_current_user
 from models.core import User, MediaContent
+from content_search import media_search
 
 router = APIRouter(tags=["Media"])
 
@@ -74,7 +75,7 @@ async def upload_media(
     )
     
     # Store in database
-    await db.media_content.insert_one(media.dict())
+    await db.media_content.insert_one({**media.dict(), **media_search.search_fields(media.dict())})
     
     return {
         "media_id": media.id,
@@ -284,6 +285,8 @@ async def update_media(
     if tags is not None:
         tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
         update_data["tags"] = tag_list
+    if media_search.touches_search_fields(update_data):
+        update_data.update(media_search.search_fields({**media, **update_data}))
     
     # Update in database
     await db.media_content.update_one({"id": media_id}, {"$set": update_data})
@@ -357,77 +360,67 @@ async def update_media_metadata(
         "metadata": metadata
     }
 
+def _media_search_filters(current_user: User, content_type: Optional[str] = None,
+                          category: Optional[str] = None, tags: Optional[str] = None) -> Dict[str, Any]:
+    """The user's own media or public approved media, narrowed by the optional filters"""
+    filters: Dict[str, Any] = {
+        "$or": [
+            {"owner_id": current_user.id},
+            {"is_published": True, "is_approved": True}
+        ]
+    }
+    if content_type:
+        filters["content_type"] = content_type
+    if category:
+        filters["category"] = category
+    if tags:
+        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        filters["tags"] = {"$in": tag_list}
+    return filters
+
 @router.get("/media/search")
 async def search_media(
     q: str,  # search query
     content_type: Optional[str] = None,
     category: Optional[str] = None,
     tags: Optional[str] = None,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 20,
     current_user: User = Depends(get_current_user)
 ):
-    """Search media content"""
-    # Build search query
-    search_conditions = []
-    
-    # Text search on title and description
-    if q:
-        search_conditions.append({
-            "$or": [
-                {"title": {"$regex": q, "$options": "i"}},
-                {"description": {"$regex": q, "$options": "i"}}
-            ]
-        })
-    
-    # Filter by content type
-    if content_type:
-        search_conditions.append({"content_type": content_type})
-    
-    # Filter by category
-    if category:
-        search_conditions.append({"category": category})
-    
-    # Filter by tags
-    if tags:
-        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-        search_conditions.append({"tags": {"$in": tag_list}})
-    
-    # Only show user's own media or public approved media
-    visibility_condition = {
-        "$or": [
-            {"owner_id": current_user.id},
-            {"is_published": True, "is_approved": True}
-        ]
-    }
-    search_conditions.append(visibility_condition)
-    
-    # Combine all conditions
-    query = {"$and": search_conditions} if search_conditions else {}
-    
-    # Execute search
-    cursor = db.media_content.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    media_items = []
-    
-    async for item in cursor:
-        media_items.append(MediaContent(**item))
-    
-    # Get total count
-    total_count = await db.media_content.count_documents(query)
+    """Search media content, ranked by relevance; page with ``next_cursor``"""
+    try:
+        result = await media_search.search(
+            db, q, _media_search_filters(current_user, content_type, category, tags),
+            cursor=cursor, limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "media_items": media_items,
-        "total_count": total_count,
+        "media_items": [{**MediaContent(**item).dict(), "score": item.get("score")} for item in result["items"]],
+        "total_count": result.get("total"),
+        "total_exact": result.get("total_exact"),
+        "facets": result.get("facets"),
+        "next_cursor": result["next_cursor"],
         "search_query": q,
         "filters": {
             "content_type": content_type,
             "category": category,
             "tags": tags
-        },
-        "page": skip // limit + 1,
-        "pages": (total_count + limit - 1) // limit
+        }
     }
 
+@router.get("/media/search/suggest")
+async def suggest_media(
+    q: str,
+    limit: int = 10,
+    current_user: User = Depends(get_current_user)
+):
+    """Autocomplete: media titles with words starting with each typed word"""
+    suggestions = await media_search.suggest(db, q, _media_search_filters(current_user), limit=limit)
+    return {"suggestions": suggestions, "query": q}
+
 def validate_media_metadata(metadata: dict) -> dict:
     """Validate media metadata and return errors"""
     errors = {}
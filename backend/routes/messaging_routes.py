@@ -9,6 +9,7 @@ from bson import ObjectId
 from config.database import db
 from auth.service import get_current_user
 from routes.notification_routes import create_notification
+from keyset_pagination import InvalidCursor, paginate
 
 router = APIRouter(prefix="/messages", tags=["Direct Messaging"])
 
@@ -116,15 +117,24 @@ async def send_message(data: SendMessage, current_user=Depends(get_current_user)
 
 
 @router.get("/conversations")
-async def list_conversations(current_user=Depends(get_current_user)):
+async def list_conversations(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    current_user=Depends(get_current_user),
+):
+    """Conversations, most recently active first; page with ``next_cursor``"""
     user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
 
-    cursor = db.conversations.find(
-        {"participants.user_id": user_id}
-    ).sort("last_message_at", -1)
+    try:
+        page = await paginate(
+            db.conversations, {"participants.user_id": user_id},
+            sort=[("last_message_at", -1), ("_id", -1)], cursor=cursor, limit=limit,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     conversations = []
-    async for doc in cursor:
+    for doc in page["items"]:
         serialized = serialize_doc(doc)
         # Add unread count for current user
         unread = doc.get("unread_count", {})
@@ -136,16 +146,17 @@ async def list_conversations(current_user=Depends(get_current_user)):
                 break
         conversations.append(serialized)
 
-    return {"conversations": conversations}
+    return {"conversations": conversations, "next_cursor": page["next_cursor"]}
 
 
 @router.get("/conversation/{other_user_id}")
 async def get_conversation_messages(
     other_user_id: str,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 50,
     current_user=Depends(get_current_user),
 ):
+    """The latest messages, oldest first; ``next_cursor`` fetches the page before them"""
     user_id = current_user.get("id") if isinstance(current_user, dict) else current_user.id
     conv_key = _conversation_key(user_id, other_user_id)
 
@@ -155,14 +166,21 @@ async def get_conversation_messages(
 
     conv_id = str(conv["_id"])
 
-    cursor = db.messages.find({"conversation_id": conv_id}).sort("created_at", 1).skip(skip).limit(limit)
-    messages = []
-    async for doc in cursor:
-        messages.append(serialize_doc(doc))
-
-    total = await db.messages.count_documents({"conversation_id": conv_id})
-
-    return {"messages": messages, "conversation": serialize_doc(conv) if conv.get("_id") else conv, "total": total}
+    try:
+        page = await paginate(
+            db.messages, {"conversation_id": conv_id},
+            sort=[("created_at", -1), ("_id", -1)], cursor=cursor, limit=limit, count="estimate",
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    messages = [serialize_doc(doc) for doc in reversed(page["items"])]
+
+    return {
+        "messages": messages,
+        "conversation": serialize_doc(conv) if conv.get("_id") else conv,
+        "total": page.get("total"),
+        "next_cursor": page["next_cursor"],
+    }
 
 
 @router.put("/read/{other_user_id}")
@@ -8,7 +8,7 @@ from datetime import datetime, timezone
 from bson import ObjectId
 from config.database import db
 from auth.service import get_current_user
-import json
+from ws_fanout import ws_bus
 import logging
 import asyncio
 
@@ -19,14 +19,20 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 # ── WebSocket connection manager ──────────────────────────────
 class NotificationWSManager:
+    """Per-user notification sockets; pushes go through the WebSocket bus to every worker"""
+
     def __init__(self):
+        # This worker's connections
         self._connections: dict[str, list[WebSocket]] = {}
 
     async def connect(self, ws: WebSocket, user_id: str):
         await ws.accept()
         self._connections.setdefault(user_id, []).append(ws)
+        await ws_bus.attach(ws, [f"notifications:user:{user_id}"], tag=user_id,
+                            on_drop=lambda: self.disconnect(ws, user_id))
 
     def disconnect(self, ws: WebSocket, user_id: str):
+        ws_bus.detach(ws)
         conns = self._connections.get(user_id, [])
         if ws in conns:
             conns.remove(ws)
@@ -34,11 +40,7 @@ class NotificationWSManager:
             self._connections.pop(user_id, None)
 
     async def push(self, user_id: str, payload: dict):
-        for ws in self._connections.get(user_id, []):
-            try:
-                await ws.send_text(json.dumps(payload))
-            except Exception:
-                pass
+        await ws_bus.publish(f"notifications:user:{user_id}", payload)
 
 
 ws_manager = NotificationWSManager()
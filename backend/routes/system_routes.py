@@ -4,14 +4,19 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, Any
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import PlainTextResponse
 from config.database import db
 from config.platforms import DISTRIBUTION_PLATFORMS
 from config.settings import settings
-from auth.service import get_current_user
+from config.mongo_pool import get_pool_stats
+from auth.service import get_current_user, password_hasher
 from models.core import User
 from cache_service import cache
 from performance_monitor import perf_monitor
+from ws_fanout import ws_bus
+from router_setup import router_registry
 from db_optimizer import DatabaseOptimizer
+from blocking_io import get_blocking_io_stats
 
 router = APIRouter(tags=["System"])
 
@@ -121,18 +126,50 @@ async def api_health():
         }
 
 @router.get("/performance/stats")
-async def get_performance_stats():
-    """Get comprehensive performance statistics"""
+async def get_performance_stats(scope: str = "worker"):
+    """Get comprehensive performance statistics (scope=cluster merges every worker's histograms)"""
     try:
+        if scope == "cluster":
+            performance = await perf_monitor.get_cluster_stats(db.performance_snapshots)
+        else:
+            performance = perf_monitor.get_all_stats()
         return {
             "status": "success",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "performance": perf_monitor.get_all_stats(),
-            "cache": cache.get_stats()
+            "scope": scope,
+            "performance": performance,
+            "cache": cache.get_stats(),
+            "blocking_io": get_blocking_io_stats(),
+            "password_hashing": password_hasher.stats(),
+            "websocket_bus": ws_bus.stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request latency histograms and resource gauges in Prometheus text format"""
+    return PlainTextResponse(perf_monitor.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@router.get("/performance/routers")
+async def get_router_loading_report():
+    """Router modules loaded so far and how long each took to import"""
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "routers": router_registry.report()
+    }
+
+@router.get("/performance/startup")
+async def get_startup_report():
+    """Per-service startup initialization timing"""
+    from startup import startup_orchestrator
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "startup": startup_orchestrator.report()
+    }
+
 @router.get("/performance/cache")
 async def get_cache_stats():
     """Get cache statistics"""
@@ -152,6 +189,15 @@ async def clear_cache():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+@router.get("/database/pool")
+async def get_database_pool_stats():
+    """Get shared MongoDB connection pool statistics"""
+    return {
+        "status": "success",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "pool": get_pool_stats()
+    }
+
 @router.get("/database/stats")
 async def get_database_stats():
     """Get database collection statistics"""
@@ -12,7 +12,7 @@ for _subdir in ['api', 'services', 'models', 'utils']:
     if _p not in sys.path:
         sys.path.insert(0, _p)
 
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
@@ -237,74 +237,11 @@ app.on_event("shutdown")(shutdown_event)
 # ============================================================
 # Router Setup
 # ============================================================
-api_router = APIRouter(prefix="/api")
-
-# Core route modules (routes/)
-from routes.licensing_routes import router as licensing_router
-from routes.agency_routes import agency_router
-from routes.admin_routes import router as admin_router
-from routes.auth_routes import router as auth_router
-from routes.dao_routes import router as dao_router
-from routes.health_routes import router as health_router
-from routes.business_routes import router as business_router
-from routes.media_routes import router as media_router
-from routes.aws_routes import router as aws_router
-from routes.domain_routes import router as domain_router
-from routes.distribution_routes import router as distribution_router
-from routes.system_routes import router as system_router
-from routes.creator_profile_routes import router as creator_profile_router
-from routes.watermark_routes import router as watermark_router
-from routes.subscription_routes import router as subscription_router
-from routes.content_routes import router as content_router
-from routes.messaging_routes import router as messaging_router
-from routes.analytics_routes import router as analytics_router
-from routes.notification_routes import router as notification_router
-from routes.websocket_routes import router as websocket_router
-from routes.webhook_routes import router as webhook_router
-from routes.social_connections_routes import router as social_connections_router
-from moderation_endpoints import router as moderation_router
-from routes.distribution_hub_routes import router as distribution_hub_router
-from routes.aws_media_processing_routes import router as aws_media_processing_router
-from routes.aws_live_streaming_routes import router as aws_live_streaming_router
-from routes.aws_workmail_pinpoint_routes import router as aws_workmail_pinpoint_router
-from routes.aws_waf_secrets_routes import router as aws_waf_secrets_router
-from routes.aws_ai_analytics_routes import router as aws_ai_analytics_router
-from routes.aws_data_analytics_routes import router as aws_data_analytics_router
-from routes.aws_blockchain_routes import router as aws_blockchain_router
-from routes.aws_ai_content_routes import router as aws_ai_content_router
-from routes.aws_messaging_routes import router as aws_messaging_router
-from routes.aws_infrastructure_routes import router as aws_infrastructure_router
-from routes.key_management_routes import router as key_management_router
-
-core_routers = [
-    licensing_router, agency_router, admin_router, auth_router,
-    dao_router, health_router, business_router, media_router,
-    aws_router, domain_router, distribution_router, system_router,
-    creator_profile_router, watermark_router, subscription_router,
-    content_router, messaging_router, analytics_router,
-    notification_router, websocket_router, webhook_router,
-    social_connections_router, moderation_router, distribution_hub_router,
-    aws_media_processing_router,
-    aws_live_streaming_router,
-    aws_workmail_pinpoint_router,
-    aws_waf_secrets_router,
-    aws_ai_analytics_router,
-    aws_data_analytics_router,
-    aws_blockchain_router,
-    aws_ai_content_router,
-    aws_messaging_router,
-    aws_infrastructure_router,
-    key_management_router,
-]
-
-for r in core_routers:
-    api_router.include_router(r)
-
-# External endpoint modules (router_setup.py)
-from router_setup import api_router as sub_routers
+# Routers are registered with their URL prefixes and imported on first use
+# (router_setup.py / router_registry.py); ROUTER_LOADING=eager imports them all now
+from router_setup import router_registry
 
-app.include_router(api_router)
-app.include_router(sub_routers)
+router_registry.install(app)
 
 # ============================================================
 # CORS
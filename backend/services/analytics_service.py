@@ -11,7 +11,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
+from async_init import schedule_init
 import statistics
 from collections import defaultdict
 
@@ -35,6 +36,15 @@ class Timeframe(str, Enum):
     QUARTER = "quarter"
     YEAR = "year"
 
+# Metrics kept as top-level total_* counters on content performance documents
+PERFORMANCE_TOTAL_METRICS = ("views", "streams", "downloads", "shares", "likes", "comments", "revenue")
+# Event field -> content performance breakdown it is bucketed into
+BREAKDOWN_FIELDS = {"country": "country_breakdown", "age_group": "age_group_breakdown", "gender": "gender_breakdown"}
+# Daily buckets older than this are folded into monthly_metrics
+DAILY_METRICS_RETENTION_DAYS = int(os.environ.get("ANALYTICS_DAILY_RETENTION_DAYS", "90"))
+PERFORMANCE_MAINTENANCE_INTERVAL_SECONDS = 3600
+PERFORMANCE_REBUILD_BATCH = 200
+
 class AnalyticsEvent(BaseModel):
     event_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
@@ -84,6 +94,7 @@ class ContentPerformance(BaseModel):
     daily_metrics: Dict[str, Dict[str, float]] = {}
     weekly_trends: Dict[str, float] = {}
     monthly_totals: Dict[str, float] = {}
+    monthly_metrics: Dict[str, Dict[str, float]] = {}
     
     # Geographic performance
     country_breakdown: Dict[str, Dict[str, float]] = {}
@@ -181,7 +192,7 @@ class PlatformAnalytics(BaseModel):
 
 class AnalyticsService:
     def __init__(self):
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         
         # Collections
@@ -191,27 +202,29 @@ class AnalyticsService:
         self.platform_analytics_collection = self.db['platform_analytics']
         
         # Create indexes for better performance
-        self._create_indexes()
+        schedule_init("Analytics indexes", self._create_indexes)
         
         # Industry benchmarks for comparison
         self.industry_benchmarks = self._initialize_benchmarks()
     
-    def _create_indexes(self):
+    async def _create_indexes(self):
         """Create database indexes for optimal query performance"""
         try:
             # Analytics events indexes
-            self.events_collection.create_index([("user_id", 1), ("timestamp", -1)])
-            self.events_collection.create_index([("content_id", 1), ("timestamp", -1)])
-            self.events_collection.create_index([("platform", 1), ("timestamp", -1)])
-            self.events_collection.create_index([("metric_type", 1), ("timestamp", -1)])
+            await self.events_collection.create_index([("user_id", 1), ("timestamp", -1)])
+            await self.events_collection.create_index([("content_id", 1), ("timestamp", -1)])
+            await self.events_collection.create_index([("platform", 1), ("timestamp", -1)])
+            await self.events_collection.create_index([("metric_type", 1), ("timestamp", -1)])
             
             # Performance collection indexes
-            self.performance_collection.create_index([("user_id", 1), ("last_updated", -1)])
-            self.performance_collection.create_index([("content_id", 1)])
+            await self.performance_collection.create_index([("user_id", 1), ("last_updated", -1)])
+            await self.performance_collection.create_index([("content_id", 1)])
+            await self.performance_collection.create_index([("content_id", 1), ("user_id", 1)])
+            await self.performance_collection.create_index([("daily_since", 1)], sparse=True)
             
             # ROI collection indexes
-            self.roi_collection.create_index([("user_id", 1), ("updated_at", -1)])
-            self.roi_collection.create_index([("content_id", 1)])
+            await self.roi_collection.create_index([("user_id", 1), ("updated_at", -1)])
+            await self.roi_collection.create_index([("content_id", 1)])
             
             print("✅ Analytics database indexes created successfully")
         except Exception as e:
@@ -273,10 +286,10 @@ class AnalyticsService:
         event_dict = event.dict()
         event_dict["timestamp"] = event.timestamp.isoformat()
         
-        self.events_collection.insert_one(event_dict)
+        await self.events_collection.insert_one(event_dict)
         
         # Update content performance asynchronously
-        asyncio.create_task(self._update_content_performance(content_id, user_id))
+        asyncio.create_task(self._update_content_performance([event_dict]))
         
         return event
     
@@ -315,123 +328,241 @@ class AnalyticsService:
         
         # Batch insert
         if event_dicts:
-            self.events_collection.insert_many(event_dicts)
+            await self.events_collection.insert_many(event_dicts)
         
-        # Update content performance for unique content IDs
-        unique_content_user_pairs = set((e["content_id"], e["user_id"]) for e in events)
-        for content_id, user_id in unique_content_user_pairs:
-            asyncio.create_task(self._update_content_performance(content_id, user_id))
+        # Update content performance, one write per content ID
+        if event_dicts:
+            asyncio.create_task(self._update_content_performance(event_dicts))
         
         return analytics_events
     
-    async def _update_content_performance(self, content_id: str, user_id: str):
-        """Update content performance metrics based on recent events"""
-        
+    @staticmethod
+    def _bucket_key(value: Any) -> str:
+        """Breakdown keys come from event data, so keep them usable as field path segments"""
+        return str(value).replace(".", "_").replace("$", "_")
+
+    def _performance_increments(self, events: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Fold events into per-content $inc documents over the pre-bucketed counters"""
+        increments: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for event in events:
+            key = (event["content_id"], event["user_id"])
+            bucket = increments.setdefault(key, {"inc": defaultdict(float), "first_day": None})
+            inc = bucket["inc"]
+            metric_type = getattr(event["metric_type"], "value", event["metric_type"])
+            value = event["value"]
+            date_str = str(event["timestamp"])[:10]
+
+            if metric_type in PERFORMANCE_TOTAL_METRICS:
+                inc[f"total_{metric_type}"] += value
+            inc[f"platform_metrics.{self._bucket_key(event['platform'])}.{metric_type}"] += value
+            inc[f"daily_metrics.{date_str}.{metric_type}"] += value
+            for field, breakdown in BREAKDOWN_FIELDS.items():
+                if event.get(field):
+                    inc[f"{breakdown}.{self._bucket_key(event[field])}.{metric_type}"] += value
+            if bucket["first_day"] is None or date_str < bucket["first_day"]:
+                bucket["first_day"] = date_str
+        return increments
+
+    def _derived_metrics(self, totals: Dict[str, Any], content_type: str) -> Dict[str, Any]:
+        total_views = totals.get("total_views", 0)
+        total_engagement = totals.get("total_likes", 0) + totals.get("total_shares", 0) + totals.get("total_comments", 0)
+        engagement_rate = (total_engagement / total_views) * 100 if total_views > 0 else 0.0
+        derived = {"engagement_rate": round(engagement_rate, 2)}
+        if content_type in self.industry_benchmarks:
+            benchmark_engagement = self.industry_benchmarks[content_type]["engagement_rate"]
+            if benchmark_engagement > 0:
+                derived["industry_percentile"] = min(100, (engagement_rate / benchmark_engagement) * 50)
+        return derived
+
+    def _derived_metrics_expressions(self) -> Dict[str, Any]:
+        """_derived_metrics as aggregation expressions over the document's updated totals"""
+        views = {"$ifNull": ["$total_views", 0]}
+        engagement = {"$add": [{"$ifNull": [f"$total_{m}", 0]} for m in ("likes", "shares", "comments")]}
+        rate = {"$cond": [{"$gt": [views, 0]}, {"$multiply": [{"$divide": [engagement, views]}, 100]}, 0.0]}
+        percentile_branches = [
+            {"case": {"$eq": ["$content_type", content_type]},
+             "then": {"$min": [100, {"$multiply": [{"$divide": [rate, benchmarks["engagement_rate"]]}, 50]}]}}
+            for content_type, benchmarks in self.industry_benchmarks.items()
+            if benchmarks["engagement_rate"] > 0
+        ]
+        return {
+            "engagement_rate": {"$round": [rate, 2]},
+            "industry_percentile": {"$switch": {"branches": percentile_branches, "default": "$industry_percentile"}},
+        }
+
+    def _performance_update(self, content_id: str, bucket: Dict[str, Any], now: str) -> List[Dict[str, Any]]:
+        """
+        Pipeline update applying one content's increments and refreshing its derived
+        ratios in the same write, so concurrent events never leave the ratios stale.
+        """
+        is_new = {"$eq": [{"$type": "$last_updated"}, "missing"]}
+        on_insert = {
+            "content_title": f"Content {content_id}",  # Would be fetched from content metadata
+            "content_type": "music",  # Would be determined from content data
+            "analysis_date": now,
+            "incremental": True,
+        }
+        counters = {path: {"$add": [{"$ifNull": [f"${path}", 0]}, value]} for path, value in bucket["inc"].items()}
+        counters["counter_version"] = {"$add": [{"$ifNull": ["$counter_version", 0]}, 1]}
+        counters["daily_since"] = {"$min": ["$daily_since", bucket["first_day"]]}
+        counters.update({field: {"$cond": [is_new, {"$literal": value}, f"${field}"]} for field, value in on_insert.items()})
+        counters["last_updated"] = now
+        return [{"$set": counters}, {"$set": self._derived_metrics_expressions()}]
+
+    async def _update_content_performance(self, events: List[Dict[str, Any]]):
+        """
+        Apply newly tracked events to their content performance documents.
+        Cost depends only on the events passed in, never on the content's history.
+        """
         try:
-            # Get all events for this content
-            events_cursor = self.events_collection.find({
-                "content_id": content_id,
-                "user_id": user_id
-            })
-            
-            events = list(events_cursor)
-            if not events:
-                return
-            
-            # Calculate metrics
-            metrics = defaultdict(float)
-            platform_metrics = defaultdict(lambda: defaultdict(float))
-            daily_metrics = defaultdict(lambda: defaultdict(float))
-            country_breakdown = defaultdict(lambda: defaultdict(float))
-            age_breakdown = defaultdict(lambda: defaultdict(float))
-            gender_breakdown = defaultdict(lambda: defaultdict(float))
-            
-            for event in events:
-                metric_type = event["metric_type"]
-                value = event["value"]
-                platform = event["platform"]
-                timestamp = datetime.fromisoformat(event["timestamp"])
-                date_str = timestamp.date().isoformat()
-                
-                # Aggregate totals
-                metrics[f"total_{metric_type}"] += value
-                
-                # Platform breakdown
-                platform_metrics[platform][metric_type] += value
-                
-                # Daily breakdown
-                daily_metrics[date_str][metric_type] += value
-                
-                # Geographic breakdown
-                if event.get("country"):
-                    country_breakdown[event["country"]][metric_type] += value
-                
-                # Demographic breakdown
-                if event.get("age_group"):
-                    age_breakdown[event["age_group"]][metric_type] += value
-                
-                if event.get("gender"):
-                    gender_breakdown[event["gender"]][metric_type] += value
-            
-            # Calculate derived metrics
-            total_views = metrics.get("total_views", 0)
-            total_streams = metrics.get("total_streams", 0)
-            total_engagement = metrics.get("total_likes", 0) + metrics.get("total_shares", 0) + metrics.get("total_comments", 0)
-            
-            engagement_rate = 0.0
-            if total_views > 0:
-                engagement_rate = (total_engagement / total_views) * 100
-            
-            # Create or update performance record
-            performance = ContentPerformance(
-                content_id=content_id,
-                user_id=user_id,
-                content_title=f"Content {content_id}",  # Would be fetched from content metadata
-                content_type="music",  # Would be determined from content data
-                total_views=int(metrics.get("total_views", 0)),
-                total_streams=int(metrics.get("total_streams", 0)),
-                total_downloads=int(metrics.get("total_downloads", 0)),
-                total_shares=int(metrics.get("total_shares", 0)),
-                total_likes=int(metrics.get("total_likes", 0)),
-                total_comments=int(metrics.get("total_comments", 0)),
-                total_revenue=metrics.get("total_revenue", 0.0),
-                engagement_rate=round(engagement_rate, 2),
-                platform_metrics=dict(platform_metrics),
-                daily_metrics=dict(daily_metrics),
-                country_breakdown=dict(country_breakdown),
-                age_group_breakdown=dict(age_breakdown),
-                gender_breakdown=dict(gender_breakdown)
-            )
-            
-            # Calculate industry percentile
-            content_type = performance.content_type
-            if content_type in self.industry_benchmarks:
-                benchmark_engagement = self.industry_benchmarks[content_type]["engagement_rate"]
-                if benchmark_engagement > 0:
-                    performance.industry_percentile = min(100, (engagement_rate / benchmark_engagement) * 50)
-            
-            # Store performance data
-            performance_dict = performance.dict()
-            performance_dict["last_updated"] = performance.last_updated.isoformat()
-            performance_dict["analysis_date"] = performance.analysis_date.isoformat()
-            
-            if performance.first_published:
-                performance_dict["first_published"] = performance.first_published.isoformat()
-            
-            self.performance_collection.update_one(
-                {"content_id": content_id, "user_id": user_id},
-                {"$set": performance_dict},
-                upsert=True
-            )
-            
+            for (content_id, user_id), bucket in self._performance_increments(events).items():
+                await self.performance_collection.update_one(
+                    {"content_id": content_id, "user_id": user_id},
+                    self._performance_update(content_id, bucket, datetime.now(timezone.utc).isoformat()),
+                    upsert=True,
+                )
         except Exception as e:
             print(f"Error updating content performance: {e}")
-    
+
+    async def rebuild_content_performance(self, content_id: str, user_id: str) -> bool:
+        """
+        Recompute a content performance document from its events on the server.
+        The result is discarded if events were applied while it was being computed;
+        returns whether it was written.
+        """
+        current = await self.performance_collection.find_one(
+            {"content_id": content_id, "user_id": user_id}, {"_id": 0, "counter_version": 1, "content_type": 1}
+        )
+        if current is None:
+            return False
+        day = {"$substrBytes": ["$timestamp", 0, 10]}
+        facets = {"totals": [{"$group": {"_id": {"metric": "$metric_type"}, "value": {"$sum": "$value"}}}]}
+        dimensions = {"platform_metrics": "$platform", "daily_metrics": day,
+                      **{breakdown: f"${field}" for field, breakdown in BREAKDOWN_FIELDS.items()}}
+        for breakdown, key in dimensions.items():
+            facets[breakdown] = [
+                {"$match": {key[1:]: {"$nin": [None, ""]}}} if isinstance(key, str) else {"$match": {}},
+                {"$group": {"_id": {"key": key, "metric": "$metric_type"}, "value": {"$sum": "$value"}}},
+            ]
+        rows = await self.events_collection.aggregate([
+            {"$match": {"content_id": content_id, "user_id": user_id}},
+            {"$facet": facets},
+        ]).to_list(length=1)
+        result = rows[0] if rows else {}
+        if not result.get("totals"):
+            return False
+
+        totals = {f"total_{m}": 0 for m in PERFORMANCE_TOTAL_METRICS}
+        for row in result["totals"]:
+            if row["_id"]["metric"] in PERFORMANCE_TOTAL_METRICS:
+                totals[f"total_{row['_id']['metric']}"] = row["value"]
+        breakdowns: Dict[str, Dict[str, Dict[str, float]]] = {name: defaultdict(dict) for name in dimensions}
+        for name in dimensions:
+            for row in result.get(name, []):
+                breakdowns[name][self._bucket_key(row["_id"]["key"])][row["_id"]["metric"]] = row["value"]
+
+        daily, monthly = self._split_daily_buckets(breakdowns.pop("daily_metrics"), self._daily_cutoff())
+        content_type = current.get("content_type", "music")
+        doc = {
+            **totals,
+            **{name: dict(values) for name, values in breakdowns.items()},
+            **self._derived_metrics(totals, content_type),
+            "daily_metrics": daily,
+            "monthly_metrics": monthly,
+            "counter_version": current.get("counter_version", 0),
+            "incremental": True,
+            "last_updated": datetime.now(timezone.utc).isoformat(),
+            "rebuilt_at": datetime.now(timezone.utc).isoformat(),
+        }
+        update = {"$set": doc}
+        if daily:
+            doc["daily_since"] = min(daily)
+        else:
+            update["$unset"] = {"daily_since": ""}
+        written = await self.performance_collection.update_one(
+            {"content_id": content_id, "user_id": user_id,
+             "counter_version": current.get("counter_version", {"$exists": False})},
+            update,
+        )
+        return written.matched_count == 1
+
+    @staticmethod
+    def _daily_cutoff() -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=DAILY_METRICS_RETENTION_DAYS)).date().isoformat()
+
+    @staticmethod
+    def _split_daily_buckets(daily: Dict[str, Dict[str, float]], cutoff: str):
+        """Split daily buckets into those kept and month totals for days before ``cutoff``"""
+        kept, monthly = {}, defaultdict(lambda: defaultdict(float))
+        for date_str, metrics in daily.items():
+            if date_str >= cutoff:
+                kept[date_str] = dict(metrics)
+                continue
+            for metric_type, value in metrics.items():
+                monthly[date_str[:7]][metric_type] += value
+        return kept, {month: dict(metrics) for month, metrics in monthly.items()}
+
+    async def compact_content_performance(self, perf: Dict[str, Any], cutoff: str) -> bool:
+        """
+        Fold daily buckets older than the retention window into monthly_metrics.
+        Skipped (returns False) if an event landed since ``perf`` was read.
+        """
+        expired = {d: m for d, m in (perf.get("daily_metrics") or {}).items() if d < cutoff}
+        if not expired:
+            return False
+        _, monthly = self._split_daily_buckets(expired, cutoff)
+        remaining = [d for d in perf.get("daily_metrics", {}) if d >= cutoff]
+        # The version guard keeps a concurrent increment from being dropped with its bucket
+        update = {
+            "$inc": {f"monthly_metrics.{month}.{metric}": value
+                     for month, metrics in monthly.items() for metric, value in metrics.items()},
+            "$unset": {f"daily_metrics.{date_str}": "" for date_str in expired},
+        }
+        # daily_since is maintained with $min, so it is removed rather than nulled
+        if remaining:
+            update["$set"] = {"daily_since": min(remaining)}
+        else:
+            update["$unset"]["daily_since"] = ""
+        result = await self.performance_collection.update_one(
+            {"_id": perf["_id"], "counter_version": perf.get("counter_version")}, update
+        )
+        return result.matched_count == 1
+
+    async def run_performance_maintenance(self) -> Dict[str, int]:
+        """Rebuild documents written before incremental counters existed and compact old daily buckets"""
+        rebuilt = compacted = 0
+        async for perf in self.performance_collection.find(
+            {"incremental": {"$ne": True}}, {"_id": 0, "content_id": 1, "user_id": 1}
+        ).limit(PERFORMANCE_REBUILD_BATCH):
+            if await self.rebuild_content_performance(perf["content_id"], perf["user_id"]):
+                rebuilt += 1
+        cutoff = self._daily_cutoff()
+        async for perf in self.performance_collection.find(
+            {"daily_since": {"$lt": cutoff}}, {"_id": 1, "daily_metrics": 1, "counter_version": 1}
+        ):
+            if await self.compact_content_performance(perf, cutoff):
+                compacted += 1
+        return {"rebuilt": rebuilt, "compacted": compacted}
+
+    async def _performance_maintenance_loop(self):
+        while True:
+            await asyncio.sleep(PERFORMANCE_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                summary = await self.run_performance_maintenance()
+                if any(summary.values()):
+                    print(f"Content performance maintenance: {summary}")
+            except Exception as e:
+                print(f"Error in content performance maintenance: {e}")
+
+    def start_performance_maintenance(self):
+        """Launch the periodic rebuild and compaction of content performance counters"""
+        asyncio.get_event_loop().create_task(self._performance_maintenance_loop())
+
     async def get_content_performance(self, content_id: str, user_id: str) -> Optional[ContentPerformance]:
         """Get performance metrics for specific content"""
         
         try:
-            perf_data = self.performance_collection.find_one({
+            perf_data = await self.performance_collection.find_one({
                 "content_id": content_id,
                 "user_id": user_id
             })
@@ -457,7 +588,7 @@ class AnalyticsService:
                          .skip(offset).limit(limit)
             
             performances = []
-            for perf_data in cursor:
+            async for perf_data in cursor:
                 try:
                     perf_data['_id'] = str(perf_data['_id'])
                     performances.append(ContentPerformance(**perf_data))
@@ -535,7 +666,7 @@ class AnalyticsService:
         if roi_analysis.break_even_point:
             roi_dict["break_even_point"] = roi_analysis.break_even_point.isoformat()
         
-        self.roi_collection.update_one(
+        await self.roi_collection.update_one(
             {"content_id": content_id, "user_id": user_id},
             {"$set": roi_dict},
             upsert=True
@@ -554,7 +685,7 @@ class AnalyticsService:
             ]
             
             cursor = self.performance_collection.aggregate(pipeline)
-            content_performances = list(cursor)
+            content_performances = await cursor.to_list(length=None)
             
             platform_analytics = PlatformAnalytics(
                 platform_id=platform,
@@ -608,7 +739,7 @@ class AnalyticsService:
             analytics_dict = platform_analytics.dict()
             analytics_dict["last_updated"] = platform_analytics.last_updated.isoformat()
             
-            self.platform_analytics_collection.update_one(
+            await self.platform_analytics_collection.update_one(
                 {"platform_id": platform, "user_id": user_id},
                 {"$set": analytics_dict},
                 upsert=True
@@ -684,7 +815,7 @@ class AnalyticsService:
                 "timestamp": {"$gte": cutoff_date.isoformat()}
             })
             
-            events = list(events_cursor)
+            events = await events_cursor.to_list(length=None)
             
             # Get content performance data
             performances = await self.get_user_content_performance(user_id, limit=100)
@@ -794,7 +925,7 @@ class AnalyticsService:
                 "timestamp": {"$gte": cutoff_date.isoformat()}
             }).sort("timestamp", 1)
             
-            events = list(events_cursor)
+            events = await events_cursor.to_list(length=None)
             
             # Group events by day
             daily_trends = defaultdict(lambda: defaultdict(float))
@@ -851,4 +982,7 @@ class AnalyticsService:
                 "error": str(e),
                 "period_days": days,
                 "total_events": 0
-            }
\ No newline at end of file
+            }
+
+# Shared by the analytics endpoints and the content performance maintenance task
+analytics_service = AnalyticsService()
@@ -17,6 +17,7 @@ import os
 # Import existing services
 from gs1_service import GS1Service
 from licensing_service import LicensingService
+from blocking_io import run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -235,10 +236,10 @@ class BusinessInformationService:
         """Extract business information from licensing system"""
         try:
             # Get licensing dashboard data
-            licensing_dashboard = self.licensing_service.get_licensing_dashboard()
+            licensing_dashboard = await run_blocking(self.licensing_service.get_licensing_dashboard)
             
             # Get licensing agreements
-            licensing_agreements = self.licensing_service.get_licensing_agreements(limit=100)
+            licensing_agreements = await run_blocking(self.licensing_service.get_licensing_agreements, limit=100)
             
             licensing_business_data = {
                 "licensing_agreement_ids": [agreement.get("id", "") for agreement in licensing_agreements],
@@ -270,7 +271,7 @@ class BusinessInformationService:
         """Get platform-specific business configuration information"""
         try:
             # Get platform licenses for credentials and configurations
-            platform_licenses = self.licensing_service.get_platform_licenses(limit=200)
+            platform_licenses = await run_blocking(self.licensing_service.get_platform_licenses, limit=200)
             
             platform_credentials = {}
             api_configurations = {}
@@ -590,7 +591,7 @@ class BusinessInformationService:
             # 2. Sync with Licensing System
             try:
                 # Update licensing agreements with latest business information
-                agreements = self.licensing_service.get_licensing_agreements()
+                agreements = await run_blocking(self.licensing_service.get_licensing_agreements)
                 for agreement in agreements:
                     # Update agreement with current business information
                     pass
@@ -1,110 +1,354 @@
 """
-Simple in-memory caching service for API responses
+In-memory caching service for API responses
 Improves performance by caching frequently accessed data
+
+The local cache is bounded by entry count and approximate size in bytes and
+evicts by LRU (or sampled LFU). ``get_or_load`` coalesces concurrent misses
+for a key into one load, serves stale entries while a single background
+refresh runs, and can sit in front of a shared Redis-compatible backend so
+workers reuse each other's results.
 """
-from typing import Optional, Any, Dict
-from datetime import datetime, timedelta
-import json
+import asyncio
+import functools
 import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+# How long past expiry an entry may still be served while it is refreshed
+DEFAULT_STALE_SECONDS = int(os.environ.get("CACHE_STALE_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_POLICY = os.environ.get("CACHE_POLICY", "lru")
+# LFU evicts the least used of this many least-recently-used entries
+LFU_SAMPLE_SIZE = 8
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint, good enough to enforce a byte budget"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class CacheBackend:
+    """Shared second-level store; values are JSON strings with their own TTL"""
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend over any client exposing the redis-py asyncio API"""
+
+    def __init__(self, client, namespace: str = "api-cache"):
+        self.client = client
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self._key(key))
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        await self.client.set(self._key(key), value, ex=max(int(ttl_seconds), 1))
+
+    async def delete(self, key: str):
+        await self.client.delete(self._key(key))
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """Redis backend when CACHE_REDIS_URL is set and redis is installed, else local only"""
+    url = os.environ.get("CACHE_REDIS_URL")
+    if not url:
+        return None
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        logger.warning("CACHE_REDIS_URL is set but redis is not installed; using the local cache only")
+        return None
+    return RedisCacheBackend(redis_asyncio.from_url(url))
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "size", "hits", "created_at")
+
+    def __init__(self, value: Any, ttl_seconds: float, stale_seconds: float, size: int):
+        now = time.monotonic()
+        self.value = value
+        self.expires_at = now + ttl_seconds
+        self.stale_until = self.expires_at + stale_seconds
+        self.size = size
+        self.hits = 0
+        self.created_at = now
 
 
 class CacheService:
-    """In-memory cache with TTL support"""
-    
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        
+    """Bounded in-memory cache with TTL, single-flight loading and an optional shared backend"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 policy: str = CACHE_POLICY, backend: Optional[CacheBackend] = None,
+                 prefix_ttls: Optional[Dict[str, int]] = None,
+                 stale_seconds: int = DEFAULT_STALE_SECONDS):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.backend = backend
+        self.prefix_ttls: Dict[str, int] = dict(prefix_ttls or {})
+        self.stale_seconds = stale_seconds
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._metrics = {
+            "hits": 0, "misses": 0, "stale_hits": 0, "backend_hits": 0, "loads": 0,
+            "load_errors": 0, "coalesced": 0, "evictions": 0, "expirations": 0, "rejected": 0,
+        }
+
     def _generate_key(self, prefix: str, **kwargs) -> str:
         """Generate a cache key from prefix and parameters"""
-        params_str = json.dumps(kwargs, sort_keys=True)
+        params_str = json.dumps(kwargs, sort_keys=True, default=str)
         key_hash = hashlib.md5(params_str.encode()).hexdigest()
         return f"{prefix}:{key_hash}"
-    
+
+    def set_prefix_ttl(self, prefix: str, ttl_seconds: int):
+        """Override the TTL of every key under ``prefix``"""
+        self.prefix_ttls[prefix] = ttl_seconds
+
+    def ttl_for(self, key: str, ttl_seconds: Optional[int] = None) -> int:
+        """Explicit TTL, else the longest matching prefix TTL, else the default"""
+        if ttl_seconds is not None:
+            return ttl_seconds
+        matches = [p for p in self.prefix_ttls if key.startswith(p)]
+        if matches:
+            return self.prefix_ttls[max(matches, key=len)]
+        return DEFAULT_TTL_SECONDS
+
+    def _lookup(self, key: str, allow_stale: bool = False) -> Optional[_Entry]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now > entry.stale_until or (now > entry.expires_at and not allow_stale):
+            if now > entry.stale_until:
+                self._remove(key)
+                self._metrics["expirations"] += 1
+            return None
+        self._cache.move_to_end(key)
+        entry.hits += 1
+        return entry
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired"""
-        if key not in self._cache:
+        entry = self._lookup(key)
+        if entry is None:
+            self._metrics["misses"] += 1
             return None
-            
-        entry = self._cache[key]
-        if datetime.utcnow() > entry['expires_at']:
-            # Expired, remove from cache
-            del self._cache[key]
-            return None
-            
-        entry['hits'] += 1
-        entry['last_accessed'] = datetime.utcnow()
-        return entry['value']
-    
-    def set(self, key: str, value: Any, ttl_seconds: int = 300):
-        """Set value in cache with TTL (default 5 minutes)"""
-        self._cache[key] = {
-            'value': value,
-            'expires_at': datetime.utcnow() + timedelta(seconds=ttl_seconds),
-            'created_at': datetime.utcnow(),
-            'last_accessed': datetime.utcnow(),
-            'hits': 0
-        }
-    
+        self._metrics["hits"] += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        """Set value in cache with TTL (prefix TTL or 5 minutes by default)"""
+        size = _estimate_size(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            self._metrics["rejected"] += 1
+            return
+        self._remove(key)
+        self._cache[key] = _Entry(value, self.ttl_for(key, ttl_seconds), self.stale_seconds, size)
+        self._bytes += size
+        while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+            self._evict_one(protect=key)
+
+    def _remove(self, key: str):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict_one(self, protect: str):
+        if self.policy == "lfu":
+            # The entry being inserted has no hits yet; never pick it
+            candidates = []
+            for key in self._cache:
+                if key == protect:
+                    continue
+                candidates.append(key)
+                if len(candidates) >= LFU_SAMPLE_SIZE:
+                    break
+            victim = min(candidates, key=lambda k: self._cache[k].hits)
+        else:
+            victim = next(iter(self._cache))
+        self._remove(victim)
+        self._metrics["evictions"] += 1
+
     def delete(self, key: str):
         """Delete specific key from cache"""
-        if key in self._cache:
-            del self._cache[key]
-    
+        self._remove(key)
+        if self.backend is not None:
+            self._spawn(self.backend.delete(key))
+
     def clear(self):
         """Clear entire cache"""
         self._cache.clear()
-    
+        self._bytes = 0
+        if self.backend is not None:
+            self._spawn(self.backend.clear())
+
+    @staticmethod
+    def _spawn(coro: Awaitable):
+        try:
+            asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+
     def cleanup_expired(self):
-        """Remove all expired entries"""
-        now = datetime.utcnow()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if now > entry['expires_at']
-        ]
+        """Remove all entries past their stale window"""
+        now = time.monotonic()
+        expired_keys = [key for key, entry in self._cache.items() if now > entry.stale_until]
         for key in expired_keys:
-            del self._cache[key]
+            self._remove(key)
+        self._metrics["expirations"] += len(expired_keys)
         return len(expired_keys)
-    
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          ttl_seconds: Optional[int] = None) -> Any:
+        """
+        Return the cached value for ``key`` or load it. Concurrent misses share
+        one load; an expired entry inside its stale window is returned at once
+        while one background load refreshes it.
+        """
+        entry = self._lookup(key, allow_stale=True)
+        if entry is not None:
+            if time.monotonic() <= entry.expires_at:
+                self._metrics["hits"] += 1
+            else:
+                self._metrics["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._start_load(key, loader, ttl_seconds).add_done_callback(_consume_exception)
+            return entry.value
+
+        self._metrics["misses"] += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self._metrics["coalesced"] += 1
+        else:
+            future = self._start_load(key, loader, ttl_seconds)
+        # Shielded so a cancelled waiter does not cancel the load the others share
+        return await asyncio.shield(future)
+
+    def _start_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                    ttl_seconds: Optional[int]) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_task(self._load(key, loader, ttl_seconds))
+        self._inflight[key] = future
+        return future
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl_seconds: Optional[int]) -> Any:
+        ttl = self.ttl_for(key, ttl_seconds)
+        try:
+            if self.backend is not None:
+                shared = await self._backend_get(key)
+                if shared is not None:
+                    self._metrics["backend_hits"] += 1
+                    self.set(key, shared, ttl)
+                    return shared
+            self._metrics["loads"] += 1
+            try:
+                value = await loader()
+            except Exception:
+                self._metrics["load_errors"] += 1
+                raise
+            if value is not None:
+                self.set(key, value, ttl)
+                if self.backend is not None:
+                    await self._backend_set(key, value, ttl)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _backend_get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.backend.get(key)
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Shared cache read failed for {key}: {e}")
+            return None
+
+    async def _backend_set(self, key: str, value: Any, ttl_seconds: int):
+        try:
+            await self.backend.set(key, json.dumps(value), ttl_seconds)
+        except (TypeError, ValueError):
+            pass  # Not JSON-serializable; stays in the local cache only
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {key}: {e}")
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        now = time.monotonic()
         total_entries = len(self._cache)
-        total_hits = sum(entry['hits'] for entry in self._cache.values())
-        
-        expired_count = sum(
-            1 for entry in self._cache.values()
-            if datetime.utcnow() > entry['expires_at']
-        )
-        
+        total_hits = sum(entry.hits for entry in self._cache.values())
+        expired_count = sum(1 for entry in self._cache.values() if now > entry.expires_at)
+        lookups = self._metrics["hits"] + self._metrics["stale_hits"] + self._metrics["misses"]
+
         return {
             'total_entries': total_entries,
             'active_entries': total_entries - expired_count,
             'expired_entries': expired_count,
             'total_hits': total_hits,
-            'average_hits': total_hits / total_entries if total_entries > 0 else 0
+            'average_hits': total_hits / total_entries if total_entries > 0 else 0,
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'policy': self.policy,
+            'shared_backend': type(self.backend).__name__ if self.backend is not None else None,
+            'in_flight_loads': len(self._inflight),
+            'hit_ratio': round((self._metrics["hits"] + self._metrics["stale_hits"]) / lookups, 4) if lookups else 0.0,
+            **self._metrics,
         }
 
 
+def _consume_exception(task: asyncio.Future):
+    # Background refresh failures keep serving the stale value until it ages out
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background cache refresh failed: {task.exception()}")
+
+
 # Global cache instance
-cache = CacheService()
+cache = CacheService(backend=backend_from_env())
 
 
 # Decorator for caching API responses
-def cached_response(prefix: str, ttl_seconds: int = 300):
-    """Decorator to cache function responses"""
+def cached_response(prefix: str, ttl_seconds: Optional[int] = None):
+    """Decorator to cache function responses; the TTL defaults to the prefix TTL"""
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # Generate cache key from function arguments
             cache_key = cache._generate_key(prefix, args=args, kwargs=kwargs)
-            
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            # Execute function and cache result
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, ttl_seconds)
-            return result
-        
+            return await cache.get_or_load(cache_key, lambda: func(*args, **kwargs), ttl_seconds)
+
         return wrapper
     return decorator
@@ -2,19 +2,41 @@
 Catalog CSV Import Service
 ===========================
 Handles parsing, validating, and bulk-inserting catalog assets from CSV uploads.
+
+Imports stream: the upload is read ``IMPORT_CHUNK_ROWS`` rows at a time,
+each chunk is checked for duplicate ISRCs/UPCs with one indexed query and
+written with one bulk insert, and the job's progress is checkpointed in
+``catalog_import_jobs`` after every chunk. An interrupted import resumes
+from its last checkpoint when the same file is sent again with its
+``job_id``. A running import holds a lease on its job, renewed at every
+checkpoint, so a job is resumed by one upload at a time and only once
+its previous run stopped or went quiet. Every row error is stored in
+``catalog_import_errors``; the response carries only the first
+``IMPORT_REPORT_LIMIT`` of each list. The indexes the leasing, resume and
+row-error upserts rely on are created by this module at startup.
 """
 
 import csv
 import io
 import logging
+import os
 import uuid
-from datetime import datetime, timezone
-from typing import Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from typing import IO, Dict, Any, List, Optional, Union
+
+from pymongo import UpdateOne
 
+from async_init import schedule_init
 from config.database import db
+from utils.csv_stream import dict_reader, iter_row_chunks, open_csv_text
 
 logger = logging.getLogger(__name__)
 
+IMPORT_CHUNK_ROWS = int(os.environ.get("CATALOG_IMPORT_CHUNK_ROWS", "1000"))
+IMPORT_REPORT_LIMIT = 500
+# A running job whose lease is not renewed for this long may be resumed by another upload
+IMPORT_LEASE_SECONDS = int(os.environ.get("CATALOG_IMPORT_LEASE_SECONDS", "300"))
+
 VALID_TYPES = {"single", "album", "ep", "compilation", "mixtape"}
 VALID_STATUSES = {"draft", "pre-release", "released", "taken_down"}
 
@@ -29,6 +51,18 @@ CSV_TEMPLATE_EXAMPLE = [
 ]
 
 
+async def _ensure_indexes():
+    # Per-chunk duplicate checks, and the assets a resumed chunk already wrote
+    await db.label_assets.create_index([("label_id", 1), ("isrc", 1)])
+    await db.label_assets.create_index([("label_id", 1), ("upc", 1)])
+    await db.label_assets.create_index([("import_job_id", 1), ("import_row", 1)], sparse=True)
+    await db.catalog_import_jobs.create_index("job_id", unique=True)
+    await db.catalog_import_errors.create_index([("job_id", 1), ("row", 1)])
+
+
+schedule_init("Catalog import indexes", _ensure_indexes)
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -92,13 +126,89 @@ def _validate_row(row: Dict[str, str], row_num: int) -> tuple:
     return asset, None
 
 
+def _report(bucket: List[Dict[str, Any]], entry: Dict[str, Any]):
+    if len(bucket) < IMPORT_REPORT_LIMIT:
+        bucket.append(entry)
+
+
+async def _existing_identifiers(label_id: str, isrcs: set, upcs: set) -> tuple:
+    """ISRCs (upper-cased) and UPCs among ``isrcs``/``upcs`` the label already has"""
+    clauses = []
+    if isrcs:
+        # Stored values may not be upper-cased
+        clauses.append({"isrc": {"$in": list(isrcs | {i.lower() for i in isrcs})}})
+    if upcs:
+        clauses.append({"upc": {"$in": list(upcs)}})
+    found_isrcs, found_upcs = set(), set()
+    if not clauses:
+        return found_isrcs, found_upcs
+    async for doc in db.label_assets.find(
+        {"label_id": label_id, "$or": clauses}, {"_id": 0, "isrc": 1, "upc": 1}
+    ):
+        if doc.get("isrc"):
+            found_isrcs.add(doc["isrc"].strip().upper())
+        if doc.get("upc"):
+            found_upcs.add(doc["upc"].strip())
+    return found_isrcs, found_upcs
+
+
+class _LeaseLost(Exception):
+    """Another upload resumed the job while this one was still running it"""
+
+
+def _lease_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=IMPORT_LEASE_SECONDS)
+
+
+async def _start_job(label_id: str, user_id: str, skip_duplicates: bool,
+                     resume_job_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    claim_id = uuid.uuid4().hex
+    if resume_job_id:
+        job = await db.catalog_import_jobs.find_one_and_update(
+            {
+                "job_id": resume_job_id,
+                "label_id": label_id,
+                "$or": [
+                    {"status": {"$nin": ["running", "completed"]}},
+                    # Jobs from before leases have none
+                    {"status": "running", "lease_expires_at": {"$not": {"$gt": datetime.now(timezone.utc)}}},
+                ],
+            },
+            {"$set": {"status": "running", "claim_id": claim_id, "lease_expires_at": _lease_expiry(),
+                      "updated_at": _now_iso()},
+             "$unset": {"error": ""}},
+            projection={"_id": 0},
+        )
+        return {**job, "claim_id": claim_id} if job else None
+    now = _now_iso()
+    job = {
+        "job_id": _gen_id("IMPORT"),
+        "label_id": label_id,
+        "created_by": user_id,
+        "skip_duplicates": skip_duplicates,
+        "status": "running",
+        "claim_id": claim_id,
+        "lease_expires_at": _lease_expiry(),
+        "rows_done": 1,  # Header row
+        "total_rows": 0,
+        "imported_count": 0,
+        "skipped_count": 0,
+        "error_count": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+    await db.catalog_import_jobs.insert_one(dict(job))
+    return job
+
+
 async def parse_and_import_csv(
     label_id: str,
-    csv_content: str,
+    csv_content: Union[str, bytes, IO],
     user_id: str,
     skip_duplicates: bool = True,
+    resume_job_id: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Parse CSV content and bulk-import assets into label_assets collection."""
+    """Stream CSV content (text, bytes or a binary file) into the label_assets collection."""
 
     # Verify label exists
     label = await db.uln_labels.find_one(
@@ -110,82 +220,155 @@ async def parse_and_import_csv(
 
     label_name = label.get("metadata_profile", {}).get("name", "Unknown")
 
-    # Parse CSV
+    # Check headers
     try:
-        reader = csv.DictReader(io.StringIO(csv_content))
-        rows = list(reader)
+        reader, headers = dict_reader(open_csv_text(csv_content))
     except Exception as e:
         return {"success": False, "error": f"Failed to parse CSV: {str(e)}"}
-
-    if not rows:
+    if not headers:
         return {"success": False, "error": "CSV file is empty (no data rows found)"}
-
-    # Check headers
-    headers = set(reader.fieldnames or [])
-    normalized_headers = {h.strip().lower().replace(" ", "_") for h in headers}
-    if "title" not in normalized_headers:
+    if "title" not in headers:
         return {"success": False, "error": "CSV must contain a 'title' column header"}
 
-    # Normalize row keys
-    normalized_rows = []
-    for row in rows:
-        normalized = {k.strip().lower().replace(" ", "_"): v for k, v in row.items()}
-        normalized_rows.append(normalized)
-
-    # Get existing ISRCs/UPCs for duplicate detection
-    existing_isrcs = set()
-    existing_upcs = set()
-    if skip_duplicates:
-        async for doc in db.label_assets.find({"label_id": label_id}, {"_id": 0, "isrc": 1, "upc": 1}):
-            if doc.get("isrc"):
-                existing_isrcs.add(doc["isrc"].strip().upper())
-            if doc.get("upc"):
-                existing_upcs.add(doc["upc"].strip())
-
-    now = _now_iso()
-    imported = []
-    skipped = []
-    errors = []
+    job = await _start_job(label_id, user_id, skip_duplicates, resume_job_id)
+    if not job:
+        return {"success": False, "error": "Import job not found, already completed or still running"}
+    job_id = job["job_id"]
+    # Every job write below is conditional on this run still holding the lease
+    owned = {"job_id": job_id, "claim_id": job["claim_id"]}
+    skip_duplicates = job["skip_duplicates"]
+    counts = {key: job[key] for key in ("imported_count", "skipped_count", "error_count")}
+    rows_done = job["rows_done"]
+    resuming = rows_done > 1
+
+    imported_summary: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
 
-    for idx, row in enumerate(normalized_rows, start=2):  # Row 2 = first data row after header
-        asset_data, error = _validate_row(row, idx)
-        if error:
-            errors.append({"row": idx, "error": error})
-            continue
-
-        # Duplicate check
-        if skip_duplicates:
-            isrc = asset_data.get("isrc", "").strip().upper()
-            upc = asset_data.get("upc", "").strip()
-            if isrc and isrc in existing_isrcs:
-                skipped.append({"row": idx, "title": asset_data["title"], "reason": f"Duplicate ISRC: {isrc}"})
-                continue
-            if upc and upc in existing_upcs:
-                skipped.append({"row": idx, "title": asset_data["title"], "reason": f"Duplicate UPC: {upc}"})
-                continue
-            # Track for intra-file duplicates
-            if isrc:
-                existing_isrcs.add(isrc)
-            if upc:
-                existing_upcs.add(upc)
-
-        asset_id = _gen_id("ASSET")
-        asset_doc = {
-            "asset_id": asset_id,
-            "label_id": label_id,
-            **asset_data,
-            "created_by": user_id,
-            "created_at": now,
-            "updated_at": now,
-            "import_source": "csv",
+    try:
+        for chunk in iter_row_chunks(reader, IMPORT_CHUNK_ROWS, start_after=rows_done):
+            now = _now_iso()
+            row_errors = []
+            valid = []
+            for idx, row in chunk:
+                asset_data, error = _validate_row(row, idx)
+                if error:
+                    row_errors.append({"job_id": job_id, "row": idx, "kind": "error", "error": error})
+                else:
+                    valid.append((idx, asset_data))
+
+            if resuming:
+                # Rows of the chunk in flight when the import stopped may already be written
+                written = {
+                    doc["import_row"] async for doc in db.label_assets.find(
+                        {"import_job_id": job_id, "import_row": {"$gte": chunk[0][0]}},
+                        {"_id": 0, "import_row": 1},
+                    )
+                }
+                valid = [(idx, asset) for idx, asset in valid if idx not in written]
+                resuming = False
+
+            if skip_duplicates:
+                chunk_isrcs = {a["isrc"].upper() for _, a in valid if a["isrc"]}
+                chunk_upcs = {a["upc"] for _, a in valid if a["upc"]}
+                seen_isrcs, seen_upcs = await _existing_identifiers(label_id, chunk_isrcs, chunk_upcs)
+                unique = []
+                for idx, asset_data in valid:
+                    isrc = asset_data["isrc"].upper()
+                    upc = asset_data["upc"]
+                    if isrc and isrc in seen_isrcs:
+                        reason = f"Duplicate ISRC: {isrc}"
+                    elif upc and upc in seen_upcs:
+                        reason = f"Duplicate UPC: {upc}"
+                    else:
+                        # Earlier chunks are already in the collection; this covers the current one
+                        if isrc:
+                            seen_isrcs.add(isrc)
+                        if upc:
+                            seen_upcs.add(upc)
+                        unique.append((idx, asset_data))
+                        continue
+                    row_errors.append({"job_id": job_id, "row": idx, "kind": "skipped",
+                                       "title": asset_data["title"], "reason": reason})
+                valid = unique
+
+            docs = [
+                {
+                    "asset_id": _gen_id("ASSET"),
+                    "label_id": label_id,
+                    **asset_data,
+                    "created_by": user_id,
+                    "created_at": now,
+                    "updated_at": now,
+                    "import_source": "csv",
+                    "import_job_id": job_id,
+                    "import_row": idx,
+                }
+                for idx, asset_data in valid
+            ]
+            if docs:
+                await db.label_assets.insert_many(docs, ordered=False)
+            if row_errors:
+                # Upserted: a resumed job processes again the chunk that was in flight when it stopped
+                await db.catalog_import_errors.bulk_write(
+                    [UpdateOne({"job_id": job_id, "row": entry["row"]}, {"$set": entry}, upsert=True)
+                     for entry in row_errors],
+                    ordered=False,
+                )
+
+            for doc in docs:
+                _report(imported_summary, {"asset_id": doc["asset_id"], "title": doc["title"],
+                                           "type": doc["type"], "artist": doc["artist"]})
+            for entry in row_errors:
+                if entry["kind"] == "error":
+                    counts["error_count"] += 1
+                    _report(errors, {"row": entry["row"], "error": entry["error"]})
+                else:
+                    counts["skipped_count"] += 1
+                    _report(skipped, {"row": entry["row"], "title": entry["title"], "reason": entry["reason"]})
+            counts["imported_count"] += len(docs)
+            last_row = chunk[-1][0]
+
+            checkpoint = await db.catalog_import_jobs.update_one(
+                owned,
+                {"$set": {**counts, "rows_done": last_row, "total_rows": last_row - 1,
+                          "lease_expires_at": _lease_expiry(), "updated_at": now}},
+            )
+            if not checkpoint.matched_count:
+                raise _LeaseLost()
+            rows_done = last_row
+    except _LeaseLost:
+        logger.warning(f"Catalog import {job_id} was resumed elsewhere; stopped after row {rows_done}")
+        return {"success": False, "job_id": job_id, "rows_done": rows_done,
+                "error": "Import job was resumed by another upload"}
+    except Exception as e:
+        logger.error(f"Catalog import {job_id} stopped after row {rows_done}: {e}")
+        await db.catalog_import_jobs.update_one(
+            owned,
+            {"$set": {"status": "failed", "error": str(e), "updated_at": _now_iso()},
+             "$unset": {"lease_expires_at": ""}},
+        )
+        return {
+            "success": False,
+            "job_id": job_id,
+            "rows_done": rows_done,
+            "error": f"Import stopped after row {rows_done}: {str(e)}. Re-upload the file with job_id {job_id} to resume.",
         }
-        imported.append(asset_doc)
 
-    # Bulk insert
-    inserted_count = 0
-    if imported:
-        result = await db.label_assets.insert_many(imported)
-        inserted_count = len(result.inserted_ids)
+    total_rows = rows_done - 1
+    if total_rows == 0:
+        await db.catalog_import_jobs.delete_one(owned)
+        return {"success": False, "error": "CSV file is empty (no data rows found)"}
+
+    now = _now_iso()
+    completed = await db.catalog_import_jobs.update_one(
+        owned,
+        {"$set": {"status": "completed", "completed_at": now, "updated_at": now},
+         "$unset": {"lease_expires_at": ""}},
+    )
+    if not completed.matched_count:
+        return {"success": False, "job_id": job_id, "rows_done": rows_done,
+                "error": "Import job was resumed by another upload"}
 
     # Audit trail
     await db.uln_audit_trail.insert_one({
@@ -193,68 +376,82 @@ async def parse_and_import_csv(
         "actor_id": user_id,
         "resource_type": "label",
         "resource_id": label_id,
-        "description": f"CSV import: {inserted_count} assets imported, {len(skipped)} skipped, {len(errors)} errors",
-        "changes": {
-            "imported_count": inserted_count,
-            "skipped_count": len(skipped),
-            "error_count": len(errors),
-        },
+        "description": (
+            f"CSV import: {counts['imported_count']} assets imported, "
+            f"{counts['skipped_count']} skipped, {counts['error_count']} errors"
+        ),
+        "changes": {**counts, "job_id": job_id},
         "timestamp": now,
     })
 
-    # Build safe response (no _id fields)
-    imported_summary = [
-        {"asset_id": a["asset_id"], "title": a["title"], "type": a["type"], "artist": a["artist"]}
-        for a in imported
-    ]
-
     return {
         "success": True,
+        "job_id": job_id,
         "label_id": label_id,
         "label_name": label_name,
-        "total_rows": len(normalized_rows),
-        "imported_count": inserted_count,
-        "skipped_count": len(skipped),
-        "error_count": len(errors),
+        "total_rows": total_rows,
+        **counts,
         "imported": imported_summary,
         "skipped": skipped,
         "errors": errors,
+        "report_limit": IMPORT_REPORT_LIMIT,
     }
 
 
-async def preview_csv(csv_content: str) -> Dict[str, Any]:
+async def get_import_job(label_id: str, job_id: str, errors_after_row: int = 0,
+                         limit: int = 100) -> Optional[Dict[str, Any]]:
+    """Progress of an import job and a page of its row errors and skips, in row order."""
+    job = await db.catalog_import_jobs.find_one({"job_id": job_id, "label_id": label_id}, {"_id": 0, "claim_id": 0})
+    if not job:
+        return None
+    issues = await db.catalog_import_errors.find(
+        {"job_id": job_id, "row": {"$gt": errors_after_row}}, {"_id": 0, "job_id": 0}
+    ).sort("row", 1).limit(limit).to_list(length=limit)
+    return {
+        **job,
+        "issues": issues,
+        "next_after_row": issues[-1]["row"] if len(issues) == limit else None,
+    }
+
+
+async def preview_csv(csv_content: Union[str, bytes, IO]) -> Dict[str, Any]:
     """Parse and preview CSV content without importing."""
     try:
-        reader = csv.DictReader(io.StringIO(csv_content))
-        rows = list(reader)
+        reader, normalized_headers = dict_reader(open_csv_text(csv_content))
     except Exception as e:
         return {"success": False, "error": f"Failed to parse CSV: {str(e)}"}
 
-    if not rows:
+    if not normalized_headers:
         return {"success": False, "error": "CSV file is empty"}
 
-    headers = list(reader.fieldnames or [])
-    normalized_headers = [h.strip().lower().replace(" ", "_") for h in headers]
-
     if "title" not in normalized_headers:
         return {"success": False, "error": "CSV must contain a 'title' column header"}
 
     preview_rows = []
     validation_errors = []
-    for idx, row in enumerate(rows[:50], start=2):  # Preview max 50 rows
-        normalized = {k.strip().lower().replace(" ", "_"): v for k, v in row.items()}
-        asset_data, error = _validate_row(normalized, idx)
-        if error:
-            validation_errors.append({"row": idx, "error": error})
-            preview_rows.append({**normalized, "_has_error": True, "_error": error})
-        else:
-            preview_rows.append({**asset_data, "_has_error": False})
+    total_rows = 0
+    try:
+        for idx, row in enumerate(reader, start=2):
+            total_rows += 1
+            if total_rows > 50:  # Preview max 50 rows; the rest are only counted
+                continue
+            asset_data, error = _validate_row(row, idx)
+            if error:
+                validation_errors.append({"row": idx, "error": error})
+                preview_rows.append({**row, "_has_error": True, "_error": error})
+            else:
+                preview_rows.append({**asset_data, "_has_error": False})
+    except csv.Error as e:
+        return {"success": False, "error": f"Failed to parse CSV: {str(e)}"}
+
+    if not total_rows:
+        return {"success": False, "error": "CSV file is empty"}
 
     return {
         "success": True,
         "headers": normalized_headers,
-        "total_rows": len(rows),
-        "preview_rows": preview_rows[:50],
+        "total_rows": total_rows,
+        "preview_rows": preview_rows,
         "validation_errors": validation_errors,
-        "valid_count": len(rows) - len(validation_errors),
+        "valid_count": total_rows - len(validation_errors),
     }
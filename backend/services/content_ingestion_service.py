@@ -15,7 +15,7 @@ from enum import Enum
 import boto3
 from botocore.exceptions import ClientError
 from pydantic import BaseModel, Field, validator
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
 
 class ContentType(str, Enum):
     AUDIO = "audio"
@@ -193,7 +193,7 @@ class ContentIngestionService:
     def __init__(self):
         self.s3_client = self._initialize_s3_client()
         self.bucket_name = os.environ.get('AWS_S3_BUCKET', 'bigmann-content-storage')
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         self.content_collection = self.db['content_ingestion']
         
@@ -326,7 +326,7 @@ class ContentIngestionService:
                         file_data[key] = value.isoformat()
         
         # Insert into MongoDB
-        result = self.content_collection.insert_one(record_dict)
+        result = await self.content_collection.insert_one(record_dict)
         ingestion_record.content_id = str(result.inserted_id)
         
         return ingestion_record
@@ -334,7 +334,7 @@ class ContentIngestionService:
     async def get_content_ingestion_record(self, content_id: str, user_id: str) -> Optional[ContentIngestionRecord]:
         """Retrieve a content ingestion record"""
         try:
-            record = self.content_collection.find_one({
+            record = await self.content_collection.find_one({
                 "content_id": content_id,
                 "user_id": user_id
             })
@@ -358,7 +358,7 @@ class ContentIngestionService:
             ).sort("created_at", -1).skip(offset).limit(limit)
             
             records = []
-            for record in cursor:
+            async for record in cursor:
                 record['_id'] = str(record['_id'])
                 try:
                     records.append(ContentIngestionRecord(**record))
@@ -396,7 +396,7 @@ class ContentIngestionService:
             if compliance_issues:
                 update_data["compliance_issues"] = compliance_issues
             
-            result = self.content_collection.update_one(
+            result = await self.content_collection.update_one(
                 {"content_id": content_id, "user_id": user_id},
                 {"$set": update_data}
             )
@@ -418,7 +418,7 @@ class ContentIngestionService:
         year = datetime.now().year % 100  # Last 2 digits of year
         
         # Get next designation number for this year
-        current_year_records = self.content_collection.count_documents({
+        current_year_records = await self.content_collection.count_documents({
             "ddex_metadata.isrc": {"$regex": f"^{country_code}{registrant_code}{year:02d}"}
         })
         
@@ -435,7 +435,7 @@ class ContentIngestionService:
         # C = Check digit
         
         # Get count of existing ISWCs to generate unique number
-        existing_count = self.content_collection.count_documents({
+        existing_count = await self.content_collection.count_documents({
             "ddex_metadata.iswc": {"$exists": True, "$ne": None}
         })
         
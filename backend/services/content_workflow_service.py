@@ -14,7 +14,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
+from async_init import schedule_init
 import ffmpeg
 import requests
 from pathlib import Path
@@ -221,7 +222,7 @@ class ContentWorkflow(BaseModel):
 
 class ContentWorkflowService:
     def __init__(self):
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         
         # Collections
@@ -233,7 +234,7 @@ class ContentWorkflowService:
         self.transcoding_jobs_collection = self.db['transcoding_jobs']
         
         # Initialize delivery profiles
-        self._initialize_delivery_profiles()
+        schedule_init("Content workflow delivery profiles", self._initialize_delivery_profiles)
         
         # Storage configuration
         self.storage_config = {
@@ -245,7 +246,7 @@ class ContentWorkflowService:
         # Ensure local storage directory exists
         Path(self.storage_config["local_storage_path"]).mkdir(parents=True, exist_ok=True)
     
-    def _initialize_delivery_profiles(self):
+    async def _initialize_delivery_profiles(self):
         """Initialize default delivery profiles for different channels"""
         
         default_profiles = [
@@ -402,7 +403,7 @@ class ContentWorkflowService:
         
         # Insert default profiles if they don't exist
         for profile_data in default_profiles:
-            existing = self.delivery_profiles_collection.find_one({
+            existing = await self.delivery_profiles_collection.find_one({
                 "profile_name": profile_data["profile_name"]
             })
             
@@ -410,7 +411,7 @@ class ContentWorkflowService:
                 profile = DeliveryProfile(**profile_data)
                 profile_dict = profile.dict()
                 profile_dict["created_at"] = profile.created_at.isoformat()
-                self.delivery_profiles_collection.insert_one(profile_dict)
+                await self.delivery_profiles_collection.insert_one(profile_dict)
     
     async def ingest_master_content(self, 
                                   user_id: str,
@@ -455,11 +456,11 @@ class ContentWorkflowService:
             master_dict["created_at"] = master_content.created_at.isoformat()
             master_dict["updated_at"] = master_content.updated_at.isoformat()
             
-            result = self.master_content_collection.insert_one(master_dict)
+            result = await self.master_content_collection.insert_one(master_dict)
             master_content.content_id = str(result.inserted_id)
             
             # Update with content_id
-            self.master_content_collection.update_one(
+            await self.master_content_collection.update_one(
                 {"_id": result.inserted_id},
                 {"$set": {"content_id": master_content.content_id}}
             )
@@ -483,14 +484,14 @@ class ContentWorkflowService:
         
         try:
             # Get master content
-            master_content = self.master_content_collection.find_one({"content_id": content_id})
+            master_content = await self.master_content_collection.find_one({"content_id": content_id})
             if not master_content:
                 raise ValueError("Master content not found")
             
             # Get existing versions to determine version number
-            existing_versions = list(self.content_versions_collection.find(
+            existing_versions = await self.content_versions_collection.find(
                 {"content_id": content_id}
-            ).sort("created_at", -1))
+            ).sort("created_at", -1).to_list(length=None)
             
             # Determine semantic version number
             if not existing_versions:
@@ -555,11 +556,11 @@ class ContentWorkflowService:
             version_dict = content_version.dict()
             version_dict["created_at"] = content_version.created_at.isoformat()
             
-            result = self.content_versions_collection.insert_one(version_dict)
+            result = await self.content_versions_collection.insert_one(version_dict)
             content_version.version_id = str(result.inserted_id)
             
             # Update with version_id
-            self.content_versions_collection.update_one(
+            await self.content_versions_collection.update_one(
                 {"_id": result.inserted_id},
                 {"$set": {"version_id": content_version.version_id}}
             )
@@ -581,7 +582,7 @@ class ContentWorkflowService:
         
         try:
             # Get version information
-            version = self.content_versions_collection.find_one({"version_id": version_id})
+            version = await self.content_versions_collection.find_one({"version_id": version_id})
             if not version:
                 raise ValueError("Content version not found")
             
@@ -644,11 +645,11 @@ class ContentWorkflowService:
             qc_dict = qc_result.dict()
             qc_dict["performed_at"] = qc_result.performed_at.isoformat()
             
-            result = self.technical_qc_collection.insert_one(qc_dict)
+            result = await self.technical_qc_collection.insert_one(qc_dict)
             qc_result.qc_id = str(result.inserted_id)
             
             # Update with qc_id
-            self.technical_qc_collection.update_one(
+            await self.technical_qc_collection.update_one(
                 {"_id": result.inserted_id},
                 {"$set": {"qc_id": qc_result.qc_id}}
             )
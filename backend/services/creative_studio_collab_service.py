@@ -1,8 +1,20 @@
 """
 Creative Studio Collaboration Service
 Real-time collaboration, presence tracking, activity feed, version management
+
+Project messages go out on the WebSocket bus (channel
+``collab:project:<id>``), which sends to peers concurrently and evicts
+slow consumers. Cursor moves are not forwarded one by one: each project
+keeps only the latest position per user and flushes the changed ones as a
+single ``cursor_frame`` every ``COLLAB_CURSOR_FRAME_SECONDS``.
+
+Element edits are operations in the project's op-log (``element_oplog``):
+each carries a Lamport clock, merges field by field, and is written in
+batches. Versions record a log position, and restoring one replays the log
+from the nearest snapshot and applies the difference as new operations.
 """
 
+import os
 import uuid
 import json
 import asyncio
@@ -11,6 +23,17 @@ from typing import Dict, List, Optional, Set, Any
 from fastapi import WebSocket, WebSocketDisconnect
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from element_oplog import ElementOpLog, materialize
+from ws_fanout import ws_bus
+
+COLLAB_CURSOR_FRAME_SECONDS = float(os.environ.get("COLLAB_CURSOR_FRAME_SECONDS", "0.05"))
+# Empty frames before a project's flush loop stops until the next cursor move
+COLLAB_CURSOR_IDLE_FRAMES = 40
+
+
+def _project_channel(project_id: str) -> str:
+    return f"collab:project:{project_id}"
+
 
 class ProjectPresence:
     """Track who is active in a project"""
@@ -18,6 +41,9 @@ class ProjectPresence:
         self.connections: Dict[str, WebSocket] = {}  # user_id -> websocket
         self.cursors: Dict[str, Dict] = {}  # user_id -> {x, y}
         self.user_info: Dict[str, Dict] = {}  # user_id -> {name, color, avatar}
+        # Cursor positions not yet sent; a newer move replaces an unsent one
+        self.pending_cursors: Dict[str, Dict] = {}
+        self.flush_task: Optional[asyncio.Task] = None
 
     @property
     def active_users(self) -> List[Dict]:
@@ -41,6 +67,8 @@ class CollaborationService:
         self.activity_collection = db.creative_studio_activity
         self.projects_collection = db.creative_studio_projects
         self.presence: Dict[str, ProjectPresence] = {}  # project_id -> ProjectPresence
+        self.oplog = ElementOpLog(db)
+        self.cursor_stats = {"moves_received": 0, "moves_superseded": 0, "frames_sent": 0, "positions_sent": 0}
 
     def _get_presence(self, project_id: str) -> ProjectPresence:
         if project_id not in self.presence:
@@ -52,7 +80,12 @@ class CollaborationService:
         await websocket.accept()
         p = self._get_presence(project_id)
         color_idx = len(p.connections) % len(AVATAR_COLORS)
+        previous = p.connections.get(user_id)
+        if previous is not None:
+            ws_bus.detach(previous)
         p.connections[user_id] = websocket
+        await ws_bus.attach(websocket, [_project_channel(project_id)], tag=user_id,
+                            on_drop=lambda: self.disconnect(project_id, user_id, websocket))
         p.user_info[user_id] = {
             "name": user_name,
             "color": AVATAR_COLORS[color_idx],
@@ -67,19 +100,28 @@ class CollaborationService:
             "active_users": p.active_users
         }, exclude=user_id)
         # Send current state to new user
-        await websocket.send_json({
+        ws_bus.send_local([websocket], {
             "type": "presence_state",
             "active_users": p.active_users
         })
 
-    async def disconnect(self, project_id: str, user_id: str):
-        """Remove a user from a project"""
-        p = self._get_presence(project_id)
-        p.connections.pop(user_id, None)
+    async def disconnect(self, project_id: str, user_id: str, websocket: Optional[WebSocket] = None):
+        """Remove a user from a project (only if ``websocket``, when given, is still theirs)"""
+        p = self.presence.get(project_id)
+        if not p or user_id not in p.connections:
+            return
+        if websocket is not None and p.connections[user_id] is not websocket:
+            return
+        ws_bus.detach(p.connections.pop(user_id))
         p.cursors.pop(user_id, None)
+        p.pending_cursors.pop(user_id, None)
         p.user_info.pop(user_id, None)
         if not p.connections:
+            if p.flush_task:
+                p.flush_task.cancel()
             self.presence.pop(project_id, None)
+            await self.oplog.flush(project_id)
+            self.oplog.forget(project_id)
         else:
             await self._broadcast(project_id, {
                 "type": "user_left",
@@ -88,62 +130,89 @@ class CollaborationService:
             })
 
     async def handle_cursor_move(self, project_id: str, user_id: str, x: float, y: float):
-        """Update and broadcast cursor position"""
-        p = self._get_presence(project_id)
+        """Record a cursor position; it is broadcast with the project's next cursor frame"""
+        p = self.presence.get(project_id)
+        if p is None or user_id not in p.connections:
+            # Late moves from a user who left or was dropped must not bring their cursor back
+            return
         p.cursors[user_id] = {"x": x, "y": y}
-        await self._broadcast(project_id, {
-            "type": "cursor_move",
+        self.cursor_stats["moves_received"] += 1
+        if user_id in p.pending_cursors:
+            self.cursor_stats["moves_superseded"] += 1
+        info = p.user_info.get(user_id, {})
+        p.pending_cursors[user_id] = {
             "user_id": user_id,
-            "user_name": p.user_info.get(user_id, {}).get("name", "Unknown"),
-            "color": p.user_info.get(user_id, {}).get("color", "#8b5cf6"),
+            "user_name": info.get("name", "Unknown"),
+            "color": info.get("color", "#8b5cf6"),
             "x": x, "y": y
-        }, exclude=user_id)
-
-    async def handle_element_update(self, project_id: str, user_id: str, element_data: Dict):
-        """Broadcast element change to other users"""
+        }
+        if p.flush_task is None:
+            p.flush_task = asyncio.ensure_future(self._cursor_frames(project_id, p))
+
+    async def _cursor_frames(self, project_id: str, p: ProjectPresence):
+        """Send the project's changed cursors as one frame per tick until it goes quiet"""
+        idle = 0
+        try:
+            while idle < COLLAB_CURSOR_IDLE_FRAMES:
+                await asyncio.sleep(COLLAB_CURSOR_FRAME_SECONDS)
+                if not p.pending_cursors:
+                    idle += 1
+                    continue
+                idle = 0
+                cursors = list(p.pending_cursors.values())
+                p.pending_cursors.clear()
+                self.cursor_stats["frames_sent"] += 1
+                self.cursor_stats["positions_sent"] += len(cursors)
+                # Clients skip their own cursor; a single mover need not get the frame at all
+                await self._broadcast(project_id, {"type": "cursor_frame", "cursors": cursors},
+                                      exclude=cursors[0]["user_id"] if len(cursors) == 1 else None)
+        finally:
+            if p.flush_task is asyncio.current_task():
+                p.flush_task = None
+
+    async def _element_op(self, project_id: str, user_id: str, kind: str, element_id: str,
+                          fields: Dict, clock: int) -> Optional[Dict]:
+        """Record an element operation, acknowledge its clock to the sender and relay it to everyone else"""
+        if not element_id:
+            return None
+        try:
+            op = await self.oplog.record(project_id, user_id, kind, element_id, fields, clock)
+        except LookupError:
+            return None
         p = self._get_presence(project_id)
-        await self._broadcast(project_id, {
-            "type": "element_update",
+        sender = p.connections.get(user_id)
+        if sender is not None:
+            ws_bus.send_local([sender], {"type": "element_ack", "element_id": element_id, "clock": op["clock"]})
+        message = {
+            "type": f"element_{kind}",
             "user_id": user_id,
             "user_name": p.user_info.get(user_id, {}).get("name", "Unknown"),
-            "element": element_data
-        }, exclude=user_id)
+            "clock": op["clock"],
+        }
+        if kind == "delete":
+            message["element_id"] = element_id
+        else:
+            message["element"] = {"id": element_id, **fields}
+        await self._broadcast(project_id, message, exclude=user_id)
+        return op
 
-    async def handle_element_add(self, project_id: str, user_id: str, element_data: Dict):
-        """Broadcast new element to other users"""
-        p = self._get_presence(project_id)
-        await self._broadcast(project_id, {
-            "type": "element_add",
-            "user_id": user_id,
-            "user_name": p.user_info.get(user_id, {}).get("name", "Unknown"),
-            "element": element_data
-        }, exclude=user_id)
+    async def handle_element_update(self, project_id: str, user_id: str, element_data: Dict, clock: int = 0):
+        """Record the changed fields of an element and send them to other users"""
+        fields = {k: v for k, v in element_data.items() if k != "id"}
+        return await self._element_op(project_id, user_id, "update", element_data.get("id", ""), fields, clock)
 
-    async def handle_element_delete(self, project_id: str, user_id: str, element_id: str):
-        """Broadcast element deletion"""
-        p = self._get_presence(project_id)
-        await self._broadcast(project_id, {
-            "type": "element_delete",
-            "user_id": user_id,
-            "user_name": p.user_info.get(user_id, {}).get("name", "Unknown"),
-            "element_id": element_id
-        }, exclude=user_id)
+    async def handle_element_add(self, project_id: str, user_id: str, element_data: Dict, clock: int = 0):
+        """Record a new element and send it to other users"""
+        fields = {k: v for k, v in element_data.items() if k != "id"}
+        return await self._element_op(project_id, user_id, "add", element_data.get("id", ""), fields, clock)
+
+    async def handle_element_delete(self, project_id: str, user_id: str, element_id: str, clock: int = 0):
+        """Record an element deletion and send it to other users"""
+        return await self._element_op(project_id, user_id, "delete", element_id, {}, clock)
 
     async def _broadcast(self, project_id: str, message: Dict, exclude: str = None):
         """Send message to all connected users in a project"""
-        p = self.presence.get(project_id)
-        if not p:
-            return
-        disconnected = []
-        for uid, ws in p.connections.items():
-            if uid == exclude:
-                continue
-            try:
-                await ws.send_json(message)
-            except Exception:
-                disconnected.append(uid)
-        for uid in disconnected:
-            await self.disconnect(project_id, uid)
+        await ws_bus.publish(_project_channel(project_id), message, exclude=exclude)
 
     # ==================== Activity Feed ====================
 
@@ -188,8 +257,10 @@ class CollaborationService:
         return versions
 
     async def restore_version(self, project_id: str, version_id: str, user_id: str) -> Optional[Dict]:
-        """Restore a project to a previous version"""
-        doc = await self.projects_collection.find_one({"id": project_id}, {"_id": 0})
+        """Restore a project to a previous version by replaying its op-log"""
+        doc = await self.projects_collection.find_one(
+            {"id": project_id}, {"_id": 0, "versions": 1, "current_version": 1}
+        )
         if not doc:
             return None
 
@@ -201,45 +272,59 @@ class CollaborationService:
         if not target:
             return None
 
-        # Save current state as a new version before restoring
+        if target.get("op_seq") is not None:
+            elements = materialize(await self.oplog.state_at(project_id, target["op_seq"]))
+        else:
+            # Saved before the project had an op-log
+            elements = target.get("elements_snapshot", [])
+
+        # The current state stays reachable through the log position it was at
+        before_seq = await self.oplog.checkpoint(project_id)
+        ops = await self.oplog.replace_elements(project_id, user_id, elements)
+        after_seq = await self.oplog.checkpoint(project_id)
+
         current_version_num = doc.get("current_version", 1)
+        now = datetime.now(timezone.utc).isoformat()
         save_version = {
             "id": str(uuid.uuid4()),
             "version_number": current_version_num + 1,
             "name": "Auto-save before restore",
-            "elements_snapshot": doc.get("elements", []),
+            "op_seq": before_seq,
+            "elements_snapshot": [],
             "created_by": "system",
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now
         }
-
         restore_version = {
             "id": str(uuid.uuid4()),
             "version_number": current_version_num + 2,
             "name": f"Restored from v{target.get('version_number', '?')}",
-            "elements_snapshot": target.get("elements_snapshot", []),
+            "op_seq": after_seq,
+            "elements_snapshot": [],
             "created_by": user_id,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": now
         }
 
         await self.projects_collection.update_one(
             {"id": project_id},
             {
-                "$set": {
-                    "elements": target.get("elements_snapshot", []),
-                    "current_version": current_version_num + 2,
-                    "updated_at": datetime.now(timezone.utc).isoformat()
-                },
-                "$push": {
-                    "versions": {"$each": [save_version, restore_version]}
-                }
+                "$set": {"current_version": current_version_num + 2, "updated_at": now},
+                "$push": {"versions": {"$each": [save_version, restore_version]}}
             }
         )
+        restored = await self.oplog.elements(project_id)
+        await self._broadcast(project_id, {
+            "type": "version_restored",
+            "user_id": user_id,
+            "version_number": current_version_num + 2,
+            "elements": restored,
+            "clock": self.oplog.lamport(project_id)
+        })
         await self.log_activity(
             project_id, user_id, "User",
             "version_restored",
-            {"restored_version": target.get("version_number")}
+            {"restored_version": target.get("version_number"), "operations": len(ops)}
         )
-        return {"success": True, "elements": target.get("elements_snapshot", []),
+        return {"success": True, "elements": restored,
                 "version_number": current_version_num + 2}
 
     # ==================== Comments ====================
@@ -303,6 +388,18 @@ class CollaborationService:
         p = self.presence.get(project_id)
         return p.active_users if p else []
 
+    def get_presence_stats(self) -> Dict[str, Any]:
+        """Cursor coalescing counters for this worker"""
+        return {
+            "projects": len(self.presence),
+            "frame_seconds": COLLAB_CURSOR_FRAME_SECONDS,
+            **self.cursor_stats,
+        }
+
+    def get_oplog_stats(self) -> Dict[str, Any]:
+        """Element op-log batching counters for this worker"""
+        return self.oplog.stats()
+
 
 # Singleton
 _collab_service: Optional[CollaborationService] = None
@@ -22,6 +22,7 @@ from creative_studio_models import (
     CreateBrandKitRequest, CreateProjectRequest, UpdateProjectRequest,
     ExportFormat
 )
+from creative_studio_collab_service import get_collab_service
 
 load_dotenv()
 
@@ -442,8 +443,17 @@ class CreativeStudioService:
             updates["name"] = request.name
         if request.description is not None:
             updates["description"] = request.description
+        collab = get_collab_service()
         if request.elements is not None:
-            updates["elements"] = [e.dict() for e in request.elements]
+            elements = [e.dict() for e in request.elements]
+            if collab:
+                # Applied as operations so concurrent live edits are merged, not overwritten
+                try:
+                    await collab.oplog.replace_elements(project_id, "api", elements)
+                except LookupError:
+                    return None
+            else:
+                updates["elements"] = elements
         if request.background_color is not None:
             updates["background_color"] = request.background_color
         if request.background_image is not None:
@@ -470,12 +480,22 @@ class CreativeStudioService:
         if not project:
             return None
         
-        version = ProjectVersion(
-            version_number=project.current_version + 1,
-            name=name,
-            elements_snapshot=project.elements,
-            created_by=user_id
-        )
+        collab = get_collab_service()
+        if collab:
+            # A log position is enough to rebuild the elements; no copy of them is stored
+            version = ProjectVersion(
+                version_number=project.current_version + 1,
+                name=name,
+                op_seq=await collab.oplog.checkpoint(project_id),
+                created_by=user_id
+            )
+        else:
+            version = ProjectVersion(
+                version_number=project.current_version + 1,
+                name=name,
+                elements_snapshot=project.elements,
+                created_by=user_id
+            )
         
         await self.projects_collection.update_one(
             {"id": project_id},
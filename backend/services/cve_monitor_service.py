@@ -9,7 +9,7 @@ import uuid
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 
 logger = logging.getLogger("cve_monitor_service")
@@ -24,7 +24,7 @@ def get_cve_monitor_service():
     if _service_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _service_instance = CVEMonitorService(db)
     return _service_instance
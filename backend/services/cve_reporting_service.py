@@ -14,7 +14,7 @@ from collections import defaultdict
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 logger = logging.getLogger("cve_reporting_service")
 
@@ -26,7 +26,7 @@ def get_cve_reporting_service():
     if _reporting_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _reporting_instance = CVEReportingService(db)
     return _reporting_instance
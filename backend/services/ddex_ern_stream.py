@@ -0,0 +1,141 @@
+"""
+Streaming DDEX ERN reader.
+
+``iter_ern_records`` walks an ERN message with ``ElementTree.iterparse``
+and yields a plain dict for each record as soon as its closing tag is
+read: the message itself (first, from the root's opening tag), the
+message header, every party, resource, release and release deal. Each
+record's subtree is cleared and detached once it has been read, so memory
+stays flat however many releases a delivery carries.
+
+Elements are matched by local name, so the reader accepts both ERN
+messages whose children are unqualified (as DDEX publishes them) and
+messages that qualify every element with the ERN namespace.
+"""
+import io
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+
+RESOURCE_TYPES = {"SoundRecording", "Video", "Image", "Text", "SheetMusic", "Software"}
+
+# (parent, element) -> record kind
+RECORD_ELEMENTS = {
+    ("PartyList", "Party"): "party",
+    ("ReleaseList", "Release"): "release",
+    ("DealList", "ReleaseDeal"): "deal",
+    **{("ResourceList", name): "resource" for name in RESOURCE_TYPES},
+}
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(elem: ET.Element, name: str) -> Optional[ET.Element]:
+    for child in elem.iter():
+        if child is not elem and _local(child.tag) == name:
+            return child
+    return None
+
+
+def _text(elem: ET.Element, name: str) -> Optional[str]:
+    found = _find(elem, name)
+    text = found.text.strip() if found is not None and found.text else ""
+    return text or None
+
+
+def _texts(elem: ET.Element, *names: str) -> List[str]:
+    values = []
+    for child in elem.iter():
+        if _local(child.tag) in names and child.text and child.text.strip():
+            value = child.text.strip()
+            if value not in values:
+                values.append(value)
+    return values
+
+
+def _child_text(elem: ET.Element, name: str) -> Optional[str]:
+    for child in elem:
+        if _local(child.tag) == name and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def _release_upc(release: ET.Element) -> Optional[str]:
+    for release_id in release.iter():
+        if _local(release_id.tag) != "ReleaseId":
+            continue
+        icpn = _child_text(release_id, "ICPN")
+        if icpn:
+            return icpn
+        if _child_text(release_id, "Namespace") == "UPC":
+            return _child_text(release_id, "ProprietaryId")
+    return None
+
+
+def _genre(elem: ET.Element) -> Optional[str]:
+    genre = _find(elem, "Genre")
+    if genre is None:
+        return None
+    if genre.text and genre.text.strip():
+        return genre.text.strip()
+    return _text(genre, "GenreText")
+
+
+def _extract(kind: str, elem: ET.Element) -> Dict[str, Any]:
+    if kind == "header":
+        return {"message_id": _text(elem, "MessageId"),
+                "message_created": _text(elem, "MessageCreatedDateTime")}
+    if kind == "party":
+        return {"party_reference": _child_text(elem, "PartyReference"),
+                "party_id": _text(elem, "PartyId"),
+                "full_name": _text(elem, "FullName")}
+    if kind == "resource":
+        return {"resource_type": _local(elem.tag),
+                "resource_reference": _child_text(elem, "ResourceReference"),
+                "title": _text(elem, "TitleText"),
+                "display_artist": _text(elem, "DisplayArtistName"),
+                "isrc": _text(elem, "ISRC"),
+                "duration": _text(elem, "Duration"),
+                "copyright_year": _text(elem, "CopyrightYear")}
+    if kind == "release":
+        return {"release_reference": _child_text(elem, "ReleaseReference"),
+                "title": _text(elem, "TitleText"),
+                "release_date": _text(elem, "ReleaseDate"),
+                "upc": _release_upc(elem),
+                "genre": _genre(elem),
+                "resource_references": _texts(elem, "ReleaseResourceReference")}
+    return {"release_references": _texts(elem, "DealReleaseReference"),
+            "territories": _texts(elem, "TerritoryCode"),
+            "commercial_models": _texts(elem, "CommercialModelType"),
+            "use_types": _texts(elem, "UseType"),
+            "start_date": _text(elem, "StartDate")}
+
+
+def iter_ern_records(source: Union[bytes, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+    """Yield ``{"record": kind, ...}`` dicts from an ERN message as they complete.
+
+    Raises ``xml.etree.ElementTree.ParseError`` where the document turns out
+    to be malformed; records before that point have already been yielded."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if not stack:
+                yield {"record": "message", "root_tag": elem.tag, "message_type": _local(elem.tag)}
+            stack.append(elem)
+            continue
+        stack.pop()
+        if not stack:
+            break
+        parent = stack[-1]
+        kind = RECORD_ELEMENTS.get((_local(parent.tag), _local(elem.tag)))
+        if kind is None and len(stack) == 1 and _local(elem.tag) == "MessageHeader":
+            kind = "header"
+        if kind is not None:
+            yield {"record": kind, **_extract(kind, elem)}
+        if kind is not None or len(stack) == 1:
+            # Done with this subtree; the containers above it stay empty
+            elem.clear()
+            parent.remove(elem)
@@ -1,6 +1,7 @@
 """
-Delivery Engine — Processes queued Distribution Hub deliveries as background tasks.
+Delivery Engine — Processes queued Distribution Hub deliveries through the durable job queue.
 Dispatches to platform adapters for real API delivery, falls back to export packages.
+Each adapter push is one job attempt; retries, leases and dead-lettering live in delivery_queue.
 """
 
 import os
@@ -11,12 +12,26 @@ from typing import Optional
 
 from config.database import db
 from services.platform_adapters import get_adapter, get_supported_platform_ids, DeliveryResult
+from services.delivery_queue import DeliveryJobQueue, DeliveryWorker
+from services.delivery_progress import get_batch_progress, transition_delivery_status
 from utils.delivery_ws_manager import delivery_ws_manager
+from async_init import schedule_init
 
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 3
+# Base of the jittered exponential backoff between attempts
 RETRY_DELAY_SECONDS = 5
+DELIVERY_WORKER_CONCURRENCY = int(os.environ.get("DELIVERY_WORKER_CONCURRENCY", "5"))
+DELIVERY_PLATFORM_CONCURRENCY = int(os.environ.get("DELIVERY_PLATFORM_CONCURRENCY", "3"))
+
+delivery_queue = DeliveryJobQueue(
+    db.delivery_jobs,
+    max_attempts=MAX_RETRIES + 1,
+    backoff_base_seconds=RETRY_DELAY_SECONDS,
+    platform_concurrency=DELIVERY_PLATFORM_CONCURRENCY,
+)
+schedule_init("Delivery job queue indexes", delivery_queue.ensure_indexes)
 
 
 async def _get_user_credentials(user_id: str, platform_id: str) -> Optional[dict]:
@@ -58,6 +73,13 @@ def _resolve_public_url(file_url: str) -> str:
     return f"{base_url}{file_url}" if base_url else file_url
 
 
+def _stored_response(result: DeliveryResult) -> dict:
+    """Adapter result as stored on the delivery; the upload session URL is a bearer credential and stays out"""
+    response = result.to_dict()
+    response["response_data"] = {k: v for k, v in result.response_data.items() if k != "upload_session"}
+    return response
+
+
 async def _resolve_file_path(content: dict) -> Optional[str]:
     """Resolve the local file path from a content record."""
     file_url = content.get("file_url", "")
@@ -82,8 +104,12 @@ async def _resolve_file_path(content: dict) -> Optional[str]:
 
 
 async def _update_delivery(delivery_id: str, updates: dict):
-    """Update a delivery record in the database."""
+    """Update a delivery record in the database, keeping batch counters in step with status."""
     updates["updated_at"] = datetime.now(timezone.utc).isoformat()
+    if "status" in updates:
+        status = updates.pop("status")
+        await transition_delivery_status({"id": delivery_id}, status, updates)
+        return
     await db.distribution_hub_deliveries.update_one(
         {"id": delivery_id},
         {"$set": updates},
@@ -118,10 +144,11 @@ async def _notify_batch_progress(batch_id: str, user_id: str):
         logger.debug(f"WS batch progress failed for {batch_id}: {e}")
 
 
-async def execute_delivery(delivery: dict):
+async def execute_delivery(delivery: dict, attempt: int = 1, final_attempt: bool = True) -> bool:
     """
-    Execute a single delivery: attempt real API push, fall back to export.
-    Updates the delivery record with results.
+    Execute one delivery attempt: real API push, or fall back to export.
+    Updates the delivery record with results. Returns False when the push failed
+    and the queue should retry it; a failed final attempt marks the delivery failed.
     """
     delivery_id = delivery["id"]
     platform_id = delivery["platform_id"]
@@ -129,7 +156,7 @@ async def execute_delivery(delivery: dict):
     content_id = delivery["content_id"]
     delivery_method = delivery.get("delivery_method", "export_package")
 
-    logger.info(f"Executing delivery {delivery_id} -> {platform_id} ({delivery_method})")
+    logger.info(f"Executing delivery {delivery_id} -> {platform_id} ({delivery_method}, attempt {attempt})")
 
     # Mark as preparing
     await _update_delivery(delivery_id, {"status": "preparing"})
@@ -142,7 +169,7 @@ async def execute_delivery(delivery: dict):
             "platform_response": {"method": "export_package", "message": "Ready for manual export/upload"},
         })
         await _notify_delivery_status(delivery, "export_ready")
-        return
+        return True
 
     # --- API Push delivery ---
     # Get content details
@@ -156,7 +183,7 @@ async def execute_delivery(delivery: dict):
             "platform_response": {"error": "Content not found"},
         })
         await _notify_delivery_status(delivery, "failed", "Content not found")
-        return
+        return True
 
     # Get adapter
     adapter = get_adapter(platform_id)
@@ -170,7 +197,7 @@ async def execute_delivery(delivery: dict):
             },
         })
         await _notify_delivery_status(delivery, "export_ready")
-        return
+        return True
 
     # Get credentials
     credentials = await _get_user_credentials(user_id, platform_id)
@@ -183,59 +210,88 @@ async def execute_delivery(delivery: dict):
             },
         })
         await _notify_delivery_status(delivery, "export_ready")
-        return
+        return True
 
     # Resolve file path and public URL
     file_path = await _resolve_file_path(content)
     content["public_file_url"] = _resolve_public_url(content.get("file_url", ""))
+    # Resumable upload session left by a previous interrupted attempt
+    content["upload_session"] = delivery.get("upload_session")
 
     # Mark as delivering
     await _update_delivery(delivery_id, {"status": "delivering"})
     await _notify_delivery_status(delivery, "delivering")
 
-    # Attempt delivery with retries
-    result = None
-    retry = 0
-    while retry <= MAX_RETRIES:
-        try:
-            result = await adapter.deliver(content, credentials, file_path)
-            if result.success:
-                break
-        except Exception as e:
-            logger.error(f"Delivery attempt {retry} failed for {delivery_id}: {e}")
-            result = DeliveryResult(False, message=str(e))
-
-        retry += 1
-        if retry <= MAX_RETRIES:
-            logger.info(f"Retrying delivery {delivery_id} (attempt {retry}/{MAX_RETRIES})")
-            await asyncio.sleep(RETRY_DELAY_SECONDS)
-
-    # Update final status
-    if result and result.success:
+    try:
+        result = await adapter.deliver(content, credentials, file_path)
+    except Exception as e:
+        logger.error(f"Delivery attempt {attempt} failed for {delivery_id}: {e}")
+        result = DeliveryResult(False, message=str(e))
+
+    if result.success:
         await _update_delivery(delivery_id, {
             "status": "delivered",
-            "platform_response": result.to_dict(),
+            "platform_response": _stored_response(result),
             "error_message": None,
-            "retry_count": retry,
+            "retry_count": attempt - 1,
+            "upload_session": None,
         })
         await _notify_delivery_status(delivery, "delivered")
         logger.info(f"Delivery {delivery_id} -> {platform_id} SUCCEEDED")
-    else:
-        error_msg = result.message if result else "Unknown error"
+        return True
+
+    error_msg = result.message or "Unknown error"
+    if not final_attempt:
+        # Back in the queue until the job's backoff elapses; keep any upload session to resume
         await _update_delivery(delivery_id, {
-            "status": "failed",
-            "platform_response": result.to_dict() if result else {},
+            "status": "queued",
+            "platform_response": _stored_response(result),
             "error_message": error_msg,
-            "retry_count": retry,
+            "retry_count": attempt,
+            "upload_session": result.response_data.get("upload_session"),
         })
-        await _notify_delivery_status(delivery, "failed", error_msg)
-        logger.warning(f"Delivery {delivery_id} -> {platform_id} FAILED: {error_msg}")
+        await _notify_delivery_status(delivery, "queued", error_msg)
+        logger.info(f"Delivery {delivery_id} -> {platform_id} attempt {attempt} failed, will retry: {error_msg}")
+        return False
+
+    # Out of attempts: nothing will resume the upload session
+    await _update_delivery(delivery_id, {
+        "status": "failed",
+        "platform_response": _stored_response(result),
+        "error_message": error_msg,
+        "retry_count": attempt - 1,
+        "upload_session": None,
+    })
+    await _notify_delivery_status(delivery, "failed", error_msg)
+    logger.warning(f"Delivery {delivery_id} -> {platform_id} FAILED: {error_msg}")
+    return False
+
+
+async def _run_delivery_job(job: dict, final_attempt: bool):
+    """Queue handler: run one attempt of the job's delivery and report (finished, error)."""
+    delivery = await db.distribution_hub_deliveries.find_one({"id": job["_id"]}, {"_id": 0})
+    if not delivery:
+        return True, "Delivery record not found"
+    try:
+        finished = await execute_delivery(delivery, attempt=job["attempts"], final_attempt=final_attempt)
+        error = None
+        if not finished:
+            latest = await db.distribution_hub_deliveries.find_one({"id": delivery["id"]}, {"_id": 0, "error_message": 1})
+            error = (latest or {}).get("error_message")
+    except Exception as e:
+        logger.error(f"Delivery {delivery['id']} attempt {job['attempts']} raised: {e}")
+        finished, error = False, str(e)
+        if final_attempt:
+            await _update_delivery(delivery["id"], {"status": "failed", "error_message": error, "upload_session": None})
+            await _notify_delivery_status(delivery, "failed", error)
+    await _notify_batch_progress(delivery["batch_id"], delivery["user_id"])
+    return finished, error
 
 
 async def process_delivery_batch(batch_id: str, user_id: str):
     """
-    Process all deliveries in a batch. Runs API-push deliveries concurrently.
-    Called as a background task after /distribute.
+    Enqueue all deliveries in a batch for the delivery workers.
+    Called as a background task after /distribute; jobs survive restarts.
     """
     deliveries = []
     async for doc in db.distribution_hub_deliveries.find(
@@ -247,28 +303,13 @@ async def process_delivery_batch(batch_id: str, user_id: str):
         logger.warning(f"No deliveries found for batch {batch_id}")
         return
 
-    logger.info(f"Processing batch {batch_id}: {len(deliveries)} deliveries")
-
-    # Process concurrently with a semaphore to limit parallelism
-    semaphore = asyncio.Semaphore(5)
-
-    async def run_with_semaphore(delivery):
-        async with semaphore:
-            await execute_delivery(delivery)
-            # Broadcast updated batch progress after each delivery completes
-            await _notify_batch_progress(batch_id, user_id)
-
-    tasks = [run_with_semaphore(d) for d in deliveries]
-    await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Final batch progress broadcast
+    await delivery_queue.enqueue(deliveries)
+    logger.info(f"Queued batch {batch_id}: {len(deliveries)} deliveries")
     await _notify_batch_progress(batch_id, user_id)
 
-    logger.info(f"Batch {batch_id} processing complete")
-
 
 async def retry_failed_delivery(delivery_id: str, user_id: str) -> bool:
-    """Retry a single failed delivery."""
+    """Requeue a single failed delivery with a fresh attempt budget."""
     doc = await db.distribution_hub_deliveries.find_one(
         {"id": delivery_id, "user_id": user_id}, {"_id": 0}
     )
@@ -277,23 +318,31 @@ async def retry_failed_delivery(delivery_id: str, user_id: str) -> bool:
     if doc.get("status") != "failed":
         return False
 
-    await _update_delivery(delivery_id, {"status": "queued", "error_message": None})
-    await execute_delivery(doc)
+    if not await delivery_queue.requeue(doc):
+        return False
+    # Only while still failed: a worker may already have claimed the fresh job
+    await transition_delivery_status(
+        {"id": delivery_id, "status": "failed"},
+        "queued",
+        {"error_message": None, "updated_at": datetime.now(timezone.utc).isoformat()},
+    )
     return True
 
 
-async def get_batch_progress(batch_id: str, user_id: str) -> dict:
-    """Get progress summary for a delivery batch."""
-    counts = {"total": 0, "delivered": 0, "failed": 0, "delivering": 0, "queued": 0, "preparing": 0, "export_ready": 0}
-    async for doc in db.distribution_hub_deliveries.find(
-        {"batch_id": batch_id, "user_id": user_id}, {"_id": 0, "status": 1}
-    ):
-        counts["total"] += 1
-        status = doc.get("status", "queued")
-        if status in counts:
-            counts[status] += 1
-
-    completed = counts["delivered"] + counts["failed"] + counts["export_ready"]
-    counts["progress_pct"] = round((completed / max(counts["total"], 1)) * 100, 1)
-    counts["is_complete"] = completed >= counts["total"]
-    return counts
+async def recover_unqueued_deliveries():
+    """Enqueue in-progress deliveries that have no job, e.g. ones created before the queue existed."""
+    deliveries = await db.distribution_hub_deliveries.find(
+        {"status": {"$in": ["queued", "preparing", "delivering"]}}, {"_id": 0}
+    ).to_list(length=None)
+    if deliveries:
+        await delivery_queue.enqueue(deliveries)
+        logger.info(f"Ensured delivery jobs exist for {len(deliveries)} in-progress deliveries")
+
+
+def start_delivery_worker():
+    """Launch this process's delivery worker; run any number of processes to scale out."""
+    worker = DeliveryWorker(delivery_queue, _run_delivery_job, DELIVERY_WORKER_CONCURRENCY)
+    loop = asyncio.get_event_loop()
+    loop.create_task(recover_unqueued_deliveries())
+    loop.create_task(worker.run())
+    logger.info(f"Delivery worker {worker.worker_id} launched")
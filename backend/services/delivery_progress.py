@@ -0,0 +1,172 @@
+"""
+Delivery Batch Progress — per-batch status counters maintained with $inc.
+
+Every delivery status change goes through ``transition_delivery_status``,
+which atomically swaps the delivery's status (reading the previous one)
+and moves one unit between the batch's status counters. Progress reads
+and WebSocket notifications use the counter document instead of scanning
+the batch. Counters can drift if a process dies between the two writes,
+so a background job recounts batches once they go quiet.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+
+from config.database import db
+from async_init import schedule_init
+
+logger = logging.getLogger(__name__)
+
+# Statuses reported individually in progress payloads; others still count toward total
+PROGRESS_STATUSES = ("delivered", "failed", "delivering", "queued", "preparing", "export_ready")
+COMPLETED_STATUSES = ("delivered", "failed", "export_ready")
+DEFAULT_STATUS = "queued"
+
+RECONCILE_INTERVAL_SECONDS = 60
+# A batch is recounted once no counter update has touched it for this long
+RECONCILE_QUIET_SECONDS = 30
+
+progress_collection = db.delivery_batch_progress
+
+
+async def _ensure_indexes():
+    await progress_collection.create_index([("dirty", ASCENDING), ("updated_at", ASCENDING)])
+    await db.distribution_hub_deliveries.create_index([("batch_id", ASCENDING), ("status", ASCENDING)])
+
+
+schedule_init("Delivery batch progress indexes", _ensure_indexes)
+
+
+def _status_name(status) -> str:
+    """Counter name for a status; statuses can come from API input, so keep them path-safe"""
+    status = getattr(status, "value", status) or DEFAULT_STATUS  # DeliveryStatus members
+    return str(status).replace(".", "_").replace("$", "_")
+
+
+def _counter_key(status) -> str:
+    return f"counts.{_status_name(status)}"
+
+
+async def record_batch_created(batch_id: str, user_id: str, deliveries: List[dict]):
+    """Initialize counters for a freshly inserted batch."""
+    counts: Dict[str, int] = {}
+    for delivery in deliveries:
+        key = _counter_key(delivery.get("status"))
+        counts[key] = counts.get(key, 0) + 1
+    now = datetime.now(timezone.utc)
+    await progress_collection.update_one(
+        {"_id": batch_id},
+        {
+            "$set": {"user_id": user_id, "updated_at": now, "dirty": True},
+            "$inc": {"total": len(deliveries), **counts},
+        },
+        upsert=True,
+    )
+
+
+async def transition_delivery_status(delivery_filter: dict, status: str, updates: Optional[dict] = None) -> Optional[dict]:
+    """
+    Set a delivery's status (plus any other fields) and adjust its batch counters.
+    Returns the delivery as it was before the update, or None if nothing matched.
+    """
+    fields = {**(updates or {}), "status": status}
+    previous = await db.distribution_hub_deliveries.find_one_and_update(
+        delivery_filter,
+        {"$set": fields},
+        projection={"_id": 0, "batch_id": 1, "status": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None:
+        return None
+    old_key, new_key = _counter_key(previous.get("status")), _counter_key(status)
+    if old_key != new_key and previous.get("batch_id"):
+        await progress_collection.update_one(
+            {"_id": previous["batch_id"]},
+            {
+                "$inc": {old_key: -1, new_key: 1},
+                "$set": {"updated_at": datetime.now(timezone.utc), "dirty": True},
+            },
+        )
+    return previous
+
+
+def _progress_payload(total: int, counts: Dict[str, int]) -> dict:
+    progress = {"total": total}
+    for status in PROGRESS_STATUSES:
+        progress[status] = max(counts.get(status, 0), 0)
+    completed = sum(progress[s] for s in COMPLETED_STATUSES)
+    progress["progress_pct"] = round((completed / max(total, 1)) * 100, 1)
+    progress["is_complete"] = completed >= total
+    return progress
+
+
+async def reconcile_batch(batch_id: str, seen_updated_at: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Recount a batch from its delivery documents and overwrite its counters.
+    With ``seen_updated_at`` the overwrite is skipped if a transition landed meanwhile.
+    """
+    counts: Dict[str, int] = {}
+    total = 0
+    user_id = None
+    async for row in db.distribution_hub_deliveries.aggregate([
+        {"$match": {"batch_id": batch_id}},
+        {"$group": {"_id": {"status": "$status", "user_id": "$user_id"}, "count": {"$sum": 1}}},
+    ]):
+        key = _status_name(row["_id"].get("status"))
+        counts[key] = counts.get(key, 0) + row["count"]
+        user_id = row["_id"].get("user_id")
+        total += row["count"]
+    if not total:
+        return None
+    doc = {"user_id": user_id, "total": total, "counts": counts,
+           "reconciled_at": datetime.now(timezone.utc), "dirty": False}
+    if seen_updated_at is None:
+        await progress_collection.update_one({"_id": batch_id}, {"$set": doc}, upsert=True)
+    else:
+        await progress_collection.update_one({"_id": batch_id, "updated_at": seen_updated_at}, {"$set": doc})
+    return doc
+
+
+async def get_batch_progress(batch_id: str, user_id: str) -> dict:
+    """Progress summary for a delivery batch, read from its counters."""
+    doc = await progress_collection.find_one({"_id": batch_id})
+    if doc is None:
+        # Batch created before counters existed
+        doc = await reconcile_batch(batch_id)
+    if doc is None or doc.get("user_id") != user_id:
+        return _progress_payload(0, {})
+    return _progress_payload(doc.get("total", 0), doc.get("counts", {}))
+
+
+async def reconcile_quiet_batches() -> int:
+    """Recount every batch that changed since its last reconciliation and has since gone quiet."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=RECONCILE_QUIET_SECONDS)
+    reconciled = 0
+    async for doc in progress_collection.find(
+        {"dirty": True, "updated_at": {"$lt": cutoff}}, {"_id": 1, "updated_at": 1}
+    ):
+        await reconcile_batch(doc["_id"], seen_updated_at=doc["updated_at"])
+        reconciled += 1
+    return reconciled
+
+
+async def _reconcile_loop():
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+        try:
+            reconciled = await reconcile_quiet_batches()
+            if reconciled:
+                logger.info(f"Reconciled progress counters for {reconciled} delivery batches")
+        except Exception as e:
+            logger.error(f"Delivery batch progress reconciliation failed: {e}")
+
+
+def start_batch_progress_reconciler():
+    """Launch the background job that corrects batch counter drift."""
+    loop = asyncio.get_event_loop()
+    loop.create_task(_reconcile_loop())
+    logger.info("Delivery batch progress reconciler launched")
@@ -0,0 +1,251 @@
+"""
+Delivery Job Queue — durable, MongoDB-backed queue for Distribution Hub deliveries.
+
+Jobs live in ``delivery_jobs`` keyed by delivery id, so enqueueing is
+idempotent. Any number of worker processes claim jobs with an atomic
+find-and-modify that sets a lease; a running job heartbeats to extend it,
+and a job whose lease expires (worker crashed or was redeployed) becomes
+claimable again. Failed attempts are rescheduled with full-jitter
+exponential backoff and dead-lettered after ``max_attempts``. A per-platform
+cap bounds how many jobs for one platform are leased at once.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo import ASCENDING, ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_LEASED = "leased"
+JOB_SUCCEEDED = "succeeded"
+JOB_DEAD = "dead"
+
+LEASE_SECONDS = int(os.environ.get("DELIVERY_LEASE_SECONDS", "60"))
+BACKOFF_CAP_SECONDS = int(os.environ.get("DELIVERY_BACKOFF_CAP_SECONDS", "600"))
+POLL_INTERVAL_SECONDS = 1.0
+POLL_INTERVAL_MAX_SECONDS = 10.0
+
+# Called with (job, is_final_attempt); returns (finished, error). finished=False schedules a retry
+JobHandler = Callable[[dict, bool], Awaitable[Tuple[bool, Optional[str]]]]
+
+
+def backoff_delay(attempt: int, base_seconds: float, cap_seconds: float = BACKOFF_CAP_SECONDS) -> float:
+    """Full-jitter exponential backoff so retries against a failing platform spread out"""
+    return random.uniform(0, min(cap_seconds, base_seconds * (2 ** max(attempt - 1, 0))))
+
+
+class DeliveryJobQueue:
+    """Leased job queue over a MongoDB collection"""
+
+    def __init__(self, collection, max_attempts: int, backoff_base_seconds: float, platform_concurrency: int):
+        self.jobs = collection
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.platform_concurrency = platform_concurrency
+
+    async def ensure_indexes(self):
+        await self.jobs.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+        await self.jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        await self.jobs.create_index([("platform_id", ASCENDING), ("status", ASCENDING)])
+        await self.jobs.create_index("batch_id")
+
+    async def enqueue(self, deliveries: List[dict]):
+        """Create a pending job per delivery; deliveries that already have a job are left alone"""
+        now = datetime.now(timezone.utc)
+        for delivery in deliveries:
+            await self.jobs.update_one(
+                {"_id": delivery["id"]},
+                {"$setOnInsert": self._new_job(delivery, now)},
+                upsert=True,
+            )
+
+    async def requeue(self, delivery: dict) -> bool:
+        """Reset a finished or dead-lettered job so it runs again with a fresh attempt budget"""
+        now = datetime.now(timezone.utc)
+        fresh = self._new_job(delivery, now)
+        result = await self.jobs.update_one(
+            {"_id": delivery["id"], "status": {"$ne": JOB_LEASED}},
+            {"$set": fresh},
+        )
+        if result.matched_count:
+            return True
+        existing = await self.jobs.find_one({"_id": delivery["id"]}, {"status": 1})
+        if existing:
+            # Currently running; that attempt will report its own outcome
+            return False
+        await self.enqueue([delivery])
+        return True
+
+    @staticmethod
+    def _new_job(delivery: dict, now: datetime) -> dict:
+        return {
+            "batch_id": delivery.get("batch_id"),
+            "user_id": delivery.get("user_id"),
+            "platform_id": delivery.get("platform_id"),
+            "status": JOB_PENDING,
+            "attempts": 0,
+            "available_at": now,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def _saturated_platforms(self, now: datetime) -> Set[str]:
+        pipeline = [
+            {"$match": {"status": JOB_LEASED, "lease_expires_at": {"$gte": now}}},
+            {"$group": {"_id": "$platform_id", "in_flight": {"$sum": 1}}},
+            {"$match": {"in_flight": {"$gte": self.platform_concurrency}}},
+        ]
+        return {row["_id"] async for row in self.jobs.aggregate(pipeline)}
+
+    async def claim(self, worker_id: str, skip_platforms: Optional[Set[str]] = None) -> Optional[dict]:
+        """Atomically lease the next due job, including jobs whose previous lease expired"""
+        now = datetime.now(timezone.utc)
+        excluded = await self._saturated_platforms(now) | (skip_platforms or set())
+        query = {"$or": [
+            {"status": JOB_PENDING, "available_at": {"$lte": now}},
+            {"status": JOB_LEASED, "lease_expires_at": {"$lt": now}},
+        ]}
+        if excluded:
+            query["platform_id"] = {"$nin": list(excluded)}
+        return await self.jobs.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": JOB_LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend a held lease; False means the lease was lost to another worker"""
+        now = datetime.now(timezone.utc)
+        result = await self.jobs.update_one(
+            {"_id": job_id, "status": JOB_LEASED, "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=LEASE_SECONDS), "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    def is_final_attempt(self, job: dict) -> bool:
+        return job.get("attempts", 0) >= self.max_attempts
+
+    async def complete(self, job: dict, worker_id: str, finished: bool, error: Optional[str] = None) -> str:
+        """Record an attempt outcome: succeeded, rescheduled with backoff, or dead-lettered"""
+        now = datetime.now(timezone.utc)
+        if finished:
+            update = {"status": JOB_SUCCEEDED, "finished_at": now}
+        elif self.is_final_attempt(job):
+            update = {"status": JOB_DEAD, "dead_lettered_at": now}
+        else:
+            delay = backoff_delay(job["attempts"], self.backoff_base_seconds)
+            update = {"status": JOB_PENDING, "available_at": now + timedelta(seconds=delay)}
+        update.update({"lease_owner": None, "lease_expires_at": None, "last_error": error, "updated_at": now})
+        result = await self.jobs.update_one(
+            {"_id": job["_id"], "status": JOB_LEASED, "lease_owner": worker_id},
+            {"$set": update},
+        )
+        if not result.matched_count:
+            logger.warning(f"Delivery job {job['_id']} lease lost before completion; outcome discarded")
+        return update["status"]
+
+    async def stats(self) -> Dict[str, object]:
+        counts = {JOB_PENDING: 0, JOB_LEASED: 0, JOB_SUCCEEDED: 0, JOB_DEAD: 0}
+        async for row in self.jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        in_flight = {}
+        async for row in self.jobs.aggregate([
+            {"$match": {"status": JOB_LEASED}},
+            {"$group": {"_id": "$platform_id", "count": {"$sum": 1}}},
+        ]):
+            in_flight[row["_id"]] = row["count"]
+        return {
+            "jobs": counts,
+            "in_flight_by_platform": in_flight,
+            "max_attempts": self.max_attempts,
+            "platform_concurrency": self.platform_concurrency,
+            "lease_seconds": LEASE_SECONDS,
+        }
+
+
+class DeliveryWorker:
+    """Claims and runs delivery jobs with bounded local concurrency"""
+
+    def __init__(self, queue: DeliveryJobQueue, handler: JobHandler, concurrency: int):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[str, str] = {}  # job id -> platform id
+
+    def _locally_saturated(self) -> Set[str]:
+        per_platform: Dict[str, int] = {}
+        for platform_id in self._running.values():
+            per_platform[platform_id] = per_platform.get(platform_id, 0) + 1
+        return {p for p, n in per_platform.items() if n >= self.queue.platform_concurrency}
+
+    async def run(self):
+        """Poll for due jobs forever; idle polling backs off up to POLL_INTERVAL_MAX_SECONDS"""
+        slots = asyncio.Semaphore(self.concurrency)
+        idle = POLL_INTERVAL_SECONDS
+        logger.info(f"Delivery worker {self.worker_id} started (concurrency={self.concurrency})")
+        while True:
+            await slots.acquire()
+            try:
+                job = await self.queue.claim(self.worker_id, self._locally_saturated())
+            except Exception as e:
+                logger.error(f"Delivery job claim failed: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                await asyncio.sleep(idle)
+                idle = min(idle * 2, POLL_INTERVAL_MAX_SECONDS)
+                continue
+            idle = POLL_INTERVAL_SECONDS
+            self._running[job["_id"]] = job.get("platform_id")
+            asyncio.get_event_loop().create_task(self._run_job(job, slots))
+
+    async def _run_job(self, job: dict, slots: asyncio.Semaphore):
+        heartbeat = asyncio.get_event_loop().create_task(self._heartbeat(job["_id"]))
+        finished, error = False, None
+        try:
+            finished, error = await self.handler(job, self.queue.is_final_attempt(job))
+        except Exception as e:
+            logger.error(f"Delivery job {job['_id']} attempt {job.get('attempts')} raised: {e}")
+            error = str(e)
+        finally:
+            heartbeat.cancel()
+            try:
+                status = await self.queue.complete(job, self.worker_id, finished, error)
+                if status == JOB_DEAD:
+                    logger.warning(f"Delivery job {job['_id']} dead-lettered after {job.get('attempts')} attempts")
+            except Exception as e:
+                # The lease will expire and another worker will pick the job up
+                logger.error(f"Delivery job {job['_id']} completion failed: {e}")
+            self._running.pop(job["_id"], None)
+            slots.release()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                if not await self.queue.heartbeat(job_id, self.worker_id):
+                    logger.warning(f"Delivery job {job_id} lease lost")
+                    return
+            except Exception as e:
+                logger.warning(f"Delivery job {job_id} heartbeat failed: {e}")
@@ -12,6 +12,10 @@ from datetime import datetime, timezone
 from enum import Enum
 
 from config.database import db
+from services.delivery_progress import record_batch_created, transition_delivery_status
+
+# Deliveries as returned to clients; a resumable upload session URL is a bearer credential
+DELIVERY_PROJECTION = {"_id": 0, "upload_session": 0}
 
 
 class ContentType(str, Enum):
@@ -396,6 +400,7 @@ class DistributionHubService:
 
         if deliveries:
             await db.distribution_hub_deliveries.insert_many(deliveries)
+            await record_batch_created(delivery_batch_id, user_id, deliveries)
             # Remove _id from each for JSON response
             for d in deliveries:
                 d.pop("_id", None)
@@ -431,32 +436,30 @@ class DistributionHubService:
         if status:
             query["status"] = status
         items = []
-        async for doc in db.distribution_hub_deliveries.find(query, {"_id": 0}).sort("created_at", -1).limit(limit):
+        async for doc in db.distribution_hub_deliveries.find(query, DELIVERY_PROJECTION).sort("created_at", -1).limit(limit):
             items.append(doc)
         return items
 
     async def get_delivery_batch(self, batch_id: str, user_id: str) -> list:
         items = []
         async for doc in db.distribution_hub_deliveries.find(
-            {"batch_id": batch_id, "user_id": user_id}, {"_id": 0}
+            {"batch_id": batch_id, "user_id": user_id}, DELIVERY_PROJECTION
         ):
             items.append(doc)
         return items
 
     async def update_delivery_status(self, delivery_id: str, user_id: str, status: str, response_data: dict = None) -> Optional[dict]:
         update = {
-            "status": status,
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         if response_data:
             update["platform_response"] = response_data
-        result = await db.distribution_hub_deliveries.update_one(
-            {"id": delivery_id, "user_id": user_id},
-            {"$set": update}
+        previous = await transition_delivery_status(
+            {"id": delivery_id, "user_id": user_id}, status, update
         )
-        if result.modified_count == 0:
+        if previous is None:
             return None
-        doc = await db.distribution_hub_deliveries.find_one({"id": delivery_id}, {"_id": 0})
+        doc = await db.distribution_hub_deliveries.find_one({"id": delivery_id}, DELIVERY_PROJECTION)
         return doc
 
     # ─── EXPORT PACKAGE GENERATION ───
@@ -498,13 +501,13 @@ class DistributionHubService:
         }
 
         # Update delivery to mark export generated
-        await db.distribution_hub_deliveries.update_one(
+        await transition_delivery_status(
             {"id": delivery_id},
-            {"$set": {
-                "status": "export_ready",
+            "export_ready",
+            {
                 "export_package": package,
                 "updated_at": datetime.now(timezone.utc).isoformat()
-            }}
+            }
         )
 
         return package
@@ -12,7 +12,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
+from async_init import schedule_init
 import boto3
 from pathlib import Path
 
@@ -99,7 +100,7 @@ class PlatformConnector(BaseModel):
 
 class DistributionOrchestrationService:
     def __init__(self):
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         
         # Collections
@@ -108,7 +109,7 @@ class DistributionOrchestrationService:
         self.delivery_receipts_collection = self.db['delivery_receipts']
         
         # Initialize platform connectors
-        self._initialize_platform_connectors()
+        schedule_init("Distribution platform connectors", self._initialize_platform_connectors)
         
         # AWS S3 client for file storage
         self.s3_client = boto3.client(
@@ -118,7 +119,7 @@ class DistributionOrchestrationService:
         
         self.s3_bucket = os.environ.get('S3_BUCKET', 'bigmann-entertainment-media')
     
-    def _initialize_platform_connectors(self):
+    async def _initialize_platform_connectors(self):
         """Initialize platform connector configurations"""
         
         platform_configs = [
@@ -228,14 +229,14 @@ class DistributionOrchestrationService:
         
         # Insert platform connectors if they don't exist
         for config in platform_configs:
-            existing = self.platform_connectors_collection.find_one({
+            existing = await self.platform_connectors_collection.find_one({
                 "platform_name": config["platform_name"]
             })
             
             if not existing:
                 connector = PlatformConnector(**config)
                 connector_dict = connector.dict()
-                self.platform_connectors_collection.insert_one(connector_dict)
+                await self.platform_connectors_collection.insert_one(connector_dict)
     
     async def create_distribution_job(self,
                                     content_id: str,
@@ -249,7 +250,7 @@ class DistributionOrchestrationService:
         
         try:
             # Get platform connector
-            connector = self.platform_connectors_collection.find_one({
+            connector = await self.platform_connectors_collection.find_one({
                 "platform_name": platform_name
             })
             
@@ -257,7 +258,7 @@ class DistributionOrchestrationService:
                 raise ValueError(f"Platform connector not found: {platform_name}")
             
             # Get delivery profile
-            delivery_profile = self.db['delivery_profiles'].find_one({
+            delivery_profile = await self.db['delivery_profiles'].find_one({
                 "profile_id": delivery_profile_id
             })
             
@@ -288,11 +289,11 @@ class DistributionOrchestrationService:
             job_dict["created_at"] = job.created_at.isoformat()
             job_dict["updated_at"] = job.updated_at.isoformat()
             
-            result = self.distribution_jobs_collection.insert_one(job_dict)
+            result = await self.distribution_jobs_collection.insert_one(job_dict)
             job.distribution_id = str(result.inserted_id)
             
             # Update with distribution_id
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"_id": result.inserted_id},
                 {"$set": {"distribution_id": job.distribution_id}}
             )
@@ -309,7 +310,7 @@ class DistributionOrchestrationService:
         
         try:
             # Get job from database
-            job_data = self.distribution_jobs_collection.find_one({
+            job_data = await self.distribution_jobs_collection.find_one({
                 "distribution_id": distribution_id
             })
             
@@ -322,7 +323,7 @@ class DistributionOrchestrationService:
             await self._update_job_status(distribution_id, DeliveryStatus.PREPARING, 10.0)
             
             # Get platform connector
-            connector = self.platform_connectors_collection.find_one({
+            connector = await self.platform_connectors_collection.find_one({
                 "platform_name": job.platform_name
             })
             
@@ -416,7 +417,7 @@ class DistributionOrchestrationService:
             }
             
             # Update job with platform response
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -461,7 +462,7 @@ class DistributionOrchestrationService:
                 "status": "published"
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -506,7 +507,7 @@ class DistributionOrchestrationService:
                 "status": "processing"
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -547,7 +548,7 @@ class DistributionOrchestrationService:
                 "estimated_live_date": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -578,7 +579,7 @@ class DistributionOrchestrationService:
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -609,7 +610,7 @@ class DistributionOrchestrationService:
                 "file_count": len(job.source_files)
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -640,7 +641,7 @@ class DistributionOrchestrationService:
                 "recipient": connector.get("delivery_email", "content@platform.com")
             }
             
-            self.distribution_jobs_collection.update_one(
+            await self.distribution_jobs_collection.update_one(
                 {"distribution_id": job.distribution_id},
                 {
                     "$set": {
@@ -672,7 +673,7 @@ class DistributionOrchestrationService:
                     "verification_time": datetime.now(timezone.utc).isoformat()
                 }
                 
-                self.distribution_jobs_collection.update_one(
+                await self.distribution_jobs_collection.update_one(
                     {"distribution_id": job.distribution_id},
                     {"$set": {"verification_completed_at": datetime.now(timezone.utc).isoformat()}}
                 )
@@ -708,7 +709,7 @@ class DistributionOrchestrationService:
         elif status == DeliveryStatus.DELIVERED:
             update_data["delivery_completed_at"] = datetime.now(timezone.utc).isoformat()
         
-        self.distribution_jobs_collection.update_one(
+        await self.distribution_jobs_collection.update_one(
             {"distribution_id": distribution_id},
             {"$set": update_data}
         )
@@ -717,7 +718,7 @@ class DistributionOrchestrationService:
         """Get status of a distribution job"""
         
         try:
-            job_data = self.distribution_jobs_collection.find_one({
+            job_data = await self.distribution_jobs_collection.find_one({
                 "distribution_id": distribution_id
             })
             
@@ -738,7 +739,7 @@ class DistributionOrchestrationService:
             if status:
                 query["status"] = status
             
-            jobs_data = list(self.distribution_jobs_collection.find(query).sort("created_at", -1))
+            jobs_data = await self.distribution_jobs_collection.find(query).sort("created_at", -1).to_list(length=None)
             
             jobs = []
             for job_data in jobs_data:
@@ -755,7 +756,7 @@ class DistributionOrchestrationService:
         """Get all available platform connectors"""
         
         try:
-            connectors_data = list(self.platform_connectors_collection.find())
+            connectors_data = await self.platform_connectors_collection.find().to_list(length=None)
             
             connectors = []
             for connector_data in connectors_data:
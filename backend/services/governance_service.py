@@ -7,7 +7,7 @@ import logging
 import os
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 logger = logging.getLogger("governance_service")
 
@@ -19,7 +19,7 @@ def get_governance_service():
     if _governance_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _governance_instance = GovernanceService(db)
     return _governance_instance
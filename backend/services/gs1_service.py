@@ -3,7 +3,6 @@ GS1 Asset Registry Service
 Core business logic for GS1 identifier generation, validation, and management
 """
 
-import asyncio
 import hashlib
 import os
 import qrcode
@@ -17,6 +16,7 @@ import re
 import logging
 import uuid
 
+from async_init import schedule_init
 from gs1_models import (
     GS1Asset, AssetType, IdentifierType, GS1IdentifierStatus,
     GTINIdentifier, GLNIdentifier, GDTIIdentifier, ISRCIdentifier, ISANIdentifier,
@@ -44,16 +44,8 @@ class GS1Service:
         self.legal_entity_gln = "0860004340201"  # Legal Entity Global Location Number
         self.base_uri = os.environ.get("FRONTEND_URL", "https://bigmannentertainment.com")
         
-        # Initialize collections (only schedule if an event loop is running)
-        try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(self._initialize_collections())
-        except RuntimeError:
-            # When imported in non-ASGI contexts (e.g. pytest import of server.py),
-            # there may be no running event loop. In that case, we skip background
-            # initialization; collections will be created lazily when the service
-            # is used under a real event loop.
-            logger.warning("GS1Service initialization skipped: no running event loop available")
+        # Initialize collections
+        schedule_init("GS1 collections", self._initialize_collections)
     
     async def _initialize_collections(self):
         """Initialize database collections with indexes"""
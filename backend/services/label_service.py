@@ -1,6 +1,6 @@
 import os
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from typing import List, Dict, Any, Optional
 from datetime import datetime, date, timedelta
 import uuid
@@ -10,7 +10,7 @@ import json
 
 # Database connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/bigmann')
-client = AsyncIOMotorClient(MONGO_URL)
+client = get_mongo_client(MONGO_URL)
 db = client.bigmann  # Explicitly specify database name
 
 class LabelManagementService:
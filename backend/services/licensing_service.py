@@ -4,6 +4,7 @@ from decimal import Decimal
 import json
 from bson import ObjectId
 from pymongo import MongoClient
+from blocking_io import LoopBlockingGuard
 import os
 
 from licensing_models import (
@@ -17,7 +18,8 @@ class LicensingService:
     def __init__(self):
         mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
         db_name = os.environ.get('DB_NAME', 'test_database')
-        self.client = MongoClient(mongo_url)
+        # Blocking client: callers must go through blocking_io.run_blocking
+        self.client = MongoClient(mongo_url, event_listeners=[LoopBlockingGuard("LicensingService")])
         self.db = self.client[db_name]
         
         # Collections
@@ -816,6 +818,14 @@ class LicensingService:
             "processing_status": "completed"
         }
     
+    def find_compensations(self, query: Dict[str, Any], limit: int) -> List[Dict]:
+        """Daily compensation records matching ``query``, newest first"""
+        return list(self.daily_compensations.find(query).sort("compensation_date", -1).limit(limit))
+
+    def find_payouts(self, query: Dict[str, Any], limit: int) -> List[Dict]:
+        """Compensation payouts matching ``query``, newest first"""
+        return list(self.compensation_payouts.find(query).sort("payout_date", -1).limit(limit))
+
     def get_compensation_dashboard(self, period_days: int = 30) -> Dict[str, Any]:
         """Get comprehensive compensation dashboard"""
         end_date = datetime.utcnow()
@@ -11,7 +11,7 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
 import schedule
 import threading
 
@@ -170,7 +170,7 @@ class AutomationRule(BaseModel):
 
 class LifecycleManagementService:
     def __init__(self):
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         
         # Collections
@@ -263,11 +263,11 @@ class LifecycleManagementService:
         version_dict = initial_version.dict()
         version_dict["created_at"] = initial_version.created_at.isoformat()
         
-        version_result = self.versions_collection.insert_one(version_dict)
+        version_result = await self.versions_collection.insert_one(version_dict)
         version_id = str(version_result.inserted_id)
         
         # Update the version document with the version_id
-        self.versions_collection.update_one(
+        await self.versions_collection.update_one(
             {"_id": version_result.inserted_id},
             {"$set": {"version_id": version_id}}
         )
@@ -314,11 +314,11 @@ class LifecycleManagementService:
         if lifecycle.last_performance_check:
             lifecycle_dict["last_performance_check"] = lifecycle.last_performance_check.isoformat()
         
-        result = self.lifecycles_collection.insert_one(lifecycle_dict)
+        result = await self.lifecycles_collection.insert_one(lifecycle_dict)
         lifecycle.lifecycle_id = str(result.inserted_id)
         
         # Update the lifecycle document with the lifecycle_id
-        self.lifecycles_collection.update_one(
+        await self.lifecycles_collection.update_one(
             {"_id": result.inserted_id},
             {"$set": {"lifecycle_id": lifecycle.lifecycle_id}}
         )
@@ -370,7 +370,7 @@ class LifecycleManagementService:
         if set_as_current:
             new_version_obj.is_current = True
             # Update previous version
-            self.versions_collection.update_one(
+            await self.versions_collection.update_one(
                 {"version_id": current_version.version_id, "created_by": user_id},
                 {"$set": {"is_current": False}}
             )
@@ -379,11 +379,11 @@ class LifecycleManagementService:
         version_dict = new_version_obj.dict()
         version_dict["created_at"] = new_version_obj.created_at.isoformat()
         
-        result = self.versions_collection.insert_one(version_dict)
+        result = await self.versions_collection.insert_one(version_dict)
         new_version_obj.version_id = str(result.inserted_id)
         
         # Update the version document with the version_id
-        self.versions_collection.update_one(
+        await self.versions_collection.update_one(
             {"_id": result.inserted_id},
             {"$set": {"version_id": new_version_obj.version_id}}
         )
@@ -425,7 +425,7 @@ class LifecycleManagementService:
                 "$push": {"stage_history": stage_entry}
             }
             
-            self.lifecycles_collection.update_one(
+            await self.lifecycles_collection.update_one(
                 {"content_id": content_id, "user_id": user_id},
                 update_operations
             )
@@ -470,7 +470,7 @@ class LifecycleManagementService:
                 "$push": {"status_history": status_entry}
             }
             
-            self.lifecycles_collection.update_one(
+            await self.lifecycles_collection.update_one(
                 {"content_id": content_id, "user_id": user_id},
                 update_operations
             )
@@ -512,11 +512,11 @@ class LifecycleManagementService:
         if automation_rule.next_execution:
             rule_dict["next_execution"] = automation_rule.next_execution.isoformat()
         
-        result = self.automation_rules_collection.insert_one(rule_dict)
+        result = await self.automation_rules_collection.insert_one(rule_dict)
         automation_rule.rule_id = str(result.inserted_id)
         
         # Update the rule document with the rule_id
-        self.automation_rules_collection.update_one(
+        await self.automation_rules_collection.update_one(
             {"_id": result.inserted_id},
             {"$set": {"rule_id": automation_rule.rule_id}}
         )
@@ -527,7 +527,7 @@ class LifecycleManagementService:
         """Get content lifecycle"""
         
         try:
-            lifecycle_data = self.lifecycles_collection.find_one({
+            lifecycle_data = await self.lifecycles_collection.find_one({
                 "content_id": content_id,
                 "user_id": user_id
             })
@@ -546,7 +546,7 @@ class LifecycleManagementService:
         """Get specific content version"""
         
         try:
-            version_data = self.versions_collection.find_one({
+            version_data = await self.versions_collection.find_one({
                 "version_id": version_id,
                 "created_by": user_id
             })
@@ -580,7 +580,7 @@ class LifecycleManagementService:
             cursor = self.lifecycles_collection.find(query).sort("updated_at", -1).skip(offset).limit(limit)
             
             lifecycles = []
-            for lifecycle_data in cursor:
+            async for lifecycle_data in cursor:
                 try:
                     lifecycle_data['_id'] = str(lifecycle_data['_id'])
                     lifecycles.append(ContentLifecycle(**lifecycle_data))
@@ -619,7 +619,7 @@ class LifecycleManagementService:
     async def _update_lifecycle_current_version(self, content_id: str, user_id: str, version_id: str):
         """Update the current version in lifecycle"""
         
-        self.lifecycles_collection.update_one(
+        await self.lifecycles_collection.update_one(
             {"content_id": content_id, "user_id": user_id},
             {
                 "$set": {
@@ -640,7 +640,7 @@ class LifecycleManagementService:
             "trigger_type": AutomationTrigger.USER_ACTION.value
         })
         
-        for rule_data in rules_cursor:
+        async for rule_data in rules_cursor:
             try:
                 rule = AutomationRule(**rule_data)
                 
@@ -661,7 +661,7 @@ class LifecycleManagementService:
             "trigger_type": AutomationTrigger.USER_ACTION.value
         })
         
-        for rule_data in rules_cursor:
+        async for rule_data in rules_cursor:
             try:
                 rule = AutomationRule(**rule_data)
                 
@@ -700,7 +700,7 @@ class LifecycleManagementService:
             
             # Update rule execution tracking
             if action_executed:
-                self.automation_rules_collection.update_one(
+                await self.automation_rules_collection.update_one(
                     {"rule_id": rule.rule_id, "user_id": user_id},
                     {
                         "$inc": {"execution_count": 1},
@@ -725,7 +725,7 @@ class LifecycleManagementService:
                 "current_status": {"$in": [ContentStatus.LIVE.value, ContentStatus.PUBLISHED.value]}
             })
             
-            for lifecycle_data in cursor:
+            async for lifecycle_data in cursor:
                 try:
                     lifecycle = ContentLifecycle(**lifecycle_data)
                     
@@ -757,7 +757,7 @@ class LifecycleManagementService:
                 "current_status": {"$ne": ContentStatus.EXPIRED.value}
             })
             
-            for lifecycle_data in cursor:
+            async for lifecycle_data in cursor:
                 try:
                     lifecycle = ContentLifecycle(**lifecycle_data)
                     await self.update_content_status(
@@ -775,7 +775,7 @@ class LifecycleManagementService:
                 "current_status": {"$nin": [ContentStatus.ARCHIVED.value, ContentStatus.EXPIRED.value]}
             })
             
-            for lifecycle_data in cursor:
+            async for lifecycle_data in cursor:
                 try:
                     lifecycle = ContentLifecycle(**lifecycle_data)
                     await self.update_content_status(
@@ -814,7 +814,7 @@ class LifecycleManagementService:
             "trigger_type": AutomationTrigger.PERFORMANCE_BASED.value
         })
         
-        for rule_data in rules_cursor:
+        async for rule_data in rules_cursor:
             try:
                 rule = AutomationRule(**rule_data)
                 await self._execute_automation_rule(rule, lifecycle.content_id, lifecycle.user_id)
@@ -844,7 +844,7 @@ class LifecycleManagementService:
             
             cursor = self.versions_collection.aggregate(pipeline)
             
-            for content_group in cursor:
+            async for content_group in cursor:
                 versions = content_group["versions"]
                 
                 # Sort by creation date, keep current version and last 9 others
@@ -858,7 +858,7 @@ class LifecycleManagementService:
                 
                 # Delete old versions
                 for version in versions_to_delete:
-                    self.versions_collection.delete_one({"version_id": version["version_id"]})
+                    await self.versions_collection.delete_one({"version_id": version["version_id"]})
                     
         except Exception as e:
             print(f"Error in version cleanup: {e}")
@@ -872,7 +872,7 @@ class LifecycleManagementService:
             
             now = datetime.now(timezone.utc)
             
-            self.lifecycles_collection.update_many(
+            await self.lifecycles_collection.update_many(
                 {"last_performance_check": {"$lt": (now - timedelta(days=1)).isoformat()}},
                 {"$set": {"last_performance_check": now.isoformat()}}
             )
@@ -896,7 +896,7 @@ class LifecycleManagementService:
             status_counts = {}
             cursor = self.lifecycles_collection.aggregate(pipeline)
             
-            for result in cursor:
+            async for result in cursor:
                 status_counts[result["_id"]] = result["count"]
             
             # Get stage distribution
@@ -911,7 +911,7 @@ class LifecycleManagementService:
             stage_counts = {}
             cursor = self.lifecycles_collection.aggregate(pipeline)
             
-            for result in cursor:
+            async for result in cursor:
                 stage_counts[result["_id"]] = result["count"]
             
             # Get recent activity
@@ -919,7 +919,7 @@ class LifecycleManagementService:
             
             # Get automation summary
             automation_cursor = self.automation_rules_collection.find({"user_id": user_id})
-            automation_rules = list(automation_cursor)
+            automation_rules = await automation_cursor.to_list(length=None)
             
             dashboard = {
                 "user_id": user_id,
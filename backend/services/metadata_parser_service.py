@@ -1,6 +1,10 @@
 """
 Metadata Parser Service
 Handles parsing of DDEX ERN (XML), MEAD, JSON, and CSV metadata formats
+
+DDEX ERN is read incrementally (``ddex_ern_stream``), so large multi-release
+deliveries parse in flat memory; ``iter_ddex_ern_metadata`` yields one
+record per recording as soon as its release has been read.
 """
 
 import xml.etree.ElementTree as ET
@@ -8,7 +12,7 @@ import json
 import csv
 import io
 import re
-from typing import Dict, List, Optional, Any, Tuple
+from typing import IO, Dict, Iterator, List, Optional, Any, Tuple, Union
 from datetime import datetime, timezone
 import logging
 from xml.dom import minidom
@@ -19,6 +23,7 @@ from metadata_models import (
     MEADStandardFields
 )
 from extended_metadata_formats import ExtendedMetadataParser
+from ddex_ern_stream import iter_ern_records
 
 logger = logging.getLogger(__name__)
 
@@ -70,131 +75,27 @@ class MetadataParserService:
             ))
             return ParsedMetadata(validation_status=ValidationStatus.ERROR), errors
 
-    def _parse_ddex_ern(self, content: bytes, file_name: str) -> Tuple[ParsedMetadata, List[MetadataValidationError]]:
-        """Parse DDEX ERN XML format (multiple versions supported)"""
+    def _parse_ddex_ern(self, content: Union[bytes, IO[bytes]], file_name: str) -> Tuple[ParsedMetadata, List[MetadataValidationError]]:
+        """Parse DDEX ERN XML format (multiple versions supported) into one summary record"""
         errors = []
         parsed_metadata = ParsedMetadata()
         
         try:
-            # Parse XML
-            root = ET.fromstring(content.decode('utf-8'))
-            
-            # Detect DDEX version from namespace
-            ddex_version = self._detect_ddex_version(root)
-            parsed_metadata.ddex_version = ddex_version
-            
-            # Get namespace info
-            if ddex_version in DDEX_VERSIONS:
-                ns = self.ddex_namespaces[ddex_version]
-            else:
-                # Default to latest version
-                ddex_version = "ern-4.4"
-                ns = self.ddex_namespaces[ddex_version]
-                errors.append(MetadataValidationError(
-                    field="ddex_version",
-                    message=f"Unknown DDEX version, defaulting to {ddex_version}",
-                    severity=ValidationSeverity.WARNING
-                ))
-            
-            # Parse message header
-            message_header = root.find('.//ern:MessageHeader', ns)
-            if message_header is not None:
-                message_id = message_header.find('ern:MessageId', ns)
-                if message_id is not None:
-                    parsed_metadata.ddex_message_id = message_id.text
-                
-                # Get message type from root element
-                parsed_metadata.ddex_message_type = root.tag.split('}')[-1] if '}' in root.tag else root.tag
-            
-            # Parse party information
-            party_list = root.find('.//ern:PartyList', ns)
-            if party_list is not None:
-                parties = party_list.findall('ern:Party', ns)
-                rights_holders = []
-                for party in parties:
-                    party_name_elem = party.find('.//ern:FullName', ns)
-                    if party_name_elem is not None:
-                        rights_holders.append(party_name_elem.text)
-                        
-                    # Get party ID
-                    party_id_elem = party.find('ern:PartyId', ns)
-                    if party_id_elem is not None and not parsed_metadata.party_id:
-                        parsed_metadata.party_id = party_id_elem.text
-                
-                parsed_metadata.rights_holders = rights_holders
-            
-            # Parse release information
-            release_list = root.find('.//ern:ReleaseList', ns)
-            if release_list is not None:
-                releases = release_list.findall('ern:Release', ns)
-                for release in releases:
-                    # Release title
-                    title_elem = release.find('.//ern:TitleText', ns)
-                    if title_elem is not None and not parsed_metadata.album:
-                        parsed_metadata.album = title_elem.text
-                    
-                    # Release date
-                    release_date_elem = release.find('.//ern:ReleaseDate', ns)
-                    if release_date_elem is not None:
-                        try:
-                            parsed_metadata.release_date = datetime.fromisoformat(
-                                release_date_elem.text.replace('Z', '+00:00')
-                            )
-                        except ValueError:
-                            errors.append(MetadataValidationError(
-                                field="release_date",
-                                message=f"Invalid release date format: {release_date_elem.text}",
-                                severity=ValidationSeverity.WARNING
-                            ))
-                    
-                    # UPC/EAN
-                    release_id_elem = release.find('.//ern:ReleaseId[ern:Namespace="UPC"]', ns)
-                    if release_id_elem is not None:
-                        upc_elem = release_id_elem.find('ern:ProprietaryId', ns)
-                        if upc_elem is not None:
-                            parsed_metadata.upc = upc_elem.text
-                    
-                    # Genre
-                    genre_elem = release.find('.//ern:Genre', ns)
-                    if genre_elem is not None:
-                        parsed_metadata.genre = genre_elem.text
-            
-            # Parse sound recording information  
-            resource_list = root.find('.//ern:ResourceList', ns)
-            if resource_list is not None:
-                sound_recordings = resource_list.findall('ern:SoundRecording', ns)
-                for recording in sound_recordings:
-                    # Track title
-                    title_elem = recording.find('.//ern:TitleText', ns)
-                    if title_elem is not None and not parsed_metadata.title:
-                        parsed_metadata.title = title_elem.text
-                    
-                    # Artist/Display Artist
-                    artist_elem = recording.find('.//ern:DisplayArtistName', ns)
-                    if artist_elem is not None and not parsed_metadata.artist:
-                        parsed_metadata.artist = artist_elem.text
-                    
-                    # ISRC
-                    isrc_elem = recording.find('.//ern:ISRC', ns)
-                    if isrc_elem is not None:
-                        parsed_metadata.isrc = isrc_elem.text
-                    
-                    # Duration
-                    duration_elem = recording.find('.//ern:Duration', ns)
-                    if duration_elem is not None:
-                        parsed_metadata.duration = duration_elem.text
-                    
-                    # Copyright information
-                    copyright_elem = recording.find('.//ern:CopyrightYear', ns)
-                    if copyright_elem is not None:
-                        try:
-                            parsed_metadata.copyright_year = int(copyright_elem.text)
-                        except ValueError:
-                            errors.append(MetadataValidationError(
-                                field="copyright_year",
-                                message=f"Invalid copyright year: {copyright_elem.text}",
-                                severity=ValidationSeverity.WARNING
-                            ))
+            message_type = None
+            for record in iter_ern_records(content):
+                kind = record["record"]
+                if kind == "message":
+                    parsed_metadata.ddex_version = self._ddex_version_for(record["root_tag"], errors)
+                    message_type = record["message_type"]
+                elif kind == "header":
+                    parsed_metadata.ddex_message_id = record["message_id"]
+                    parsed_metadata.ddex_message_type = message_type
+                elif kind == "party":
+                    self._apply_ern_party(parsed_metadata, record)
+                elif kind == "release":
+                    self._apply_ern_release(parsed_metadata, record, errors)
+                elif kind == "resource" and record["resource_type"] == "SoundRecording":
+                    self._apply_ern_recording(parsed_metadata, record, errors)
             
             parsed_metadata.validation_status = ValidationStatus.VALID if not errors else ValidationStatus.WARNING
             
@@ -218,11 +119,122 @@ class MetadataParserService:
             
         return parsed_metadata, errors
     
-    def _detect_ddex_version(self, root: ET.Element) -> str:
-        """Detect DDEX version from XML namespace"""
+    def iter_ddex_ern_metadata(self, content: Union[bytes, IO[bytes]],
+                               file_name: str) -> Iterator[Tuple[ParsedMetadata, List[MetadataValidationError]]]:
+        """Yield one record per sound recording of an ERN message as each release completes.
+        
+        Recordings take their album, UPC, genre and release date from the
+        first release that lists them; recordings no release lists, and
+        releases without known recordings, are yielded on their own. Only a
+        small summary of each resource is kept until its release arrives.
+        Raises ``ET.ParseError`` at the point the document is malformed."""
+        message: Dict[str, Any] = {}
+        message_errors: List[MetadataValidationError] = []
+        parties: List[Dict[str, Any]] = []
+        resources: Dict[str, Dict[str, Any]] = {}
+        emitted = set()
+        
+        def build(recording: Optional[Dict], release: Optional[Dict]):
+            errors = list(message_errors)
+            parsed_metadata = ParsedMetadata(**message)
+            for party in parties:
+                self._apply_ern_party(parsed_metadata, party)
+            if release:
+                self._apply_ern_release(parsed_metadata, release, errors)
+            if recording:
+                self._apply_ern_recording(parsed_metadata, recording, errors)
+            parsed_metadata.validation_status = ValidationStatus.VALID if not errors else ValidationStatus.WARNING
+            return parsed_metadata, errors
+        
+        for record in iter_ern_records(content):
+            kind = record["record"]
+            if kind == "message":
+                message["ddex_version"] = self._ddex_version_for(record["root_tag"], message_errors)
+                message["ddex_message_type"] = record["message_type"]
+            elif kind == "header":
+                message["ddex_message_id"] = record["message_id"]
+            elif kind == "party":
+                parties.append(record)
+            elif kind == "resource" and record["resource_type"] == "SoundRecording":
+                resources[record["resource_reference"] or f"#{len(resources)}"] = record
+            elif kind == "release":
+                listed = [ref for ref in record["resource_references"] if ref in resources]
+                if not listed:
+                    yield build(None, record)
+                for ref in listed:
+                    if ref not in emitted:
+                        emitted.add(ref)
+                        yield build(resources[ref], record)
+        
+        for ref, recording in resources.items():
+            if ref not in emitted:
+                yield build(recording, None)
+    
+    def _apply_ern_party(self, parsed_metadata: ParsedMetadata, party: Dict[str, Any]):
+        if parsed_metadata.rights_holders is None:
+            parsed_metadata.rights_holders = []
+        if party["full_name"]:
+            parsed_metadata.rights_holders.append(party["full_name"])
+        if party["party_id"] and not parsed_metadata.party_id:
+            parsed_metadata.party_id = party["party_id"]
+    
+    def _apply_ern_release(self, parsed_metadata: ParsedMetadata, release: Dict[str, Any],
+                           errors: List[MetadataValidationError]):
+        if release["title"] and not parsed_metadata.album:
+            parsed_metadata.album = release["title"]
+        if release["release_date"]:
+            try:
+                parsed_metadata.release_date = datetime.fromisoformat(
+                    release["release_date"].replace('Z', '+00:00')
+                )
+            except ValueError:
+                errors.append(MetadataValidationError(
+                    field="release_date",
+                    message=f"Invalid release date format: {release['release_date']}",
+                    severity=ValidationSeverity.WARNING
+                ))
+        if release["upc"]:
+            parsed_metadata.upc = release["upc"]
+        if release["genre"]:
+            parsed_metadata.genre = release["genre"]
+    
+    def _apply_ern_recording(self, parsed_metadata: ParsedMetadata, recording: Dict[str, Any],
+                             errors: List[MetadataValidationError]):
+        if recording["title"] and not parsed_metadata.title:
+            parsed_metadata.title = recording["title"]
+        if recording["display_artist"] and not parsed_metadata.artist:
+            parsed_metadata.artist = recording["display_artist"]
+        if recording["isrc"]:
+            parsed_metadata.isrc = recording["isrc"]
+        if recording["duration"]:
+            parsed_metadata.duration = recording["duration"]
+        if recording["copyright_year"]:
+            try:
+                parsed_metadata.copyright_year = int(recording["copyright_year"])
+            except ValueError:
+                errors.append(MetadataValidationError(
+                    field="copyright_year",
+                    message=f"Invalid copyright year: {recording['copyright_year']}",
+                    severity=ValidationSeverity.WARNING
+                ))
+    
+    def _ddex_version_for(self, root_tag: str, errors: List[MetadataValidationError]) -> str:
+        """Known DDEX version for the root tag, warning and defaulting to the latest otherwise"""
+        ddex_version = self._detect_ddex_version(root_tag)
+        if ddex_version not in DDEX_VERSIONS:
+            ddex_version = "ern-4.4"
+            errors.append(MetadataValidationError(
+                field="ddex_version",
+                message=f"Unknown DDEX version, defaulting to {ddex_version}",
+                severity=ValidationSeverity.WARNING
+            ))
+        return ddex_version
+    
+    def _detect_ddex_version(self, root_tag: str) -> str:
+        """Detect DDEX version from the root element's namespace"""
         # Check root element namespace
-        if root.tag.startswith('{'):
-            namespace = root.tag.split('}')[0][1:]  # Remove { and }
+        if root_tag.startswith('{'):
+            namespace = root_tag.split('}')[0][1:]  # Remove { and }
             
             # Match namespace to known versions
             for version, info in DDEX_VERSIONS.items():
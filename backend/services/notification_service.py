@@ -13,7 +13,7 @@ from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
 
 import resend
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 logger = logging.getLogger("notification_service")
 
@@ -48,7 +48,7 @@ def get_notification_service():
     if _notification_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _notification_instance = NotificationService(db)
     return _notification_instance
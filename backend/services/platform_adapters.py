@@ -2,6 +2,7 @@
 Platform Adapters — Real API delivery logic for each platform.
 Each adapter: authenticate, upload/post content, return result dict.
 Content is served via the app's own URL (APP_BASE_URL).
+HTTP goes through the shared per-host pools in platform_http; media is streamed in chunks.
 """
 
 import os
@@ -12,10 +13,26 @@ import logging
 from typing import Dict, Optional, Any
 from datetime import datetime, timezone
 
+from services.platform_http import (
+    platform_http,
+    UPLOAD_TIMEOUT,
+    UPLOAD_CHUNK_SIZE,
+    UploadSessionExpired,
+    content_range_upload,
+    file_body,
+    multipart_stream,
+    resumable_put_upload,
+    tus_upload,
+)
+
 logger = logging.getLogger(__name__)
 
 TIMEOUT = httpx.Timeout(60.0, connect=15.0)
 
+# TikTok FILE_UPLOAD chunk bounds: 5-64 MB per chunk, the final chunk may run to 128 MB
+TIKTOK_MIN_CHUNK = 5 * 1024 * 1024
+TIKTOK_MAX_CHUNK = 64 * 1024 * 1024
+
 
 def get_app_base_url() -> str:
     """Get the public base URL for the app used in content delivery."""
@@ -68,6 +85,20 @@ class BasePlatformAdapter:
     async def deliver(self, content: dict, credentials: dict, file_path: str = None) -> DeliveryResult:
         raise NotImplementedError
 
+    def resumable_session(self, content: dict, file_path: str) -> Optional[dict]:
+        """Upload session saved by a previous failed attempt for this platform and file, if any."""
+        session = content.get("upload_session") or {}
+        if session.get("platform_id") != self.platform_id or not session.get("upload_url"):
+            return None
+        if session.get("file_size") != os.path.getsize(file_path):
+            return None
+        return session
+
+    def upload_session(self, upload_url: str, file_path: str, **extra) -> dict:
+        """Session details a failed attempt returns so the delivery engine can resume it next time."""
+        return {"platform_id": self.platform_id, "upload_url": upload_url,
+                "file_size": os.path.getsize(file_path), **extra}
+
 
 # ─────────────────────────────────────────────
 # YOUTUBE ADAPTER (YouTube Data API v3)
@@ -88,7 +119,17 @@ class YouTubeAdapter(BasePlatformAdapter):
         public_url = self.get_public_file_url(content)
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
+                has_file = bool(file_path and os.path.exists(file_path))
+                session = self.resumable_session(content, file_path) if has_file else None
+                upload_url = session["upload_url"] if session else None
+
+                if upload_url:
+                    try:
+                        return await self._upload(client, upload_url, file_path, public_url, resume=True)
+                    except UploadSessionExpired:
+                        logger.info("YouTube upload session expired; starting a new one")
+
                 # Step 1: Initiate resumable upload
                 metadata = {
                     "snippet": {
@@ -99,15 +140,18 @@ class YouTubeAdapter(BasePlatformAdapter):
                     },
                     "status": {"privacyStatus": "private", "selfDeclaredMadeForKids": False},
                 }
+                init_headers = {
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/json; charset=UTF-8",
+                    "X-Upload-Content-Type": "video/*",
+                }
+                if has_file:
+                    init_headers["X-Upload-Content-Length"] = str(os.path.getsize(file_path))
 
                 init_resp = await client.post(
                     "https://www.googleapis.com/upload/youtube/v3/videos",
                     params={"uploadType": "resumable", "part": "snippet,status"},
-                    headers={
-                        "Authorization": f"Bearer {access_token}",
-                        "Content-Type": "application/json; charset=UTF-8",
-                        "X-Upload-Content-Type": "video/*",
-                    },
+                    headers=init_headers,
                     content=json.dumps(metadata),
                 )
 
@@ -118,24 +162,9 @@ class YouTubeAdapter(BasePlatformAdapter):
                 if not upload_url:
                     return DeliveryResult(False, message="No upload URL returned from YouTube")
 
-                # Step 2: Upload file if available
-                if file_path and os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
-                    upload_resp = await client.put(
-                        upload_url,
-                        content=file_bytes,
-                        headers={"Content-Type": "video/*"},
-                    )
-                    if upload_resp.status_code in (200, 201):
-                        data = upload_resp.json()
-                        return DeliveryResult(
-                            True,
-                            platform_content_id=data.get("id", ""),
-                            message=f"Uploaded to YouTube as {data.get('id')}",
-                            response_data={"video_id": data.get("id"), "status": data.get("status", {}), "source_url": public_url},
-                        )
-                    return DeliveryResult(False, message=f"YouTube upload failed: {upload_resp.status_code}")
+                # Step 2: Upload file in resumable chunks if available
+                if has_file:
+                    return await self._upload(client, upload_url, file_path, public_url)
 
                 # No file - create metadata-only placeholder with source link
                 return DeliveryResult(
@@ -148,6 +177,22 @@ class YouTubeAdapter(BasePlatformAdapter):
             logger.error(f"YouTube delivery error: {e}")
             return DeliveryResult(False, message=f"YouTube error: {str(e)[:200]}")
 
+    async def _upload(self, client, upload_url: str, file_path: str, public_url: str, resume: bool = False) -> DeliveryResult:
+        session = {"upload_session": self.upload_session(upload_url, file_path, protocol="google_resumable")}
+        try:
+            upload_resp = await resumable_put_upload(client, upload_url, file_path, "video/*", resume=resume)
+        except httpx.TransportError as e:
+            return DeliveryResult(False, message=f"YouTube upload interrupted: {str(e)[:200]}", response_data=session)
+        if upload_resp.status_code in (200, 201):
+            data = upload_resp.json()
+            return DeliveryResult(
+                True,
+                platform_content_id=data.get("id", ""),
+                message=f"Uploaded to YouTube as {data.get('id')}",
+                response_data={"video_id": data.get("id"), "status": data.get("status", {}), "source_url": public_url},
+            )
+        return DeliveryResult(False, message=f"YouTube upload failed: {upload_resp.status_code}", response_data=session)
+
 
 # ─────────────────────────────────────────────
 # TWITTER/X ADAPTER (v2 API)
@@ -174,17 +219,17 @@ class TwitterAdapter(BasePlatformAdapter):
         text = "\n\n".join(text_parts)[:280]
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 media_id = None
                 # Upload media if file exists
                 if file_path and os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
                     # Twitter v1.1 media upload (still required for media)
+                    headers, body = multipart_stream({}, "media", file_path)
                     upload_resp = await client.post(
                         "https://upload.twitter.com/1.1/media/upload.json",
-                        headers={"Authorization": f"Bearer {bearer}"},
-                        files={"media": file_bytes},
+                        headers={"Authorization": f"Bearer {bearer}", **headers},
+                        content=body,
+                        timeout=UPLOAD_TIMEOUT,
                     )
                     if upload_resp.status_code == 200:
                         media_id = upload_resp.json().get("media_id_string")
@@ -235,11 +280,12 @@ class TikTokAdapter(BasePlatformAdapter):
         title = content.get("title", "")[:150]
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 if not file_path or not os.path.exists(file_path):
                     return DeliveryResult(False, message="TikTok requires a video file")
 
                 file_size = os.path.getsize(file_path)
+                chunk_size, chunk_count = self._chunk_plan(file_size)
 
                 # Step 1: Initialize upload
                 init_resp = await client.post(
@@ -250,7 +296,12 @@ class TikTokAdapter(BasePlatformAdapter):
                     },
                     content=json.dumps({
                         "post_info": {"title": title, "privacy_level": "SELF_ONLY"},
-                        "source_info": {"source": "FILE_UPLOAD", "video_size": file_size, "chunk_size": file_size},
+                        "source_info": {
+                            "source": "FILE_UPLOAD",
+                            "video_size": file_size,
+                            "chunk_size": chunk_size,
+                            "total_chunk_count": chunk_count,
+                        },
                     }),
                 )
 
@@ -262,15 +313,8 @@ class TikTokAdapter(BasePlatformAdapter):
                 publish_id = data.get("publish_id", "")
 
                 if upload_url:
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
-                    upload_resp = await client.put(
-                        upload_url,
-                        content=file_bytes,
-                        headers={
-                            "Content-Range": f"bytes 0-{file_size - 1}/{file_size}",
-                            "Content-Type": "video/mp4",
-                        },
+                    upload_resp = await content_range_upload(
+                        client, upload_url, file_path, chunk_size, chunk_count, "video/mp4"
                     )
                     if upload_resp.status_code in (200, 201):
                         return DeliveryResult(
@@ -287,6 +331,14 @@ class TikTokAdapter(BasePlatformAdapter):
             logger.error(f"TikTok delivery error: {e}")
             return DeliveryResult(False, message=f"TikTok error: {str(e)[:200]}")
 
+    @staticmethod
+    def _chunk_plan(file_size: int):
+        """(chunk_size, chunk_count) within TikTok's limits; small files go as one chunk."""
+        if file_size <= TIKTOK_MAX_CHUNK:
+            return file_size, 1
+        chunk_size = min(max(UPLOAD_CHUNK_SIZE, TIKTOK_MIN_CHUNK), TIKTOK_MAX_CHUNK)
+        return chunk_size, file_size // chunk_size
+
 
 # ─────────────────────────────────────────────
 # SOUNDCLOUD ADAPTER
@@ -309,19 +361,22 @@ class SoundCloudAdapter(BasePlatformAdapter):
             if not file_path or not os.path.exists(file_path):
                 return DeliveryResult(False, message="SoundCloud requires an audio file")
 
-            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=15.0)) as client:
-                with open(file_path, "rb") as f:
-                    resp = await client.post(
-                        "https://api.soundcloud.com/tracks",
-                        headers={"Authorization": f"OAuth {access_token}"},
-                        data={
-                            "track[title]": title,
-                            "track[description]": description,
-                            "track[genre]": genre,
-                            "track[sharing]": "private",
-                        },
-                        files={"track[asset_data]": (os.path.basename(file_path), f)},
-                    )
+            async with platform_http.session(UPLOAD_TIMEOUT) as client:
+                headers, body = multipart_stream(
+                    {
+                        "track[title]": title,
+                        "track[description]": description,
+                        "track[genre]": genre,
+                        "track[sharing]": "private",
+                    },
+                    "track[asset_data]",
+                    file_path,
+                )
+                resp = await client.post(
+                    "https://api.soundcloud.com/tracks",
+                    headers={"Authorization": f"OAuth {access_token}", **headers},
+                    content=body,
+                )
 
                 if resp.status_code in (200, 201):
                     data = resp.json()
@@ -361,7 +416,15 @@ class VimeoAdapter(BasePlatformAdapter):
 
             file_size = os.path.getsize(file_path)
 
-            async with httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=15.0)) as client:
+            async with platform_http.session(UPLOAD_TIMEOUT) as client:
+                session = self.resumable_session(content, file_path)
+                if session:
+                    try:
+                        return await self._upload(client, session["upload_url"], file_path,
+                                                  session.get("video_uri", ""), session.get("link", ""), resume=True)
+                    except UploadSessionExpired:
+                        logger.info("Vimeo tus upload expired; creating a new video")
+
                 # Step 1: Create video resource
                 create_resp = await client.post(
                     "https://api.vimeo.com/me/videos",
@@ -384,28 +447,10 @@ class VimeoAdapter(BasePlatformAdapter):
                 data = create_resp.json()
                 upload_link = data.get("upload", {}).get("upload_link")
                 video_uri = data.get("uri", "")
-                video_id = video_uri.split("/")[-1] if video_uri else ""
 
                 if upload_link:
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
-                    upload_resp = await client.patch(
-                        upload_link,
-                        content=file_bytes,
-                        headers={
-                            "Tus-Resumable": "1.0.0",
-                            "Upload-Offset": "0",
-                            "Content-Type": "application/offset+octet-stream",
-                        },
-                    )
-                    if upload_resp.status_code in (200, 204):
-                        return DeliveryResult(
-                            True,
-                            platform_content_id=video_id,
-                            message=f"Uploaded to Vimeo: {video_id}",
-                            response_data={"video_id": video_id, "uri": video_uri, "link": data.get("link", "")},
-                        )
-                    return DeliveryResult(False, message=f"Vimeo upload failed: {upload_resp.status_code}")
+                    # Step 2: tus upload in resumable chunks
+                    return await self._upload(client, upload_link, file_path, video_uri, data.get("link", ""))
 
                 return DeliveryResult(False, message="No upload link from Vimeo")
 
@@ -413,6 +458,24 @@ class VimeoAdapter(BasePlatformAdapter):
             logger.error(f"Vimeo delivery error: {e}")
             return DeliveryResult(False, message=f"Vimeo error: {str(e)[:200]}")
 
+    async def _upload(self, client, upload_link: str, file_path: str, video_uri: str, link: str,
+                      resume: bool = False) -> DeliveryResult:
+        video_id = video_uri.split("/")[-1] if video_uri else ""
+        session = {"upload_session": self.upload_session(upload_link, file_path, protocol="tus",
+                                                         video_uri=video_uri, link=link)}
+        try:
+            upload_resp = await tus_upload(client, upload_link, file_path, resume=resume)
+        except httpx.TransportError as e:
+            return DeliveryResult(False, message=f"Vimeo upload interrupted: {str(e)[:200]}", response_data=session)
+        if upload_resp.status_code in (200, 204):
+            return DeliveryResult(
+                True,
+                platform_content_id=video_id,
+                message=f"Uploaded to Vimeo: {video_id}",
+                response_data={"video_id": video_id, "uri": video_uri, "link": link},
+            )
+        return DeliveryResult(False, message=f"Vimeo upload failed: {upload_resp.status_code}", response_data=session)
+
 
 # ─────────────────────────────────────────────
 # BLUESKY ADAPTER (AT Protocol)
@@ -439,7 +502,7 @@ class BlueskyAdapter(BasePlatformAdapter):
         text = "\n\n".join(text_parts)[:300]
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 # Authenticate
                 auth_resp = await client.post(
                     "https://bsky.social/xrpc/com.atproto.server.createSession",
@@ -456,15 +519,16 @@ class BlueskyAdapter(BasePlatformAdapter):
                 # Upload blob if file exists
                 embed = None
                 if file_path and os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        file_bytes = f.read()
+                    headers, body = file_body(file_path)
                     blob_resp = await client.post(
                         "https://bsky.social/xrpc/com.atproto.repo.uploadBlob",
-                        content=file_bytes,
+                        content=body,
                         headers={
                             "Authorization": f"Bearer {access_jwt}",
                             "Content-Type": "image/jpeg",
+                            **headers,
                         },
+                        timeout=UPLOAD_TIMEOUT,
                     )
                     if blob_resp.status_code == 200:
                         blob = blob_resp.json().get("blob")
@@ -548,16 +612,12 @@ class DiscordAdapter(BasePlatformAdapter):
             embed["fields"].append({"name": "Content Link", "value": f"[View/Download]({public_url})", "inline": False})
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 payload = {"embeds": [embed]}
 
                 if file_path and os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        resp = await client.post(
-                            webhook_url,
-                            data={"payload_json": json.dumps(payload)},
-                            files={"file": (os.path.basename(file_path), f)},
-                        )
+                    headers, body = multipart_stream({"payload_json": json.dumps(payload)}, "file", file_path)
+                    resp = await client.post(webhook_url, headers=headers, content=body, timeout=UPLOAD_TIMEOUT)
                 else:
                     resp = await client.post(
                         webhook_url,
@@ -581,6 +641,12 @@ class TelegramAdapter(BasePlatformAdapter):
     platform_id = "telegram"
     platform_name = "Telegram"
     required_credentials = ["bot_token", "chat_id"]
+    # content_type -> (Bot API method, multipart field)
+    MEDIA_METHODS = {
+        "audio": ("sendAudio", "audio"),
+        "video": ("sendVideo", "video"),
+        "image": ("sendPhoto", "photo"),
+    }
 
     async def deliver(self, content: dict, credentials: dict, file_path: str = None) -> DeliveryResult:
         if not self.validate_credentials(credentials):
@@ -600,33 +666,15 @@ class TelegramAdapter(BasePlatformAdapter):
         base_url = f"https://api.telegram.org/bot{bot_token}"
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 if file_path and os.path.exists(file_path):
-                    with open(file_path, "rb") as f:
-                        if content_type == "audio":
-                            resp = await client.post(
-                                f"{base_url}/sendAudio",
-                                data={"chat_id": chat_id, "caption": caption, "parse_mode": "Markdown"},
-                                files={"audio": (os.path.basename(file_path), f)},
-                            )
-                        elif content_type == "video":
-                            resp = await client.post(
-                                f"{base_url}/sendVideo",
-                                data={"chat_id": chat_id, "caption": caption, "parse_mode": "Markdown"},
-                                files={"video": (os.path.basename(file_path), f)},
-                            )
-                        elif content_type == "image":
-                            resp = await client.post(
-                                f"{base_url}/sendPhoto",
-                                data={"chat_id": chat_id, "caption": caption, "parse_mode": "Markdown"},
-                                files={"photo": (os.path.basename(file_path), f)},
-                            )
-                        else:
-                            resp = await client.post(
-                                f"{base_url}/sendDocument",
-                                data={"chat_id": chat_id, "caption": caption, "parse_mode": "Markdown"},
-                                files={"document": (os.path.basename(file_path), f)},
-                            )
+                    method, field = self.MEDIA_METHODS.get(content_type, ("sendDocument", "document"))
+                    headers, body = multipart_stream(
+                        {"chat_id": chat_id, "caption": caption, "parse_mode": "Markdown"}, field, file_path
+                    )
+                    resp = await client.post(
+                        f"{base_url}/{method}", headers=headers, content=body, timeout=UPLOAD_TIMEOUT
+                    )
                 else:
                     resp = await client.post(
                         f"{base_url}/sendMessage",
@@ -667,7 +715,7 @@ class InstagramAdapter(BasePlatformAdapter):
         content_type = content.get("content_type", "image")
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 # Use the app's own public URL for media
                 file_url = self.get_public_file_url(content)
 
@@ -733,22 +781,17 @@ class FacebookAdapter(BasePlatformAdapter):
             message_text += f"\n\n{public_url}"
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 if file_path and os.path.exists(file_path):
                     content_type = content.get("content_type", "")
-                    with open(file_path, "rb") as f:
-                        if content_type == "video":
-                            resp = await client.post(
-                                f"https://graph-video.facebook.com/v19.0/{page_id}/videos",
-                                data={"description": message_text, "access_token": access_token},
-                                files={"source": (os.path.basename(file_path), f)},
-                            )
-                        else:
-                            resp = await client.post(
-                                f"https://graph.facebook.com/v19.0/{page_id}/photos",
-                                data={"message": message_text, "access_token": access_token},
-                                files={"source": (os.path.basename(file_path), f)},
-                            )
+                    if content_type == "video":
+                        url = f"https://graph-video.facebook.com/v19.0/{page_id}/videos"
+                        fields = {"description": message_text, "access_token": access_token}
+                    else:
+                        url = f"https://graph.facebook.com/v19.0/{page_id}/photos"
+                        fields = {"message": message_text, "access_token": access_token}
+                    headers, body = multipart_stream(fields, "source", file_path)
+                    resp = await client.post(url, headers=headers, content=body, timeout=UPLOAD_TIMEOUT)
                 elif public_url:
                     # Use the app's public URL to let Facebook fetch the content
                     resp = await client.post(
@@ -796,7 +839,7 @@ class SnapchatAdapter(BasePlatformAdapter):
         content_type = content.get("content_type", "")
 
         try:
-            async with httpx.AsyncClient(timeout=TIMEOUT) as client:
+            async with platform_http.session(TIMEOUT) as client:
                 # Step 1: List organizations to verify token
                 org_resp = await client.get(
                     "https://adsapi.snapchat.com/v1/me/organizations",
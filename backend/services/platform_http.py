@@ -0,0 +1,337 @@
+"""
+Platform HTTP — shared connection pools and streaming uploads for platform adapters.
+
+``platform_http`` keeps one long-lived ``httpx.AsyncClient`` per scheme+host,
+so deliveries to the same platform reuse TLS connections (HTTP/2 is negotiated
+when the optional ``h2`` package is installed and the server offers it).
+Media files are never read whole: bodies are async generators over fixed-size
+chunks read with aiofiles, so memory stays flat for multi-GB masters.
+``resumable_put_upload`` (Google resumable protocol, used by YouTube) and
+``tus_upload`` (tus 1.0, used by Vimeo) resume from the server's committed
+offset after a dropped connection or a 5xx, and their session URLs can be
+persisted so a later attempt picks up where the last one stopped.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiofiles
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=15.0)
+UPLOAD_TIMEOUT = httpx.Timeout(120.0, connect=15.0)
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+MAX_POOLED_HOSTS = 64
+
+# Upload request size; YouTube requires a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = int(os.environ.get("PLATFORM_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+# Size of each file read while streaming a request body
+READ_SIZE = 1024 * 1024
+UPLOAD_RESUME_ATTEMPTS = 5
+RETRYABLE_STATUS = (500, 502, 503, 504)
+
+
+async def _backoff(failures: int):
+    await asyncio.sleep(min(2 ** failures, 30))
+
+
+class UploadSessionExpired(Exception):
+    """A persisted resumable upload session is no longer accepted by the platform."""
+
+
+class PlatformHTTPPool:
+    """Long-lived, per-host pooled clients shared by every adapter."""
+
+    def __init__(self, transport_factory: Optional[Callable[[str], httpx.AsyncBaseTransport]] = None):
+        self._clients: "OrderedDict[str, httpx.AsyncClient]" = OrderedDict()
+        self._transport_factory = transport_factory
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            options = {"timeout": DEFAULT_TIMEOUT, "limits": POOL_LIMITS, "http2": HTTP2_ENABLED}
+            if self._transport_factory:
+                options["transport"] = self._transport_factory(key)
+            client = httpx.AsyncClient(**options)
+            self._clients[key] = client
+            while len(self._clients) > MAX_POOLED_HOSTS:
+                _, evicted = self._clients.popitem(last=False)
+                asyncio.get_event_loop().create_task(evicted.aclose())
+        self._clients.move_to_end(key)
+        return client
+
+    def session(self, timeout: httpx.Timeout = DEFAULT_TIMEOUT) -> "PooledSession":
+        """Client-like facade routing each request to its host's pooled client."""
+        return PooledSession(self, timeout)
+
+    def stats(self) -> Dict[str, object]:
+        return {"hosts": list(self._clients.keys()), "http2": HTTP2_ENABLED}
+
+    async def close_all(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+class PooledSession:
+    """Drop-in for ``async with httpx.AsyncClient() as client`` that leaves pools open on exit."""
+
+    def __init__(self, pool: PlatformHTTPPool, timeout: httpx.Timeout):
+        self._pool = pool
+        self._timeout = timeout
+
+    async def __aenter__(self) -> "PooledSession":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        kwargs.setdefault("timeout", self._timeout)
+        return await self._pool.client_for(url).request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+
+platform_http = PlatformHTTPPool()
+
+
+# ─────────────────────────────────────────────
+# STREAMING BODIES
+# ─────────────────────────────────────────────
+async def iter_file(path: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yield bytes [start, end) of a file in READ_SIZE pieces without blocking the loop."""
+    end = os.path.getsize(path) if end is None else end
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            piece = await f.read(min(READ_SIZE, remaining))
+            if not piece:
+                break
+            remaining -= len(piece)
+            yield piece
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+def multipart_stream(fields: Dict[str, str], file_field: str, path: str,
+                     content_type: str = "application/octet-stream") -> Tuple[Dict[str, str], AsyncIterator[bytes]]:
+    """
+    Streamed multipart/form-data body with an exact Content-Length.
+    Replaces ``files={...}`` (which reads file objects synchronously on the loop).
+    """
+    boundary = uuid.uuid4().hex
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote(str(name))}"\r\n\r\n'.encode()
+        + str(value).encode() + b"\r\n"
+        for name, value in fields.items() if value is not None
+    )
+    head += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{_quote(file_field)}"; '
+        f'filename="{_quote(os.path.basename(path))}"\r\nContent-Type: {content_type}\r\n\r\n'
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    async def body():
+        yield head
+        async for piece in iter_file(path):
+            yield piece
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + os.path.getsize(path) + len(tail)),
+    }
+    return headers, body()
+
+
+def file_body(path: str) -> Tuple[Dict[str, str], AsyncIterator[bytes]]:
+    """Whole file as a streamed raw body with Content-Length."""
+    return {"Content-Length": str(os.path.getsize(path))}, iter_file(path)
+
+
+# ─────────────────────────────────────────────
+# RESUMABLE UPLOAD PROTOCOLS
+# ─────────────────────────────────────────────
+def _committed_from_range(range_header: Optional[str]) -> int:
+    """Next offset from a Google ``Range: bytes=0-N`` header (absent means nothing stored)."""
+    if not range_header or "-" not in range_header:
+        return 0
+    return int(range_header.rsplit("-", 1)[1]) + 1
+
+
+async def _google_status(client, upload_url: str, total: int):
+    """Ask a resumable session how much it has; returns (offset, final_response_or_None)."""
+    resp = await client.put(upload_url, content=b"", headers={"Content-Range": f"bytes */{total}", "Content-Length": "0"})
+    if resp.status_code == 308:
+        return _committed_from_range(resp.headers.get("Range")), None
+    if resp.status_code in (200, 201):
+        return total, resp
+    if resp.status_code in (404, 410):
+        raise UploadSessionExpired(f"Upload session rejected: {resp.status_code}")
+    return None, resp
+
+
+async def resumable_put_upload(client, upload_url: str, path: str, content_type: str,
+                               chunk_size: int = UPLOAD_CHUNK_SIZE, resume: bool = False) -> httpx.Response:
+    """Upload via the Google resumable protocol, resuming after errors from the committed offset."""
+    total = os.path.getsize(path)
+    offset, failures = 0, 0
+    if resume:
+        offset, final = await _google_status(client, upload_url, total)
+        if final is not None:
+            return final
+    if total == 0:
+        return await client.put(upload_url, content=b"", headers={"Content-Type": content_type, "Content-Length": "0"})
+
+    while True:
+        end = min(offset + chunk_size, total)
+        try:
+            resp = await client.put(
+                upload_url,
+                content=iter_file(path, offset, end),
+                headers={
+                    "Content-Type": content_type,
+                    "Content-Length": str(end - offset),
+                    "Content-Range": f"bytes {offset}-{end - 1}/{total}",
+                },
+            )
+        except httpx.TransportError as e:
+            resp = None
+            logger.warning(f"Resumable upload interrupted at {offset}/{total}: {e}")
+        if resp is not None and resp.status_code == 308:
+            offset = _committed_from_range(resp.headers.get("Range"))
+            continue
+        if resp is not None and resp.status_code not in RETRYABLE_STATUS:
+            return resp
+
+        failures += 1
+        if failures > UPLOAD_RESUME_ATTEMPTS:
+            if resp is None:
+                raise httpx.TransportError(f"Upload failed after {UPLOAD_RESUME_ATTEMPTS} resume attempts")
+            return resp
+        await _backoff(failures)
+        try:
+            status_offset, final = await _google_status(client, upload_url, total)
+        except httpx.TransportError:
+            continue
+        if final is not None and status_offset is not None:
+            return final
+        if status_offset is not None:
+            offset = status_offset
+
+
+async def _tus_offset(client, upload_url: str) -> Optional[int]:
+    resp = await client.head(upload_url, headers={"Tus-Resumable": "1.0.0"})
+    if resp.status_code in (404, 410):
+        raise UploadSessionExpired(f"tus upload rejected: {resp.status_code}")
+    offset = resp.headers.get("Upload-Offset")
+    return int(offset) if offset is not None else None
+
+
+async def tus_upload(client, upload_url: str, path: str, chunk_size: int = UPLOAD_CHUNK_SIZE,
+                     resume: bool = False) -> httpx.Response:
+    """Upload via tus 1.0 PATCH requests, resuming from the server's Upload-Offset after errors."""
+    total = os.path.getsize(path)
+    offset, failures = 0, 0
+    resp = None
+    if resume:
+        offset = await _tus_offset(client, upload_url) or 0
+
+    while offset < total or resp is None:
+        end = min(offset + chunk_size, total)
+        try:
+            resp = await client.patch(
+                upload_url,
+                content=iter_file(path, offset, end),
+                headers={
+                    "Tus-Resumable": "1.0.0",
+                    "Upload-Offset": str(offset),
+                    "Content-Type": "application/offset+octet-stream",
+                    "Content-Length": str(end - offset),
+                },
+            )
+        except httpx.TransportError as e:
+            logger.warning(f"tus upload interrupted at {offset}/{total}: {e}")
+            resp = None
+        if resp is not None and resp.status_code in (200, 204):
+            offset = int(resp.headers.get("Upload-Offset", end))
+            continue
+        if resp is not None and resp.status_code not in RETRYABLE_STATUS + (409,):
+            return resp
+
+        failures += 1
+        if failures > UPLOAD_RESUME_ATTEMPTS:
+            if resp is None:
+                raise httpx.TransportError(f"Upload failed after {UPLOAD_RESUME_ATTEMPTS} resume attempts")
+            return resp
+        await _backoff(failures)
+        try:
+            server_offset = await _tus_offset(client, upload_url)
+        except httpx.TransportError:
+            continue
+        if server_offset is not None:
+            offset = server_offset
+    return resp
+
+
+async def content_range_upload(client, upload_url: str, path: str, chunk_size: int, chunk_count: int,
+                               content_type: str) -> httpx.Response:
+    """PUT a file as ``chunk_count`` Content-Range chunks; the last chunk absorbs the remainder."""
+    total = os.path.getsize(path)
+    resp = None
+    for index in range(chunk_count):
+        start = index * chunk_size
+        end = total if index == chunk_count - 1 else start + chunk_size
+        for attempt in range(UPLOAD_RESUME_ATTEMPTS + 1):
+            try:
+                resp = await client.put(
+                    upload_url,
+                    content=iter_file(path, start, end),
+                    headers={
+                        "Content-Type": content_type,
+                        "Content-Length": str(end - start),
+                        "Content-Range": f"bytes {start}-{end - 1}/{total}",
+                    },
+                )
+            except httpx.TransportError as e:
+                if attempt == UPLOAD_RESUME_ATTEMPTS:
+                    raise
+                logger.warning(f"Chunk {index + 1}/{chunk_count} upload interrupted: {e}")
+                await _backoff(attempt + 1)
+                continue
+            if resp.status_code not in RETRYABLE_STATUS or attempt == UPLOAD_RESUME_ATTEMPTS:
+                break
+            await _backoff(attempt + 1)
+        if resp.status_code not in (200, 201, 206):
+            return resp
+    return resp
@@ -9,7 +9,7 @@ import uuid
 import os
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from github import Github, GithubException
 
 logger = logging.getLogger("remediation_service")
@@ -22,7 +22,7 @@ def get_remediation_service():
     if _remediation_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _remediation_instance = RemediationService(db)
     return _remediation_instance
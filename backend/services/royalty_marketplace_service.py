@@ -11,7 +11,8 @@ from enum import Enum
 from decimal import Decimal, ROUND_HALF_UP
 from pydantic import BaseModel, Field
 import uuid
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
+from keyset_pagination import paginate
 import os
 import hashlib
 
@@ -19,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'royalty_marketplace')]
 
 
@@ -368,10 +369,10 @@ class RoyaltyMarketplaceService:
         featured_only: bool = False,
         sort_by: str = "created_at",
         sort_order: int = -1,
-        page: int = 1,
+        cursor: Optional[str] = None,
         limit: int = 20
     ) -> Dict[str, Any]:
-        """Search and filter marketplace listings"""
+        """Search and filter marketplace listings; page with the returned ``next_cursor``"""
         try:
             # Build query
             match_query = {"status": ListingStatus.ACTIVE.value}
@@ -405,24 +406,21 @@ class RoyaltyMarketplaceService:
             if featured_only:
                 match_query["featured"] = True
             
-            # Execute query with pagination
-            skip = (page - 1) * limit
-            
-            cursor = self.listings.find(match_query, {"_id": 0})
-            cursor = cursor.sort(sort_by, sort_order).skip(skip).limit(limit)
-            listings = await cursor.to_list(length=None)
-            
-            # Get total count
-            total = await self.listings.count_documents(match_query)
+            # Keyset pagination on the sort field, with the listing id as tie-breaker
+            page = await paginate(
+                self.listings, match_query,
+                sort=[(sort_by, sort_order), ("id", sort_order)],
+                cursor=cursor, limit=limit, projection={"_id": 0}, count="estimate",
+            )
             
             return {
                 "success": True,
-                "listings": listings,
+                "listings": page["items"],
                 "pagination": {
-                    "page": page,
                     "limit": limit,
-                    "total": total,
-                    "pages": (total + limit - 1) // limit
+                    "next_cursor": page["next_cursor"],
+                    "total": page.get("total"),
+                    "total_exact": page.get("total_exact")
                 }
             }
             
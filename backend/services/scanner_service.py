@@ -12,7 +12,7 @@ import os
 import shutil
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 
 logger = logging.getLogger("scanner_service")
 
@@ -24,7 +24,7 @@ def get_scanner_service():
     if _scanner_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _scanner_instance = ScannerService(db)
     return _scanner_instance
@@ -1,14 +1,31 @@
 """
 Post Scheduler Service
-Background task that checks for due scheduled posts and publishes them
+Background task that claims due scheduled posts and publishes them
 via the existing multi-platform publish engine.
+
+Posts carry a native ``due_at`` datetime (indexed with ``status``) next to
+the user-facing ISO ``scheduled_time``. Each tick claims a batch of due
+posts by stamping them with a lease, so several app workers can run the
+scheduler without double-posting; a post whose lease expires (worker died
+mid-publish) is claimed again and only retries the platforms that have not
+already succeeded. Leases of posts still queued or publishing locally are
+renewed in one write every third of the lease. Claimed posts publish
+concurrently, with every platform call bounded by a per-platform semaphore. Between ticks the loop sleeps
+until the next post is due, or until ``wake_scheduler`` is called after a
+post is created or rescheduled.
 """
 import asyncio
 import logging
+import os
+import socket
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from pymongo import ASCENDING
 
 from config.database import db
+from async_init import schedule_init
 from services.social_platform_manager import (
     TwitterConnectionManager,
     TikTokConnectionManager,
@@ -22,124 +39,268 @@ _twitter = TwitterConnectionManager()
 _tiktok = TikTokConnectionManager()
 _snapchat = SnapchatConnectionManager()
 
-CHECK_INTERVAL_SECONDS = 30
+# Upper bound on a single sleep, so posts created through another worker are picked up
+MAX_IDLE_SECONDS = 30
+LEASE_SECONDS = int(os.environ.get("SCHEDULER_LEASE_SECONDS", "300"))
+CLAIM_BATCH_SIZE = int(os.environ.get("SCHEDULER_CLAIM_BATCH_SIZE", "500"))
+POST_CONCURRENCY = int(os.environ.get("SCHEDULER_POST_CONCURRENCY", "200"))
+PLATFORM_CONCURRENCY = int(os.environ.get("SCHEDULER_PLATFORM_CONCURRENCY", "25"))
 
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
-async def _publish_post(post: dict) -> dict:
-    """Execute the actual publish for a scheduled post, mirroring the live publish logic."""
+_wake_event: Optional[asyncio.Event] = None
+_platform_slots: Dict[str, asyncio.Semaphore] = {}
+_running: Set[str] = set()  # ids of posts leased by this worker
+
+
+def _parse_iso(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def _ensure_indexes():
+    await db.scheduled_posts.create_index([("status", ASCENDING), ("due_at", ASCENDING)])
+    await db.scheduled_posts.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+    await db.scheduled_posts.create_index("claim_id", sparse=True)
+    # Posts scheduled before due_at existed only have the ISO scheduled_time
+    async for doc in db.scheduled_posts.find(
+        {"status": "pending", "due_at": {"$exists": False}}, {"_id": 0, "id": 1, "scheduled_time": 1}
+    ):
+        due_at = _parse_iso(doc.get("scheduled_time"))
+        if due_at is not None:
+            await db.scheduled_posts.update_one({"id": doc["id"]}, {"$set": {"due_at": due_at}})
+
+
+schedule_init("Post scheduler indexes", _ensure_indexes)
+
+
+def wake_scheduler():
+    """Re-check the next due time now, e.g. after a post was created or rescheduled."""
+    if _wake_event is not None:
+        _wake_event.set()
+
+
+def _platform_slot(platform: str) -> asyncio.Semaphore:
+    slot = _platform_slots.get(platform)
+    if slot is None:
+        slot = _platform_slots[platform] = asyncio.Semaphore(PLATFORM_CONCURRENCY)
+    return slot
+
+
+async def _publish_to_platform(post: dict, platform: str) -> dict:
+    """Publish a scheduled post to one platform, mirroring the live publish logic."""
     user_id = post["user_id"]
     text = post["text"]
-    platforms = post["platforms"]
     media_url = post.get("media_url")
-    results = {}
 
-    for platform in platforms:
-        try:
-            if platform == "twitter_x":
-                creds = await get_platform_credentials(user_id, "twitter_x")
-                token = creds.get("access_token") if creds else None
-                if not token:
-                    results[platform] = {"success": False, "error": "No Twitter access token."}
-                    continue
-                results[platform] = await _twitter.post_tweet(text, token)
-
-            elif platform == "tiktok":
-                creds = await get_platform_credentials(user_id, "tiktok")
-                token = creds.get("access_token") if creds else ""
-                if not token:
-                    results[platform] = {"success": False, "error": "No TikTok access token."}
-                    continue
-                if media_url:
-                    results[platform] = await _tiktok.publish_video(media_url, text, token)
-                else:
-                    results[platform] = {"success": False, "error": "TikTok requires a media URL."}
-                    continue
-
-            elif platform == "snapchat":
-                creds = await get_platform_credentials(user_id, "snapchat")
-                token = creds.get("api_token") if creds else None
-                if not token:
-                    results[platform] = {"success": False, "error": "No Snapchat API token."}
-                    continue
-                results[platform] = await _snapchat.publish_content(text, token)
-
-            else:
-                results[platform] = {"success": False, "error": f"Unsupported platform: {platform}"}
+    if platform == "twitter_x":
+        creds = await get_platform_credentials(user_id, "twitter_x")
+        token = creds.get("access_token") if creds else None
+        if not token:
+            return {"success": False, "error": "No Twitter access token."}
+        return await _twitter.post_tweet(text, token)
+
+    if platform == "tiktok":
+        creds = await get_platform_credentials(user_id, "tiktok")
+        token = creds.get("access_token") if creds else ""
+        if not token:
+            return {"success": False, "error": "No TikTok access token."}
+        if not media_url:
+            return {"success": False, "error": "TikTok requires a media URL."}
+        return await _tiktok.publish_video(media_url, text, token)
+
+    if platform == "snapchat":
+        creds = await get_platform_credentials(user_id, "snapchat")
+        token = creds.get("api_token") if creds else None
+        if not token:
+            return {"success": False, "error": "No Snapchat API token."}
+        return await _snapchat.publish_content(text, token)
+
+    return {"success": False, "error": f"Unsupported platform: {platform}"}
+
 
+async def _publish_platform_once(post: dict, platform: str) -> dict:
+    async with _platform_slot(platform):
+        try:
+            result = await _publish_to_platform(post, platform)
         except Exception as e:
             logger.error(f"Scheduled publish to {platform} failed: {e}")
-            results[platform] = {"success": False, "error": str(e)[:300]}
+            result = {"success": False, "error": str(e)[:300]}
+    if result.get("success"):
+        # Record each success as it lands so a re-claimed post never publishes it twice
+        await db.scheduled_posts.update_one(
+            {"id": post["id"], "lease_owner": WORKER_ID},
+            {"$set": {f"results.{platform}": result}},
+        )
+    return result
 
+
+async def _publish_post(post: dict) -> dict:
+    """Publish to every platform of a post concurrently; platforms that already succeeded are kept."""
+    previous = post.get("results") or {}
+    results = {p: previous[p] for p in post["platforms"] if (previous.get(p) or {}).get("success")}
+    remaining = [p for p in post["platforms"] if p not in results]
+    outcomes = await asyncio.gather(*(_publish_platform_once(post, p) for p in remaining))
+    results.update(zip(remaining, outcomes))
     return results
 
 
-async def _process_due_posts():
-    """Find and publish all posts whose scheduled_time has passed."""
-    now = datetime.now(timezone.utc)
-    cursor = db.scheduled_posts.find(
-        {"status": "pending", "scheduled_time": {"$lte": now.isoformat()}},
-        {"_id": 0},
+async def _claim_due_posts(now: datetime) -> List[dict]:
+    """Lease up to CLAIM_BATCH_SIZE due posts, including posts whose previous lease expired."""
+    due = {"$or": [
+        {"status": "pending", "due_at": {"$lte": now}},
+        {"status": "publishing", "lease_expires_at": {"$lt": now}},
+    ]}
+    ids = [doc["id"] async for doc in db.scheduled_posts.find(due, {"_id": 0, "id": 1})
+           .sort("due_at", ASCENDING).limit(CLAIM_BATCH_SIZE)]
+    if not ids:
+        return []
+    claim_id = uuid.uuid4().hex
+    # The due filter is re-evaluated per document, so a post claimed by another worker is skipped
+    await db.scheduled_posts.update_many(
+        {"$and": [{"id": {"$in": ids}}, due]},
+        {"$set": {
+            "status": "publishing",
+            "claim_id": claim_id,
+            "lease_owner": WORKER_ID,
+            "lease_expires_at": now + timedelta(seconds=LEASE_SECONDS),
+            "updated_at": now.isoformat(),
+        }},
     )
+    return [doc async for doc in db.scheduled_posts.find({"claim_id": claim_id}, {"_id": 0})]
 
-    due_posts = []
-    async for doc in cursor:
-        due_posts.append(doc)
 
-    for post in due_posts:
-        post_id = post["id"]
-        logger.info(f"Publishing scheduled post {post_id}")
-
-        # Mark as publishing
-        await db.scheduled_posts.update_one(
-            {"id": post_id},
-            {"$set": {"status": "publishing", "updated_at": now.isoformat()}},
-        )
-
-        results = await _publish_post(post)
-        succeeded = sum(1 for r in results.values() if r.get("success"))
-        total = len(post["platforms"])
-        final_status = "published" if succeeded > 0 else "failed"
+async def _complete_post(post: dict, results: dict):
+    now = datetime.now(timezone.utc)
+    post_id = post["id"]
+    succeeded = sum(1 for r in results.values() if r.get("success"))
+    total = len(post["platforms"])
+    final_status = "published" if succeeded > 0 else "failed"
 
-        await db.scheduled_posts.update_one(
-            {"id": post_id},
-            {"$set": {
+    updated = await db.scheduled_posts.update_one(
+        {"id": post_id, "status": "publishing", "lease_owner": WORKER_ID},
+        {
+            "$set": {
                 "status": final_status,
                 "results": results,
                 "succeeded": succeeded,
                 "total": total,
                 "published_at": now.isoformat(),
                 "updated_at": now.isoformat(),
-            }},
-        )
+            },
+            "$unset": {"claim_id": "", "lease_owner": "", "lease_expires_at": ""},
+        },
+    )
+    if not updated.matched_count:
+        logger.warning(f"Scheduled post {post_id} lease lost before completion; outcome discarded")
+        return
+
+    # Also save to publish_history for unified feed
+    record = {
+        "id": str(uuid.uuid4()),
+        "user_id": post["user_id"],
+        "text": post["text"],
+        "media_url": post.get("media_url"),
+        "platforms": post["platforms"],
+        "results": results,
+        "succeeded": succeeded,
+        "total": total,
+        "created_at": now.isoformat(),
+        "source": "scheduled",
+        "scheduled_post_id": post_id,
+    }
+    await db.publish_history.insert_one(record)
+
+    logger.info(f"Scheduled post {post_id}: {final_status} ({succeeded}/{total})")
+
+
+async def _run_post(post: dict, slots: asyncio.Semaphore):
+    try:
+        logger.info(f"Publishing scheduled post {post['id']}")
+        results = await _publish_post(post)
+        await _complete_post(post, results)
+    except Exception as e:
+        # Lease expiry hands the post to the next tick
+        logger.error(f"Scheduled post {post['id']} failed: {e}")
+    finally:
+        _running.discard(post["id"])
+        slots.release()
+
+
+async def _process_due_posts(slots: asyncio.Semaphore) -> int:
+    """Claim due posts batch by batch and start publishing them; returns the number claimed."""
+    claimed = 0
+    while True:
+        posts = await _claim_due_posts(datetime.now(timezone.utc))
+        loop = asyncio.get_event_loop()
+        _running.update(post["id"] for post in posts)
+        for post in posts:
+            await slots.acquire()
+            loop.create_task(_run_post(post, slots))
+        claimed += len(posts)
+        if len(posts) < CLAIM_BATCH_SIZE:
+            return claimed
 
-        # Also save to publish_history for unified feed
-        record = {
-            "id": str(uuid.uuid4()),
-            "user_id": post["user_id"],
-            "text": post["text"],
-            "media_url": post.get("media_url"),
-            "platforms": post["platforms"],
-            "results": results,
-            "succeeded": succeeded,
-            "total": total,
-            "created_at": now.isoformat(),
-            "source": "scheduled",
-            "scheduled_post_id": post_id,
-        }
-        await db.publish_history.insert_one(record)
-
-        logger.info(f"Scheduled post {post_id}: {final_status} ({succeeded}/{total})")
+
+async def _renew_leases():
+    while True:
+        await asyncio.sleep(LEASE_SECONDS / 3)
+        if not _running:
+            continue
+        try:
+            await db.scheduled_posts.update_many(
+                {"id": {"$in": list(_running)}, "status": "publishing", "lease_owner": WORKER_ID},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=LEASE_SECONDS)}},
+            )
+        except Exception as e:
+            logger.warning(f"Scheduled post lease renewal failed: {e}")
+
+
+async def _seconds_until_next_due() -> float:
+    upcoming = await db.scheduled_posts.find_one(
+        {"status": "pending", "due_at": {"$exists": True}},
+        {"_id": 0, "due_at": 1},
+        sort=[("due_at", ASCENDING)],
+    )
+    lease = await db.scheduled_posts.find_one(
+        {"status": "publishing"},
+        {"_id": 0, "lease_expires_at": 1},
+        sort=[("lease_expires_at", ASCENDING)],
+    )
+    candidates = [_parse_iso(d.get(field)) for d, field in ((upcoming, "due_at"), (lease, "lease_expires_at")) if d]
+    candidates = [c for c in candidates if c is not None]
+    if not candidates:
+        return MAX_IDLE_SECONDS
+    delay = (min(candidates) - datetime.now(timezone.utc)).total_seconds()
+    return min(max(delay, 0), MAX_IDLE_SECONDS)
 
 
 async def run_scheduler():
-    """Background loop that checks for due posts every CHECK_INTERVAL_SECONDS."""
-    logger.info("Post scheduler started")
+    """Background loop that publishes due posts and sleeps until the next one is due."""
+    global _wake_event
+    _wake_event = asyncio.Event()
+    slots = asyncio.Semaphore(POST_CONCURRENCY)
+    asyncio.get_event_loop().create_task(_renew_leases())
+    logger.info(f"Post scheduler {WORKER_ID} started")
     while True:
+        delay = MAX_IDLE_SECONDS
         try:
-            await _process_due_posts()
+            await _process_due_posts(slots)
+            delay = await _seconds_until_next_due()
         except Exception as e:
             logger.error(f"Scheduler tick error: {e}")
-        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        if delay <= 0:
+            continue
+        _wake_event.clear()
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
 
 
 def start_scheduler():
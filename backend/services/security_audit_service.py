@@ -8,7 +8,7 @@ import logging
 import subprocess
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 import resend
 
@@ -30,7 +30,7 @@ def get_security_audit_service():
     if _service_instance is None:
         mongo_url = os.environ.get("MONGO_URL")
         db_name = os.environ.get("DB_NAME")
-        client = AsyncIOMotorClient(mongo_url)
+        client = get_mongo_client(mongo_url)
         db = client[db_name]
         _service_instance = SecurityAuditService(db)
     return _service_instance
@@ -10,6 +10,7 @@ from typing import List, Optional, Tuple, Dict
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import uuid
 
+from keyset_pagination import InvalidCursor, paginate
 from ai_support_service import ai_support_service
 from support_models import (
     SupportTicket, TicketResponse, ChatSession, ChatMessage, DAODispute, 
@@ -155,8 +156,11 @@ class SupportService:
             logger.error(f"Failed to add ticket response: {str(e)}")
             raise
     
-    async def search_tickets(self, search_query: TicketSearchQuery, user_id: str) -> Tuple[List[SupportTicket], int]:
-        """Search tickets with filters and pagination"""
+    async def search_tickets(
+        self, search_query: TicketSearchQuery, user_id: str
+    ) -> Tuple[List[SupportTicket], Optional[str], Optional[int]]:
+        """Search tickets with filters; returns the page, the cursor for the next one and,
+        on the first page, the (capped) total"""
         try:
             # Build MongoDB query
             query = {"user_id": user_id}  # Users can only see their tickets
@@ -183,24 +187,21 @@ class SupportService:
                     date_filter["$lte"] = search_query.date_to.isoformat()
                 query["created_at"] = date_filter
             
-            # Count total results
-            total_count = await self.tickets_collection.count_documents(query)
-            
-            # Get paginated results
-            skip = (search_query.page - 1) * search_query.page_size
-            cursor = self.tickets_collection.find(query).sort("created_at", -1).skip(skip).limit(search_query.page_size)
-            
-            tickets = []
-            async for doc in cursor:
-                if "_id" in doc:
-                    del doc["_id"]
-                tickets.append(SupportTicket(**doc))
+            page = await paginate(
+                self.tickets_collection, query,
+                sort=[("created_at", -1), ("ticket_id", -1)],
+                cursor=search_query.cursor, limit=search_query.page_size,
+                projection={"_id": 0}, count="estimate",
+            )
+            tickets = [SupportTicket(**doc) for doc in page["items"]]
             
-            return tickets, total_count
+            return tickets, page["next_cursor"], page.get("total")
             
+        except InvalidCursor:
+            raise
         except Exception as e:
             logger.error(f"Failed to search tickets: {str(e)}")
-            return [], 0
+            return [], None, 0
     
     # =========== LIVE CHAT SYSTEM ===========
     
@@ -12,7 +12,7 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 from enum import Enum
 from pydantic import BaseModel, Field
-from pymongo import MongoClient
+from config.mongo_pool import get_mongo_client
 import ffmpeg
 from pathlib import Path
 
@@ -78,7 +78,7 @@ class TranscodingJob(BaseModel):
 
 class TranscodingService:
     def __init__(self):
-        self.mongo_client = MongoClient(os.environ.get('MONGO_URL'))
+        self.mongo_client = get_mongo_client(os.environ.get('MONGO_URL'))
         self.db = self.mongo_client[os.environ.get('DB_NAME', 'bigmann_entertainment')]
         
         # Collections
@@ -247,11 +247,11 @@ class TranscodingService:
             job_dict["created_at"] = job.created_at.isoformat()
             job_dict["updated_at"] = job.updated_at.isoformat()
             
-            result = self.transcoding_jobs_collection.insert_one(job_dict)
+            result = await self.transcoding_jobs_collection.insert_one(job_dict)
             job.job_id = str(result.inserted_id)
             
             # Update with job_id
-            self.transcoding_jobs_collection.update_one(
+            await self.transcoding_jobs_collection.update_one(
                 {"_id": result.inserted_id},
                 {"$set": {"job_id": job.job_id}}
             )
@@ -268,7 +268,7 @@ class TranscodingService:
         
         try:
             # Get job from database
-            job_data = self.transcoding_jobs_collection.find_one({"job_id": job_id})
+            job_data = await self.transcoding_jobs_collection.find_one({"job_id": job_id})
             if not job_data:
                 raise ValueError("Transcoding job not found")
             
@@ -602,7 +602,7 @@ class TranscodingService:
         elif status == "completed":
             update_data["completed_at"] = datetime.now(timezone.utc).isoformat()
         
-        self.transcoding_jobs_collection.update_one(
+        await self.transcoding_jobs_collection.update_one(
             {"job_id": job_id},
             {"$set": update_data}
         )
@@ -691,7 +691,7 @@ class TranscodingService:
         """Get status of a transcoding job"""
         
         try:
-            job_data = self.transcoding_jobs_collection.find_one({"job_id": job_id})
+            job_data = await self.transcoding_jobs_collection.find_one({"job_id": job_id})
             if job_data:
                 job_data["_id"] = str(job_data["_id"])
                 return TranscodingJob(**job_data)
@@ -709,7 +709,7 @@ class TranscodingService:
             if status:
                 query["status"] = status
             
-            jobs_data = list(self.transcoding_jobs_collection.find(query).sort("created_at", -1))
+            jobs_data = await self.transcoding_jobs_collection.find(query).sort("created_at", -1).to_list(length=None)
             
             jobs = []
             for job_data in jobs_data:
@@ -10,12 +10,12 @@ import os
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import random
 
 MONGO_URL = os.environ.get('MONGO_URL')
 DB_NAME = os.environ.get('DB_NAME')
-client = AsyncIOMotorClient(MONGO_URL)
+client = get_mongo_client(MONGO_URL)
 db = client[DB_NAME]
 logger = logging.getLogger(__name__)
 
@@ -13,12 +13,12 @@ import time
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import uuid
 
 MONGO_URL = os.environ.get('MONGO_URL')
 DB_NAME = os.environ.get('DB_NAME')
-client = AsyncIOMotorClient(MONGO_URL)
+client = get_mongo_client(MONGO_URL)
 db = client[DB_NAME]
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ Core service implementing the foundational Label Registry Service and ULN functi
 
 import os
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date, timedelta
 import uuid
@@ -24,7 +24,7 @@ from uln_models import *
 # Database connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 DB_NAME = os.environ.get('DB_NAME', 'bigmann_entertainment_production')
-client = AsyncIOMotorClient(MONGO_URL)
+client = get_mongo_client(MONGO_URL)
 db = client[DB_NAME]
 
 # Logging setup
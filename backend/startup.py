@@ -2,136 +2,193 @@
 Application startup and shutdown event handlers.
 Extracted from server.py — initializes database indexes, external services,
 payment/metadata pipelines, and AWS media services.
+
+Every piece of startup work is a service in ``startup_orchestrator`` with
+the services it depends on. Critical services run concurrently before the
+app reports ready; the AWS and security integrations are non-critical and
+initialize in the background afterwards. ``/api/performance/startup``
+shows the per-service timing.
 """
+import importlib
 from pathlib import Path
-from datetime import datetime, timezone
 from config.database import db
 from db_optimizer import DatabaseOptimizer
+from async_init import run_pending_initializers
+from startup_orchestrator import StartupOrchestrator
 
-# External service initializers
-from content_removal_endpoints import init_removal_service
-from aws_organizations_service import initialize_service as init_org_service
-from aws_enterprise_mapping_service import initialize_enterprise_mapping
-from agency_success_automation_service import initialize_automation_service
-from dao_governance_v2_service import initialize_dao_v2_service
-from creative_studio_service import initialize_creative_studio_service
-from creative_studio_collab_service import initialize_collab_service
-from creative_studio_ai_service import initialize_ai_assets_service
-from usage_analytics_service import initialize_analytics_tracking
-from aws_cloudwatch_service import initialize_cloudwatch_service
-from macie_service import initialize_macie_service
-from guardduty_service import initialize_guardduty_service
-from qldb_service import initialize_qldb_service
+startup_orchestrator = StartupOrchestrator(announce=print)
 
 
-async def startup_event():
-    """Initialize database indexes, external services, and security modules."""
-    # Create uploads directory
+def _service(name: str, depends_on=(), critical: bool = True, timeout: float = None):
+    """Register the decorated function as a startup service"""
+    def register(fn):
+        startup_orchestrator.service(name, fn, depends_on=depends_on, critical=critical, timeout=timeout)
+        return fn
+    return register
+
+
+def _init_with_db(module: str, function: str):
+    return lambda: getattr(__import__(module), function)(db)
+
+
+# ── Critical: storage, core pipelines and background workers ──
+
+@_service("Uploads Directory")
+def _create_uploads_directory():
     Path("/app/uploads").mkdir(exist_ok=True)
 
-    print("Creating database indexes...")
+
+@_service("Database Indexes", timeout=60)
+async def _create_database_indexes():
     await DatabaseOptimizer.ensure_indexes(db)
 
-    # Initialize external services
-    init_fns = [
-        ("AWS Enterprise Mapping", lambda: initialize_enterprise_mapping(db)),
-        ("Agency Success Automation", lambda: initialize_automation_service(db)),
-        ("DAO Governance V2", lambda: initialize_dao_v2_service(db)),
-        ("Creative Studio", lambda: initialize_creative_studio_service(db)),
-        ("Collaboration & AI Assets", lambda: (initialize_collab_service(db), initialize_ai_assets_service(db))),
-        ("Usage Analytics", lambda: initialize_analytics_tracking(db)),
-        ("Macie PII Detection", lambda: initialize_macie_service(db)),
-        ("GuardDuty Threat Detection", lambda: initialize_guardduty_service(db)),
-        ("QLDB Dispute Ledger", lambda: initialize_qldb_service(db)),
-        ("CloudWatch Monitoring", lambda: initialize_cloudwatch_service()),
-    ]
-
-    for name, fn in init_fns:
-        try:
-            fn()
-            print(f"  {name} initialized")
-        except Exception as e:
-            print(f"  {name} failed: {str(e)}")
 
-    print("Cache service initialized")
-    print("Performance monitoring active")
+# Modules that create their own indexes: the background workers need theirs
+# (e.g. the unique audit batch sequence) before they start, search needs
+# its text indexes and catalog imports their unique job ids before the
+# first request
+_INDEXED_MODULES = (
+    "royalty_engine_core",
+    "services.scheduler_service",
+    "services.delivery_engine",
+    "services.delivery_progress",
+    "analytics_service",
+    "content_search",
+    "services.catalog_import_service",
+)
+
+
+# Index creation and seed data deferred by services built at import time
+@_service("Deferred Service Initializers", timeout=60)
+async def _run_deferred_initializers():
+    for module in _INDEXED_MODULES:
+        importlib.import_module(module)
+    await run_pending_initializers()
+
+for _name, _module, _function in [
+    ("Agency Success Automation", "agency_success_automation_service", "initialize_automation_service"),
+    ("DAO Governance V2", "dao_governance_v2_service", "initialize_dao_v2_service"),
+    ("Creative Studio", "creative_studio_service", "initialize_creative_studio_service"),
+    ("Collaboration", "creative_studio_collab_service", "initialize_collab_service"),
+    ("AI Assets", "creative_studio_ai_service", "initialize_ai_assets_service"),
+    ("Usage Analytics", "usage_analytics_service", "initialize_analytics_tracking"),
+]:
+    _service(_name)(_init_with_db(_module, _function))
+
+
+@_service("Post Scheduler", depends_on=("Deferred Service Initializers",))
+def _start_post_scheduler():
+    from services.scheduler_service import start_scheduler
+    start_scheduler()
+
+
+@_service("Royalty Audit Sealer", depends_on=("Deferred Service Initializers",))
+def _start_audit_sealer():
+    from royalty_engine_core import start_audit_sealer
+    start_audit_sealer()
+
+
+@_service("Royalty Terms Cache Watchers")
+def _start_terms_cache_watchers():
+    from royalty_engine_core import start_terms_cache_watchers
+    start_terms_cache_watchers()
+
+
+# Drains the durable distribution hub delivery job queue
+@_service("Delivery Worker", depends_on=("Deferred Service Initializers",))
+def _start_delivery_worker():
+    from services.delivery_engine import start_delivery_worker
+    start_delivery_worker()
+
+
+@_service("Delivery Progress Reconciler", depends_on=("Deferred Service Initializers",))
+def _start_batch_progress_reconciler():
+    from services.delivery_progress import start_batch_progress_reconciler
+    start_batch_progress_reconciler()
+
+
+# Content performance rebuild and daily bucket compaction
+@_service("Content Performance Maintenance", depends_on=("Deferred Service Initializers",))
+def _start_performance_maintenance():
+    from analytics_service import analytics_service
+    analytics_service.start_performance_maintenance()
 
-    # CVE & Security Services
-    cve_services = [
-        ("CVE Monitor", lambda: __import__('security_audit_service').get_security_audit_service()),
-        ("CVE Management", lambda: __import__('cve_management_service').initialize_cve_management(db)),
-        ("Scanner Service", lambda: __import__('scanner_service').initialize_scanner_service(db)),
-        ("Remediation Service", lambda: __import__('remediation_service').initialize_remediation_service(db)),
-        ("Governance Service", lambda: __import__('governance_service').initialize_governance_service(db)),
-        ("Notification Service", lambda: __import__('notification_service').initialize_notification_service(db)),
-        ("RBAC Service", lambda: __import__('rbac_service').initialize_rbac_service(db)),
-        ("SLA Tracker", lambda: __import__('sla_tracker_service').initialize_sla_tracker_service(db)),
-        ("CVE Reporting", lambda: __import__('cve_reporting_service').initialize_cve_reporting_service(db)),
-        ("Infrastructure Automation", lambda: __import__('iac_service').initialize_iac_service(db)),
-        ("Ticketing Integration", lambda: __import__('ticketing_service').initialize_ticketing_service(db)),
-        ("Multi-Tenant", lambda: __import__('tenant_service').initialize_tenant_service(db)),
-    ]
-
-    for name, fn in cve_services:
-        try:
-            fn()
-            print(f"  {name} initialized")
-        except Exception as e:
-            print(f"  {name} failed: {str(e)}")
-
-    # Initialize content removal and AWS organizations services
-    init_removal_service(db)
-    init_org_service(db)
-
-    # Initialize Payment Service
-    try:
-        import payment_endpoints
-        from payment_service import PaymentService
-        payment_service_instance = PaymentService(db)
-        payment_endpoints.payment_service = payment_service_instance
-    except Exception:
-        pass
-
-    # Initialize Metadata, Batch, Reporting, Rights, Contracts, Audit Services
-    try:
-        import metadata_endpoints
-        import batch_endpoints
-        import reporting_endpoints
-        import rights_endpoints
-        import smart_contract_endpoints
-        import audit_endpoints
-        services_dict = {}
-        metadata_endpoints.init_metadata_services(db, services_dict)
-        batch_endpoints.init_batch_service(db, services_dict)
-        reporting_endpoints.init_reporting_service(db, services_dict)
-        rights_endpoints.init_rights_service(db, services_dict)
-        smart_contract_endpoints.init_contract_service(db, services_dict)
-        audit_endpoints.init_audit_service(db, services_dict)
-    except Exception:
-        pass
-
-    # Initialize GS1 service
-    try:
-        from gs1_endpoints import init_gs1_service
-        init_gs1_service(db)
-    except Exception:
-        pass
 
-    # Initialize Phase 2 AWS services
+# Resource sampling and cross-worker performance snapshots
+@_service("Performance Resource Sampler")
+def _start_resource_sampler():
+    from performance_monitor import start_resource_sampler
+    start_resource_sampler(db.performance_snapshots)
+
+
+@_service("Principal Cache Watcher")
+def _start_principal_cache_watcher():
+    from auth.service import start_principal_cache_watcher
+    start_principal_cache_watcher()
+
+
+# ── Non-critical: AWS and security integrations, initialized after readiness ──
+
+for _name, _module, _function in [
+    ("AWS Enterprise Mapping", "aws_enterprise_mapping_service", "initialize_enterprise_mapping"),
+    ("AWS Organizations", "aws_organizations_service", "initialize_service"),
+    ("Macie PII Detection", "macie_service", "initialize_macie_service"),
+    ("GuardDuty Threat Detection", "guardduty_service", "initialize_guardduty_service"),
+    ("QLDB Dispute Ledger", "qldb_service", "initialize_qldb_service"),
+    ("CVE Management", "cve_management_service", "initialize_cve_management"),
+    ("Scanner Service", "scanner_service", "initialize_scanner_service"),
+    ("Remediation Service", "remediation_service", "initialize_remediation_service"),
+    ("Governance Service", "governance_service", "initialize_governance_service"),
+    ("Notification Service", "notification_service", "initialize_notification_service"),
+    ("RBAC Service", "rbac_service", "initialize_rbac_service"),
+    ("SLA Tracker", "sla_tracker_service", "initialize_sla_tracker_service"),
+    ("CVE Reporting", "cve_reporting_service", "initialize_cve_reporting_service"),
+    ("Infrastructure Automation", "iac_service", "initialize_iac_service"),
+    ("Ticketing Integration", "ticketing_service", "initialize_ticketing_service"),
+    ("Multi-Tenant", "tenant_service", "initialize_tenant_service"),
+]:
+    _service(_name, critical=False)(_init_with_db(_module, _function))
+
+
+@_service("CloudWatch Monitoring", critical=False)
+def _init_cloudwatch():
+    from aws_cloudwatch_service import initialize_cloudwatch_service
+    initialize_cloudwatch_service()
+
+
+@_service("CVE Monitor", critical=False)
+def _init_security_audit():
+    from security_audit_service import get_security_audit_service
+    get_security_audit_service()
+
+
+@_service("Phase 2 AWS Media Services", critical=False)
+def _init_phase2_aws_services():
     from services.aws_media_svc import CloudFrontService, LambdaProcessingService, RekognitionService
     CloudFrontService()
     LambdaProcessingService()
     RekognitionService()
 
-    # Start post scheduler background task
-    try:
-        from services.scheduler_service import start_scheduler
-        start_scheduler()
-        print("  Post Scheduler started")
-    except Exception as e:
-        print(f"  Post Scheduler failed: {str(e)}")
 
-    # ── OWNERSHIP PROTECTION: Enforce immutable owner fields on every startup ──
+# Prefix terms for media and content written before search was indexed
+@_service("Search Index Backfill", depends_on=("Database Indexes",), critical=False, timeout=300)
+async def _backfill_search_prefixes():
+    from content_search import media_search, user_content_search
+    await media_search.backfill(db)
+    await user_content_search.backfill(db)
+
+
+# Load the routers no request has needed yet
+@_service("Router Warm-up", critical=False)
+def _start_router_warmup():
+    from router_setup import router_registry
+    router_registry.start_warmup()
+
+
+# Label ownership is reconciled in one read and at most two bulk writes
+@_service("Ownership Guard", depends_on=("Database Indexes",))
+async def _enforce_owner_fields():
+    """OWNERSHIP PROTECTION: Enforce immutable owner fields, label ownership and business identifiers on every startup"""
     try:
         from utils.ownership_guard import (
             PROTECTED_OWNER_USER_ID,
@@ -142,6 +199,7 @@ async def startup_event():
             PROTECTED_OWNER_IS_ADMIN,
             PROTECTED_OWNER_IS_ACTIVE,
             PROTECTED_OWNER_ACCOUNT_STATUS,
+            reconcile_label_ownership,
         )
         result = await db.users.update_one(
             {"id": PROTECTED_OWNER_USER_ID},
@@ -156,60 +214,50 @@ async def startup_event():
             }},
         )
         if result.modified_count > 0:
+            from auth.service import invalidate_principal
+            invalidate_principal(PROTECTED_OWNER_USER_ID)
             print("  [OWNERSHIP GUARD] Re-asserted protected owner fields (drift detected and corrected)")
         else:
             print("  [OWNERSHIP GUARD] Protected owner fields verified — no drift")
 
-        # Ensure owner membership on every label
-        async for lbl in db.uln_labels.find({"status": "active"}, {"_id": 0, "global_id": 1}):
-            lid = lbl.get("global_id", {}).get("id")
-            if lid:
-                existing = await db.label_members.find_one({"label_id": lid, "user_id": PROTECTED_OWNER_USER_ID})
-                if existing and existing.get("role") != "owner":
-                    await db.label_members.update_one(
-                        {"label_id": lid, "user_id": PROTECTED_OWNER_USER_ID},
-                        {"$set": {"role": "owner"}},
-                    )
-                    print(f"  [OWNERSHIP GUARD] Restored owner role on label {lid}")
+        stats = await reconcile_label_ownership(db)
+        for lid in stats["roles_restored"]:
+            print(f"  [OWNERSHIP GUARD] Restored owner role on label {lid}")
+        print(
+            f"  [OWNERSHIP GUARD] Labels reconciled: {stats['labels_checked']} checked, "
+            f"{len(stats['roles_restored'])} roles restored, {stats['identifiers_created']} identifiers created, "
+            f"{stats['identifiers_updated']} re-asserted in {stats['seconds'] * 1000:.0f}ms "
+            f"({stats['round_trips']} round trips)"
+        )
     except Exception as e:
         print(f"  [OWNERSHIP GUARD] Startup check failed: {str(e)}")
 
-    # ── OWNERSHIP PROTECTION: Enforce immutable business identifiers on every startup ──
-    try:
-        from utils.ownership_guard import PROTECTED_BUSINESS_IDENTIFIERS, PROTECTED_GS1_COMPANY_PREFIX
-
-        # Find all labels owned by the protected owner
-        owner_labels = await db.label_members.find(
-            {"user_id": PROTECTED_OWNER_USER_ID, "role": "owner"}, {"_id": 0, "label_id": 1}
-        ).to_list(length=None)
-
-        for lbl_doc in owner_labels:
-            lid = lbl_doc.get("label_id")
-            if not lid:
-                continue
-            now = datetime.now(timezone.utc).isoformat()
-            ident_doc = {
-                **PROTECTED_BUSINESS_IDENTIFIERS,
-                "label_id": lid,
-                "owner_user_id": PROTECTED_OWNER_USER_ID,
-                "updated_at": now,
-                "updated_by": "system_startup",
-            }
-            result = await db.business_identifiers.update_one(
-                {"label_id": lid},
-                {"$set": ident_doc, "$setOnInsert": {"created_at": now, "created_by": "system_startup"}},
-                upsert=True,
-            )
-            if result.upserted_id:
-                print(f"  [OWNERSHIP GUARD] Pre-populated business identifiers for label {lid}")
-            elif result.modified_count > 0:
-                print(f"  [OWNERSHIP GUARD] Re-asserted business identifiers for label {lid}")
-
-        print(f"  [OWNERSHIP GUARD] Business identifiers enforced for {len(owner_labels)} owned labels")
-    except Exception as e:
-        print(f"  [OWNERSHIP GUARD] Business identifiers startup check failed: {str(e)}")
+
+async def startup_event():
+    """Initialize database indexes, external services, and security modules."""
+    await startup_orchestrator.run()
+    print("Cache service initialized")
+    print("Performance monitoring active")
+    startup_orchestrator.start_deferred()
 
 
 async def shutdown_event():
     """Cleanup on application shutdown."""
-    pass
+    from config.mongo_pool import close_mongo_clients, get_pool_stats
+    print(f"  MongoDB pool stats at shutdown: {get_pool_stats()}")
+    try:
+        from creative_studio_collab_service import get_collab_service
+        collab = get_collab_service()
+        if collab:
+            await collab.oplog.flush_all()
+            print("  Creative Studio element operations flushed")
+    except Exception as e:
+        print(f"  Creative Studio element op flush failed: {str(e)}")
+    close_mongo_clients()
+    print("  MongoDB connection pools closed")
+    try:
+        from services.platform_http import platform_http
+        await platform_http.close_all()
+        print("  Platform HTTP pools closed")
+    except Exception as e:
+        print(f"  Platform HTTP pool shutdown failed: {str(e)}")
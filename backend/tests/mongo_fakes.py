@@ -0,0 +1,536 @@
+"""
+In-memory stand-ins for the Motor collection API used by the unit tests.
+
+Covers the query operators, update operators and aggregation stages the
+services under test issue; anything else raises NotImplementedError so a
+test never silently passes against an unsupported operation. Unique
+indexes are enforced, so upsert and duplicate-key behaviour can be tested.
+"""
+
+import copy
+import itertools
+import re
+from types import SimpleNamespace
+
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+_ids = itertools.count(1)
+# Where a $text match keeps each document's score for {"$meta": "textScore"}
+_TEXT_SCORE = "$textScore"
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def get_path(doc, path, default=None):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+
+def set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def unset_path(doc, path):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _compare(value, op, operand):
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$all":
+        return isinstance(value, list) and all(v in value for v in operand)
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise NotImplementedError(op)
+
+
+def _match_value(value, cond):
+    if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+        for op, operand in cond.items():
+            if op == "$not":
+                if _match_value(value, operand):
+                    return False
+            elif op == "$exists":
+                if (value is not _MISSING) != bool(operand):
+                    return False
+            elif not _compare(None if value is _MISSING else value, op, operand):
+                return False
+        return True
+    return (None if value is _MISSING else value) == cond
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif not _match_value(get_path(doc, key, _MISSING), cond):
+            return False
+    return True
+
+
+def _bson_key(value):
+    """Comparison order for expression operators: null sorts before everything else"""
+    return (value is not None, value)
+
+
+def _field_value(value, parts):
+    """A field path as aggregation expressions see it: paths through arrays collect from every element"""
+    for i, part in enumerate(parts):
+        if isinstance(value, list):
+            return [v for v in (_field_value(item, parts[i:]) for item in value) if v is not _MISSING]
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def evaluate(expr, doc):
+    """The aggregation expression subset used by pipeline updates, $group keys and $project"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _field_value(doc, expr[1:].split("."))
+    if isinstance(expr, list):
+        return [evaluate(e, doc) for e in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {k: v for k, v in ((k, evaluate(v, doc)) for k, v in expr.items()) if v is not _MISSING}
+    op, args = next(iter(expr.items()))
+    if op == "$literal":
+        return args
+    if op == "$meta":
+        if args != "textScore":
+            raise NotImplementedError(args)
+        return doc.get(_TEXT_SCORE, _MISSING)
+    if op == "$type":
+        value = evaluate(args[0] if isinstance(args, list) else args, doc)
+        return "missing" if value is _MISSING else "null" if value is None else type(value).__name__
+    if op == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        return evaluate(args[1], doc) if evaluate(args[0], doc) else evaluate(args[2], doc)
+    if op == "$switch":
+        for branch in args["branches"]:
+            if evaluate(branch["case"], doc):
+                return evaluate(branch["then"], doc)
+        return evaluate(args["default"], doc)
+    values = [evaluate(a, doc) for a in (args if isinstance(args, list) else [args])]
+    values = [None if v is _MISSING else v for v in values]
+    if op == "$in":
+        return values[0] in (values[1] or [])
+    if op == "$arrayElemAt":
+        array, index = values
+        return array[index] if array and -len(array) <= index < len(array) else _MISSING
+    if op == "$ifNull":
+        return next((v for v in values[:-1] if v is not None), values[-1])
+    if op in ("$gt", "$gte", "$lt", "$lte", "$eq", "$ne"):
+        left, right = _bson_key(values[0]), _bson_key(values[1])
+        return {"$gt": left > right, "$gte": left >= right, "$lt": left < right,
+                "$lte": left <= right, "$eq": left == right, "$ne": left != right}[op]
+    if op == "$max":
+        present = [v for v in values if v is not None]
+        return max(present) if present else None
+    if op == "$min":
+        present = [v for v in values if v is not None]
+        return min(present) if present else None
+    if None in values:
+        return None
+    if op == "$add":
+        return sum(values)
+    if op == "$subtract":
+        return values[0] - values[1]
+    if op == "$multiply":
+        result = 1
+        for v in values:
+            result *= v
+        return result
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$round":
+        return round(values[0], values[1] if len(values) > 1 else 0)
+    if op == "$substrBytes":
+        return values[0][values[1]:values[1] + values[2]]
+    raise NotImplementedError(op)
+
+
+def apply_update(doc, update, inserting=False):
+    if isinstance(update, list):
+        for stage in update:
+            (op, fields), = stage.items()
+            if op not in ("$set", "$addFields"):
+                raise NotImplementedError(op)
+            current = copy.deepcopy(doc)
+            for path, expr in fields.items():
+                value = evaluate(expr, current)
+                if value is _MISSING:
+                    unset_path(doc, path)
+                else:
+                    set_path(doc, path, value)
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set":
+                set_path(doc, path, copy.deepcopy(value))
+            elif op == "$setOnInsert":
+                if inserting:
+                    set_path(doc, path, copy.deepcopy(value))
+            elif op == "$inc":
+                set_path(doc, path, get_path(doc, path, 0) + value)
+            elif op == "$max":
+                current = get_path(doc, path, _MISSING)
+                if current is _MISSING or value > current:
+                    set_path(doc, path, value)
+            elif op == "$min":
+                current = get_path(doc, path, _MISSING)
+                if current is _MISSING or value < current:
+                    set_path(doc, path, value)
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$push":
+                get_path(doc, path) or set_path(doc, path, [])
+                get_path(doc, path).append(copy.deepcopy(value))
+            else:
+                raise NotImplementedError(op)
+
+
+def project(doc, projection):
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = [k for k, v in projection.items() if v and k != "_id"]
+    if include:
+        out = {}
+        for path in include:
+            value = get_path(doc, path, _MISSING)
+            if value is not _MISSING:
+                set_path(out, path, value)
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    for path, value in projection.items():
+        if not value:
+            unset_path(doc, path)
+    return doc
+
+
+def project_expressions(doc, projection):
+    """A $project stage that computes fields as well as including them"""
+    out = {}
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    for path, spec in projection.items():
+        if path == "_id" or spec in (0, False):
+            continue
+        value = get_path(doc, path, _MISSING) if spec in (1, True) else evaluate(spec, doc)
+        if value is not _MISSING:
+            set_path(out, path, copy.deepcopy(value))
+    return out
+
+
+def _sort(rows, sort):
+    for key, direction in reversed(sort or []):
+        rows.sort(key=lambda d: (get_path(d, key) is not None, get_path(d, key)), reverse=direction < 0)
+    return rows
+
+
+class FakeCursor:
+    def __init__(self, rows, projection=None):
+        self.rows = rows
+        # Applied when the rows are read, so sorts can use fields the projection drops
+        self.projection = projection
+
+    def sort(self, key, direction=1):
+        _sort(self.rows, key if isinstance(key, list) else [(key, direction)])
+        return self
+
+    def skip(self, n):
+        self.rows = self.rows[n:]
+        return self
+
+    def limit(self, n):
+        if n:
+            self.rows = self.rows[:n]
+        return self
+
+    def _results(self):
+        return self.rows if self.projection is None else [project(d, self.projection) for d in self.rows]
+
+    async def to_list(self, length=None):
+        rows = self._results()
+        return rows if length is None else rows[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._results())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, name="collection", database=None):
+        self.name = name
+        self.database = database
+        self.docs = []
+        self.unique_keys = []
+        self.indexes = []
+
+    # Indexes
+    async def create_index(self, keys, unique=False, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        self.indexes.append((keys, {"unique": unique, **kwargs}))
+        if unique:
+            self.unique_keys.append(tuple(k for k, _ in keys))
+        return "_".join(f"{k}_{d}" for k, d in keys)
+
+    def _check_unique(self, doc, ignore=None):
+        for fields in self.unique_keys + [("_id",)]:
+            key = tuple(get_path(doc, f) for f in fields)
+            if all(v is None for v in key):
+                continue
+            for other in self.docs:
+                if other is not ignore and other is not doc and tuple(get_path(other, f) for f in fields) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key {dict(zip(fields, key))} in {self.name}")
+
+    # Writes
+    async def insert_one(self, doc):
+        doc.setdefault("_id", next(_ids))
+        stored = copy.deepcopy(doc)
+        self._check_unique(stored)
+        self.docs.append(stored)
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        ids, errors = [], []
+        for index, doc in enumerate(docs):
+            try:
+                ids.append((await self.insert_one(doc)).inserted_id)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(ids)})
+        return SimpleNamespace(inserted_ids=ids)
+
+    def _upsert_doc(self, query, update):
+        doc = {}
+        for k, v in query.items():
+            if not k.startswith("$") and not (isinstance(v, dict) and any(o.startswith("$") for o in v)):
+                set_path(doc, k, copy.deepcopy(v))
+        apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", next(_ids))
+        self._check_unique(doc)
+        self.docs.append(doc)
+        return doc
+
+    def _modify(self, doc, update):
+        before = copy.deepcopy(doc)
+        apply_update(doc, update)
+        try:
+            self._check_unique(doc, ignore=doc)
+        except DuplicateKeyError:
+            doc.clear()
+            doc.update(before)
+            raise
+        return before
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if matches(d, query)), None)
+        if doc is None:
+            if upsert:
+                created = self._upsert_doc(query, update)
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=created["_id"])
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        before = self._modify(doc, update)
+        return SimpleNamespace(matched_count=1, modified_count=int(before != doc), upserted_id=None)
+
+    async def update_many(self, query, update, upsert=False):
+        hits = [d for d in self.docs if matches(d, query)]
+        modified = 0
+        for doc in hits:
+            modified += int(self._modify(doc, update) != doc)
+        if not hits and upsert:
+            created = self._upsert_doc(query, update)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=created["_id"])
+        return SimpleNamespace(matched_count=len(hits), modified_count=modified, upserted_id=None)
+
+    async def find_one_and_update(self, query, update, projection=None, sort=None, upsert=False,
+                                  return_document=ReturnDocument.BEFORE):
+        rows = _sort([d for d in self.docs if matches(d, query)], sort)
+        if not rows:
+            if not upsert:
+                return None
+            created = self._upsert_doc(query, update)
+            return project(created, projection) if return_document == ReturnDocument.AFTER else None
+        doc = rows[0]
+        before = self._modify(doc, update)
+        return project(doc if return_document == ReturnDocument.AFTER else before, projection)
+
+    async def delete_one(self, query):
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[i]
+                return SimpleNamespace(deleted_count=1)
+        return SimpleNamespace(deleted_count=0)
+
+    async def delete_many(self, query):
+        kept = [d for d in self.docs if not matches(d, query)]
+        deleted = len(self.docs) - len(kept)
+        self.docs[:] = kept
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            if isinstance(request, InsertOne):
+                await self.insert_one(request._doc)
+            else:
+                await self.update_one(request._filter, request._doc, upsert=request._upsert)
+
+    # Reads
+    def find(self, query=None, projection=None, sort=None, limit=0):
+        rows = _sort([d for d in self.docs if matches(d, query or {})], sort)
+        return FakeCursor(rows, projection or {}).limit(limit)
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        rows = _sort([d for d in self.docs if matches(d, query or {})], sort)
+        return project(rows[0], projection) if rows else None
+
+    async def count_documents(self, query, limit=0):
+        total = sum(1 for d in self.docs if matches(d, query))
+        return min(total, limit) if limit else total
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    def aggregate(self, pipeline):
+        return FakeCursor(self._run_pipeline([copy.deepcopy(d) for d in self.docs], pipeline))
+
+    def _text_scores(self, rows, search):
+        """Score ``rows`` against the collection's text index: field weight times matching words"""
+        index = next(((keys, options) for keys, options in self.indexes
+                      if any(direction == "text" for _, direction in keys)), None)
+        if index is None:
+            raise OperationFailure("text index required for $text query", code=27)
+        keys, options = index
+        weights = options.get("weights") or {}
+        terms = {t.lower() for t in _WORD.findall(search)}
+        scored = []
+        for doc in rows:
+            score = 0.0
+            for field, _ in keys:
+                value = get_path(doc, field)
+                texts = value if isinstance(value, list) else [value]
+                words = [w.lower() for text in texts if isinstance(text, str) for w in _WORD.findall(text)]
+                score += weights.get(field, 1) * sum(1 for w in words if w in terms)
+            if score:
+                doc[_TEXT_SCORE] = score
+                scored.append(doc)
+        return scored
+
+    def _run_pipeline(self, rows, pipeline):
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op == "$match":
+                if "$text" in spec:
+                    spec = dict(spec)
+                    rows = self._text_scores(rows, spec.pop("$text")["$search"])
+                rows = [d for d in rows if matches(d, spec)]
+            elif op == "$addFields":
+                for doc in rows:
+                    for path, expr in spec.items():
+                        value = evaluate(expr, doc)
+                        if value is not _MISSING:
+                            set_path(doc, path, value)
+            elif op == "$count":
+                rows = [{spec: len(rows)}] if rows else []
+            elif op == "$sortByCount":
+                counts = {}
+                for doc in rows:
+                    key = evaluate(spec, doc)
+                    key = None if key is _MISSING else key
+                    counts.setdefault(repr(key), {"_id": key, "count": 0})["count"] += 1
+                rows = sorted(counts.values(), key=lambda g: g["count"], reverse=True)
+            elif op == "$group":
+                groups = {}
+                for doc in rows:
+                    key = evaluate(spec["_id"], doc)
+                    group = groups.setdefault(repr(key), {"_id": key})
+                    for field, acc in spec.items():
+                        if field == "_id":
+                            continue
+                        (acc_op, acc_expr), = acc.items()
+                        if acc_op != "$sum":
+                            raise NotImplementedError(acc_op)
+                        group[field] = group.get(field, 0) + evaluate(acc_expr, doc)
+                rows = list(groups.values())
+            elif op == "$sort":
+                _sort(rows, list(spec.items()))
+            elif op == "$limit":
+                rows = rows[:spec]
+            elif op == "$project":
+                if all(v in (0, 1, True, False) for v in spec.values()):
+                    rows = [project(d, spec) for d in rows]
+                else:
+                    rows = [project_expressions(d, spec) for d in rows]
+            elif op == "$lookup":
+                foreign = self.database[spec["from"]].docs
+                for doc in rows:
+                    local = get_path(doc, spec["localField"])
+                    doc[spec["as"]] = [copy.deepcopy(f) for f in foreign
+                                       if get_path(f, spec["foreignField"]) == local]
+            elif op == "$facet":
+                rows = [{name: self._run_pipeline(copy.deepcopy(rows), sub) for name, sub in spec.items()}]
+            else:
+                raise NotImplementedError(op)
+        for doc in rows:
+            doc.pop(_TEXT_SCORE, None)
+        return rows
+
+
+class FakeDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name, self)
+        return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
@@ -0,0 +1,190 @@
+"""
+Cache Service - Unit Tests
+
+Validates the bounded API response cache: LRU/LFU eviction under entry and
+byte budgets, per-prefix TTLs, single-flight loading, stale-while-revalidate
+and the shared backend, using a local in-process stand-in for Redis.
+"""
+
+import asyncio
+import fnmatch
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "services"))
+from cache_service import CacheService, RedisCacheBackend  # type: ignore  # noqa: E402
+
+
+class LocalRedis:
+    """The subset of the redis-py asyncio client the cache backend uses"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        value = self.store.get(key)
+        if value is None or value[1] < time.monotonic():
+            return None
+        return value[0].encode()
+
+    async def set(self, key, value, ex):
+        self.store[key] = (value, time.monotonic() + ex)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match):
+        for key in list(self.store):
+            if fnmatch.fnmatch(key, match):
+                yield key
+
+
+def _expire(cache, key, stale=True):
+    """Move an entry past its TTL, optionally past its stale window too"""
+    entry = cache._cache[key]
+    entry.expires_at = time.monotonic() - 1
+    if not stale:
+        entry.stale_until = entry.expires_at
+
+
+class TestBounds:
+    def test_lru_evicts_least_recently_used(self):
+        cache = CacheService(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_budget_evicts(self):
+        cache = CacheService(max_entries=100, max_bytes=250)
+        for i in range(5):
+            cache.set(f"k{i}", "x" * 100)
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 250
+        assert stats["total_entries"] == 2
+
+    def test_oversized_value_rejected(self):
+        cache = CacheService(max_bytes=10)
+        cache.set("big", "x" * 100)
+        assert cache.get("big") is None
+        assert cache.get_stats()["rejected"] == 1
+
+    def test_lfu_keeps_frequently_used(self):
+        cache = CacheService(max_entries=2, policy="lfu")
+        cache.set("hot", 1)
+        cache.set("cold", 2)
+        for _ in range(5):
+            cache.get("hot")
+        cache.get("cold")  # most recent, but used less
+        cache.set("new", 3)
+        assert cache.get("hot") == 1
+        assert cache.get("cold") is None
+
+
+class TestTTL:
+    def test_prefix_ttl_longest_match_wins(self):
+        cache = CacheService(prefix_ttls={"dashboard": 30, "dashboard:admin": 5})
+        assert cache.ttl_for("dashboard:user:1") == 30
+        assert cache.ttl_for("dashboard:admin:1") == 5
+        assert cache.ttl_for("other:1") == 300
+        assert cache.ttl_for("dashboard:user:1", 90) == 90
+
+    def test_expired_entry_not_returned_by_get(self):
+        cache = CacheService()
+        cache.set("a", 1)
+        _expire(cache, "a")
+        assert cache.get("a") is None
+
+
+class TestLoading:
+    async def test_concurrent_misses_share_one_load(self):
+        cache = CacheService()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"rows": [1, 2, 3]}
+
+        results = await asyncio.gather(*(cache.get_or_load("dash", loader) for _ in range(50)))
+        assert calls == 1
+        assert all(r == {"rows": [1, 2, 3]} for r in results)
+        assert cache.get_stats()["coalesced"] == 49
+
+    async def test_stale_value_served_while_refreshing(self):
+        cache = CacheService(stale_seconds=60)
+        await cache.get_or_load("dash", _value("old"))
+        _expire(cache, "dash")
+        refreshed = asyncio.Event()
+
+        async def slow_loader():
+            await refreshed.wait()
+            return "new"
+
+        assert await cache.get_or_load("dash", slow_loader) == "old"
+        assert await cache.get_or_load("dash", slow_loader) == "old"  # refresh already running
+        refreshed.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert cache.get("dash") == "new"
+        assert cache.get_stats()["loads"] == 2
+
+    async def test_past_stale_window_loads_synchronously(self):
+        cache = CacheService(stale_seconds=60)
+        await cache.get_or_load("dash", _value("old"))
+        _expire(cache, "dash", stale=False)
+        assert await cache.get_or_load("dash", _value("new")) == "new"
+
+    async def test_load_error_reaches_every_waiter_and_is_not_cached(self):
+        cache = CacheService()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("mongo down")
+
+        results = await asyncio.gather(*(cache.get_or_load("k", failing) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await cache.get_or_load("k", _value("ok")) == "ok"
+
+
+class TestSharedBackend:
+    async def test_second_worker_reads_shared_value(self):
+        redis = LocalRedis()
+        first = CacheService(backend=RedisCacheBackend(redis))
+        second = CacheService(backend=RedisCacheBackend(redis))
+        await first.get_or_load("dash", _value({"total": 7}))
+
+        async def must_not_run():
+            raise AssertionError("loaded despite shared value")
+
+        assert await second.get_or_load("dash", must_not_run) == {"total": 7}
+        assert second.get_stats()["backend_hits"] == 1
+
+    async def test_clear_empties_backend_namespace(self):
+        redis = LocalRedis()
+        redis.store["other:key"] = ("1", time.monotonic() + 60)
+        cache = CacheService(backend=RedisCacheBackend(redis))
+        await cache.get_or_load("dash", _value(1))
+        cache.clear()
+        await asyncio.sleep(0)
+        assert list(redis.store) == ["other:key"]
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        CacheService(policy="fifo")
+
+
+def _value(value):
+    async def loader():
+        return value
+    return loader
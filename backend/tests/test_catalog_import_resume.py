@@ -0,0 +1,168 @@
+"""
+Catalog CSV Import Chunks - Unit Tests
+
+Validates the streaming catalog import without a live server: rows are
+written one chunk at a time with a checkpoint after each, an interrupted
+import resumes from its checkpoint without duplicating the assets or row
+errors of the chunk that was in flight, and a job is resumed by one
+upload at a time, only once its lease has run out. Runs against
+in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from services import catalog_import_service  # type: ignore  # noqa: E402
+from services.catalog_import_service import get_import_job, parse_and_import_csv  # type: ignore  # noqa: E402
+
+CSV = "\n".join([
+    "title,type,isrc",
+    "One,single,USAAA0000001",
+    "Two,single,USAAA0000002",
+    "Three,bogus,USAAA0000003",
+    "Four,single,USAAA0000001",
+    "Five,single,USAAA0000005",
+])
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(catalog_import_service, "db", fake)
+    monkeypatch.setattr(catalog_import_service, "IMPORT_CHUNK_ROWS", 2)
+    await catalog_import_service._ensure_indexes()
+    fake.uln_labels.docs.append({"global_id": {"id": "L1"}, "metadata_profile": {"name": "Label"}})
+    return fake
+
+
+def _fail_once(monkeypatch, collection, method, when=lambda *args: True):
+    """Make ``collection.method`` raise the first time ``when`` holds for its arguments"""
+    original = getattr(collection, method)
+    failed = []
+
+    async def wrapper(*args, **kwargs):
+        if not failed and when(*args):
+            failed.append(True)
+            raise ConnectionError("connection reset")
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(collection, method, wrapper)
+
+
+def _is_checkpoint(query, update):
+    return "rows_done" in update.get("$set", {})
+
+
+def _job(db):
+    return db.catalog_import_jobs.docs[0]
+
+
+class TestChunks:
+    async def test_rows_are_written_per_chunk_with_checkpoints(self, db, monkeypatch):
+        checkpoints = []
+        original = db.catalog_import_jobs.update_one
+
+        async def update_one(query, update, upsert=False):
+            if _is_checkpoint(query, update):
+                checkpoints.append(update["$set"]["rows_done"])
+            return await original(query, update, upsert=upsert)
+
+        monkeypatch.setattr(db.catalog_import_jobs, "update_one", update_one)
+        result = await parse_and_import_csv("L1", CSV, "u1")
+
+        assert result["success"] and result["total_rows"] == 5
+        assert (result["imported_count"], result["skipped_count"], result["error_count"]) == (3, 1, 1)
+        assert checkpoints == [3, 5, 6]
+        assert sorted(a["import_row"] for a in db.label_assets.docs) == [2, 3, 6]
+        assert [(e["row"], e["kind"]) for e in db.catalog_import_errors.docs] == [(4, "error"), (5, "skipped")]
+        assert _job(db)["status"] == "completed" and "lease_expires_at" not in _job(db)
+
+        job = await get_import_job("L1", result["job_id"])
+        assert [issue["row"] for issue in job["issues"]] == [4, 5] and "claim_id" not in job
+
+
+class TestResume:
+    async def test_failed_import_resumes_from_its_checkpoint(self, db, monkeypatch):
+        _fail_once(monkeypatch, db.label_assets, "insert_many",
+                   lambda docs, *rest: docs[0]["import_row"] == 6)
+        failed = await parse_and_import_csv("L1", CSV, "u1")
+        assert not failed["success"] and failed["rows_done"] == 5
+        assert _job(db)["status"] == "failed"
+
+        resumed = await parse_and_import_csv("L1", CSV, "u1", resume_job_id=failed["job_id"])
+        assert resumed["success"] and resumed["job_id"] == failed["job_id"]
+        assert (resumed["imported_count"], resumed["skipped_count"], resumed["error_count"]) == (3, 1, 1)
+        assert sorted(a["import_row"] for a in db.label_assets.docs) == [2, 3, 6]
+
+    async def test_in_flight_chunk_is_not_written_twice(self, db, monkeypatch):
+        # The second chunk's assets and errors are written, then its checkpoint fails
+        _fail_once(monkeypatch, db.catalog_import_jobs, "update_one",
+                   lambda query, update: _is_checkpoint(query, update) and update["$set"]["rows_done"] == 5)
+        failed = await parse_and_import_csv("L1", CSV, "u1")
+        assert not failed["success"] and failed["rows_done"] == 3
+
+        resumed = await parse_and_import_csv("L1", CSV, "u1", resume_job_id=failed["job_id"])
+        assert resumed["success"]
+        assert sorted(a["import_row"] for a in db.label_assets.docs) == [2, 3, 6]
+        assert sorted(e["row"] for e in db.catalog_import_errors.docs) == [4, 5]
+        assert (resumed["imported_count"], resumed["skipped_count"], resumed["error_count"]) == (3, 1, 1)
+
+    async def test_completed_job_is_not_resumed(self, db):
+        done = await parse_and_import_csv("L1", CSV, "u1")
+        again = await parse_and_import_csv("L1", CSV, "u1", resume_job_id=done["job_id"])
+        assert not again["success"] and len(db.label_assets.docs) == 3
+
+
+class TestLease:
+    async def _stalled_job(self, db, monkeypatch):
+        """A job whose run stopped after its first checkpoint without releasing its lease"""
+        _fail_once(monkeypatch, db.catalog_import_jobs, "update_one",
+                   lambda query, update: _is_checkpoint(query, update) and update["$set"]["rows_done"] == 5)
+        _fail_once(monkeypatch, db.catalog_import_jobs, "update_one",
+                   lambda query, update: update.get("$set", {}).get("status") == "failed")
+        with pytest.raises(ConnectionError):
+            await parse_and_import_csv("L1", CSV, "u1")
+        assert _job(db)["status"] == "running"
+        return _job(db)["job_id"]
+
+    async def test_running_job_is_not_resumed_while_leased(self, db, monkeypatch):
+        job_id = await self._stalled_job(db, monkeypatch)
+        result = await parse_and_import_csv("L1", CSV, "u1", resume_job_id=job_id)
+        assert not result["success"] and "still running" in result["error"]
+        assert _job(db)["rows_done"] == 3
+
+    async def test_job_with_expired_lease_is_resumed(self, db, monkeypatch):
+        job_id = await self._stalled_job(db, monkeypatch)
+        _job(db)["lease_expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        result = await parse_and_import_csv("L1", CSV, "u1", resume_job_id=job_id)
+        assert result["success"] and sorted(a["import_row"] for a in db.label_assets.docs) == [2, 3, 6]
+
+    async def test_run_that_lost_its_lease_stops(self, db, monkeypatch):
+        original = db.catalog_import_jobs.update_one
+
+        async def update_one(query, update, upsert=False):
+            if _is_checkpoint(query, update) and update["$set"]["rows_done"] == 5:
+                # Another upload takes the job over between this run's chunks
+                _job(db)["claim_id"] = "other-upload"
+            return await original(query, update, upsert=upsert)
+
+        monkeypatch.setattr(db.catalog_import_jobs, "update_one", update_one)
+        result = await parse_and_import_csv("L1", CSV, "u1")
+        assert not result["success"] and "another upload" in result["error"]
+        assert _job(db)["rows_done"] == 3 and _job(db)["status"] == "running"
+
+
+class TestIndexes:
+    async def test_job_ids_are_unique(self, db):
+        result = await parse_and_import_csv("L1", CSV, "u1")
+        with pytest.raises(DuplicateKeyError):
+            await db.catalog_import_jobs.insert_one({"job_id": result["job_id"], "status": "running"})
@@ -0,0 +1,120 @@
+"""
+Creative Studio Presence - Unit Tests
+
+Validates cursor coalescing: a burst of cursor moves is sent as one frame
+per tick holding only each user's latest position, a lone mover does not
+receive their own frame, quiet projects stop their flush loop, and a
+dropped collaborator is disconnected without leaving a ghost cursor.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "services"))
+import creative_studio_collab_service as collab  # type: ignore  # noqa: E402
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = []
+        self.fail = False
+        self.close_codes = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+class _Db:
+    creative_studio_activity = None
+    creative_studio_element_ops = None
+    creative_studio_element_snapshots = None
+    creative_studio_projects = None
+
+
+def _frames(ws):
+    return [m for m in ws.sent if m["type"] == "cursor_frame"]
+
+
+async def _session(*users):
+    service = collab.CollaborationService(_Db())
+    sockets = {}
+    for user in users:
+        sockets[user] = _Socket()
+        await service.connect("p1", user, user.title(), sockets[user])
+    return service, sockets
+
+
+class TestCursorFrames:
+    async def test_burst_is_coalesced_into_latest_positions(self, monkeypatch):
+        monkeypatch.setattr(collab, "COLLAB_CURSOR_FRAME_SECONDS", 0.02)
+        service, sockets = await _session("ana", "ben", "cy")
+        for i in range(50):
+            await service.handle_cursor_move("p1", "ana", i, i)
+            await service.handle_cursor_move("p1", "ben", -i, -i)
+        await asyncio.sleep(0.05)
+
+        frames = _frames(sockets["cy"])
+        assert len(frames) == 1
+        assert {(c["user_id"], c["x"]) for c in frames[0]["cursors"]} == {("ana", 49), ("ben", -49)}
+        assert service.get_presence_stats()["moves_superseded"] == 98
+        for user in ("ana", "ben", "cy"):
+            await service.disconnect("p1", user)
+
+    async def test_lone_mover_does_not_receive_own_frame(self, monkeypatch):
+        monkeypatch.setattr(collab, "COLLAB_CURSOR_FRAME_SECONDS", 0.01)
+        service, sockets = await _session("ana", "ben")
+        await service.handle_cursor_move("p1", "ana", 3, 4)
+        await asyncio.sleep(0.04)
+        assert _frames(sockets["ana"]) == []
+        assert _frames(sockets["ben"])[0]["cursors"][0]["x"] == 3
+        for user in ("ana", "ben"):
+            await service.disconnect("p1", user)
+
+    async def test_flush_loop_stops_when_quiet(self, monkeypatch):
+        monkeypatch.setattr(collab, "COLLAB_CURSOR_FRAME_SECONDS", 0.001)
+        monkeypatch.setattr(collab, "COLLAB_CURSOR_IDLE_FRAMES", 3)
+        service, _ = await _session("ana", "ben")
+        await service.handle_cursor_move("p1", "ana", 1, 1)
+        assert service.presence["p1"].flush_task is not None
+        await asyncio.sleep(0.05)
+        assert service.presence["p1"].flush_task is None
+        for user in ("ana", "ben"):
+            await service.disconnect("p1", user)
+
+
+class TestDroppedCollaborator:
+    async def test_dropped_user_is_closed_and_cursor_moves_ignored(self, monkeypatch):
+        monkeypatch.setattr(collab, "COLLAB_CURSOR_FRAME_SECONDS", 0.01)
+        service, sockets = await _session("ana", "ben", "cy")
+        sockets["ben"].fail = True
+        await service.handle_cursor_move("p1", "ana", 1, 1)
+        await asyncio.sleep(0.05)
+
+        presence = service.presence["p1"]
+        assert sockets["ben"].close_codes == [1013] and "ben" not in presence.connections
+        assert any(m["type"] == "user_left" and m["user_id"] == "ben" for m in sockets["cy"].sent)
+
+        # The dropped client's last moves arrive after it left
+        await service.handle_cursor_move("p1", "ben", 9, 9)
+        await asyncio.sleep(0.03)
+        assert "ben" not in presence.cursors and "ben" not in presence.pending_cursors
+        assert all(c["user_id"] != "ben" for f in _frames(sockets["cy"]) for c in f["cursors"])
+        assert [u["user_id"] for u in presence.active_users] == ["ana", "cy"]
+        for user in ("ana", "cy"):
+            await service.disconnect("p1", user)
+
+    async def test_cursor_move_for_unknown_project_is_ignored(self):
+        service = collab.CollaborationService(_Db())
+        await service.handle_cursor_move("p9", "ana", 1, 1)
+        assert "p9" not in service.presence
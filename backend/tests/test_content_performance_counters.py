@@ -0,0 +1,181 @@
+"""
+Content Performance Counters - Unit Tests
+
+Validates incremental content performance aggregation: tracked events are
+folded into per-content counters and breakdowns with one write per
+content, the derived ratios are refreshed in that same write, a rebuild
+from the raw events reproduces the incremental document, and old daily
+buckets are compacted into monthly totals unless an event raced the
+compaction. Runs against in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from services.analytics_service import AnalyticsService  # type: ignore  # noqa: E402
+
+COUNTER_FIELDS = ("total_views", "total_streams", "total_likes", "total_shares", "total_comments", "total_revenue",
+                  "platform_metrics", "country_breakdown", "age_group_breakdown", "gender_breakdown",
+                  "daily_metrics", "monthly_metrics", "engagement_rate", "industry_percentile")
+
+
+@pytest.fixture
+def service():
+    fake = FakeDatabase()
+    service = AnalyticsService.__new__(AnalyticsService)
+    service.events_collection = fake.analytics_events
+    service.performance_collection = fake.content_performance
+    service.industry_benchmarks = service._initialize_benchmarks()
+    return service
+
+
+def _event(metric_type, value, days_ago=0, platform="spotify", content_id="c1", **fields):
+    timestamp = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return {"event_id": f"{metric_type}-{value}-{days_ago}-{platform}", "user_id": "u1", "content_id": content_id,
+            "platform": platform, "metric_type": metric_type, "value": value,
+            "timestamp": timestamp.isoformat(), **fields}
+
+
+async def _track(service, events):
+    await service.events_collection.insert_many([dict(e) for e in events])
+    await service._update_content_performance(events)
+
+
+def _perf(service, content_id="c1"):
+    return next(d for d in service.performance_collection.docs if d["content_id"] == content_id)
+
+
+class TestIncrementalUpdate:
+    async def test_events_fold_into_counters_and_breakdowns(self, service):
+        await _track(service, [
+            _event("views", 100, country="US", age_group="18-24"),
+            _event("views", 50, platform="apple.music", country="GB"),
+            _event("likes", 6, country="US"),
+            _event("revenue", 1.5),
+        ])
+        perf = _perf(service)
+        assert perf["total_views"] == 150 and perf["total_likes"] == 6 and perf["total_revenue"] == 1.5
+        assert perf["platform_metrics"] == {"spotify": {"views": 100, "likes": 6, "revenue": 1.5},
+                                            "apple_music": {"views": 50}}
+        assert perf["country_breakdown"] == {"US": {"views": 100, "likes": 6}, "GB": {"views": 50}}
+        assert perf["age_group_breakdown"] == {"18-24": {"views": 100}}
+        assert perf["content_type"] == "music" and perf["incremental"] is True
+        assert perf["counter_version"] == 1
+
+    async def test_derived_ratios_written_with_the_counters(self, service):
+        await _track(service, [_event("views", 200), _event("likes", 5), _event("shares", 3)])
+        perf = _perf(service)
+        assert perf["engagement_rate"] == 4.0
+        assert perf == {**perf, **service._derived_metrics(perf, "music")}
+
+        # A second batch moves the ratios in the same write that moves the totals
+        await _track(service, [_event("comments", 12)])
+        perf = _perf(service)
+        assert perf["counter_version"] == 2
+        assert perf["engagement_rate"] == 10.0
+        assert perf["industry_percentile"] == service._derived_metrics(perf, "music")["industry_percentile"]
+
+    async def test_zero_views_has_zero_engagement(self, service):
+        await _track(service, [_event("likes", 3)])
+        assert _perf(service)["engagement_rate"] == 0.0
+
+    async def test_existing_document_keeps_its_metadata(self, service):
+        await service.performance_collection.insert_one({
+            "content_id": "c1", "user_id": "u1", "content_title": "Single", "content_type": "video",
+            "total_views": 10, "last_updated": "2020-01-01T00:00:00+00:00",
+        })
+        await _track(service, [_event("views", 90), _event("likes", 9)])
+        perf = _perf(service)
+        assert perf["content_title"] == "Single" and perf["content_type"] == "video"
+        assert perf["total_views"] == 100 and perf["engagement_rate"] == 9.0
+        assert perf["industry_percentile"] == service._derived_metrics(perf, "video")["industry_percentile"]
+        # Documents from before incremental counters stay queued for a rebuild
+        assert "incremental" not in perf
+
+    async def test_daily_since_tracks_the_oldest_bucket(self, service):
+        await _track(service, [_event("views", 1, days_ago=2)])
+        await _track(service, [_event("views", 1, days_ago=5), _event("views", 1)])
+        oldest = (datetime.now(timezone.utc) - timedelta(days=5)).date().isoformat()
+        assert _perf(service)["daily_since"] == oldest
+
+
+class TestRebuild:
+    async def test_rebuild_reproduces_incremental_counters(self, service):
+        events = [
+            _event("views", 120, country="US", gender="f"),
+            _event("views", 30, platform="youtube", age_group="25-34", days_ago=3),
+            _event("likes", 4, country="US"),
+            _event("comments", 2, platform="youtube"),
+            _event("revenue", 0.75, days_ago=3),
+        ]
+        await _track(service, events)
+        incremental = {k: _perf(service)[k] for k in COUNTER_FIELDS if k in _perf(service)}
+
+        _perf(service).update(total_views=0, platform_metrics={}, engagement_rate=99)
+        assert await service.rebuild_content_performance("c1", "u1") is True
+        rebuilt = _perf(service)
+        assert {k: rebuilt[k] for k in incremental} == incremental
+        assert "rebuilt_at" in rebuilt
+
+    async def test_rebuild_discarded_if_events_land_meanwhile(self, service):
+        await _track(service, [_event("views", 10)])
+        original_update_one = service.performance_collection.update_one
+        raced = []
+
+        async def update_one(query, update, upsert=False):
+            # Events are applied between the rebuild's read and its write
+            if not raced and isinstance(update, dict) and "rebuilt_at" in update.get("$set", {}):
+                raced.append(True)
+                await _track(service, [_event("views", 5)])
+            return await original_update_one(query, update, upsert=upsert)
+
+        service.performance_collection.update_one = update_one
+        assert await service.rebuild_content_performance("c1", "u1") is False
+        assert _perf(service)["total_views"] == 15 and "rebuilt_at" not in _perf(service)
+
+    async def test_maintenance_rebuilds_legacy_documents(self, service):
+        await service.events_collection.insert_many([_event("views", 40), _event("likes", 2)])
+        await service.performance_collection.insert_one(
+            {"content_id": "c1", "user_id": "u1", "content_type": "music", "total_views": 7}
+        )
+        summary = await service.run_performance_maintenance()
+        assert summary["rebuilt"] == 1
+        perf = _perf(service)
+        assert perf["total_views"] == 40 and perf["engagement_rate"] == 5.0 and perf["incremental"] is True
+        assert (await service.run_performance_maintenance())["rebuilt"] == 0
+
+
+class TestCompaction:
+    async def test_old_daily_buckets_fold_into_months(self, service):
+        old = 120
+        await _track(service, [_event("views", 10, days_ago=old), _event("views", 5, days_ago=old),
+                               _event("streams", 3, days_ago=old), _event("views", 1)])
+        month = (datetime.now(timezone.utc) - timedelta(days=old)).strftime("%Y-%m")
+        today = datetime.now(timezone.utc).date().isoformat()
+
+        summary = await service.run_performance_maintenance()
+        assert summary["compacted"] == 1
+        perf = _perf(service)
+        assert perf["monthly_metrics"] == {month: {"views": 15, "streams": 3}}
+        assert list(perf["daily_metrics"]) == [today] and perf["daily_since"] == today
+        assert perf["total_views"] == 16
+        assert (await service.run_performance_maintenance())["compacted"] == 0
+
+    async def test_compaction_skipped_when_an_event_races_it(self, service):
+        await _track(service, [_event("views", 10, days_ago=120)])
+        stale = dict(_perf(service))
+        await _track(service, [_event("views", 1, days_ago=120)])
+
+        cutoff = service._daily_cutoff()
+        assert await service.compact_content_performance(stale, cutoff) is False
+        perf = _perf(service)
+        assert sum(m["views"] for m in perf["daily_metrics"].values()) == 11
+        assert "monthly_metrics" not in perf
@@ -0,0 +1,131 @@
+"""
+Content Search - Unit Tests
+
+Validates indexed search: prefix terms are derived from titles and tags,
+ranked queries use the weighted text index, pages continue from a keyset
+cursor instead of skipping, facet counts run only for the first page, and
+suggestions match every typed word by prefix. Runs against in-memory
+collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from content_search import ContentSearch, prefixes_for  # type: ignore  # noqa: E402
+from keyset_pagination import decode_cursor  # type: ignore  # noqa: E402
+
+
+SEARCH = ContentSearch("things", {"title": 10, "tags": 5}, ("title", "tags"), ("content_type",))
+
+
+async def _collection(docs):
+    """The searched collection with its indexes, recording every aggregation pipeline"""
+    db = FakeDatabase()
+    coll = db.things
+    await SEARCH.ensure_indexes(db)
+    for doc in docs:
+        await coll.insert_one({**doc, **SEARCH.search_fields(doc)})
+    coll.pipelines = []
+    aggregate = coll.aggregate
+
+    def recording(pipeline):
+        coll.pipelines.append(pipeline)
+        return aggregate(pipeline)
+
+    coll.aggregate = recording
+    return db, coll
+
+
+def _thing(n, title, content_type="audio", **fields):
+    return {"_id": f"64b0000000000000000000{n:02d}", "title": title, "content_type": content_type,
+            "visibility": "public", "created_at": datetime(2026, 1, 1) + timedelta(minutes=n), **fields}
+
+
+class TestPrefixes:
+    def test_prefixes_cover_title_and_tag_words(self):
+        search = ContentSearch("things", {"title": 10}, ("title", "tags"), ())
+        prefixes = search.search_fields({"title": "Midnight Beats", "tags": ["Lo-Fi"]})["search_prefixes"]
+        assert {"mi", "midn", "midnight", "be", "beats", "lo", "fi"} <= set(prefixes)
+        assert "m" not in prefixes
+
+    def test_long_words_are_truncated(self):
+        assert max(len(p) for p in prefixes_for("supercalifragilistic")) == 15
+
+
+class TestIndexes:
+    async def test_text_index_is_weighted_and_prefixes_indexed_with_sort_key(self):
+        db, coll = await _collection([])
+        (text_keys, text_options), (prefix_keys, _) = coll.indexes
+        assert text_keys == [("title", "text"), ("tags", "text")]
+        assert text_options["weights"] == {"title": 10, "tags": 5}
+        assert prefix_keys == [("search_prefixes", 1), ("created_at", -1)]
+
+
+class TestSearch:
+    async def test_ranked_search_uses_text_index_and_pages_by_cursor(self):
+        db, coll = await _collection([
+            _thing(1, "Beats"), _thing(2, "Beats and more beats"), _thing(3, "Quiet", tags=["beats"]),
+            _thing(4, "Silence"), _thing(5, "Beats", visibility="private"),
+        ])
+        first = await SEARCH.search(db, "beats", {"visibility": "public"}, limit=2)
+        assert coll.pipelines[0][0] == {"$match": {"visibility": "public", "$text": {"$search": "beats"}}}
+        assert [(item["title"], item["score"]) for item in first["items"]] == [
+            ("Beats and more beats", 20.0), ("Beats", 10.0)
+        ]
+        assert all("search_prefixes" not in item for item in first["items"])
+        assert first["total"] == 3 and first["total_exact"]
+        assert decode_cursor([("_score", -1), ("_id", -1)], first["next_cursor"])[0] == 10.0
+
+        coll.pipelines.clear()
+        second = await SEARCH.search(db, "beats", {"visibility": "public"}, cursor=first["next_cursor"], limit=2)
+        assert len(coll.pipelines) == 1
+        assert not any("$skip" in stage for stage in coll.pipelines[0])
+        assert [item["title"] for item in second["items"]] == ["Quiet"]
+        assert second["next_cursor"] is None and "total" not in second
+
+    async def test_browse_sorts_newest_first_with_time_cursor(self):
+        # Two documents share a timestamp, so the cursor must carry the tie-breaker
+        db, coll = await _collection([_thing(1, "a"), _thing(2, "b"), _thing(3, "c", created_at=datetime(2026, 1, 1, 0, 2))])
+        seen, cursor = [], None
+        while True:
+            page = await SEARCH.search(db, "", {}, cursor=cursor, limit=1, facets=False)
+            seen += [item["title"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert seen == ["c", "b", "a"]
+        assert len(coll.pipelines) == 3
+        assert {"$sort": {"created_at": -1, "_id": -1}} in coll.pipelines[0]
+        assert "facets" not in page
+
+    async def test_facet_counts_on_first_page(self):
+        db, coll = await _collection([_thing(n, f"song {n}", "audio" if n < 6 else "video") for n in range(8)])
+        page = await SEARCH.search(db, "song", limit=5)
+        assert page["facets"] == {"content_type": {"audio": 6, "video": 2}}
+        assert page["total"] == 8 and len(page["items"]) == 5
+        assert len(coll.pipelines) == 2
+
+        coll.pipelines.clear()
+        await SEARCH.search(db, "song", cursor=page["next_cursor"], limit=5)
+        assert len(coll.pipelines) == 1
+
+    async def test_bad_cursor_is_rejected(self):
+        db, _ = await _collection([])
+        with pytest.raises(ValueError):
+            await SEARCH.search(db, "song", cursor="not-a-cursor")
+
+
+class TestSuggest:
+    async def test_every_typed_word_must_start_a_title_or_tag_word(self):
+        db, _ = await _collection([
+            _thing(1, "Midnight Beats"), _thing(2, "Midnight Jazz", tags=["lofi"]), _thing(3, "Beats at Noon"),
+        ])
+        suggestions = await SEARCH.suggest(db, "mid lo", {"visibility": "public"})
+        assert suggestions == [{"_id": "64b000000000000000000002", "title": "Midnight Jazz"}]
+        assert [s["title"] for s in await SEARCH.suggest(db, "beat")] == ["Beats at Noon", "Midnight Beats"]
+        assert await SEARCH.suggest(db, "m") == []
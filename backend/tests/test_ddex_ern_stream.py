@@ -0,0 +1,184 @@
+"""
+Streaming DDEX ERN Parsing - Unit Tests
+
+Validates incremental ERN parsing: records are yielded while the file is
+still being read, processed subtrees are released, unqualified and
+namespace-qualified messages parse the same way, the per-recording
+iterator joins each recording with its release, and the ingest endpoint
+parses uploads in batches off the event loop.
+"""
+
+import io
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "services"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "models"))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from ddex_ern_stream import iter_ern_records  # type: ignore  # noqa: E402
+from metadata_parser_service import MetadataParserService  # type: ignore  # noqa: E402
+from mongo_fakes import FakeDatabase  # noqa: E402
+from api import metadata_endpoints  # type: ignore  # noqa: E402
+
+NS = "http://ddex.net/xml/ern/43"
+
+
+def _recording(i):
+    return (f"<SoundRecording><ResourceReference>A{i}</ResourceReference>"
+            f"<ResourceId><ISRC>USABC26{i:05d}</ISRC></ResourceId>"
+            f"<ReferenceTitle><TitleText>Track {i}</TitleText></ReferenceTitle>"
+            f"<DisplayArtistName>Artist</DisplayArtistName><Duration>PT3M{i % 60}S</Duration>"
+            f"</SoundRecording>")
+
+
+def _release(i, refs):
+    items = "".join(f"<ReleaseResourceReference>{r}</ReleaseResourceReference>" for r in refs)
+    return (f"<Release><ReleaseReference>R{i}</ReleaseReference>"
+            f"<ReleaseId><ICPN>0123456789{i:03d}</ICPN></ReleaseId>"
+            f"<ReferenceTitle><TitleText>Album {i}</TitleText></ReferenceTitle>"
+            f"<ReleaseResourceReferenceList>{items}</ReleaseResourceReferenceList>"
+            f"<Genre><GenreText>Pop</GenreText></Genre><ReleaseDate>2026-0{1 + i % 9}-01</ReleaseDate></Release>")
+
+
+def _ern(tracks, releases=1, prefix=""):
+    per_release = max(tracks // releases, 1)
+    body = (
+        f"<{prefix}NewReleaseMessage xmlns{':ern' if prefix else ''}=\"{NS}\">"
+        "<MessageHeader><MessageId>MSG-1</MessageId></MessageHeader>"
+        "<PartyList><Party><PartyId>PADPIDA2026</PartyId><PartyName><FullName>Label</FullName></PartyName></Party></PartyList>"
+        "<ResourceList>" + "".join(_recording(i) for i in range(tracks)) + "</ResourceList>"
+        "<ReleaseList>" + "".join(
+            _release(r, [f"A{i}" for i in range(r * per_release, (r + 1) * per_release)]) for r in range(releases)
+        ) + "</ReleaseList>"
+        "<DealList><ReleaseDeal><DealReleaseReference>R0</DealReleaseReference>"
+        "<Deal><DealTerms><TerritoryCode>Worldwide</TerritoryCode></DealTerms></Deal></ReleaseDeal></DealList>"
+        f"</{prefix}NewReleaseMessage>"
+    )
+    if prefix:
+        # Qualify every element, not just the root
+        body = body.replace("<", "<ern:").replace("<ern:/", "</ern:").replace("<ern:ern:", "<ern:").replace("</ern:ern:", "</ern:")
+    return body.encode()
+
+
+class _Reader(io.RawIOBase):
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data.read(min(len(buffer), 4096))
+        buffer[:len(chunk)] = chunk
+        self.consumed += len(chunk)
+        return len(chunk)
+
+
+class TestRecordStream:
+    def test_records_in_document_order(self):
+        kinds = [r["record"] for r in iter_ern_records(_ern(2))]
+        assert kinds == ["message", "header", "party", "resource", "resource", "release", "deal"]
+
+    def test_records_arrive_before_the_file_is_read(self):
+        data = _ern(2000)
+        reader = _Reader(data)
+        records = iter_ern_records(reader)
+        next(r for r in records if r["record"] == "resource")
+        assert reader.consumed < len(data) / 10
+
+    def test_processed_subtrees_are_released(self, monkeypatch):
+        real_iterparse = ET.iterparse
+
+        def tree_size_at_deal(tracks):
+            roots = []
+
+            def spy(source, events):
+                for event, elem in real_iterparse(source, events):
+                    if not roots:
+                        roots.append(elem)
+                    yield event, elem
+
+            monkeypatch.setattr(ET, "iterparse", spy)
+            for record in iter_ern_records(_ern(tracks, releases=tracks // 5)):
+                if record["record"] == "deal":
+                    return sum(1 for _ in roots[0].iter())
+
+        assert tree_size_at_deal(10) == tree_size_at_deal(500)
+
+    def test_qualified_and_unqualified_elements_match(self):
+        plain = list(iter_ern_records(_ern(3)))
+        qualified = list(iter_ern_records(_ern(3, prefix="ern:")))
+        assert [{k: v for k, v in r.items() if k != "root_tag"} for r in plain] == \
+               [{k: v for k, v in r.items() if k != "root_tag"} for r in qualified]
+        release = next(r for r in plain if r["record"] == "release")
+        assert release["upc"] == "0123456789000" and release["genre"] == "Pop"
+        assert release["resource_references"] == ["A0", "A1", "A2"]
+
+
+class TestParserService:
+    def test_summary_parse_keeps_first_and_last_value_rules(self):
+        parsed, errors = MetadataParserService()._parse_ddex_ern(_ern(3), "delivery.xml")
+        assert errors == []
+        assert parsed.ddex_version == "ern-4.3" and parsed.ddex_message_id == "MSG-1"
+        assert parsed.ddex_message_type == "NewReleaseMessage"
+        assert (parsed.title, parsed.isrc, parsed.album) == ("Track 0", "USABC2600002", "Album 0")
+        assert parsed.rights_holders == ["Label"] and parsed.party_id == "PADPIDA2026"
+
+    def test_one_record_per_recording_with_its_release(self):
+        records = list(MetadataParserService().iter_ddex_ern_metadata(_ern(6, releases=3), "delivery.xml"))
+        assert [(p.isrc, p.album) for p, _ in records] == [
+            (f"USABC26{i:05d}", f"Album {i // 2}") for i in range(6)
+        ]
+        assert all(p.upc and p.ddex_message_id == "MSG-1" for p, _ in records)
+
+    def test_malformed_tail_raises_after_earlier_records(self):
+        data = _ern(3)[:-40]
+        records = MetadataParserService().iter_ddex_ern_metadata(data, "broken.xml")
+        with pytest.raises(ET.ParseError):
+            list(records)
+
+
+class TestIngestEndpoint:
+    @pytest.fixture
+    def db(self, monkeypatch):
+        fake = FakeDatabase()
+        monkeypatch.setattr(metadata_endpoints, "mongo_db", fake)
+        monkeypatch.setattr(metadata_endpoints, "DDEX_INGEST_PARSE_BATCH", 2)
+        return fake
+
+    async def _ingest(self, data):
+        upload = SimpleNamespace(file=io.BytesIO(data), filename="delivery.xml", size=len(data))
+        return await metadata_endpoints.ingest_ddex_ern(
+            file=upload, validate_metadata=False, check_duplicates=False,
+            current_user=SimpleNamespace(id="u1"),
+        )
+
+    async def test_upload_is_parsed_in_batches_off_the_loop(self, db, monkeypatch):
+        threads = []
+        original = metadata_endpoints._read_ddex_batch
+
+        def read_batch(parsed_records, size):
+            threads.append(threading.current_thread())
+            return original(parsed_records, size)
+
+        monkeypatch.setattr(metadata_endpoints, "_read_ddex_batch", read_batch)
+        result = await self._ingest(_ern(5))
+        assert result["success"] and result["total_records"] == result["stored_records"] == 5
+        assert len(threads) == 3 and threading.main_thread() not in threads
+        assert [d["parsed_metadata"]["isrc"] for d in db.metadata_validation_results.docs] == [
+            f"USABC26{i:05d}" for i in range(5)
+        ]
+
+    async def test_malformed_tail_keeps_records_of_its_batch(self, db):
+        result = await self._ingest(_ern(3)[:-40])
+        assert not result["success"] and result["parse_error"].startswith("XML parsing error")
+        assert result["total_records"] == 3 and len(db.metadata_validation_results.docs) == 3
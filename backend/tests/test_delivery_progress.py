@@ -0,0 +1,131 @@
+"""
+Delivery Batch Progress - Unit Tests
+
+Validates the per-batch status counters: creation counts, one-unit moves
+on each status transition, progress payloads read from the counters, and
+the reconciler recounting drifted batches once they go quiet (without
+clobbering a batch that changed after it was selected). Runs against
+in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from services import delivery_progress  # type: ignore  # noqa: E402
+from services.delivery_progress import (  # type: ignore  # noqa: E402
+    get_batch_progress,
+    reconcile_batch,
+    reconcile_quiet_batches,
+    record_batch_created,
+    transition_delivery_status,
+)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(delivery_progress, "db", fake)
+    monkeypatch.setattr(delivery_progress, "progress_collection", fake.delivery_batch_progress)
+    return fake
+
+
+async def _batch(db, statuses, batch_id="b1"):
+    deliveries = [{"id": f"{batch_id}-d{n}", "batch_id": batch_id, "user_id": "u1", "status": status}
+                  for n, status in enumerate(statuses)]
+    await db.distribution_hub_deliveries.insert_many([dict(d) for d in deliveries])
+    await record_batch_created(batch_id, "u1", deliveries)
+    return deliveries
+
+
+def _counters(db, batch_id="b1"):
+    return next(d for d in db.delivery_batch_progress.docs if d["_id"] == batch_id)
+
+
+def _go_quiet(db, batch_id="b1"):
+    _counters(db, batch_id)["updated_at"] = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+
+class TestCounters:
+    async def test_created_batch_counts_initial_statuses(self, db):
+        await _batch(db, ["queued", "queued", None])
+        counters = _counters(db)
+        assert counters["total"] == 3 and counters["counts"] == {"queued": 3}
+        assert counters["dirty"] is True
+
+    async def test_transition_moves_one_unit(self, db):
+        await _batch(db, ["queued", "queued"])
+        previous = await transition_delivery_status({"id": "b1-d0"}, "delivering")
+        assert previous["status"] == "queued"
+        await transition_delivery_status({"id": "b1-d0"}, "delivered", {"error_message": None})
+        assert _counters(db)["counts"] == {"queued": 1, "delivering": 0, "delivered": 1}
+        assert db.distribution_hub_deliveries.docs[0]["status"] == "delivered"
+
+    async def test_same_status_and_unmatched_filters_leave_counters(self, db):
+        await _batch(db, ["queued"])
+        await transition_delivery_status({"id": "b1-d0"}, "queued", {"note": "x"})
+        assert await transition_delivery_status({"id": "missing"}, "delivered") is None
+        assert _counters(db)["counts"] == {"queued": 1}
+
+    async def test_unsafe_status_names_are_path_safe(self, db):
+        await _batch(db, ["queued"])
+        await transition_delivery_status({"id": "b1-d0"}, "$weird.status")
+        assert _counters(db)["counts"] == {"queued": 0, "_weird_status": 1}
+
+    async def test_progress_reads_counters(self, db):
+        await _batch(db, ["queued", "queued", "queued", "queued"])
+        await transition_delivery_status({"id": "b1-d0"}, "delivered")
+        await transition_delivery_status({"id": "b1-d1"}, "failed")
+        progress = await get_batch_progress("b1", "u1")
+        assert progress["total"] == 4 and progress["delivered"] == 1 and progress["failed"] == 1
+        assert progress["queued"] == 2 and progress["progress_pct"] == 50.0
+        assert progress["is_complete"] is False
+        assert (await get_batch_progress("b1", "someone-else"))["total"] == 0
+
+
+class TestReconciliation:
+    async def test_drifted_counts_are_recounted(self, db):
+        await _batch(db, ["queued", "queued", "queued"])
+        # A process died between the delivery write and the counter update
+        db.distribution_hub_deliveries.docs[0]["status"] = "delivered"
+        db.distribution_hub_deliveries.docs[1]["status"] = "failed"
+        _counters(db)["counts"]["queued"] = 7
+        _go_quiet(db)
+
+        assert await reconcile_quiet_batches() == 1
+        counters = _counters(db)
+        assert counters["counts"] == {"queued": 1, "delivered": 1, "failed": 1}
+        assert counters["total"] == 3 and counters["dirty"] is False
+        assert await reconcile_quiet_batches() == 0
+
+    async def test_busy_batches_are_left_alone(self, db):
+        await _batch(db, ["queued"])
+        _counters(db)["counts"]["queued"] = 5
+        assert await reconcile_quiet_batches() == 0
+        assert _counters(db)["counts"] == {"queued": 5}
+
+    async def test_transition_after_selection_wins(self, db):
+        await _batch(db, ["queued", "queued"])
+        _go_quiet(db)
+        seen = _counters(db)["updated_at"]
+        await transition_delivery_status({"id": "b1-d0"}, "delivered")
+
+        await reconcile_batch("b1", seen_updated_at=seen)
+        counters = _counters(db)
+        assert counters["dirty"] is True and "reconciled_at" not in counters
+
+    async def test_batches_without_counters_are_built_on_read(self, db):
+        await db.distribution_hub_deliveries.insert_many([
+            {"id": "old-d0", "batch_id": "old", "user_id": "u1", "status": "delivered"},
+            {"id": "old-d1", "batch_id": "old", "user_id": "u1", "status": "queued"},
+        ])
+        progress = await get_batch_progress("old", "u1")
+        assert progress["total"] == 2 and progress["delivered"] == 1 and progress["queued"] == 1
+        assert _counters(db, "old")["dirty"] is False
@@ -0,0 +1,218 @@
+"""
+Delivery Job Queue - Unit Tests
+
+Validates the durable Distribution Hub delivery queue without a live
+server: leases are exclusive until they expire, a worker that lost its
+lease cannot record an outcome, failures back off and dead-letter,
+retrying a failed delivery only reports it queued once a job exists, and
+an upload session is kept for the next attempt but cleared once the
+delivery succeeds or runs out of attempts, and never leaves the internal
+upload_session field.
+Runs against in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from services import delivery_engine, delivery_progress, distribution_hub_service  # type: ignore  # noqa: E402
+from services.platform_adapters import DeliveryResult  # type: ignore  # noqa: E402
+from services.delivery_queue import (  # type: ignore  # noqa: E402
+    JOB_DEAD,
+    JOB_LEASED,
+    JOB_PENDING,
+    DeliveryJobQueue,
+)
+
+
+def _delivery(n, status="queued", platform_id="spotify"):
+    return {"id": f"d{n}", "batch_id": "b1", "user_id": "u1", "platform_id": platform_id, "status": status}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(delivery_engine, "db", fake)
+    monkeypatch.setattr(delivery_progress, "db", fake)
+    monkeypatch.setattr(distribution_hub_service, "db", fake)
+    monkeypatch.setattr(delivery_progress, "progress_collection", fake.delivery_batch_progress)
+    return fake
+
+
+@pytest.fixture
+def queue(db, monkeypatch):
+    queue = DeliveryJobQueue(db.delivery_jobs, max_attempts=2, backoff_base_seconds=5, platform_concurrency=2)
+    monkeypatch.setattr(delivery_engine, "delivery_queue", queue)
+    return queue
+
+
+def _expire_lease(db, job_id):
+    job = next(j for j in db.delivery_jobs.docs if j["_id"] == job_id)
+    job["lease_expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+
+class TestLeases:
+    async def test_claim_leases_job_exclusively(self, queue):
+        await queue.enqueue([_delivery(1)])
+        job = await queue.claim("w1")
+        assert job["_id"] == "d1" and job["status"] == JOB_LEASED
+        assert job["lease_owner"] == "w1" and job["attempts"] == 1
+        assert await queue.claim("w2") is None
+
+    async def test_enqueue_is_idempotent(self, queue, db):
+        await queue.enqueue([_delivery(1)])
+        await queue.claim("w1")
+        await queue.enqueue([_delivery(1)])
+        assert len(db.delivery_jobs.docs) == 1
+        assert db.delivery_jobs.docs[0]["status"] == JOB_LEASED
+
+    async def test_expired_lease_is_reclaimed_and_old_owner_fenced(self, queue, db):
+        await queue.enqueue([_delivery(1)])
+        first = await queue.claim("w1")
+        _expire_lease(db, "d1")
+
+        second = await queue.claim("w2")
+        assert second["lease_owner"] == "w2" and second["attempts"] == 2
+        assert await queue.heartbeat("d1", "w1") is False
+        assert await queue.heartbeat("d1", "w2") is True
+
+        await queue.complete(first, "w1", finished=True)
+        assert db.delivery_jobs.docs[0]["status"] == JOB_LEASED
+
+    async def test_platform_concurrency_cap(self, queue):
+        await queue.enqueue([_delivery(n) for n in range(3)] + [_delivery(9, platform_id="tidal")])
+        claimed = [(await queue.claim("w1"))["platform_id"] for _ in range(3)]
+        assert sorted(claimed) == ["spotify", "spotify", "tidal"]
+        assert await queue.claim("w1") is None
+
+    async def test_failure_backs_off_then_dead_letters(self, queue, db):
+        await queue.enqueue([_delivery(1)])
+        job = await queue.claim("w1")
+        assert await queue.complete(job, "w1", finished=False, error="timeout") == JOB_PENDING
+        stored = db.delivery_jobs.docs[0]
+        assert stored["available_at"] >= job["updated_at"] and stored["last_error"] == "timeout"
+        assert stored["lease_owner"] is None and stored["attempts"] == 1
+
+        db.delivery_jobs.docs[0]["available_at"] = datetime.now(timezone.utc)
+        job = await queue.claim("w1")
+        assert queue.is_final_attempt(job)
+        assert await queue.complete(job, "w1", finished=False, error="timeout") == JOB_DEAD
+        assert await queue.claim("w1") is None
+
+
+class TestRequeue:
+    async def test_requeue_resets_dead_job(self, queue, db):
+        await queue.enqueue([_delivery(1)])
+        db.delivery_jobs.docs[0].update(status=JOB_DEAD, attempts=2)
+        assert await queue.requeue(_delivery(1)) is True
+        assert db.delivery_jobs.docs[0]["status"] == JOB_PENDING
+        assert db.delivery_jobs.docs[0]["attempts"] == 0
+
+    async def test_requeue_refuses_running_job(self, queue):
+        await queue.enqueue([_delivery(1)])
+        await queue.claim("w1")
+        assert await queue.requeue(_delivery(1)) is False
+
+    async def test_requeue_creates_missing_job(self, queue, db):
+        assert await queue.requeue(_delivery(1)) is True
+        assert db.delivery_jobs.docs[0]["status"] == JOB_PENDING
+
+
+class TestRetryFailedDelivery:
+    async def _failed_delivery(self, db, queue):
+        delivery = _delivery(1, status="failed")
+        await db.distribution_hub_deliveries.insert_one(dict(delivery))
+        await delivery_progress.record_batch_created("b1", "u1", [delivery])
+        await queue.enqueue([delivery])
+        return delivery
+
+    async def test_retry_queues_delivery_with_fresh_job(self, db, queue):
+        await self._failed_delivery(db, queue)
+        db.delivery_jobs.docs[0].update(status=JOB_DEAD, attempts=2)
+
+        assert await delivery_engine.retry_failed_delivery("d1", "u1") is True
+        assert db.distribution_hub_deliveries.docs[0]["status"] == "queued"
+        assert db.delivery_jobs.docs[0]["status"] == JOB_PENDING
+        assert db.delivery_batch_progress.docs[0]["counts"] == {"failed": 0, "queued": 1}
+
+    async def test_retry_leaves_status_when_job_is_running(self, db, queue):
+        await self._failed_delivery(db, queue)
+        await queue.claim("w1")
+
+        assert await delivery_engine.retry_failed_delivery("d1", "u1") is False
+        assert db.distribution_hub_deliveries.docs[0]["status"] == "failed"
+        assert db.delivery_batch_progress.docs[0]["counts"] == {"failed": 1}
+
+    async def test_retry_ignores_other_users_and_non_failed(self, db, queue):
+        await self._failed_delivery(db, queue)
+        assert await delivery_engine.retry_failed_delivery("d1", "u2") is False
+        db.distribution_hub_deliveries.docs[0]["status"] = "delivered"
+        assert await delivery_engine.retry_failed_delivery("d1", "u1") is False
+
+
+SESSION = {"platform_id": "youtube", "upload_url": "https://upload.example/session-1", "file_size": 10}
+
+
+class _Adapter:
+    def __init__(self, result):
+        self.result = result
+        self.sessions = []
+
+    async def deliver(self, content, credentials, file_path=None):
+        self.sessions.append(content.get("upload_session"))
+        return self.result
+
+
+class TestUploadSession:
+    async def _push(self, db, monkeypatch, result, upload_session=None):
+        delivery = {**_delivery(1, platform_id="youtube"), "content_id": "c1", "delivery_method": "api_push",
+                    "upload_session": upload_session}
+        await db.distribution_hub_deliveries.insert_one(dict(delivery))
+        await db.distribution_hub_content.insert_one({"id": "c1", "user_id": "u1", "title": "Clip"})
+        adapter = _Adapter(result)
+
+        async def credentials(user_id, platform_id):
+            return {"access_token": "token"}
+
+        monkeypatch.setattr(delivery_engine, "get_adapter", lambda platform_id: adapter)
+        monkeypatch.setattr(delivery_engine, "_get_user_credentials", credentials)
+        return delivery, adapter
+
+    def _stored(self, db):
+        return db.distribution_hub_deliveries.docs[0]
+
+    async def test_failed_attempt_keeps_session_for_the_retry(self, db, monkeypatch):
+        failed = DeliveryResult(False, message="interrupted", response_data={"upload_session": SESSION})
+        delivery, _ = await self._push(db, monkeypatch, failed)
+        assert await delivery_engine.execute_delivery(delivery, attempt=1, final_attempt=False) is False
+        assert self._stored(db)["status"] == "queued" and self._stored(db)["upload_session"] == SESSION
+        assert "upload_session" not in self._stored(db)["platform_response"]["response_data"]
+
+    async def test_retry_resumes_then_success_clears_session(self, db, monkeypatch):
+        delivery, adapter = await self._push(db, monkeypatch, DeliveryResult(True, "v1"), upload_session=SESSION)
+        assert await delivery_engine.execute_delivery(delivery, attempt=2, final_attempt=False) is True
+        assert adapter.sessions == [SESSION]
+        assert self._stored(db)["status"] == "delivered" and self._stored(db)["upload_session"] is None
+
+    async def test_final_failure_clears_session(self, db, monkeypatch):
+        failed = DeliveryResult(False, message="interrupted", response_data={"upload_session": SESSION})
+        delivery, _ = await self._push(db, monkeypatch, failed, upload_session=SESSION)
+        assert await delivery_engine.execute_delivery(delivery, attempt=4, final_attempt=True) is False
+        assert self._stored(db)["status"] == "failed" and self._stored(db)["upload_session"] is None
+
+    async def test_session_is_not_returned_to_clients(self, db, monkeypatch):
+        failed = DeliveryResult(False, message="interrupted", response_data={"upload_session": SESSION})
+        delivery, _ = await self._push(db, monkeypatch, failed)
+        await delivery_engine.execute_delivery(delivery, attempt=1, final_attempt=False)
+        hub = distribution_hub_service.DistributionHubService()
+        listed = await hub.get_deliveries("u1")
+        batch = await hub.get_delivery_batch("b1", "u1")
+        assert listed and batch
+        assert all("upload_session" not in doc for doc in listed + batch)
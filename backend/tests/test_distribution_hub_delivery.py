@@ -8,6 +8,7 @@ Tests the new delivery engine functionality:
 - POST /api/distribution-hub/deliveries/{delivery_id}/retry retries failed deliveries
 - PUT /api/distribution-hub/deliveries/{delivery_id}/status updates delivery status
 - Delivery engine falls back to export_ready when no credentials are available
+- GET /api/distribution-hub/delivery-queue/stats reports durable job queue state
 """
 
 import pytest
@@ -399,6 +400,26 @@ class TestDistributionHubDeliveryEngine:
         
         print(f"✓ Distribute response includes all {len(live_adapters)} live adapters")
 
+    # ==========================================
+    # Test 11: Durable delivery job queue stats
+    # ==========================================
+    def test_delivery_queue_stats(self, auth_headers):
+        """Distributed deliveries are tracked as jobs in the durable queue"""
+        response = requests.get(
+            f"{BASE_URL}/api/distribution-hub/delivery-queue/stats",
+            headers=auth_headers
+        )
+        assert response.status_code == 200, f"Queue stats failed: {response.text}"
+        
+        data = response.json()
+        for state in ("pending", "leased", "succeeded", "dead"):
+            assert state in data["jobs"], f"Missing job state {state}"
+        assert sum(data["jobs"].values()) > 0, "Distributed deliveries should have queue jobs"
+        assert data["max_attempts"] >= 1
+        assert "in_flight_by_platform" in data
+        
+        print(f"✓ Delivery queue stats: {data['jobs']}")
+
     # ==========================================
     # Cleanup
     # ==========================================
@@ -0,0 +1,292 @@
+"""
+Element Op-Log - Unit Tests
+
+Validates the element CRDT and its persistence: concurrent edits to
+different fields of an element both survive in any arrival order, deletes
+and re-adds resolve by clock, edits are written in batches with one
+sequence reservation each, a retried batch skips the operations an
+earlier attempt already wrote, a stale view never overwrites a newer one,
+and the state at an old sequence number is rebuilt from the nearest
+snapshot. Operations for missing projects are
+rejected or dropped, failed writes stop retrying, checkpoints and
+replacements catch up with other workers, idle projects are evicted and
+operations arriving after their sequence number was skipped still apply.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+import element_oplog  # type: ignore  # noqa: E402
+from element_oplog import ElementOpLog, apply_op, diff_ops, materialize, new_state  # type: ignore  # noqa: E402
+
+
+def _op(kind, eid, clock, **fields):
+    return {"kind": kind, "element_id": eid, "clock": clock, "fields": fields}
+
+
+async def _db(elements, *other_projects):
+    db = FakeDatabase()
+    await db.creative_studio_projects.insert_many(
+        [{"id": "p1", "elements": elements}] + [{"id": pid, "elements": []} for pid in other_projects]
+    )
+    await ElementOpLog(db).ensure_indexes()
+    return db
+
+
+def _calls(collection, *methods):
+    """Record the names of ``methods`` called on ``collection`` (and batch sizes of insert_many)"""
+    calls = []
+    for name in methods:
+        def wrap(original, name=name):
+            async def method(*args, **kwargs):
+                calls.append((name, len(args[0])) if name == "insert_many" else name)
+                return await original(*args, **kwargs)
+            return method
+        setattr(collection, name, wrap(getattr(collection, name)))
+    return calls
+
+
+class TestMerge:
+    def test_concurrent_field_edits_both_survive_in_any_order(self):
+        ops = [
+            _op("add", "e1", [1, "a"], position={"x": 0, "y": 0}, opacity=1.0),
+            _op("update", "e1", [2, "a"], position={"x": 50, "y": 0}),
+            _op("update", "e1", [2, "b"], opacity=0.5),
+        ]
+        forward, backward = new_state(), new_state()
+        for op in ops:
+            apply_op(forward, op)
+        for op in reversed(ops):
+            apply_op(backward, op)
+        expected = [{"id": "e1", "position": {"x": 50, "y": 0}, "opacity": 0.5}]
+        assert materialize(forward) == materialize(backward) == expected
+
+    def test_delete_and_readd_resolve_by_clock(self):
+        state = new_state()
+        apply_op(state, _op("add", "e1", [1, "a"], content="hi"))
+        apply_op(state, _op("delete", "e1", [3, "b"]))
+        apply_op(state, _op("update", "e1", [2, "a"], content="hello"))
+        assert materialize(state) == []
+        apply_op(state, _op("add", "e1", [4, "a"]))
+        assert materialize(state) == [{"id": "e1", "content": "hello"}]
+
+    def test_diff_sends_only_changed_fields(self):
+        state = new_state()
+        apply_op(state, _op("add", "e1", [1, "a"], content="hi", rotation=0))
+        apply_op(state, _op("add", "e2", [2, "a"], content="bye"))
+        ops = diff_ops(state, [{"id": "e1", "content": "hi", "rotation": 90}, {"id": "e3", "content": "new"}])
+        assert ops == [("delete", "e2", {}), ("update", "e1", {"rotation": 90}), ("add", "e3", {"content": "new"})]
+
+
+class TestPersistence:
+    async def test_edits_are_written_in_one_batch(self):
+        db = await _db([{"id": "e1", "content": "hi"}])
+        ops = db.creative_studio_element_ops
+        inserts = _calls(ops, "insert_many")
+        reservations = _calls(db.creative_studio_projects, "find_one_and_update")
+        oplog = ElementOpLog(db, flush_seconds=0.01)
+        for i in range(25):
+            await oplog.record("p1", "ana", "update", "e1", {"rotation": i})
+        await asyncio.sleep(0.05)
+
+        assert inserts == [("insert_many", 25)]
+        assert reservations == ["find_one_and_update"]
+        assert [op["seq"] for op in ops.docs] == list(range(1, 26))
+        assert db.creative_studio_projects.docs[0]["elements"] == [{"id": "e1", "content": "hi", "rotation": 24}]
+
+    async def test_state_at_replays_from_nearest_snapshot(self):
+        db = await _db([])
+        oplog = ElementOpLog(db, batch_size=5, snapshot_every=10)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "v0"})
+        for i in range(1, 24):
+            await oplog.record("p1", "ana", "update", "e1", {"content": f"v{i}"})
+        await oplog.flush("p1")
+        assert sorted(s["seq"] for s in db.creative_studio_element_snapshots.docs) == [0, 10, 20]
+
+        fresh = ElementOpLog(db)
+        state = await fresh.state_at("p1", 13)
+        assert materialize(state) == [{"id": "e1", "content": "v12"}]
+        assert fresh.stats()["ops_replayed"] == 3
+
+
+def _stored_op(seq, element_id, age_seconds=0, **fields):
+    return {"project_id": "p1", "seq": seq, "kind": "update", "element_id": element_id, "fields": fields,
+            "clock": [seq, "other"], "user_id": "bo",
+            "created_at": datetime.now(timezone.utc) - timedelta(seconds=age_seconds)}
+
+
+class TestIdempotentWrites:
+    async def test_retry_skips_ops_an_earlier_attempt_wrote(self, monkeypatch):
+        db = await _db([])
+        ops = db.creative_studio_element_ops
+        original = ops.insert_many
+        attempts = []
+
+        async def insert_many(docs, ordered=True):
+            attempts.append([d["seq"] for d in docs])
+            if len(attempts) == 1:
+                # The first two ops are written, then the connection drops
+                await original(docs[:2], ordered=ordered)
+                raise ConnectionError("connection reset")
+            return await original(docs, ordered=ordered)
+
+        monkeypatch.setattr(ops, "insert_many", insert_many)
+        oplog = ElementOpLog(db, flush_seconds=60)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "hi"})
+        for i in range(2):
+            await oplog.record("p1", "ana", "update", "e1", {"rotation": i})
+        await oplog.flush("p1")
+        assert oplog.stats()["flush_failures"] == 1 and oplog.stats()["pending"] == 3
+
+        await oplog.flush("p1")
+        assert attempts == [[1, 2, 3], [1, 2, 3]]
+        assert sorted(op["seq"] for op in ops.docs) == [1, 2, 3]
+        assert oplog.stats()["pending"] == 0 and oplog.stats()["ops_persisted"] == 3
+        assert db.creative_studio_projects.docs[0]["op_seq"] == 3
+        assert db.creative_studio_projects.docs[0]["elements"] == [{"id": "e1", "content": "hi", "rotation": 1}]
+
+    async def test_write_errors_other_than_duplicates_are_retried(self, monkeypatch):
+        db = await _db([])
+        ops = db.creative_studio_element_ops
+        original = ops.insert_many
+        failed = []
+
+        async def insert_many(docs, ordered=True):
+            if not failed:
+                failed.append(True)
+                raise BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "validation"}]})
+            return await original(docs, ordered=ordered)
+
+        monkeypatch.setattr(ops, "insert_many", insert_many)
+        oplog = ElementOpLog(db, flush_seconds=60)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "hi"})
+        await oplog.flush("p1")
+        assert oplog.stats()["flush_failures"] == 1 and ops.docs == []
+
+        await oplog.flush("p1")
+        assert [op["seq"] for op in ops.docs] == [1]
+
+    async def test_stale_view_does_not_overwrite_a_newer_one(self):
+        db = await _db([{"id": "e1", "content": "hi"}])
+        project = db.creative_studio_projects.docs[0]
+        oplog = ElementOpLog(db, flush_seconds=60)
+        await oplog.elements("p1")
+        # Another worker has already written the view for a later sequence number
+        project.update(elements=[{"id": "e1", "content": "newer"}], elements_seq=10)
+
+        await oplog.record("p1", "ana", "update", "e1", {"rotation": 90})
+        await oplog.flush("p1")
+        assert project["elements"] == [{"id": "e1", "content": "newer"}] and project["elements_seq"] == 10
+
+        project["elements_seq"] = 0
+        await oplog.record("p1", "ana", "update", "e1", {"rotation": 180})
+        await oplog.flush("p1")
+        assert project["elements"] == [{"id": "e1", "content": "hi", "rotation": 180}]
+        assert project["elements_seq"] == 2
+
+
+class TestMissingProjects:
+    async def test_ops_for_unknown_projects_are_rejected(self):
+        db = await _db([])
+        oplog = ElementOpLog(db, flush_seconds=0.01)
+        with pytest.raises(LookupError):
+            await oplog.record("ghost", "ana", "add", "e1", {"content": "hi"})
+        assert oplog.stats()["projects"] == 0 and oplog.stats()["pending"] == 0
+
+    async def test_batch_for_deleted_project_is_dropped(self):
+        db = await _db([])
+        reservations = _calls(db.creative_studio_projects, "find_one_and_update")
+        oplog = ElementOpLog(db, flush_seconds=0.01)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "hi"})
+        db.creative_studio_projects.docs.clear()
+        await asyncio.sleep(0.05)
+
+        stats = oplog.stats()
+        assert stats["ops_dropped"] == 1 and stats["projects"] == 0 and stats["pending"] == 0
+        assert reservations == ["find_one_and_update"]
+
+
+class TestFlushRetries:
+    async def test_failed_writes_stop_retrying_until_the_next_edit(self, monkeypatch):
+        monkeypatch.setattr(element_oplog, "ELEMENT_OPS_MAX_RETRIES", 2)
+        db = await _db([])
+        attempts = []
+
+        async def failing_insert_many(docs, ordered=True):
+            attempts.append(len(docs))
+            raise ConnectionError("primary unavailable")
+
+        monkeypatch.setattr(db.creative_studio_element_ops, "insert_many", failing_insert_many)
+        oplog = ElementOpLog(db, flush_seconds=0.01)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "hi"})
+        await asyncio.sleep(0.2)
+        assert attempts == [1, 1]
+        assert oplog.stats()["pending"] == 1
+
+        # The next edit retries both; the first keeps the sequence number it reserved
+        await oplog.record("p1", "ana", "update", "e1", {"content": "bye"})
+        await asyncio.sleep(0.1)
+        assert attempts == [1, 1, 2]
+        assert db.creative_studio_projects.docs[0]["op_seq"] == 2
+
+
+class TestCatchUp:
+    async def test_checkpoint_returns_the_persisted_sequence(self):
+        db = await _db([{"id": "e1", "content": "hi"}])
+        mine, theirs = ElementOpLog(db), ElementOpLog(db)
+        await mine.elements("p1")
+        for i in range(3):
+            await theirs.record("p1", "bo", "update", "e1", {"content": f"v{i}"})
+        await theirs.flush("p1")
+
+        assert await mine.checkpoint("p1") == 3
+        assert await mine.elements("p1") == [{"id": "e1", "content": "v2"}]
+
+    async def test_replace_diffs_against_other_workers_edits(self):
+        db = await _db([{"id": "e1", "content": "hi"}])
+        mine, theirs = ElementOpLog(db), ElementOpLog(db)
+        await mine.elements("p1")
+        await theirs.record("p1", "bo", "update", "e1", {"content": "edited"})
+        await theirs.flush("p1")
+
+        ops = await mine.replace_elements("p1", "api", [{"id": "e1", "content": "edited", "rotation": 90}])
+        assert [(op["kind"], op["fields"]) for op in ops] == [("update", {"rotation": 90})]
+
+    async def test_idle_projects_are_evicted(self):
+        db = await _db([], "p2")
+        oplog = ElementOpLog(db, flush_seconds=0.01, idle_seconds=0)
+        await oplog.record("p1", "ana", "add", "e1", {"content": "hi"})
+        await oplog.elements("p2")
+        assert oplog.stats()["projects"] == 2
+
+        await oplog.flush("p1")
+        await db.creative_studio_projects.insert_one({"id": "p3", "elements": []})
+        await oplog.elements("p3")
+        assert oplog.stats()["projects"] == 1 and oplog.stats()["evictions"] == 2
+
+
+class TestLateOps:
+    async def test_op_written_after_its_gap_was_skipped_is_applied(self):
+        db = await _db([{"id": "e1", "content": "hi"}, {"id": "e2", "content": "x"}])
+        db.creative_studio_projects.docs[0]["op_seq"] = 3
+        ops = db.creative_studio_element_ops
+        ops.docs.extend([_stored_op(1, "e1", age_seconds=60, content="one"),
+                         _stored_op(3, "e1", age_seconds=60, rotation=3)])
+        oplog = ElementOpLog(db)
+        assert await oplog.elements("p1") == [{"id": "e1", "content": "one", "rotation": 3},
+                                              {"id": "e2", "content": "x"}]
+
+        # The worker that reserved seq 2 writes it at last
+        ops.docs.append(_stored_op(2, "e2", age_seconds=60, content="two"))
+        assert await oplog.checkpoint("p1") == 3
+        assert await oplog.elements("p1") == [{"id": "e1", "content": "one", "rotation": 3},
+                                              {"id": "e2", "content": "two"}]
+        assert oplog.stats()["late_ops"] == 1
+        assert db.creative_studio_projects.docs[0]["elements"][1] == {"id": "e2", "content": "two"}
@@ -0,0 +1,109 @@
+"""
+Keyset Pagination - Unit Tests
+
+Validates cursor pagination: walking every page visits each document
+exactly once even when sort keys tie, pages never use skip, cursors
+survive datetimes and ObjectIds and are rejected under another sort, and
+totals are counted only on the first page.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeCursor, FakeDatabase  # noqa: E402
+from keyset_pagination import (  # type: ignore  # noqa: E402
+    InvalidCursor,
+    PAGINATION_COUNT_LIMIT,
+    encode_cursor,
+    keyset_filter,
+    paginate,
+)
+
+
+async def _collection(docs):
+    coll = FakeDatabase().items
+    await coll.insert_many(docs)
+    return coll
+
+
+def _count_calls(coll, monkeypatch):
+    """Record the ``limit`` of each count_documents call and each estimated count"""
+    calls = []
+    count_documents, estimated = coll.count_documents, coll.estimated_document_count
+
+    async def counted(query, limit=0):
+        calls.append(limit)
+        return await count_documents(query, limit=limit)
+
+    async def counted_estimate():
+        calls.append("estimated")
+        return await estimated()
+
+    monkeypatch.setattr(coll, "count_documents", counted)
+    monkeypatch.setattr(coll, "estimated_document_count", counted_estimate)
+    return calls
+
+
+def _docs(n):
+    start = datetime(2026, 1, 1)
+    # Three documents share every timestamp so the tie-breaker matters
+    return [{"_id": ObjectId(), "owner": "u1", "created_at": start + timedelta(minutes=i // 3)} for i in range(n)]
+
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+class TestPaging:
+    async def test_walk_visits_every_document_once(self, monkeypatch):
+        coll = await _collection(_docs(47))
+
+        def no_skip(self, n):
+            raise AssertionError("pages must not skip")
+
+        monkeypatch.setattr(FakeCursor, "skip", no_skip)
+        seen, cursor = [], None
+        while True:
+            page = await paginate(coll, {"owner": "u1"}, SORT, cursor=cursor, limit=10)
+            seen += [d["_id"] for d in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 47 and len(set(seen)) == 47
+        expected = sorted(coll.docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+        assert seen == [d["_id"] for d in expected]
+
+    async def test_total_counted_on_first_page_only(self, monkeypatch):
+        coll = await _collection(_docs(5))
+        counts = _count_calls(coll, monkeypatch)
+        first = await paginate(coll, {"owner": "u1"}, SORT, limit=2, count="estimate")
+        assert first["total"] == 5 and first["total_exact"]
+        assert counts == [PAGINATION_COUNT_LIMIT]
+        second = await paginate(coll, {"owner": "u1"}, SORT, cursor=first["next_cursor"], limit=2, count="estimate")
+        assert "total" not in second and len(counts) == 1
+
+    async def test_unfiltered_estimate_uses_collection_metadata(self, monkeypatch):
+        coll = await _collection(_docs(3))
+        counts = _count_calls(coll, monkeypatch)
+        page = await paginate(coll, {}, SORT, count="estimate")
+        assert counts == ["estimated"] and not page["total_exact"]
+
+
+class TestCursor:
+    def test_keyset_filter_for_mixed_directions(self):
+        assert keyset_filter([("price", 1), ("id", -1)], [10, "b"]) == {
+            "$or": [{"price": {"$gt": 10}}, {"price": 10, "id": {"$lt": "b"}}]
+        }
+
+    async def test_cursor_rejected_under_another_sort(self):
+        cursor = encode_cursor(SORT, _docs(1)[0])
+        with pytest.raises(InvalidCursor):
+            await paginate(await _collection([]), {}, [("price", -1), ("_id", -1)], cursor=cursor)
+
+    async def test_garbage_cursor_rejected(self):
+        with pytest.raises(InvalidCursor):
+            await paginate(await _collection([]), {}, SORT, cursor="%%%")
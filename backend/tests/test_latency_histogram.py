@@ -0,0 +1,104 @@
+"""
+Latency Histogram and Performance Monitor - Unit Tests
+
+Validates the fixed-memory log-bucketed histograms behind the performance
+monitor: percentile accuracy, constant memory, cross-worker merging and
+the Prometheus text exposition.
+"""
+
+import math
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from latency_histogram import BUCKET_COUNT, GROWTH, LatencyHistogram  # type: ignore  # noqa: E402
+from performance_monitor import PerformanceMonitor  # type: ignore  # noqa: E402
+
+
+def _true_percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * q / 100), 1) - 1]
+
+
+class TestHistogram:
+    def test_percentiles_within_one_bucket(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-3, 1) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        for q in (50, 95, 99, 99.9):
+            exact = _true_percentile(values, q)
+            assert exact <= histogram.percentile(q) <= exact * GROWTH
+
+    def test_memory_is_fixed(self):
+        histogram = LatencyHistogram()
+        for i in range(50000):
+            histogram.record(i / 1000)
+        assert len(histogram.counts) == BUCKET_COUNT + 1
+        assert histogram.count == 50000
+        assert histogram.percentile(100) == histogram.max == 49.999
+
+    def test_merge_equals_recording_everything_in_one(self):
+        rng = random.Random(1)
+        a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(2000):
+            value = rng.uniform(0.001, 2)
+            (a if i % 2 else b).record(value)
+            both.record(value)
+        merged = LatencyHistogram.from_dict(a.to_dict())
+        merged.merge(LatencyHistogram.from_dict(b.to_dict()))
+        assert merged.counts == both.counts
+        assert merged.percentile(95) == both.percentile(95)
+        assert (merged.min, merged.max) == (both.min, both.max)
+
+    def test_cumulative_buckets_end_with_count(self):
+        histogram = LatencyHistogram()
+        for value in (0.00005, 0.01, 0.5, 1000):
+            histogram.record(value)
+        buckets = histogram.cumulative_buckets()
+        assert buckets[-1] == (math.inf, 4)
+        counts = [c for _, c in buckets]
+        assert counts == sorted(counts)
+        assert buckets[-2][1] == 3  # 1000s is past the last finite bucket
+
+
+class TestMonitor:
+    def test_endpoint_stats_merge_status_classes(self):
+        monitor = PerformanceMonitor()
+        for _ in range(9):
+            monitor.record_request("/api/items/{item_id}", 0.02, 200, "GET")
+        monitor.record_request("/api/items/{item_id}", 0.5, 404, "GET")
+        stats = monitor.get_endpoint_stats("/api/items/{item_id}")
+        assert stats["call_count"] == 10
+        assert stats["error_count"] == 1
+        assert stats["error_rate"] == 10
+        assert 0.02 <= stats["p50_response_time"] <= 0.02 * GROWTH
+
+    def test_series_are_capped(self):
+        monitor = PerformanceMonitor(max_series=3)
+        for i in range(10):
+            monitor.record_request(f"/api/r{i}", 0.01, 200)
+        assert len(monitor._series) == 4
+        assert monitor.get_endpoint_stats("other")["call_count"] == 7
+
+    def test_cluster_stats_merge_worker_snapshots(self):
+        first, second = PerformanceMonitor(), PerformanceMonitor()
+        first.record_request("/api/a", 0.01, 200)
+        second.record_request("/api/a", 0.03, 500)
+        second.record_request("/api/b", 2.0, 200)
+        stats = PerformanceMonitor().merge_snapshots([first.snapshot(), second.snapshot()])
+        assert stats["workers"] == 2
+        assert stats["overview"]["total_requests"] == 3
+        assert stats["overview"]["total_errors"] == 1
+        assert stats["overview"]["slow_requests_count"] == 1
+
+    def test_prometheus_exposition(self):
+        monitor = PerformanceMonitor()
+        monitor.record_request('/api/q"x', 0.01, 201, "POST")
+        text = monitor.render_prometheus()
+        labels = 'endpoint="/api/q\\"x",method="POST",status_class="2xx"'
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+        assert f"http_request_duration_seconds_count{{{labels}}} 1" in text
@@ -0,0 +1,145 @@
+"""
+Merkle Audit Ledger - Unit Tests
+
+Validates the pure hashing helpers behind the batched royalty audit
+trail: Merkle roots, inclusion proofs, batch chaining and the
+round-trip-stable entry hash, and the sealing lease, which only its
+owner can release. Runs against in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from merkle_audit import (  # type: ignore  # noqa: E402
+    GENESIS_ROOT,
+    MerkleAuditLedger,
+    batch_hash,
+    entry_hash,
+    merkle_proof,
+    merkle_root,
+    verify_proof,
+)
+
+
+def _leaves(count):
+    return [entry_hash({"id": str(i), "data": {"n": i}}) for i in range(count)]
+
+
+class TestMerkleRoot:
+    def test_empty_batch_is_genesis(self):
+        assert merkle_root([]) == GENESIS_ROOT
+
+    def test_single_leaf_is_root(self):
+        leaves = _leaves(1)
+        assert merkle_root(leaves) == leaves[0]
+
+    def test_order_matters(self):
+        leaves = _leaves(4)
+        assert merkle_root(leaves) != merkle_root(list(reversed(leaves)))
+
+
+class TestInclusionProofs:
+    def test_every_leaf_verifies(self):
+        for count in range(1, 18):
+            leaves = _leaves(count)
+            root = merkle_root(leaves)
+            for index, leaf in enumerate(leaves):
+                assert verify_proof(leaf, merkle_proof(leaves, index), root)
+
+    def test_tampered_leaf_fails(self):
+        leaves = _leaves(7)
+        root = merkle_root(leaves)
+        proof = merkle_proof(leaves, 3)
+        tampered = entry_hash({"id": "3", "data": {"n": 999}})
+        assert not verify_proof(tampered, proof, root)
+
+
+class TestEntryHash:
+    def test_stable_across_mongo_round_trip(self):
+        """Mongo drops tzinfo and sub-millisecond precision; the hash must not change"""
+        written = {
+            "id": "a",
+            "timestamp": datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc),
+            "data": {"gross_revenue": Decimal("1.50")},
+        }
+        read_back = {
+            "_id": "object-id",
+            "id": "a",
+            "timestamp": datetime(2026, 1, 1, 12, 0, 0, 123000),
+            "data": {"gross_revenue": Decimal("1.50")},
+            "batch_id": "b1",
+            "leaf_index": 0,
+        }
+        assert entry_hash(written) == entry_hash(read_back)
+
+    def test_content_change_changes_hash(self):
+        assert entry_hash({"id": "a", "data": {"x": 1}}) != entry_hash({"id": "a", "data": {"x": 2}})
+
+
+class TestBatchChain:
+    def test_batch_hash_commits_to_predecessor(self):
+        root = merkle_root(_leaves(3))
+        first = batch_hash(1, GENESIS_ROOT, root)
+        assert batch_hash(2, first, root) != batch_hash(2, GENESIS_ROOT, root)
+
+
+async def _ledger():
+    ledger = MerkleAuditLedger(FakeDatabase())
+    await ledger.ensure_indexes()
+    return ledger
+
+
+async def _expire_lease(ledger):
+    await ledger.state.update_one(
+        {"_id": ledger.name}, {"$set": {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}}
+    )
+
+
+class TestSealLease:
+    async def test_held_lease_blocks_second_sealer(self):
+        ledger = await _ledger()
+        assert await ledger._acquire_lease()
+        assert await ledger._acquire_lease() is None
+
+    async def test_expired_lease_is_taken_over_with_new_owner(self):
+        ledger = await _ledger()
+        first = await ledger._acquire_lease()
+        await _expire_lease(ledger)
+        second = await ledger._acquire_lease()
+        assert second and second["lease_owner"] != first["lease_owner"]
+
+    async def test_stalled_sealer_cannot_release_next_holders_lease(self):
+        ledger = await _ledger()
+        stalled = await ledger._acquire_lease()
+        await _expire_lease(ledger)
+        current = await ledger._acquire_lease()
+        await ledger._release_lease(stalled["lease_owner"], {})
+        state = await ledger.state.find_one({"_id": ledger.name})
+        assert state["lease_owner"] == current["lease_owner"]
+        assert await ledger._acquire_lease() is None
+
+    async def test_stalled_sealer_cannot_rewind_chain_head(self):
+        ledger = await _ledger()
+        await ledger.append([{"id": "e1", "timestamp": datetime.now(timezone.utc), "data": {}}])
+        stalled = await ledger._acquire_lease()
+        await _expire_lease(ledger)
+        await ledger.append([{"id": "e2", "timestamp": datetime.now(timezone.utc), "data": {}}])
+        assert (await ledger.seal_pending(force=True))["sequence"] == 1
+        assert (await ledger.seal_pending(force=True)) is None
+        await ledger._release_lease(stalled["lease_owner"], {"last_sequence": 0, "last_batch_hash": GENESIS_ROOT})
+        state = await ledger.state.find_one({"_id": ledger.name})
+        assert state["last_sequence"] == 1
+        assert state["lease_until"] is None
+
+    async def test_seal_releases_own_lease(self):
+        ledger = await _ledger()
+        await ledger.append([{"id": "e1", "timestamp": datetime.now(timezone.utc), "data": {}}])
+        batch = await ledger.seal_pending(force=True)
+        state = await ledger.state.find_one({"_id": ledger.name})
+        assert state["last_sequence"] == batch["sequence"] == 1
+        assert state["lease_owner"] is None
+        assert (await ledger.verify_chain())["valid"]
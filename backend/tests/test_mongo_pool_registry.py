@@ -0,0 +1,45 @@
+"""
+Shared MongoDB Pool Registry Tests
+Tests for the process-wide connection pool and its stats endpoint.
+Endpoints tested:
+- GET /api/database/pool
+"""
+import os
+
+import pytest
+import requests
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestMongoPoolRegistry:
+    """Shared pool registry endpoint tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def test_pool_stats_shape(self):
+        """Pool stats expose options and per-pool checkout counters"""
+        # Touch the database so at least one checkout is recorded
+        self.session.get(f"{BASE_URL}/api/health")
+
+        response = self.session.get(f"{BASE_URL}/api/database/pool")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+
+        pool = response.json()["pool"]
+        assert pool["pool_count"] >= 1
+        for key in ("maxPoolSize", "minPoolSize", "maxIdleTimeMS", "waitQueueTimeoutMS"):
+            assert key in pool["options"]
+        stats = pool["pools"][0]
+        for key in ("checkouts", "in_use", "avg_wait_ms", "max_wait_ms", "checkout_failures"):
+            assert key in stats
+        assert stats["checkouts"] >= 1
+
+    def test_pool_stats_hide_connection_urls(self):
+        """Pool stats never leak connection strings"""
+        response = self.session.get(f"{BASE_URL}/api/database/pool")
+        assert response.status_code == 200
+        assert "mongodb://" not in response.text
+        assert "mongodb+srv://" not in response.text
@@ -0,0 +1,91 @@
+"""
+Label Ownership Reconciliation - Unit Tests
+
+Validates the startup ownership guard: owner roles are restored only on
+active labels, business identifiers are written only where missing or
+drifted, and the whole pass takes one read plus at most two bulk writes
+however many labels exist. Runs against in-memory collections.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from utils.ownership_guard import (  # type: ignore  # noqa: E402
+    PROTECTED_BUSINESS_IDENTIFIERS,
+    PROTECTED_OWNER_USER_ID,
+    reconcile_label_ownership,
+)
+
+
+async def _db(labels):
+    """``labels`` maps label id to (owner's role, label status, identifiers or None)"""
+    db = FakeDatabase()
+    for label_id, (role, status, identifiers) in labels.items():
+        await db.label_members.insert_one({"label_id": label_id, "user_id": PROTECTED_OWNER_USER_ID, "role": role})
+        await db.uln_labels.insert_one({"global_id": {"id": label_id}, "status": status})
+        if identifiers is not None:
+            await db.business_identifiers.insert_one({"label_id": label_id, **identifiers})
+    return db
+
+
+def _round_trips(db):
+    """Count the reads and bulk writes the reconciliation sends"""
+    calls = []
+    for collection, method in ((db.label_members, "aggregate"), (db.label_members, "bulk_write"),
+                               (db.business_identifiers, "bulk_write")):
+        original = getattr(collection, method)
+
+        def wrapped(*args, original=original, method=method, **kwargs):
+            calls.append(method)
+            if method == "bulk_write":
+                assert kwargs.get("ordered", True)
+            return original(*args, **kwargs)
+
+        setattr(collection, method, wrapped)
+    return calls
+
+
+def _current_identifiers(**overrides):
+    return {**PROTECTED_BUSINESS_IDENTIFIERS, "owner_user_id": PROTECTED_OWNER_USER_ID, **overrides}
+
+
+def _identifiers(db, label_id):
+    return next(d for d in db.business_identifiers.docs if d["label_id"] == label_id)
+
+
+class TestReconcileLabelOwnership:
+    async def test_constant_round_trips_for_many_labels(self):
+        db = await _db({f"L{i}": ("member", "active", None) for i in range(200)})
+        calls = _round_trips(db)
+        stats = await reconcile_label_ownership(db)
+        assert len(calls) == 3 and stats["round_trips"] == 3
+        assert len(stats["roles_restored"]) == 200 and stats["identifiers_created"] == 200
+        assert {d["role"] for d in db.label_members.docs} == {"owner"}
+        assert len(db.business_identifiers.docs) == 200
+        assert _identifiers(db, "L7")["created_by"] == "system_startup"
+
+    async def test_only_drift_is_written(self):
+        db = await _db({
+            "ok": ("owner", "active", _current_identifiers(updated_at="before")),
+            "drifted": ("owner", "active", _current_identifiers(ein="00-0000000", updated_at="before")),
+            "inactive": ("member", "suspended", None),
+        })
+        calls = _round_trips(db)
+        stats = await reconcile_label_ownership(db)
+        assert stats["labels_checked"] == 3
+        assert stats["roles_restored"] == []
+        assert (stats["identifiers_created"], stats["identifiers_updated"]) == (0, 1)
+        assert _identifiers(db, "ok")["updated_at"] == "before"
+        assert _identifiers(db, "drifted") == {**_identifiers(db, "drifted"), **_current_identifiers()}
+        assert "created_by" not in _identifiers(db, "drifted")
+        assert next(d for d in db.label_members.docs if d["label_id"] == "inactive")["role"] == "member"
+        assert len(db.business_identifiers.docs) == 2
+        assert calls == ["aggregate", "bulk_write"] and stats["round_trips"] == 2
+
+    async def test_nothing_to_do_is_one_round_trip(self):
+        db = await _db({"ok": ("owner", "active", _current_identifiers())})
+        calls = _round_trips(db)
+        stats = await reconcile_label_ownership(db)
+        assert stats["round_trips"] == 1 and calls == ["aggregate"]
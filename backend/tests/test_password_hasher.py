@@ -0,0 +1,55 @@
+"""
+Password Hasher - Unit Tests
+
+Validates off-loop bcrypt hashing: hash/verify round trips, rejection of
+malformed hashes, detection of hashes that need upgrading, and load
+shedding once the pending-job cap is reached.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from password_hasher import PasswordHasher, PasswordHashingBusy  # type: ignore  # noqa: E402
+
+
+class TestHashing:
+    async def test_round_trip(self):
+        hasher = PasswordHasher(rounds=4, max_workers=2, max_pending=4)
+        hashed = await hasher.hash("s3cret")
+        assert hashed.startswith("$2b$04$")
+        assert await hasher.verify("s3cret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        stats = hasher.stats()
+        assert stats["hashes"] == 1 and stats["verifications"] == 2 and stats["in_flight"] == 0
+
+    async def test_malformed_hash_does_not_verify(self):
+        hasher = PasswordHasher(rounds=4)
+        assert not await hasher.verify("s3cret", "not-a-bcrypt-hash")
+
+    async def test_needs_rehash(self):
+        hasher = PasswordHasher(rounds=5)
+        assert hasher.needs_rehash(await PasswordHasher(rounds=4).hash("pw"))
+        assert not hasher.needs_rehash(await hasher.hash("pw"))
+        assert hasher.needs_rehash("$2a$12$" + "x" * 53)
+        assert not hasher.needs_rehash("garbage")
+
+
+class TestLoadShedding:
+    async def test_rejects_beyond_max_pending(self):
+        hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2)
+        release = threading.Event()
+        blocked = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.stats()["queue_depth"] == 1
+        with pytest.raises(PasswordHashingBusy):
+            await hasher.hash("pw")
+        release.set()
+        await asyncio.gather(*blocked)
+        assert hasher.stats()["rejected"] == 1
+        # Capacity is back once the pending jobs finish
+        assert await hasher.verify("pw", await hasher.hash("pw"))
@@ -0,0 +1,165 @@
+"""
+Post Scheduler Leases - Unit Tests
+
+Validates how scheduled posts are claimed: only due posts are leased, a
+leased post is not claimed again until its lease expires, a worker that
+lost its lease cannot record an outcome, a re-claimed post only retries
+the platforms that have not succeeded, and two workers claiming at the
+same moment never share a post. Runs against in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from services import scheduler_service  # type: ignore  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(scheduler_service, "db", fake)
+    monkeypatch.setattr(scheduler_service, "WORKER_ID", "w1")
+    return fake
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+async def _post(db, n, due_in_seconds=-1, platforms=("twitter_x",)):
+    due_at = _now() + timedelta(seconds=due_in_seconds)
+    await db.scheduled_posts.insert_one({
+        "id": f"p{n}", "user_id": "u1", "text": "hello", "platforms": list(platforms),
+        "status": "pending", "due_at": due_at, "scheduled_time": due_at.isoformat(),
+    })
+
+
+def _stored(db, post_id):
+    return next(d for d in db.scheduled_posts.docs if d["id"] == post_id)
+
+
+class TestClaim:
+    async def test_claims_only_due_posts(self, db):
+        await _post(db, 1)
+        await _post(db, 2, due_in_seconds=3600)
+        claimed = await scheduler_service._claim_due_posts(_now())
+        assert [p["id"] for p in claimed] == ["p1"]
+        assert claimed[0]["status"] == "publishing" and claimed[0]["lease_owner"] == "w1"
+        assert claimed[0]["lease_expires_at"] > _now()
+        assert _stored(db, "p2")["status"] == "pending"
+
+    async def test_leased_post_is_not_claimed_again(self, db, monkeypatch):
+        await _post(db, 1)
+        await scheduler_service._claim_due_posts(_now())
+        monkeypatch.setattr(scheduler_service, "WORKER_ID", "w2")
+        assert await scheduler_service._claim_due_posts(_now()) == []
+
+    async def test_claims_in_batches(self, db, monkeypatch):
+        monkeypatch.setattr(scheduler_service, "CLAIM_BATCH_SIZE", 2)
+        for n in range(3):
+            await _post(db, n, due_in_seconds=-10 + n)
+        first = await scheduler_service._claim_due_posts(_now())
+        second = await scheduler_service._claim_due_posts(_now())
+        assert [p["id"] for p in first] == ["p0", "p1"]
+        assert [p["id"] for p in second] == ["p2"]
+
+
+class TestLeaseExpiry:
+    async def test_expired_lease_is_reclaimed_and_old_owner_discarded(self, db, monkeypatch):
+        await _post(db, 1)
+        [stale] = await scheduler_service._claim_due_posts(_now())
+        _stored(db, "p1")["lease_expires_at"] = _now() - timedelta(seconds=1)
+
+        monkeypatch.setattr(scheduler_service, "WORKER_ID", "w2")
+        [fresh] = await scheduler_service._claim_due_posts(_now())
+        assert fresh["lease_owner"] == "w2" and fresh["claim_id"] != stale["claim_id"]
+
+        monkeypatch.setattr(scheduler_service, "WORKER_ID", "w1")
+        await scheduler_service._complete_post(stale, {"twitter_x": {"success": True}})
+        assert _stored(db, "p1")["status"] == "publishing"
+        assert db.publish_history.docs == []
+
+        monkeypatch.setattr(scheduler_service, "WORKER_ID", "w2")
+        await scheduler_service._complete_post(fresh, {"twitter_x": {"success": True}})
+        stored = _stored(db, "p1")
+        assert stored["status"] == "published" and "lease_owner" not in stored
+        assert len(db.publish_history.docs) == 1
+
+    async def test_reclaimed_post_only_retries_unfinished_platforms(self, db, monkeypatch):
+        calls = []
+
+        async def publish(post, platform):
+            calls.append(platform)
+            return {"success": platform == "twitter_x", "error": None if platform == "twitter_x" else "down"}
+
+        monkeypatch.setattr(scheduler_service, "_publish_to_platform", publish)
+        await _post(db, 1, platforms=("twitter_x", "snapchat"))
+        [post] = await scheduler_service._claim_due_posts(_now())
+        await scheduler_service._publish_post(post)
+        # The worker dies before completing; its lease runs out
+        _stored(db, "p1")["lease_expires_at"] = _now() - timedelta(seconds=1)
+
+        monkeypatch.setattr(scheduler_service, "WORKER_ID", "w2")
+        [post] = await scheduler_service._claim_due_posts(_now())
+        results = await scheduler_service._publish_post(post)
+        assert calls == ["twitter_x", "snapchat", "snapchat"]
+        assert results["twitter_x"]["success"] and not results["snapchat"]["success"]
+
+
+class TestConcurrentClaims:
+    async def test_workers_racing_for_the_same_posts_never_share_one(self, db, monkeypatch):
+        for n in range(4):
+            await _post(db, n)
+        collection = db.scheduled_posts
+        original_update_many = collection.update_many
+        rival = {}
+
+        async def update_many(query, update, upsert=False):
+            # w2 selects and claims the same posts between w1's selection and w1's write
+            if not rival:
+                rival["claimed"] = None
+                monkeypatch.setattr(scheduler_service, "WORKER_ID", "w2")
+                rival["claimed"] = await scheduler_service._claim_due_posts(_now())
+                monkeypatch.setattr(scheduler_service, "WORKER_ID", "w1")
+            return await original_update_many(query, update, upsert=upsert)
+
+        monkeypatch.setattr(collection, "update_many", update_many)
+        mine = await scheduler_service._claim_due_posts(_now())
+
+        theirs = rival["claimed"]
+        assert {p["id"] for p in theirs} == {"p0", "p1", "p2", "p3"}
+        assert mine == []
+        assert {d["lease_owner"] for d in collection.docs} == {"w2"}
+
+    async def test_partial_overlap_splits_posts(self, db, monkeypatch):
+        monkeypatch.setattr(scheduler_service, "CLAIM_BATCH_SIZE", 2)
+        for n in range(3):
+            await _post(db, n, due_in_seconds=-10 + n)
+        collection = db.scheduled_posts
+        original_update_many = collection.update_many
+        rival = {}
+
+        async def update_many(query, update, upsert=False):
+            if not rival:
+                rival["claimed"] = None
+                # w2 got to p0 first, by itself
+                await original_update_many(
+                    {"id": "p0"},
+                    {"$set": {"status": "publishing", "claim_id": "other", "lease_owner": "w2",
+                              "lease_expires_at": _now() + timedelta(minutes=5)}},
+                )
+            return await original_update_many(query, update, upsert=upsert)
+
+        monkeypatch.setattr(collection, "update_many", update_many)
+        mine = await scheduler_service._claim_due_posts(_now())
+        assert [p["id"] for p in mine] == ["p1"]
+        assert _stored(db, "p0")["lease_owner"] == "w2"
+        assert _stored(db, "p2")["status"] == "pending"
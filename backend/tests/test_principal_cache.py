@@ -0,0 +1,194 @@
+"""
+Principal Cache - Unit Tests
+
+Validates how bearer tokens resolve to users through the cached resolver:
+repeat requests are served from the cache, a token whose "tv" claim no
+longer matches the user's token_version is rejected, user writes drop the
+cached document, and logout, password reset and admin deactivation revoke
+every token issued before them. Runs against in-memory collections.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from mongo_fakes import FakeDatabase  # noqa: E402
+from auth import service as auth_service  # type: ignore  # noqa: E402
+from auth.service import (  # type: ignore  # noqa: E402
+    create_access_token,
+    invalidate_principal,
+    load_principal,
+    resolve_principal,
+    revoke_user_tokens,
+)
+from models.core import ResetPasswordRequest, User, UserUpdate  # type: ignore  # noqa: E402
+from routes import admin_routes, auth_routes  # type: ignore  # noqa: E402
+from versioned_cache import VersionedLRUCache  # type: ignore  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    for module in (auth_service, auth_routes, admin_routes):
+        monkeypatch.setattr(module, "db", fake)
+    monkeypatch.setattr(auth_service, "principal_cache", VersionedLRUCache("principals", 100, 60))
+
+    async def no_activity_log(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(auth_routes, "log_activity", no_activity_log)
+    return fake
+
+
+@pytest.fixture
+def user_lookups(db, monkeypatch):
+    """Counts users lookups that reach the database"""
+    calls = []
+    original = db.users.find_one
+
+    async def find_one(query=None, projection=None, sort=None):
+        calls.append(query)
+        return await original(query, projection, sort)
+
+    monkeypatch.setattr(db.users, "find_one", find_one)
+    return calls
+
+
+async def _user(db, user_id="u1", **fields):
+    doc = {"id": user_id, "email": f"{user_id}@example.com", "full_name": "Test User",
+           "role": "user", "is_active": True, "token_version": 0, **fields}
+    await db.users.insert_one(dict(doc))
+    return doc
+
+
+def _token(user_id="u1", tv=0):
+    return create_access_token({"sub": user_id, "tv": tv})
+
+
+async def _rejected(token) -> str:
+    with pytest.raises(HTTPException) as exc:
+        await resolve_principal(token)
+    assert exc.value.status_code == 401
+    return exc.value.detail
+
+
+class TestResolve:
+    async def test_repeat_requests_hit_the_cache(self, db, user_lookups):
+        await _user(db)
+        first = await resolve_principal(_token())
+        second = await resolve_principal(_token())
+        assert first["id"] == second["id"] == "u1" and "_id" not in first
+        assert len(user_lookups) == 1
+
+    async def test_callers_cannot_mutate_the_cached_document(self, db):
+        await _user(db)
+        principal = await resolve_principal(_token())
+        principal["role"] = "admin"
+        assert (await resolve_principal(_token()))["role"] == "user"
+
+    async def test_unknown_user_is_rejected_and_negative_result_cached(self, db, user_lookups):
+        assert await _rejected(_token("ghost")) == "User not found"
+        assert await _rejected(_token("ghost")) == "User not found"
+        assert len(user_lookups) == 1
+
+    async def test_bad_signature_and_missing_subject_are_rejected(self, db):
+        await _user(db)
+        assert await _rejected(_token() + "x") == "Could not validate credentials"
+        assert await _rejected(create_access_token({"tv": 0})) == "Could not validate credentials"
+
+    async def test_token_version_mismatch_is_rejected(self, db):
+        await _user(db, token_version=3)
+        assert await _rejected(_token(tv=2)) == "Token has been revoked"
+        assert await _rejected(_token(tv=4)) == "Token has been revoked"
+        assert (await resolve_principal(_token(tv=3)))["id"] == "u1"
+
+    async def test_tokens_without_tv_match_users_never_revoked(self, db):
+        await _user(db)
+        del db.users.docs[0]["token_version"]
+        assert (await resolve_principal(create_access_token({"sub": "u1"})))["id"] == "u1"
+
+
+class TestInvalidation:
+    async def test_user_write_is_seen_after_invalidation(self, db, user_lookups):
+        await _user(db)
+        await load_principal("u1")
+        await db.users.update_one({"id": "u1"}, {"$set": {"role": "admin"}})
+        assert (await load_principal("u1"))["role"] == "user"
+
+        invalidate_principal("u1")
+        assert (await load_principal("u1"))["role"] == "admin"
+        assert len(user_lookups) == 2
+
+    async def test_admin_role_change_invalidates_without_revoking(self, db):
+        await _user(db)
+        admin = User(id="admin", email="admin@example.com", full_name="Admin", role="admin", is_admin=True)
+        token = _token()
+        await resolve_principal(token)
+
+        await admin_routes.update_user("u1", UserUpdate(role="moderator"), current_user=admin)
+        principal = await resolve_principal(token)
+        assert principal["role"] == "moderator" and principal["token_version"] == 0
+
+    async def test_load_racing_an_invalidation_is_not_cached(self, db, monkeypatch):
+        await _user(db)
+        original = db.users.find_one
+
+        async def find_one(query=None, projection=None, sort=None):
+            doc = await original(query, projection, sort)
+            # The user is written and invalidated while this read is in flight
+            await db.users.update_one({"id": "u1"}, {"$set": {"role": "admin"}})
+            invalidate_principal("u1")
+            return doc
+
+        monkeypatch.setattr(db.users, "find_one", find_one)
+        assert (await load_principal("u1"))["role"] == "user"
+        monkeypatch.setattr(db.users, "find_one", original)
+        assert (await load_principal("u1"))["role"] == "admin"
+
+
+class TestRevocation:
+    async def test_revoke_bumps_version_and_rejects_cached_token(self, db):
+        await _user(db)
+        token = _token()
+        await resolve_principal(token)
+        await revoke_user_tokens("u1")
+        assert db.users.docs[0]["token_version"] == 1
+        assert await _rejected(token) == "Token has been revoked"
+        assert (await resolve_principal(_token(tv=1)))["id"] == "u1"
+
+    async def test_logout_revokes_tokens(self, db):
+        doc = await _user(db)
+        await db.user_sessions.insert_one({"user_id": "u1", "is_active": True})
+        token = _token()
+        await resolve_principal(token)
+
+        await auth_routes.logout_user(current_user=User(**doc), request=None)
+        assert await _rejected(token) == "Token has been revoked"
+        assert db.user_sessions.docs[0]["is_active"] is False
+
+    async def test_password_reset_revokes_tokens(self, db):
+        await _user(db, password_reset_token="reset-1",
+                    password_reset_expires=datetime.utcnow() + timedelta(hours=1))
+        token = _token()
+        await resolve_principal(token)
+
+        await auth_routes.reset_password(ResetPasswordRequest(token="reset-1", new_password="N3w-Passw0rd!"), None)
+        assert await _rejected(token) == "Token has been revoked"
+        assert "password_reset_token" not in db.users.docs[0]
+
+    @pytest.mark.parametrize("update", [UserUpdate(is_active=False), UserUpdate(account_status="suspended")])
+    async def test_admin_deactivation_revokes_tokens(self, db, update):
+        await _user(db)
+        admin = User(id="admin", email="admin@example.com", full_name="Admin", role="admin", is_admin=True)
+        token = _token()
+        await resolve_principal(token)
+
+        await admin_routes.update_user("u1", update, current_user=admin)
+        assert await _rejected(token) == "Token has been revoked"
@@ -0,0 +1,101 @@
+"""
+Rate Limiter - Unit Tests
+
+Validates the sliding-window-counter limiter on its in-memory store:
+per-minute and per-hour limits, previous-window weighting, route cost
+weights, idle identifier expiry and the rate limit response headers.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from rate_limiter import MemoryRateLimitStore, RateLimiter, rate_limit_headers  # type: ignore  # noqa: E402
+
+# Start of a minute and of an hour, so window offsets in the tests are exact
+T0 = 1_800_000_000 - (1_800_000_000 % 3600)
+
+
+def _limiter(per_minute=5, per_hour=100, route_costs=None):
+    return RateLimiter(requests_per_minute=per_minute, requests_per_hour=per_hour,
+                       store=MemoryRateLimitStore(), route_costs=route_costs or {})
+
+
+class TestWindows:
+    async def test_minute_limit(self):
+        limiter = _limiter(per_minute=3)
+        results = [await limiter.check_rate_limit("ip:1", now=T0 + i) for i in range(4)]
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        denied = results[-1][1]
+        assert denied["limit_type"] == "per_minute"
+        assert denied["retry_after"] == 57
+
+    async def test_identifiers_are_independent(self):
+        limiter = _limiter(per_minute=1)
+        assert (await limiter.check_rate_limit("ip:1", now=T0))[0]
+        assert (await limiter.check_rate_limit("ip:2", now=T0))[0]
+        assert not (await limiter.check_rate_limit("ip:1", now=T0))[0]
+
+    async def test_previous_window_is_weighted(self):
+        limiter = _limiter(per_minute=10)
+        for _ in range(10):
+            assert (await limiter.check_rate_limit("ip:1", now=T0 + 59))[0]
+        # 15s into the next minute 75% of the previous minute still counts: 7.5 used
+        allowed, info = await limiter.check_rate_limit("ip:1", now=T0 + 75)
+        assert allowed and info["minute_remaining"] == 1
+        assert (await limiter.check_rate_limit("ip:1", now=T0 + 75))[0]
+        assert not (await limiter.check_rate_limit("ip:1", now=T0 + 75))[0]
+        # Halfway through, only 5 of the previous 10 count
+        assert (await limiter.check_rate_limit("ip:1", now=T0 + 90))[0]
+
+    async def test_hour_limit(self):
+        limiter = _limiter(per_minute=100, per_hour=3)
+        for i in range(3):
+            assert (await limiter.check_rate_limit("ip:1", now=T0 + i * 120))[0]
+        allowed, info = await limiter.check_rate_limit("ip:1", now=T0 + 600)
+        assert not allowed and info["limit_type"] == "per_hour"
+
+    async def test_denied_request_is_not_counted(self):
+        limiter = _limiter(per_minute=2, per_hour=3)
+        await limiter.check_rate_limit("ip:1", now=T0)
+        await limiter.check_rate_limit("ip:1", now=T0)
+        for _ in range(5):
+            assert not (await limiter.check_rate_limit("ip:1", now=T0 + 1))[0]
+        # Two minutes later the minute window is empty and only 2 of 3 hourly slots are used
+        assert (await limiter.check_rate_limit("ip:1", now=T0 + 120))[0]
+
+
+class TestCosts:
+    async def test_route_cost_consumes_budget(self):
+        limiter = _limiter(per_minute=10, route_costs={"/api/reports": 5, "/api/reports/light": 1})
+        assert limiter.cost_for("/api/reports/export") == 5
+        assert limiter.cost_for("/api/reports/light/x") == 1
+        assert limiter.cost_for("/api/other") == 1
+        assert (await limiter.check_rate_limit("ip:1", cost=5, now=T0))[0]
+        assert (await limiter.check_rate_limit("ip:1", cost=5, now=T0))[0]
+        assert not (await limiter.check_rate_limit("ip:1", cost=1, now=T0))[0]
+
+
+class TestStore:
+    async def test_idle_identifiers_expire(self):
+        store = MemoryRateLimitStore()
+        limiter = RateLimiter(requests_per_minute=5, requests_per_hour=100, store=store, route_costs={})
+        await limiter.check_rate_limit("ip:1", now=T0)
+        assert len(store) == 2
+        for key, (count, expires_at) in list(store._counters.items()):
+            store._counters[key] = (count, expires_at - 10_000)
+        store._last_sweep -= store.SWEEP_INTERVAL_SECONDS
+        await limiter.check_rate_limit("ip:2", now=T0)
+        assert all(key.startswith("ratelimit:ip:2") for key in store._counters)
+
+
+class TestHeaders:
+    async def test_headers_report_tightest_window(self):
+        limiter = _limiter(per_minute=5, per_hour=100)
+        _, info = await limiter.check_rate_limit("ip:1", now=T0 + 20)
+        headers = rate_limit_headers(limiter, info)
+        assert headers["RateLimit-Limit"] == "5"
+        assert headers["RateLimit-Remaining"] == "4"
+        assert headers["RateLimit-Reset"] == "40"
+        assert headers["RateLimit-Policy"] == "5;w=60, 100;w=3600"
+        assert headers["X-RateLimit-Remaining-Hour"] == "99"
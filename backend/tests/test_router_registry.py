@@ -0,0 +1,122 @@
+"""
+Router Registry - Unit Tests
+
+Validates on-demand router loading: routers are imported only when a
+request falls under one of their claims, route order follows registration
+order whatever order modules load in, failed imports answer 503, the
+OpenAPI schema and the background warm-up load everything, and imports
+run off the event loop, once however many requests need the module.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import types
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from router_registry import RouterRegistry  # type: ignore  # noqa: E402
+
+
+def _fake_module(name: str, routes: dict, prefix: str = "") -> str:
+    """Register an importable module whose ``router`` serves ``{path: response}``"""
+    router = APIRouter(prefix=prefix)
+    for path, body in routes.items():
+        router.add_api_route(path, lambda body=body: body, methods=["GET"])
+    module = types.ModuleType(name)
+    module.router = router
+    sys.modules[name] = module
+    return name
+
+
+def _app(*specs):
+    app = FastAPI()
+    registry = RouterRegistry(prefix="/api")
+    for module, claims in specs:
+        registry.add(module, claims=claims)
+    registry.install(app)
+    return app, registry
+
+
+class TestOnDemand:
+    def test_router_loads_on_first_matching_request(self):
+        alpha = _fake_module("rr_alpha", {"/ping": {"from": "alpha"}}, prefix="/alpha")
+        beta = _fake_module("rr_beta", {"/ping": {"from": "beta"}}, prefix="/beta")
+        app, registry = _app((alpha, ["/alpha"]), (beta, ["/beta"]))
+        client = TestClient(app)
+        assert client.get("/api/alpha/ping").json() == {"from": "alpha"}
+        loaded = {spec.module: spec.loaded for spec in registry.specs}
+        assert loaded == {"rr_alpha": True, "rr_beta": False}
+        assert client.get("/api/alphabet").status_code == 404
+        assert not registry.specs[1].loaded
+
+    def test_route_order_follows_registration(self):
+        first = _fake_module("rr_first", {"/shared/x": {"from": "first"}})
+        second = _fake_module("rr_second", {"/shared/x": {"from": "second"}, "/only-second": {}})
+        app, registry = _app((first, ["/shared"]), (second, ["/only-second"]))
+        client = TestClient(app)
+        client.get("/api/only-second")
+        client.get("/api/shared/x")
+        assert registry.specs[0].loaded and registry.specs[1].loaded
+        assert client.get("/api/shared/x").json() == {"from": "first"}
+
+    def test_failed_import_answers_503(self):
+        app, registry = _app(("rr_does_not_exist", ["/missing"]))
+        client = TestClient(app)
+        for _ in range(2):
+            response = client.get("/api/missing/thing")
+            assert response.status_code == 503
+        report = registry.report()
+        assert report["failed"] == 1 and "ModuleNotFoundError" in report["routers"][0]["error"]
+
+
+class TestLoadAll:
+    def test_openapi_schema_includes_every_router(self):
+        gamma = _fake_module("rr_gamma", {"/gamma": {}})
+        delta = _fake_module("rr_delta", {"/delta": {}})
+        app, registry = _app((gamma, ["/gamma"]), (delta, ["/delta"]))
+        paths = TestClient(app).get("/openapi.json").json()["paths"]
+        assert {"/api/gamma", "/api/delta"} <= set(paths)
+        assert registry.settled
+
+    async def test_warm_up_loads_remaining_routers(self):
+        epsilon = _fake_module("rr_epsilon", {"/epsilon": {}})
+        _, registry = _app((epsilon, ["/epsilon"]))
+        await registry.warm_up(delay=0)
+        report = registry.report()
+        assert report["loaded"] == 1
+        assert report["routers"][0]["loaded_by"] == "warmup"
+        assert report["routers"][0]["routes"] == 1
+
+
+class TestOffLoop:
+    def _module_on_disk(self, tmp_path, monkeypatch, name: str) -> str:
+        """A real module file, so importing it runs its body on the importing thread"""
+        (tmp_path / f"{name}.py").write_text(
+            "import threading\n"
+            "from fastapi import APIRouter\n"
+            "imported_on = threading.current_thread().name\n"
+            "router = APIRouter()\n"
+            f"router.add_api_route('/{name}', lambda: {{'ok': True}}, methods=['GET'])\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        return name
+
+    async def test_imports_run_off_the_event_loop(self, tmp_path, monkeypatch):
+        module = self._module_on_disk(tmp_path, monkeypatch, "rr_threaded")
+        _, registry = _app((module, ["/rr_threaded"]))
+        assert await registry.load_for_path("/api/rr_threaded") == []
+        assert sys.modules[module].imported_on != threading.current_thread().name
+        assert registry.settled
+
+    async def test_concurrent_requests_import_once(self, tmp_path, monkeypatch):
+        module = self._module_on_disk(tmp_path, monkeypatch, "rr_shared")
+        app, registry = _app((module, ["/rr_shared"]))
+        routes_before = len(app.router.routes)
+        await asyncio.gather(*(registry.load_for_path("/api/rr_shared") for _ in range(3)))
+        assert registry.report()["loaded"] == 1
+        assert len(app.router.routes) == routes_before + 1
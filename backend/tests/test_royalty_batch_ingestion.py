@@ -0,0 +1,194 @@
+"""
+Royalty Batch Ingestion - Unit Tests
+
+Validates that process_transaction_batch is a drop-in replacement for
+calling process_transaction_event once per event: the same fraud flags
+(including counters that cross their thresholds mid-batch), the same
+calculations and payout rows, and the same errors for events without
+terms or splits. Runs against in-memory collections; no MongoDB needed.
+"""
+
+import copy
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+import royalty_engine_core  # type: ignore  # noqa: E402
+from royalty_engine_core import RoyaltyEngineCore, TransactionEvent  # type: ignore  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        self._iter = iter(self.rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return self.rows
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$gte" in cond and (value is None or value < cond["$gte"]):
+                return False
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class _Collection:
+    def __init__(self, docs=None):
+        self.docs = [copy.deepcopy(d) for d in docs or []]
+
+    def find(self, query):
+        return _Cursor([copy.deepcopy(d) for d in self.docs if _matches(d, query)])
+
+    async def insert_one(self, doc):
+        self.docs.append(copy.deepcopy(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(copy.deepcopy(docs))
+
+    async def count_documents(self, query):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    def aggregate(self, pipeline):
+        match, group = pipeline[0]["$match"], pipeline[1]["$group"]
+        field = group["_id"].lstrip("$")
+        counts = {}
+        for doc in self.docs:
+            if _matches(doc, match):
+                counts[doc[field]] = counts.get(doc[field], 0) + 1
+        return _Cursor([{"_id": key, "count": count} for key, count in counts.items()])
+
+
+class _Ledger:
+    def __init__(self):
+        self.entries = []
+
+    async def append(self, entries):
+        self.entries.extend(entries)
+
+
+class _Db:
+    def __init__(self):
+        self.fraud_flags = _Collection()
+        self.processing_errors = _Collection()
+
+
+NOW = datetime.now(timezone.utc)
+
+
+def _seed_events():
+    """Recent history that puts u1 and the NG territory just under their fraud thresholds"""
+    history = [{"user_id": "u1", "territory": "US", "timestamp": NOW - timedelta(minutes=1)} for _ in range(99)]
+    history += [{"user_id": None, "territory": "NG", "timestamp": NOW - timedelta(hours=1)} for _ in range(999)]
+    return history
+
+
+def _engine(monkeypatch):
+    engine = RoyaltyEngineCore.__new__(RoyaltyEngineCore)
+    engine.collection_events = _Collection(_seed_events())
+    engine.collection_contracts = _Collection([{
+        "asset_id": "a1", "contract_type": "percentage", "base_rate": Decimal("0.5"),
+        "effective_date": NOW - timedelta(days=30), "active": True,
+    }])
+    engine.collection_splits = _Collection([
+        {"asset_id": "a1", "contributor_id": "artist", "contributor_type": "artist",
+         "split_percentage": Decimal("70"), "payout_method": "ach_batch", "active": True},
+        {"asset_id": "a1", "contributor_id": "producer", "contributor_type": "producer",
+         "split_percentage": Decimal("30"), "payout_method": "crypto_instant",
+         "wallet_address": "0xabc", "active": True},
+        {"asset_id": "a2", "contributor_id": "artist", "contributor_type": "artist",
+         "split_percentage": Decimal("100"), "active": True},
+    ])
+    engine.collection_calculations = _Collection()
+    engine.collection_payouts = _Collection()
+    engine.audit_ledger = _Ledger()
+    engine.terms_cache = royalty_engine_core.VersionedLRUCache("terms", 0)
+    engine.splits_cache = royalty_engine_core.VersionedLRUCache("splits", 0)
+    monkeypatch.setattr(royalty_engine_core, "db", _Db())
+    return engine
+
+
+def _events():
+    def event(n, **fields):
+        defaults = {"id": f"e{n}", "asset_id": "a1", "platform": "spotify", "territory": "US",
+                    "revenue_source": "streaming", "monetization_type": "subscription",
+                    "gross_revenue": Decimal("100"), "timestamp": NOW}
+        return TransactionEvent(**{**defaults, **fields})
+
+    return [
+        event(1, user_id="u1", gross_revenue=Decimal("20000")),  # 100th u1 event: not yet rapid
+        event(2, user_id="u1", gross_revenue=Decimal("20000")),  # 101st: rapid + high revenue -> REVIEW
+        event(3, territory="NG", gross_revenue=Decimal("20000")),  # 1000th NG event: under volume limit
+        event(4, user_id="u1", territory="NG", gross_revenue=Decimal("20000")),  # all three -> BLOCK
+        event(5, asset_id="a2"),  # splits but no contract terms
+        event(6, asset_id="a3"),  # nothing configured
+        event(7),
+    ]
+
+
+def _outcome(engine):
+    db = royalty_engine_core.db
+    return {
+        "flags": [(f["transaction_event_id"], f["flags"], f["recommended_action"]) for f in db.fraud_flags.docs],
+        "errors": [(e["transaction_event_id"], e["error_message"]) for e in db.processing_errors.docs],
+        "calculations": [(c["transaction_event_id"], c["total_royalty"], c["contributor_payouts"])
+                         for c in engine.collection_calculations.docs],
+        "payouts": [(p["metadata"]["transaction_event_id"], p["contributor_id"], p["amount"],
+                     p["payout_method"], p["status"], p.get("wallet_address"))
+                    for p in engine.collection_payouts.docs],
+        "audited": [a["transaction_event_id"] for a in engine.audit_ledger.entries],
+        "stored_events": len(engine.collection_events.docs),
+    }
+
+
+class TestBatchMatchesPerEvent:
+    async def test_same_flags_payouts_and_errors(self, monkeypatch):
+        engine = _engine(monkeypatch)
+        for event in _events():
+            try:
+                await engine.process_transaction_event(event)
+            except ValueError:
+                pass
+        sequential = _outcome(engine)
+
+        engine = _engine(monkeypatch)
+        results = await engine.process_transaction_batch(_events())
+        batched = _outcome(engine)
+
+        assert batched == sequential
+        assert [r.event.id for r in results if r.error] == ["e4", "e5", "e6"]
+        assert [flag[2] for flag in batched["flags"]] == ["REVIEW", "BLOCK"]
+        assert {p[4] for p in batched["payouts"]} == {"pending_batch", "pending_crypto"}
+
+    async def test_small_chunks_carry_counters_across_chunks(self, monkeypatch):
+        engine = _engine(monkeypatch)
+        whole = await engine.process_transaction_batch(_events())
+        whole_outcome = _outcome(engine)
+
+        engine = _engine(monkeypatch)
+        chunked = await engine.process_transaction_batch(_events(), chunk_size=2)
+
+        assert _outcome(engine) == whole_outcome
+        assert [r.error for r in chunked] == [r.error for r in whole]
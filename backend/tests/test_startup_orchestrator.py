@@ -0,0 +1,197 @@
+"""
+Startup Orchestrator - Unit Tests
+
+Validates dependency-aware startup: independent services initialize
+concurrently, dependents wait for their dependencies, failures and
+timeouts skip dependents without cancelling the slow work and start them
+once it finishes, deferred
+services run after the critical phase, bad graphs are rejected, and
+draining deferred initializers also waits for the ones already running.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+import async_init  # type: ignore  # noqa: E402
+from async_init import run_pending_initializers, schedule_init  # type: ignore  # noqa: E402
+from startup_orchestrator import StartupOrchestrator  # type: ignore  # noqa: E402
+
+
+def _sleeper(seconds, log=None, name=None):
+    async def run():
+        await asyncio.sleep(seconds)
+        if log is not None:
+            log.append(name)
+    return run
+
+
+def _statuses(orchestrator):
+    return {s["name"]: s["status"] for s in orchestrator.report()["services"]}
+
+
+class TestCriticalPhase:
+    async def test_independent_services_run_concurrently(self):
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        for name in ("a", "b", "c"):
+            orchestrator.service(name, _sleeper(0.1))
+        started = time.perf_counter()
+        await orchestrator.run()
+        assert time.perf_counter() - started < 0.25
+        report = orchestrator.report()
+        assert report["sum_of_durations"] >= 0.3
+        assert set(_statuses(orchestrator).values()) == {"ok"}
+
+    async def test_dependents_wait_for_dependencies(self):
+        log = []
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("child", lambda: log.append("child"), depends_on=["parent"])
+        orchestrator.service("parent", _sleeper(0.05, log, "parent"))
+        await orchestrator.run()
+        assert log == ["parent", "child"]
+
+    async def test_failure_skips_dependents(self):
+        def boom():
+            raise RuntimeError("no credentials")
+
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("sdk", boom)
+        orchestrator.service("uses_sdk", lambda: None, depends_on=["sdk"])
+        orchestrator.service("unrelated", lambda: None)
+        await orchestrator.run()
+        assert _statuses(orchestrator) == {"sdk": "failed", "uses_sdk": "skipped", "unrelated": "ok"}
+
+    async def test_timeout_keeps_work_running(self):
+        log = []
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("slow", _sleeper(0.2, log, "slow"), timeout=0.05)
+        orchestrator.service("after_slow", lambda: None, depends_on=["slow"])
+        started = time.perf_counter()
+        await orchestrator.run()
+        assert time.perf_counter() - started < 0.15
+        assert _statuses(orchestrator) == {"slow": "timeout", "after_slow": "skipped"}
+        await asyncio.sleep(0.25)
+        assert log == ["slow"]
+        slow = next(s for s in orchestrator.report()["services"] if s["name"] == "slow")
+        assert slow["status"] == "ok" and slow["late"]
+
+    async def test_late_success_starts_skipped_dependents(self):
+        log = []
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("indexes", _sleeper(0.1, log, "indexes"), timeout=0.02)
+        orchestrator.service("fast", lambda: None)
+        orchestrator.service("worker", _sleeper(0, log, "worker"), depends_on=["indexes", "fast"])
+        orchestrator.service("reconciler", _sleeper(0, log, "reconciler"), depends_on=["worker"], critical=False)
+        await orchestrator.run()
+        await orchestrator.run_deferred()
+        assert _statuses(orchestrator) == {"indexes": "timeout", "fast": "ok", "worker": "skipped",
+                                           "reconciler": "skipped"}
+        await asyncio.sleep(0.15)
+        assert log == ["indexes", "worker", "reconciler"]
+        assert _statuses(orchestrator) == {"indexes": "ok", "fast": "ok", "worker": "ok", "reconciler": "ok"}
+
+    async def test_late_failure_keeps_dependents_skipped(self):
+        async def slow_boom():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("index build failed")
+
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("indexes", slow_boom, timeout=0.01)
+        orchestrator.service("worker", lambda: None, depends_on=["indexes"])
+        await orchestrator.run()
+        await asyncio.sleep(0.1)
+        assert _statuses(orchestrator) == {"indexes": "failed", "worker": "skipped"}
+
+
+class TestDeferredPhase:
+    async def test_deferred_services_wait_for_run_deferred(self):
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("core", lambda: None)
+        orchestrator.service("aws", lambda: None, depends_on=["core"], critical=False)
+        await orchestrator.run()
+        assert _statuses(orchestrator) == {"core": "ok", "aws": "pending"}
+        await orchestrator.run_deferred()
+        assert _statuses(orchestrator)["aws"] == "ok"
+
+
+class TestGraphValidation:
+    async def test_cycle_is_rejected(self):
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("a", lambda: None, depends_on=["b"])
+        orchestrator.service("b", lambda: None, depends_on=["a"])
+        with pytest.raises(ValueError, match="cycle"):
+            await orchestrator.run()
+
+    async def test_critical_cannot_depend_on_deferred(self):
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("later", lambda: None, critical=False)
+        orchestrator.service("now", lambda: None, depends_on=["later"])
+        with pytest.raises(ValueError, match="deferred"):
+            await orchestrator.run()
+
+    def test_unknown_dependency_is_rejected(self):
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+        orchestrator.service("a", lambda: None, depends_on=["missing"])
+        with pytest.raises(ValueError, match="unknown"):
+            orchestrator._ordered()
+
+
+class TestDeferredInitializers:
+    @pytest.fixture(autouse=True)
+    def fresh_queue(self, monkeypatch):
+        monkeypatch.setattr(async_init, "_pending", [])
+        monkeypatch.setattr(async_init, "_running", set())
+        monkeypatch.setattr(async_init, "_app_loop", None)
+
+    async def test_initializers_started_on_the_loop_are_awaited(self):
+        log = []
+        # A module imported while startup is already running schedules its indexes
+        schedule_init("indexes", _sleeper(0.05, log, "indexes"))
+        await run_pending_initializers()
+        assert log == ["indexes"]
+
+    async def test_dependents_start_after_running_initializers(self):
+        log = []
+        orchestrator = StartupOrchestrator(announce=lambda _: None)
+
+        def import_worker_module():
+            schedule_init("worker indexes", _sleeper(0.05, log, "worker indexes"))
+
+        async def deferred():
+            import_worker_module()
+            await run_pending_initializers()
+
+        orchestrator.service("initializers", deferred)
+        orchestrator.service("worker", lambda: log.append("worker"), depends_on=["initializers"])
+        await orchestrator.run()
+        assert log == ["worker indexes", "worker"]
+
+    async def test_failures_are_logged_and_others_complete(self):
+        log = []
+
+        async def boom():
+            raise RuntimeError("index conflict")
+
+        schedule_init("broken", boom)
+        schedule_init("fine", _sleeper(0, log, "fine"))
+        await run_pending_initializers()
+        assert log == ["fine"]
+
+    async def test_initializers_from_other_threads_run_on_the_app_loop(self):
+        await run_pending_initializers()
+        ran_on = []
+
+        async def record():
+            ran_on.append(threading.current_thread().name)
+
+        thread = threading.Thread(target=schedule_init, args=("imported off the loop", record))
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        await run_pending_initializers()
+        assert ran_on == [threading.current_thread().name]
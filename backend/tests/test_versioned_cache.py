@@ -0,0 +1,117 @@
+"""
+Versioned LRU Cache - Unit Tests
+
+Validates the in-process cache behind the royalty contract terms and
+contributor split lookups: LRU bound, TTL expiry (shorter while no
+change stream is active), invalidation racing an in-flight load, and
+change-stream event handling. No MongoDB connection is needed.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from versioned_cache import MISSING, VersionedLRUCache, _apply_change  # type: ignore  # noqa: E402
+
+
+class TestLookups:
+    def test_miss_then_hit(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        assert cache.get("a") is MISSING
+        cache.put("a", [1], cache.token())
+        assert cache.get("a") == [1]
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_ratio"] == 0.5
+
+    def test_none_is_cacheable(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        cache.put("a", None, cache.token())
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        cache = VersionedLRUCache("test", max_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, key, cache.token())
+        cache.get("a")
+        cache.put("c", "c", cache.token())
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == "a"
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        cache = VersionedLRUCache("test", max_entries=10, ttl_seconds=0)
+        cache.put("a", 1, cache.token())
+        assert cache.get("a") is MISSING
+
+    def test_short_ttl_without_change_stream(self):
+        cache = VersionedLRUCache("test", max_entries=10, ttl_seconds=300, unwatched_ttl_seconds=0)
+        cache.put("a", 1, cache.token())
+        assert cache.get("a") is MISSING
+        assert cache.stats()["ttl_seconds"] == 0
+
+    def test_full_ttl_with_active_change_stream(self):
+        cache = VersionedLRUCache("test", max_entries=10, ttl_seconds=300, unwatched_ttl_seconds=0)
+        cache.change_stream = "active"
+        cache.put("a", 1, cache.token())
+        assert cache.get("a") == 1
+        assert cache.stats()["ttl_seconds"] == 300
+
+    def test_disabled_cache_never_stores(self):
+        cache = VersionedLRUCache("test", max_entries=0)
+        cache.put("a", 1, cache.token())
+        assert cache.get("a") is MISSING
+
+
+class TestInvalidation:
+    def test_invalidate_drops_entry(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        cache.put("a", 1, cache.token())
+        cache.invalidate("a")
+        assert cache.get("a") is MISSING
+
+    def test_load_racing_invalidation_is_not_cached(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        token = cache.token()
+        cache.invalidate("a")  # write lands while the load is in flight
+        cache.put("a", "stale", token)
+        assert cache.get("a") is MISSING
+        cache.put("a", "fresh", cache.token())
+        assert cache.get("a") == "fresh"
+
+    def test_other_keys_unaffected_by_invalidation(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        token = cache.token()
+        cache.invalidate("a")
+        cache.put("b", 2, token)
+        assert cache.get("b") == 2
+
+    def test_clear_rejects_all_in_flight_loads(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        token = cache.token()
+        cache.clear()
+        cache.put("b", 2, token)
+        assert cache.get("b") is MISSING
+
+
+class TestChangeEvents:
+    def test_update_invalidates_asset(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        cache.put("asset-1", 1, cache.token())
+        cache.put("asset-2", 2, cache.token())
+        _apply_change(cache, {"operationType": "update", "fullDocument": {"asset_id": "asset-1"},
+                              "updateDescription": {"updatedFields": {"base_rate": "0.2"}}}, "asset_id")
+        assert cache.get("asset-1") is MISSING
+        assert cache.get("asset-2") == 2
+
+    def test_delete_clears_everything(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        cache.put("asset-1", 1, cache.token())
+        _apply_change(cache, {"operationType": "delete", "documentKey": {"_id": "x"}}, "asset_id")
+        assert cache.get("asset-1") is MISSING
+
+    def test_asset_move_clears_everything(self):
+        cache = VersionedLRUCache("test", max_entries=10)
+        cache.put("asset-1", 1, cache.token())
+        _apply_change(cache, {"operationType": "update", "fullDocument": {"asset_id": "asset-2"},
+                              "updateDescription": {"updatedFields": {"asset_id": "asset-2"}}}, "asset_id")
+        assert cache.get("asset-1") is MISSING
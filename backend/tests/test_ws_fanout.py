@@ -0,0 +1,128 @@
+"""
+WebSocket Fan-out Bus - Unit Tests
+
+Validates the cross-worker bus: an event published on one worker reaches
+sockets attached on another, is serialized once for all of them, skips
+excluded users, and a slow or broken socket is dropped (with its manager
+cleanup) and closed without holding up the others.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "utils"))
+from ws_fanout import FanoutBackend, WebSocketBus  # type: ignore  # noqa: E402
+
+
+class _Broker:
+    """Shared by several backends, like one Redis server for several workers"""
+
+    def __init__(self):
+        self.subscribers = []
+
+
+class _BrokerBackend(FanoutBackend):
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def publish(self, channel, message):
+        for deliver in self.broker.subscribers:
+            await deliver(channel, message)
+
+    async def start(self, deliver):
+        self.broker.subscribers.append(deliver)
+
+
+class _Socket:
+    def __init__(self, delay=0.0, fail=False):
+        self.sent = []
+        self.delay = delay
+        self.fail = fail
+        self.close_codes = []
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+
+async def _settle():
+    await asyncio.sleep(0.05)
+
+
+class TestFanout:
+    async def test_publish_reaches_sockets_on_other_workers(self):
+        broker = _Broker()
+        worker_a, worker_b = WebSocketBus(_BrokerBackend(broker)), WebSocketBus(_BrokerBackend(broker))
+        on_a, on_b, elsewhere = _Socket(), _Socket(), _Socket()
+        await worker_a.attach(on_a, ["delivery:user:u1"])
+        await worker_b.attach(on_b, ["delivery:user:u1"])
+        await worker_b.attach(elsewhere, ["delivery:user:u2"])
+
+        await worker_a.publish("delivery:user:u1", {"type": "batch_progress", "done": 3})
+        await _settle()
+        assert on_a.sent == on_b.sent == ['{"type": "batch_progress", "done": 3}']
+        assert elsewhere.sent == []
+
+    async def test_event_serialized_once_for_all_sockets(self):
+        bus = WebSocketBus()
+        sockets = [_Socket() for _ in range(3)]
+        for ws in sockets:
+            await bus.attach(ws, ["sla:all"])
+        await bus.publish("sla:all", {"type": "sla_breach"})
+        await _settle()
+        first = sockets[0].sent[0]
+        assert all(ws.sent[0] is first for ws in sockets)
+
+    async def test_exclude_skips_the_sender(self):
+        bus = WebSocketBus()
+        agent, customer = _Socket(), _Socket()
+        await bus.attach(agent, ["support:session:s1"], tag="agent-1")
+        await bus.attach(customer, ["support:session:s1"], tag="cust-1")
+        await bus.publish("support:session:s1", {"type": "typing_indicator"}, exclude="agent-1")
+        await _settle()
+        assert agent.sent == [] and len(customer.sent) == 1
+
+
+class TestBackpressure:
+    async def test_slow_socket_is_dropped_without_blocking_others(self):
+        dropped = []
+        bus = WebSocketBus(queue_size=3, send_timeout=1)
+        slow, fast = _Socket(delay=0.5), _Socket()
+        await bus.attach(slow, ["notifications:user:u1"], on_drop=lambda: dropped.append("slow"))
+        await bus.attach(fast, ["notifications:user:u1"])
+        for i in range(5):
+            await bus.publish("notifications:user:u1", {"n": i})
+            await asyncio.sleep(0.01)
+        assert len(fast.sent) == 5
+        assert dropped == ["slow"]
+        assert bus.stats()["dropped_slow"] == 1 and bus.local_sockets("notifications:user:u1") == 1
+        assert slow.close_codes == [1013] and fast.close_codes == []
+
+    async def test_failed_send_runs_manager_cleanup(self):
+        cleaned = []
+
+        async def cleanup():
+            cleaned.append(True)
+
+        bus = WebSocketBus()
+        broken = _Socket(fail=True)
+        await bus.attach(broken, ["delivery:user:u1"], on_drop=cleanup)
+        await bus.publish("delivery:user:u1", {"type": "delivery_update"})
+        await _settle()
+        assert cleaned == [True]
+        assert bus.stats()["sockets"] == 0
+        assert broken.close_codes == [1013]
+
+    async def test_manager_detach_does_not_close_the_socket(self):
+        bus = WebSocketBus()
+        ws = _Socket()
+        await bus.attach(ws, ["delivery:user:u1"])
+        bus.detach(ws)
+        await _settle()
+        assert ws.close_codes == []
@@ -0,0 +1,64 @@
+"""
+Deferred async initialization for module-level service singletons.
+
+Most services are instantiated at import time, before uvicorn's event loop
+is running, so they cannot await Motor calls (index creation, default
+seed data) from ``__init__``. ``schedule_init`` runs the coroutine
+immediately when a loop is available and otherwise queues it until
+``startup_event`` drains the queue with ``run_pending_initializers``,
+which also waits for initializers already running on the loop. Modules
+imported later from another thread (the router registry imports off the
+loop) hand their initializers to the app's loop, which
+``run_pending_initializers`` records.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_pending: List[Tuple[str, Callable[[], Awaitable[None]]]] = []
+_running: Set[asyncio.Task] = set()
+_app_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def _run(name: str, coro_factory: Callable[[], Awaitable[None]]):
+    try:
+        await coro_factory()
+    except Exception as e:
+        logger.error(f"{name} async initialization failed: {e}")
+
+
+def _start(loop: asyncio.AbstractEventLoop, name: str, coro_factory: Callable[[], Awaitable[None]]):
+    task = loop.create_task(_run(name, coro_factory))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+
+def schedule_init(name: str, coro_factory: Callable[[], Awaitable[None]]):
+    """Run ``coro_factory()`` on the running loop, or defer it until startup."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = _app_loop
+        if loop is None or not loop.is_running():
+            _pending.append((name, coro_factory))
+            return
+        # Called from a worker thread while the app is serving
+        loop.call_soon_threadsafe(_start, loop, name, coro_factory)
+        return
+    _start(loop, name, coro_factory)
+
+
+async def run_pending_initializers():
+    """Await every initializer queued before the event loop started, or still running on it, concurrently."""
+    global _app_loop
+    _app_loop = asyncio.get_running_loop()
+
+    while True:
+        batch = list(_pending)
+        _pending.clear()
+        running = [task for task in _running if task.get_loop() is _app_loop]
+        if not batch and not running:
+            return
+        await asyncio.gather(*(_run(name, coro_factory) for name, coro_factory in batch), *running)
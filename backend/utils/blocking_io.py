@@ -0,0 +1,74 @@
+"""
+Bounded off-loop execution for code that still uses blocking pymongo.
+
+``run_blocking`` runs a synchronous callable on a dedicated, size-limited
+thread pool so it never stalls the uvicorn event loop. ``LoopBlockingGuard``
+is a pymongo command listener that flags any command issued from a thread
+that is currently running an event loop, i.e. a blocking call that slipped
+past ``run_blocking``.
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+BLOCKING_IO_MAX_WORKERS = int(os.environ.get("BLOCKING_IO_MAX_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_MAX_WORKERS, thread_name_prefix="blocking-io")
+_stats_lock = threading.Lock()
+_stats = {"submitted": 0, "in_flight": 0, "blocking_calls_on_loop": 0}
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await ``fn(*args, **kwargs)`` on the bounded blocking-I/O pool."""
+    loop = asyncio.get_running_loop()
+    with _stats_lock:
+        _stats["submitted"] += 1
+        _stats["in_flight"] += 1
+    try:
+        return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+    finally:
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+
+
+def _thread_runs_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class LoopBlockingGuard(monitoring.CommandListener):
+    """Detects blocking pymongo commands issued on an event-loop thread."""
+
+    def __init__(self, owner: str):
+        self.owner = owner
+
+    def started(self, event):
+        if not _thread_runs_event_loop():
+            return
+        with _stats_lock:
+            _stats["blocking_calls_on_loop"] += 1
+        logger.warning(
+            f"Blocking MongoDB '{event.command_name}' issued on the event loop by {self.owner}"
+        )
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def get_blocking_io_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return {"max_workers": BLOCKING_IO_MAX_WORKERS, **_stats}
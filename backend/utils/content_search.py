@@ -0,0 +1,209 @@
+"""
+Indexed full-text search over media and user content.
+
+Each searchable collection gets a weighted MongoDB text index over its
+text fields and a ``search_prefixes`` array holding the leading
+characters of every title and tag word, kept up to date on write. Full
+queries use the text index and are ranked by text score; autocomplete
+matches every typed word against the multikey prefix index. Neither
+scans the collection.
+
+The indexes are created by this module at startup (``schedule_init``),
+independently of the general index build, because ``$text`` queries fail
+outright without them.
+
+Results page with keyset cursors (see keyset_pagination.py) instead of
+``skip``, so deep pages cost the same as the first.
+Facet counts and the total are computed on the first page only, alongside
+the results, over at most ``SEARCH_FACET_SCAN_LIMIT`` matches;
+``total_exact`` is false when that cap was reached.
+"""
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo import UpdateOne
+
+from async_init import schedule_init
+from keyset_pagination import decode_cursor, encode_cursor, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FACET_SCAN_LIMIT = int(os.environ.get("SEARCH_FACET_SCAN_LIMIT", "10000"))
+SEARCH_MAX_LIMIT = 100
+PREFIX_MIN_LENGTH = 2
+PREFIX_MAX_LENGTH = 15
+MAX_PREFIX_TOKENS = 64
+BACKFILL_BATCH_SIZE = 1000
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(text or "")]
+
+
+def prefixes_for(*texts: str) -> List[str]:
+    """Leading substrings of the first MAX_PREFIX_TOKENS distinct words, from PREFIX_MIN_LENGTH characters up"""
+    tokens = dict.fromkeys(token for text in texts for token in tokenize(text))
+    prefixes = set()
+    for token in list(tokens)[:MAX_PREFIX_TOKENS]:
+        for end in range(PREFIX_MIN_LENGTH, min(len(token), PREFIX_MAX_LENGTH) + 1):
+            prefixes.add(token[:end])
+    return sorted(prefixes)
+
+
+class ContentSearch:
+    """Text, prefix and facet search over one collection"""
+
+    def __init__(self, collection: str, text_weights: Dict[str, int], prefix_fields: Sequence[str],
+                 facet_fields: Sequence[str], key_field: str = "_id", sort_field: str = "created_at"):
+        self.collection = collection
+        self.text_weights = dict(text_weights)
+        self.prefix_fields = tuple(prefix_fields)
+        self.facet_fields = tuple(facet_fields)
+        self.key_field = key_field
+        self.sort_field = sort_field
+
+    # ── Indexing ──
+
+    def search_fields(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields to store alongside ``doc`` so it can be found by prefix"""
+        texts = []
+        for field in self.prefix_fields:
+            value = doc.get(field)
+            texts.extend(value if isinstance(value, list) else [value or ""])
+        return {"search_prefixes": prefixes_for(*texts)}
+
+    def touches_search_fields(self, updates: Dict[str, Any]) -> bool:
+        return any(field in updates for field in self.prefix_fields)
+
+    async def ensure_indexes(self, db):
+        coll = db[self.collection]
+        await coll.create_index(
+            [(field, "text") for field in self.text_weights],
+            weights=self.text_weights, name=f"{self.collection}_search_text",
+        )
+        await coll.create_index([("search_prefixes", 1), (self.sort_field, -1)])
+
+    async def backfill(self, db) -> int:
+        """Add ``search_prefixes`` to documents written before search existed"""
+        coll = db[self.collection]
+        projection = {field: 1 for field in self.prefix_fields}
+        pending, updated = [], 0
+        async for doc in coll.find({"search_prefixes": {"$exists": False}}, projection):
+            pending.append(UpdateOne({"_id": doc["_id"]}, {"$set": self.search_fields(doc)}))
+            if len(pending) >= BACKFILL_BATCH_SIZE:
+                await coll.bulk_write(pending, ordered=False)
+                updated += len(pending)
+                pending = []
+        if pending:
+            await coll.bulk_write(pending, ordered=False)
+            updated += len(pending)
+        if updated:
+            logger.info(f"Search backfill: indexed {updated} {self.collection} documents")
+        return updated
+
+    # ── Querying ──
+
+    async def search(self, db, q: str = "", filters: Optional[Dict[str, Any]] = None,
+                     cursor: Optional[str] = None, limit: int = 20, facets: bool = True) -> Dict[str, Any]:
+        """
+        Ranked text search when ``q`` is given, newest-first browsing when it is not.
+
+        Returns ``items`` (each with a relevance ``score`` when ranked),
+        ``next_cursor`` and, on the first page, ``total``, ``total_exact``
+        and ``facets``.
+        """
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        ranked = bool(q and q.strip())
+        match = dict(filters or {})
+        if ranked:
+            match["$text"] = {"$search": q}
+
+        sort = [("_score" if ranked else self.sort_field, -1), (self.key_field, -1)]
+        items_pipeline: List[Dict[str, Any]] = [{"$match": match}]
+        if ranked:
+            items_pipeline.append({"$addFields": {"_score": {"$meta": "textScore"}}})
+        if cursor:
+            items_pipeline.append({"$match": keyset_filter(sort, decode_cursor(sort, cursor))})
+        items_pipeline += [{"$sort": dict(sort)}, {"$limit": limit + 1}, {"$project": {"search_prefixes": 0}}]
+
+        coll = db[self.collection]
+        first_page = facets and not cursor
+        reads = [coll.aggregate(items_pipeline).to_list(length=None)]
+        if first_page:
+            # Sub-pipelines of $facet cannot use indexes, so only the capped counts run inside one
+            counts = {"total": [{"$count": "n"}]}
+            for field in self.facet_fields:
+                counts[f"facet_{field}"] = [{"$sortByCount": f"${field}"}]
+            reads.append(coll.aggregate([
+                {"$match": match}, {"$limit": SEARCH_FACET_SCAN_LIMIT}, {"$facet": counts},
+            ]).to_list(length=1))
+        results = await asyncio.gather(*reads)
+
+        items = results[0]
+        next_cursor = encode_cursor(sort, items[limit - 1]) if len(items) > limit else None
+        items = items[:limit]
+        for item in items:
+            if ranked:
+                item["score"] = round(item.pop("_score"), 4)
+
+        response: Dict[str, Any] = {"items": items, "next_cursor": next_cursor}
+        if first_page:
+            result = results[1][0]
+            total = result["total"][0]["n"] if result["total"] else 0
+            response["total"] = total
+            response["total_exact"] = total < SEARCH_FACET_SCAN_LIMIT
+            response["facets"] = {
+                field: {str(bucket["_id"]): bucket["count"] for bucket in result[f"facet_{field}"]}
+                for field in self.facet_fields
+            }
+        return response
+
+    async def suggest(self, db, prefix: str, filters: Optional[Dict[str, Any]] = None,
+                      limit: int = 10, fields: Sequence[str] = ("title",)) -> List[Dict[str, Any]]:
+        """Newest documents with a title or tag word starting with each typed word"""
+        words = [w[:PREFIX_MAX_LENGTH] for w in tokenize(prefix) if len(w) >= PREFIX_MIN_LENGTH]
+        if not words:
+            return []
+        query = dict(filters or {})
+        query["search_prefixes"] = {"$all": words}
+        projection = {field: 1 for field in fields}
+        projection[self.key_field] = 1
+        if self.key_field != "_id":
+            projection["_id"] = 0
+        cursor = db[self.collection].find(query, projection).sort(self.sort_field, -1).limit(
+            max(1, min(limit, SEARCH_MAX_LIMIT))
+        )
+        return await cursor.to_list(length=None)
+
+
+media_search = ContentSearch(
+    "media_content",
+    text_weights={"title": 10, "tags": 5, "description": 1},
+    prefix_fields=("title", "tags"),
+    facet_fields=("content_type", "category"),
+    key_field="id",
+)
+
+user_content_search = ContentSearch(
+    "user_content",
+    text_weights={"title": 10, "tags": 5, "description": 1},
+    prefix_fields=("title", "tags"),
+    facet_fields=("content_type",),
+)
+
+
+async def _ensure_indexes():
+    from config.database import db
+    await media_search.ensure_indexes(db)
+    await user_content_search.ensure_indexes(db)
+    # Keyset browse order for the public listings
+    await db.media_content.create_index([("is_published", 1), ("is_approved", 1), ("created_at", -1), ("id", -1)])
+    await db.user_content.create_index([("visibility", 1), ("created_at", -1), ("_id", -1)])
+
+
+schedule_init("Content search indexes", _ensure_indexes)
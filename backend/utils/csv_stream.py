@@ -0,0 +1,82 @@
+"""
+Streaming CSV reading for large uploads.
+
+``open_csv_text`` turns an uploaded file (or a string) into a text stream
+without reading it all: the encoding is chosen from the first block
+(UTF-8, with or without BOM, else Latin-1). ``iter_row_chunks`` then yields
+rows with their file row numbers in fixed-size chunks, so a caller that
+handles one chunk at a time holds at most ``chunk_size`` rows whatever the
+file size.
+"""
+import codecs
+import csv
+import io
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+SNIFF_BYTES = 64 * 1024
+
+Row = Tuple[int, Dict[str, str]]
+
+
+def normalize_header(name: Optional[str]) -> str:
+    return (name or "").strip().lower().replace(" ", "_")
+
+
+def _sniff_encoding(head: bytes) -> str:
+    try:
+        # Not final: a multi-byte character may be cut at the end of the block
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def open_csv_text(source: Union[str, bytes, IO]) -> IO[str]:
+    """A text stream over ``source``: a string, bytes, or a binary file object"""
+    if isinstance(source, str):
+        return io.StringIO(source)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    buffered = source if isinstance(source, io.BufferedReader) else io.BufferedReader(_Readable(source), SNIFF_BYTES)
+    encoding = _sniff_encoding(buffered.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+    # Bad bytes past the sniffed block become U+FFFD instead of aborting a long import
+    return io.TextIOWrapper(buffered, encoding=encoding, errors="replace", newline="")
+
+
+class _Readable(io.RawIOBase):
+    """Adapts any object with ``read(n)`` (e.g. a spooled upload) for ``io.BufferedReader``"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.fileobj.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def dict_reader(text: IO[str]) -> Tuple[csv.DictReader, List[str]]:
+    """A DictReader with normalized header names, and those names"""
+    reader = csv.DictReader(text, restval="")
+    headers = [normalize_header(h) for h in (reader.fieldnames or [])]
+    reader.fieldnames = headers
+    return reader, headers
+
+
+def iter_row_chunks(reader: csv.DictReader, chunk_size: int, start_after: int = 0) -> Iterator[List[Row]]:
+    """``(row_number, row)`` lists of up to ``chunk_size``; row 2 is the first data row.
+
+    Rows numbered ``start_after`` or less are read past without being kept."""
+    chunk: List[Row] = []
+    for row_num, row in enumerate(reader, start=2):
+        if row_num <= start_after:
+            continue
+        chunk.append((row_num, row))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -3,7 +3,9 @@ Database optimization utilities
 Includes connection pooling configuration and query optimization helpers
 """
 from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 from typing import List, Dict, Any, Optional
+from keyset_pagination import PAGINATION_MAX_LIMIT, after_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,6 +52,17 @@ class DatabaseOptimizer:
             await db.purchases.create_index("media_id")
             await db.purchases.create_index("payment_status")
             await db.purchases.create_index([("user_id", 1), ("created_at", -1)])
+
+            # Keyset pagination: filter fields, then the sort keys with their tie-breaker
+            await db.conversations.create_index([("participants.user_id", 1), ("last_message_at", -1), ("_id", -1)])
+            await db.messages.create_index([("conversation_id", 1), ("created_at", -1), ("_id", -1)])
+            await db.marketplace_listings.create_index([("status", 1), ("created_at", -1), ("id", -1)])
+            await db.support_tickets.create_index([("user_id", 1), ("created_at", -1), ("ticket_id", -1)])
+
+            # Lookups made by the startup label ownership reconciliation
+            await db.label_members.create_index([("user_id", 1), ("label_id", 1)])
+            await db.uln_labels.create_index("global_id.id")
+            await db.business_identifiers.create_index("label_id")
             
             logger.info("✅ Database indexes created successfully")
             return True
@@ -88,18 +101,13 @@ class DatabaseOptimizer:
     
     @staticmethod
     async def optimize_connection_pool(mongo_url: str, max_pool_size: int = 50) -> AsyncIOMotorClient:
-        """Create MongoDB client with optimized connection pool settings"""
-        client = AsyncIOMotorClient(
-            mongo_url,
-            maxPoolSize=max_pool_size,
-            minPoolSize=10,
-            maxIdleTimeMS=45000,  # Close idle connections after 45 seconds
-            waitQueueTimeoutMS=10000,  # Wait max 10 seconds for connection
-            serverSelectionTimeoutMS=5000,  # Server selection timeout
-            connectTimeoutMS=10000,  # Connection timeout
-            socketTimeoutMS=30000,  # Socket timeout
-        )
-        return client
+        """Return the shared MongoDB client for ``mongo_url``.
+
+        Pool sizing is configured process-wide through the MONGO_*_POOL_SIZE,
+        MONGO_MAX_IDLE_TIME_MS and MONGO_WAIT_QUEUE_TIMEOUT_MS settings, so
+        ``max_pool_size`` is kept only for backward compatibility.
+        """
+        return get_mongo_client(mongo_url)
     
     @staticmethod
     async def cleanup_old_data(db, days: int = 90):
@@ -140,18 +148,16 @@ class DatabaseOptimizer:
     @staticmethod
     def build_paginated_query(
         filter_dict: Dict[str, Any],
-        page: int = 1,
         page_size: int = 20,
         sort_by: str = 'created_at',
-        sort_order: int = -1
+        sort_order: int = -1,
+        cursor: Optional[str] = None
     ) -> tuple:
-        """Build optimized paginated query with sorting"""
-        skip = (page - 1) * page_size
-        limit = min(page_size, 100)  # Max 100 per page
-        
-        sort = [(sort_by, sort_order)]
-        
-        return filter_dict, skip, limit, sort
+        """Build a keyset-paginated query: the filter narrowed to the items after ``cursor``,
+        the limit, and the sort (with ``_id`` as tie-breaker) to encode the next cursor from"""
+        sort = [(sort_by, sort_order), ('_id', sort_order)]
+        limit = min(page_size, PAGINATION_MAX_LIMIT)
+        return after_cursor(filter_dict, sort, cursor), limit, sort
 
 
 # Helper functions for query optimization
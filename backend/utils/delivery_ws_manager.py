@@ -1,21 +1,28 @@
 """
 Delivery WebSocket Manager — Real-time delivery status updates.
 Broadcasts per-delivery and batch-level progress to connected clients.
+Updates are published on the WebSocket bus, so they reach the user's
+sockets on every worker.
 """
 
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Set, Any, Optional
 
 from fastapi import WebSocket
 
+from ws_fanout import ws_bus
+
 logger = logging.getLogger("delivery_ws_manager")
 
 
+def _user_channel(user_id: str) -> str:
+    return f"delivery:user:{user_id}"
+
+
 class DeliveryWebSocketManager:
     def __init__(self):
-        # user_id -> set of WebSocket connections
+        # user_id -> set of this worker's WebSocket connections
         self.connections: Dict[str, Set[WebSocket]] = {}
 
     async def connect(self, ws: WebSocket, user_id: str):
@@ -23,10 +30,13 @@ class DeliveryWebSocketManager:
         if user_id not in self.connections:
             self.connections[user_id] = set()
         self.connections[user_id].add(ws)
+        await ws_bus.attach(ws, [_user_channel(user_id)], tag=user_id,
+                            on_drop=lambda: self.disconnect(ws, user_id))
         total = sum(len(v) for v in self.connections.values())
         logger.info(f"Delivery WS connected (user={user_id}) — total: {total}")
 
     def disconnect(self, ws: WebSocket, user_id: str):
+        ws_bus.detach(ws)
         conns = self.connections.get(user_id)
         if conns:
             conns.discard(ws)
@@ -36,21 +46,8 @@ class DeliveryWebSocketManager:
         logger.info(f"Delivery WS disconnected (user={user_id}) — total: {total}")
 
     async def send_to_user(self, user_id: str, event: Dict[str, Any]):
-        conns = self.connections.get(user_id)
-        if not conns:
-            return
         event["timestamp"] = datetime.now(timezone.utc).isoformat()
-        payload = json.dumps(event)
-        stale = []
-        for ws in conns.copy():
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                stale.append(ws)
-        for ws in stale:
-            conns.discard(ws)
-        if not conns:
-            self.connections.pop(user_id, None)
+        await ws_bus.publish(_user_channel(user_id), event)
 
     async def broadcast_delivery_update(
         self,
@@ -0,0 +1,459 @@
+"""
+Versioned operation log for Creative Studio project elements.
+
+Every element edit is an operation (``add``, ``update`` or ``delete``)
+stamped with a Lamport clock ``[counter, site]``. A project's elements are
+the merge of its operations: each element field, and each element's
+presence, is a last-writer-wins register, so the order operations arrive
+in does not matter and concurrent edits to different fields of the same
+element both survive. Clients should send only the fields they changed.
+
+Operations are buffered per project and written with one ``insert_many``
+per batch; sequence numbers for the batch are reserved with a single
+``$inc`` on the project. Each batch also refreshes the project's
+``elements`` field, and every ``ELEMENT_SNAPSHOT_EVERY`` operations the
+merged state is written to ``creative_studio_element_snapshots``, so
+rebuilding the state at any sequence number (``state_at``) only replays
+operations since the nearest snapshot.
+
+The log creates its own unique ``(project_id, seq)`` indexes at startup
+(``schedule_init``); a retried batch relies on them to reject the
+operations an earlier attempt already wrote.
+
+A worker caches each project's state. ``checkpoint`` and
+``replace_elements`` first catch up with every operation reserved in the
+project's ``op_seq``, and state nobody has used for
+``ELEMENT_OPS_IDLE_SECONDS`` is dropped.
+"""
+import asyncio
+import copy
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from async_init import schedule_init
+
+logger = logging.getLogger(__name__)
+
+ELEMENT_OPS_FLUSH_SECONDS = float(os.environ.get("ELEMENT_OPS_FLUSH_SECONDS", "0.5"))
+ELEMENT_OPS_BATCH_SIZE = int(os.environ.get("ELEMENT_OPS_BATCH_SIZE", "200"))
+ELEMENT_SNAPSHOT_EVERY = int(os.environ.get("ELEMENT_SNAPSHOT_EVERY", "500"))
+ELEMENT_OPS_IDLE_SECONDS = float(os.environ.get("ELEMENT_OPS_IDLE_SECONDS", "300"))
+# Failed batch writes are retried, with backoff, this many times; the next edit retries again
+ELEMENT_OPS_MAX_RETRIES = int(os.environ.get("ELEMENT_OPS_MAX_RETRIES", "5"))
+# A sequence number reserved by a worker that died before writing it is skipped after this long;
+# if its operation is written within ELEMENT_OPS_LATE_SECONDS after all, it is applied then
+ELEMENT_OPS_GAP_SECONDS = 30
+ELEMENT_OPS_LATE_SECONDS = 600
+
+OP_KINDS = ("add", "update", "delete")
+
+
+def new_state() -> Dict[str, Any]:
+    return {"seq": 0, "lamport": 0, "elements": {}}
+
+
+def apply_op(state: Dict[str, Any], op: Dict[str, Any]):
+    """Merge ``op`` into ``state``; applying an operation twice, or out of order, is harmless"""
+    clock = tuple(op["clock"])
+    element = state["elements"].setdefault(op["element_id"], {"present": None, "fields": {}})
+    if op["kind"] != "update":
+        present = element["present"]
+        if present is None or clock > tuple(present[1]):
+            element["present"] = [op["kind"] == "add", list(clock)]
+    for name, value in (op.get("fields") or {}).items():
+        current = element["fields"].get(name)
+        if current is None or clock > tuple(current[1]):
+            element["fields"][name] = [value, list(clock)]
+    state["lamport"] = max(state["lamport"], clock[0])
+
+
+def materialize(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Visible elements in the order they were added"""
+    visible = [(eid, el) for eid, el in state["elements"].items() if el["present"] and el["present"][0]]
+    visible.sort(key=lambda item: tuple(item[1]["present"][1]))
+    return [{"id": eid, **{name: reg[0] for name, reg in el["fields"].items()}} for eid, el in visible]
+
+
+def diff_ops(state: Dict[str, Any], elements: List[Dict[str, Any]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """``(kind, element_id, fields)`` operations that turn ``state`` into ``elements``"""
+    current = {e["id"]: e for e in materialize(state)}
+    target_ids = {e["id"] for e in elements}
+    ops = [("delete", eid, {}) for eid in current if eid not in target_ids]
+    for element in elements:
+        fields = {k: v for k, v in element.items() if k != "id"}
+        existing = current.get(element["id"])
+        if existing is None:
+            ops.append(("add", element["id"], fields))
+        else:
+            changed = {k: v for k, v in fields.items() if existing.get(k) != v}
+            if changed:
+                ops.append(("update", element["id"], changed))
+    return ops
+
+
+def _to_snapshot(project_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "project_id": project_id,
+        "seq": state["seq"],
+        "lamport": state["lamport"],
+        # A list rather than a dict keyed by element id, which may not be a valid field name
+        "elements": [{"id": eid, **el} for eid, el in state["elements"].items()],
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _from_snapshot(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "seq": doc["seq"],
+        "lamport": doc.get("lamport", 0),
+        "elements": {el["id"]: {"present": el.get("present"), "fields": el.get("fields", {})}
+                     for el in doc.get("elements", [])},
+    }
+
+
+def _age_seconds(when: Optional[datetime]) -> float:
+    if when is None:
+        return 0.0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - when).total_seconds()
+
+
+class _ProjectLog:
+    """One project's state on this worker"""
+
+    def __init__(self, durable: Dict[str, Any]):
+        # Exactly the persisted operations up to durable["seq"]
+        self.durable = durable
+        # Persisted operations past a sequence gap, applied once it fills
+        self.ahead: Dict[int, Dict[str, Any]] = {}
+        # Sequence numbers skipped over, and when
+        self.skipped: Dict[int, datetime] = {}
+        # Recorded here, not yet written
+        self.pending: List[Dict[str, Any]] = []
+        self.lamport = durable["lamport"]
+        self.head = durable["seq"]
+        self.view_seq = durable["seq"]
+        # A late operation changed the state without moving its sequence number
+        self.view_stale = False
+        self.snapshot_seq = durable["seq"]
+        self.lock = asyncio.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+        self.failures = 0
+        self.last_used = time.monotonic()
+
+    def live(self) -> Dict[str, Any]:
+        """Durable state plus everything else this worker has seen"""
+        state = copy.deepcopy(self.durable)
+        for op in list(self.ahead.values()) + self.pending:
+            apply_op(state, op)
+        return state
+
+
+class ElementOpLog:
+    """Records, batches, persists and replays element operations"""
+
+    def __init__(self, db, flush_seconds: Optional[float] = None, batch_size: Optional[int] = None,
+                 snapshot_every: Optional[int] = None, idle_seconds: Optional[float] = None):
+        self.ops_collection = db.creative_studio_element_ops
+        self.snapshots_collection = db.creative_studio_element_snapshots
+        self.projects_collection = db.creative_studio_projects
+        self.flush_seconds = ELEMENT_OPS_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.batch_size = batch_size or ELEMENT_OPS_BATCH_SIZE
+        self.snapshot_every = snapshot_every or ELEMENT_SNAPSHOT_EVERY
+        self.idle_seconds = ELEMENT_OPS_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        # Breaks ties between workers that stamp the same Lamport counter
+        self.site = uuid.uuid4().hex[:8]
+        self._projects: Dict[str, _ProjectLog] = {}
+        self._loading: Dict[str, asyncio.Lock] = {}
+        self._stats = {"ops_recorded": 0, "ops_persisted": 0, "batches": 0, "view_writes": 0,
+                       "snapshots": 0, "ops_replayed": 0, "flush_failures": 0, "ops_dropped": 0,
+                       "late_ops": 0, "evictions": 0}
+        schedule_init("Creative Studio element op-log indexes", self.ensure_indexes)
+
+    async def ensure_indexes(self):
+        """Replay by sequence and nearest snapshot lookup; uniqueness makes batch retries idempotent"""
+        await self.ops_collection.create_index([("project_id", 1), ("seq", 1)], unique=True)
+        await self.snapshots_collection.create_index([("project_id", 1), ("seq", -1)], unique=True)
+
+    # ---------- Loading and replay ----------
+
+    async def _seed(self, project_id: str) -> Dict[str, Any]:
+        """Snapshot 0: the project's elements from before it had a log"""
+        doc = await self.projects_collection.find_one({"id": project_id}, {"_id": 0, "elements": 1})
+        state = new_state()
+        for i, element in enumerate((doc or {}).get("elements") or []):
+            # Same clocks on every worker, all older than any real operation
+            apply_op(state, {"kind": "add", "element_id": element["id"], "clock": [0, f"{i:08d}"],
+                             "fields": {k: v for k, v in element.items() if k != "id"}})
+        await self.snapshots_collection.update_one(
+            {"project_id": project_id, "seq": 0},
+            {"$setOnInsert": _to_snapshot(project_id, state)},
+            upsert=True
+        )
+        return state
+
+    async def _replay(self, project_id: str, through: Optional[int] = None) -> Tuple[Dict[str, Any], List[Dict]]:
+        """Nearest snapshot at or before ``through`` and the operations after it"""
+        query: Dict[str, Any] = {"project_id": project_id}
+        if through is not None:
+            query["seq"] = {"$lte": through}
+        snapshot = await self.snapshots_collection.find_one(query, {"_id": 0}, sort=[("seq", -1)])
+        state = _from_snapshot(snapshot) if snapshot else await self._seed(project_id)
+        seq_range: Dict[str, Any] = {"$gt": state["seq"]}
+        if through is not None:
+            seq_range["$lte"] = through
+        ops = await self.ops_collection.find(
+            {"project_id": project_id, "seq": seq_range}, {"_id": 0}
+        ).sort("seq", 1).to_list(length=None)
+        self._stats["ops_replayed"] += len(ops)
+        return state, ops
+
+    async def _log(self, project_id: str) -> _ProjectLog:
+        """The project's cached state, loaded on first use; ``LookupError`` if there is no such project"""
+        log = self._projects.get(project_id)
+        if log is None:
+            lock = self._loading.setdefault(project_id, asyncio.Lock())
+            try:
+                async with lock:
+                    log = self._projects.get(project_id)
+                    if log is None:
+                        self._evict_idle()
+                        if await self.projects_collection.find_one({"id": project_id}, {"_id": 0, "id": 1}) is None:
+                            raise LookupError(f"Project {project_id} not found")
+                        state, ops = await self._replay(project_id)
+                        log = _ProjectLog(state)
+                        self._advance(log, ops)
+                        log.view_seq = log.snapshot_seq = log.durable["seq"]
+                        self._projects[project_id] = log
+            finally:
+                self._loading.pop(project_id, None)
+        log.last_used = time.monotonic()
+        return log
+
+    def _evict_idle(self):
+        """Drop cached projects nobody has used lately and that have nothing left to write"""
+        cutoff = time.monotonic() - self.idle_seconds
+        for project_id, log in list(self._projects.items()):
+            if log.last_used <= cutoff and not log.pending and not log.lock.locked():
+                self._projects.pop(project_id, None)
+                self._stats["evictions"] += 1
+
+    def _advance(self, log: _ProjectLog, ops: List[Dict[str, Any]]):
+        """Apply persisted operations to the durable state in sequence order"""
+        for op in ops:
+            if log.skipped.pop(op["seq"], None) is not None:
+                # Merging does not depend on order, so a late operation applies as is
+                apply_op(log.durable, op)
+                log.view_stale = True
+                self._stats["late_ops"] += 1
+            elif op["seq"] > log.durable["seq"]:
+                log.ahead[op["seq"]] = op
+            log.head = max(log.head, op["seq"])
+            log.lamport = max(log.lamport, op["clock"][0])
+        while log.ahead:
+            nxt = log.durable["seq"] + 1
+            if nxt not in log.ahead:
+                first = min(log.ahead)
+                if _age_seconds(log.ahead[first].get("created_at")) < ELEMENT_OPS_GAP_SECONDS:
+                    break
+                now = datetime.now(timezone.utc)
+                log.skipped.update((seq, now) for seq in range(nxt, first))
+                nxt = first
+            apply_op(log.durable, log.ahead.pop(nxt))
+            log.durable["seq"] = nxt
+
+    async def state_at(self, project_id: str, seq: int) -> Dict[str, Any]:
+        """Project state after operation ``seq``, replayed from the nearest snapshot"""
+        log = self._projects.get(project_id)
+        if log is not None and log.durable["seq"] == seq:
+            return copy.deepcopy(log.durable)
+        state, ops = await self._replay(project_id, through=seq)
+        for op in ops:
+            apply_op(state, op)
+        state["seq"] = seq
+        return state
+
+    # ---------- Recording ----------
+
+    async def record(self, project_id: str, user_id: str, kind: str, element_id: str,
+                     fields: Optional[Dict[str, Any]] = None, client_clock: int = 0) -> Dict[str, Any]:
+        """Apply an operation locally and queue it for the next batch write"""
+        if kind not in OP_KINDS:
+            raise ValueError(f"Unknown element operation: {kind}")
+        log = await self._log(project_id)
+        log.lamport = max(log.lamport, int(client_clock or 0)) + 1
+        op = {
+            "project_id": project_id,
+            "kind": kind,
+            "element_id": element_id,
+            "fields": fields or {},
+            "clock": [log.lamport, self.site],
+            "user_id": user_id,
+            "created_at": datetime.now(timezone.utc),
+        }
+        log.pending.append(op)
+        self._stats["ops_recorded"] += 1
+        if len(log.pending) >= self.batch_size:
+            await self.flush(project_id)
+        elif log.flush_task is None:
+            log.flush_task = asyncio.ensure_future(self._flush_later(project_id, log))
+        return op
+
+    async def replace_elements(self, project_id: str, user_id: str,
+                               elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Record the operations that turn the current elements into ``elements`` and write them"""
+        log = await self._log(project_id)
+        # Diff against other workers' edits too, not just the ones this worker has seen
+        await self._sync(project_id, log)
+        ops = [await self.record(project_id, user_id, kind, eid, fields)
+               for kind, eid, fields in diff_ops(log.live(), elements)]
+        await self.flush(project_id)
+        return ops
+
+    async def elements(self, project_id: str) -> List[Dict[str, Any]]:
+        return materialize((await self._log(project_id)).live())
+
+    async def checkpoint(self, project_id: str) -> int:
+        """Write pending operations and return the project's persisted sequence number"""
+        log = await self._log(project_id)
+        await self.flush(project_id)
+        return await self._sync(project_id, log)
+
+    async def _sync(self, project_id: str, log: _ProjectLog) -> int:
+        """Catch up with every operation reserved so far; returns the project's ``op_seq``"""
+        doc = await self.projects_collection.find_one({"id": project_id}, {"_id": 0, "op_seq": 1})
+        if doc is None:
+            raise LookupError(f"Project {project_id} not found")
+        op_seq = doc.get("op_seq") or 0
+        async with log.lock:
+            await self._catch_up(project_id, log, op_seq)
+        return op_seq
+
+    def lamport(self, project_id: str) -> int:
+        log = self._projects.get(project_id)
+        return log.lamport if log else 0
+
+    # ---------- Persistence ----------
+
+    async def _flush_later(self, project_id: str, log: _ProjectLog):
+        try:
+            # Back off while writes are failing
+            await asyncio.sleep(self.flush_seconds * 2 ** min(log.failures, ELEMENT_OPS_MAX_RETRIES))
+            await self.flush(project_id)
+        finally:
+            if log.flush_task is asyncio.current_task():
+                log.flush_task = None
+            if (log.pending and log.flush_task is None and log.failures < ELEMENT_OPS_MAX_RETRIES
+                    and self._projects.get(project_id) is log):
+                log.flush_task = asyncio.ensure_future(self._flush_later(project_id, log))
+
+    async def flush(self, project_id: str):
+        """Write the project's pending operations as one batch"""
+        log = self._projects.get(project_id)
+        if log is None:
+            return
+        async with log.lock:
+            batch = log.pending[:]
+            if not batch:
+                return
+            try:
+                await self._write(project_id, log, batch)
+            except LookupError:
+                # The project was deleted; its operations have nowhere to go
+                self._stats["ops_dropped"] += len(log.pending)
+                logger.warning(f"Dropped {len(log.pending)} element ops for deleted project {project_id}")
+                log.pending.clear()
+                self._projects.pop(project_id, None)
+                return
+            except Exception as e:
+                # Operations keep any sequence numbers already reserved, so a retry cannot duplicate them
+                log.failures += 1
+                self._stats["flush_failures"] += 1
+                logger.error(f"Element op flush for project {project_id} failed: {e}")
+                return
+            log.failures = 0
+            del log.pending[:len(batch)]
+            self._stats["ops_persisted"] += len(batch)
+            self._stats["batches"] += 1
+            await self._catch_up(project_id, log, max(op["seq"] for op in batch))
+
+    async def _write(self, project_id: str, log: _ProjectLog, batch: List[Dict[str, Any]]):
+        unassigned = [op for op in batch if "seq" not in op]
+        if unassigned:
+            doc = await self.projects_collection.find_one_and_update(
+                {"id": project_id},
+                {"$inc": {"op_seq": len(unassigned)}},
+                projection={"_id": 0, "op_seq": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                raise LookupError(f"Project {project_id} not found")
+            first = doc["op_seq"] - len(unassigned) + 1
+            for offset, op in enumerate(unassigned):
+                op["seq"] = first + offset
+        try:
+            await self.ops_collection.insert_many([dict(op) for op in batch], ordered=False)
+        except BulkWriteError as e:
+            # Duplicates are operations a failed earlier attempt already wrote
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    async def _catch_up(self, project_id: str, log: _ProjectLog, through: int):
+        """Pull in other workers' operations up to ``through``, then refresh the view and snapshot"""
+        for seq, skipped_at in list(log.skipped.items()):
+            if _age_seconds(skipped_at) >= ELEMENT_OPS_LATE_SECONDS:
+                del log.skipped[seq]
+        ops = []
+        if log.skipped:
+            ops = await self.ops_collection.find(
+                {"project_id": project_id, "seq": {"$in": sorted(log.skipped)}}, {"_id": 0}
+            ).to_list(length=None)
+        ops += await self.ops_collection.find(
+            {"project_id": project_id, "seq": {"$gt": log.durable["seq"], "$lte": through}}, {"_id": 0}
+        ).sort("seq", 1).to_list(length=None)
+        self._advance(log, ops)
+        seq = log.durable["seq"]
+        if seq > log.view_seq or log.view_stale:
+            await self.projects_collection.update_one(
+                {"id": project_id, "elements_seq": {"$not": {"$gt": seq}}},
+                {"$set": {"elements": materialize(log.durable), "elements_seq": seq,
+                          "updated_at": datetime.now(timezone.utc).isoformat()}}
+            )
+            log.view_seq = seq
+            log.view_stale = False
+            self._stats["view_writes"] += 1
+        # A snapshot must not miss an operation that may still arrive
+        if not log.skipped and seq - log.snapshot_seq >= self.snapshot_every:
+            await self.snapshots_collection.update_one(
+                {"project_id": project_id, "seq": seq},
+                {"$setOnInsert": _to_snapshot(project_id, log.durable)},
+                upsert=True
+            )
+            log.snapshot_seq = seq
+            self._stats["snapshots"] += 1
+
+    async def flush_all(self):
+        for project_id in list(self._projects):
+            await self.flush(project_id)
+
+    def forget(self, project_id: str):
+        """Drop a project's cached state once it has nothing left to write"""
+        log = self._projects.get(project_id)
+        if log is not None and not log.pending:
+            self._projects.pop(project_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "projects": len(self._projects),
+            "pending": sum(len(log.pending) for log in self._projects.values()),
+            "snapshot_every": self.snapshot_every,
+            **self._stats,
+        }
@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination for MongoDB list queries.
+
+A page is fetched with the list's sort keys compared against the last item
+of the previous page instead of ``skip``, so with an index on the sort keys
+page 500 costs the same as page 1. The sort must end in a unique field
+(``_id`` or ``id``) so items with equal leading keys are neither repeated
+nor dropped between pages.
+
+Cursors are opaque, URL-safe strings holding the sort fields and the last
+item's values (Extended JSON, so datetimes and ObjectIds round-trip). A
+cursor issued for one sort is rejected under another.
+
+Totals are optional. ``count="estimate"`` counts at most
+``PAGINATION_COUNT_LIMIT`` matches (the collection's metadata count when
+there is no filter) and only on the first page; ``total_exact`` is false
+when the cap was reached. ``count="exact"`` pays for a full count.
+"""
+import asyncio
+import base64
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from bson.json_util import CANONICAL_JSON_OPTIONS
+
+PAGINATION_COUNT_LIMIT = int(os.environ.get("PAGINATION_COUNT_LIMIT", "10000"))
+PAGINATION_MAX_LIMIT = 100
+
+SortSpec = Sequence[Tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _field_value(doc: Dict[str, Any], field: str):
+    for part in field.split("."):
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc
+
+
+def encode_cursor(sort: SortSpec, item: Dict[str, Any]) -> str:
+    """Cursor positioned just after ``item`` in ``sort`` order"""
+    payload = {"f": [field for field, _ in sort], "v": [_field_value(item, field) for field, _ in sort]}
+    return base64.urlsafe_b64encode(json_util.dumps(payload, json_options=CANONICAL_JSON_OPTIONS).encode()).decode()
+
+
+def decode_cursor(sort: SortSpec, cursor: str) -> List[Any]:
+    """The sort key values stored in ``cursor``; raises InvalidCursor if it was not issued for ``sort``"""
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+        fields, values = payload["f"], payload["v"]
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+    if fields != [field for field, _ in sort] or len(values) != len(fields):
+        raise InvalidCursor("Pagination cursor does not match the requested sort order")
+    return values
+
+
+def keyset_filter(sort: SortSpec, values: Sequence[Any]) -> Dict[str, Any]:
+    """Match the documents that come after ``values`` in ``sort`` order"""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def after_cursor(query: Dict[str, Any], sort: SortSpec, cursor: Optional[str]) -> Dict[str, Any]:
+    """``query`` narrowed to the documents after ``cursor``"""
+    if not cursor:
+        return query
+    after = keyset_filter(sort, decode_cursor(sort, cursor))
+    return {"$and": [query, after]} if query else after
+
+
+async def count_matches(collection, query: Dict[str, Any], count: str) -> Tuple[int, bool]:
+    """``(total, exact)`` for ``query`` under the ``count`` mode"""
+    if count == "exact":
+        return await collection.count_documents(query), True
+    if not query:
+        return await collection.estimated_document_count(), False
+    total = await collection.count_documents(query, limit=PAGINATION_COUNT_LIMIT)
+    return total, total < PAGINATION_COUNT_LIMIT
+
+
+async def paginate(collection, query: Dict[str, Any], sort: SortSpec, cursor: Optional[str] = None,
+                   limit: int = 20, projection: Optional[Dict[str, Any]] = None,
+                   count: Optional[str] = None) -> Dict[str, Any]:
+    """
+    One page of ``collection.find(query)`` in ``sort`` order.
+
+    Returns ``items``, ``next_cursor`` (None on the last page) and, when
+    ``count`` is given and this is the first page, ``total`` and
+    ``total_exact``.
+    """
+    limit = max(1, min(limit, PAGINATION_MAX_LIMIT))
+    page_query = after_cursor(query, sort, cursor)
+    reads = [collection.find(page_query, projection).sort(list(sort)).limit(limit + 1).to_list(length=None)]
+    counted = bool(count) and not cursor
+    if counted:
+        reads.append(count_matches(collection, query, count))
+    results = await asyncio.gather(*reads)
+
+    items = results[0]
+    next_cursor = encode_cursor(sort, items[limit - 1]) if len(items) > limit else None
+    page: Dict[str, Any] = {"items": items[:limit], "next_cursor": next_cursor}
+    if counted:
+        page["total"], page["total_exact"] = results[1]
+    return page
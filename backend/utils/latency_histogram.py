@@ -0,0 +1,105 @@
+"""
+Fixed-memory, log-bucketed latency histograms.
+
+Bucket ``i`` counts durations in ``(MIN * GROWTH**(i-1), MIN * GROWTH**i]``,
+so any percentile read from the histogram is within one bucket (about 5%
+relative error) of the true value, at any traffic level and in constant
+memory. Histograms with the same layout merge by adding counts, which is
+how snapshots from several workers are combined.
+"""
+import bisect
+import math
+from typing import Dict, List, Optional
+
+MIN_SECONDS = 0.0001  # 100µs; anything faster lands in bucket 0
+GROWTH = 1.05
+BUCKET_COUNT = 300  # upper bound of the last finite bucket ≈ 225s; slower requests go to the overflow bucket
+# Every EXPORT_STRIDE-th bucket bound (≈ doubling) is exposed as a Prometheus ``le`` bucket
+EXPORT_STRIDE = 14
+
+BOUNDS: List[float] = [MIN_SECONDS * GROWTH ** i for i in range(BUCKET_COUNT)]
+EXPORT_BUCKETS: List[int] = list(range(0, BUCKET_COUNT, EXPORT_STRIDE))
+
+
+class LatencyHistogram:
+    """Counts per log bucket plus an overflow bucket, count, sum, min and max"""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, seconds: float):
+        index = 0 if seconds <= MIN_SECONDS else bisect.bisect_left(BOUNDS, seconds)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q``-th percentile, clamped to the observed max"""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * q / 100), 1)
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                bound = BOUNDS[index] if index < BUCKET_COUNT else self.max
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, bucket in enumerate(other.counts):
+            if bucket:
+                self.counts[index] += bucket
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def cumulative_buckets(self) -> List[tuple]:
+        """(le, cumulative count) pairs at the export bounds, ending with +Inf"""
+        result = []
+        seen = 0
+        previous = 0
+        for index in EXPORT_BUCKETS:
+            seen += sum(self.counts[previous:index + 1])
+            previous = index + 1
+            result.append((BOUNDS[index], seen))
+        result.append((math.inf, self.count))
+        return result
+
+    def to_dict(self) -> Dict:
+        """Sparse serialization for cross-worker snapshots"""
+        return {
+            "buckets": {str(i): c for i, c in enumerate(self.counts) if c},
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        for index, bucket in data.get("buckets", {}).items():
+            histogram.counts[int(index)] = bucket
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("sum", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
@@ -0,0 +1,310 @@
+"""
+Merkle-batched audit ledger.
+
+Audit entries are written independently (no read of a previous hash per
+entry) and later sealed into batches. Each batch commits to its entries
+through a Merkle root and to the previous batch through ``previous_root``,
+so the ledger keeps hash-chain tamper evidence while concurrent writers
+no longer serialize on the last entry. Batches are sealed once they reach
+``AUDIT_BATCH_SIZE`` entries or their oldest entry is older than
+``AUDIT_BATCH_MAX_SECONDS``; sealing takes a short lease so only one
+worker seals at a time. The lease carries an owner token and the chain
+head only advances under it, so a sealer that stalls past its lease can
+neither clear the next holder's lease nor rewind the chain head.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from bson.decimal128 import Decimal128
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_BATCH_MAX_SECONDS = int(os.environ.get("AUDIT_BATCH_MAX_SECONDS", "10"))
+SEAL_LEASE_SECONDS = 30
+GENESIS_ROOT = "genesis"
+
+# Entries awaiting a batch; entries from the old per-entry hash chain have no entry_hash
+PENDING_FILTER = {"batch_id": None, "entry_hash": {"$exists": True}}
+
+# Fields of an entry covered by its leaf hash
+HASHED_FIELDS = ("id", "transaction_event_id", "calculation_id", "timestamp",
+                 "event_hash", "calculation_hash", "data")
+
+
+def _canonical(value: Any) -> Any:
+    """Normalize values so a document hashes the same before and after a MongoDB round trip"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if k != "_id"}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, datetime):
+        value = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        value = value.astimezone(timezone.utc)
+        return value.replace(microsecond=(value.microsecond // 1000) * 1000).isoformat()
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _sha256(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def entry_hash(entry: Dict[str, Any]) -> str:
+    """Leaf hash of an audit entry"""
+    content = {field: entry.get(field) for field in HASHED_FIELDS}
+    return _sha256("\x00" + json.dumps(_canonical(content), sort_keys=True, default=str))
+
+
+def _node_hash(left: str, right: str) -> str:
+    return _sha256("\x01" + left + right)
+
+
+def merkle_root(leaves: List[str]) -> str:
+    """Merkle root over leaf hashes; an odd node is promoted unchanged"""
+    if not leaves:
+        return GENESIS_ROOT
+    level = list(leaves)
+    while len(level) > 1:
+        nxt = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0]
+
+
+def merkle_proof(leaves: List[str], index: int) -> List[Dict[str, str]]:
+    """Sibling path proving leaves[index] is included in merkle_root(leaves)"""
+    proof = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"hash": level[sibling], "position": "left" if sibling < index else "right"})
+        nxt = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    current = leaf
+    for step in proof:
+        current = _node_hash(step["hash"], current) if step["position"] == "left" else _node_hash(current, step["hash"])
+    return current == root
+
+
+def batch_hash(sequence: int, previous_root: str, root: str) -> str:
+    """Chain link committing a batch root to its predecessor"""
+    return _sha256(f"{sequence}:{previous_root}:{root}")
+
+
+class MerkleAuditLedger:
+    """Append-only audit ledger sealed into chained Merkle batches"""
+
+    def __init__(self, database, entries_collection: str = "audit_trail", name: str = "royalty_audit"):
+        self.entries = database[entries_collection]
+        self.batches = database[f"{entries_collection}_batches"]
+        self.state = database["audit_chain_state"]
+        self.name = name
+        self._unsealed_since_seal = 0
+        self._seal_task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.entries.create_index("id", unique=True)
+        await self.entries.create_index([("batch_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)])
+        await self.entries.create_index("transaction_event_id")
+        await self.batches.create_index([("name", ASCENDING), ("sequence", ASCENDING)], unique=True)
+        await self.batches.create_index("batch_id", unique=True)
+
+    @staticmethod
+    def prepare(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Stamp an entry with its leaf hash and mark it unsealed"""
+        entry["entry_hash"] = entry_hash(entry)
+        entry["batch_id"] = None
+        entry["leaf_index"] = None
+        return entry
+
+    async def append(self, entries: List[Dict[str, Any]]):
+        """Write entries without touching any other entry; sealing happens later"""
+        if not entries:
+            return
+        docs = [self.prepare(entry) for entry in entries]
+        if len(docs) == 1:
+            await self.entries.insert_one(docs[0])
+        else:
+            await self.entries.insert_many(docs, ordered=True)
+        self._unsealed_since_seal += len(docs)
+        if self._unsealed_since_seal >= AUDIT_BATCH_SIZE and (self._seal_task is None or self._seal_task.done()):
+            self._seal_task = asyncio.create_task(self.seal_all())
+
+    async def _acquire_lease(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        try:
+            return await self.state.find_one_and_update(
+                {"_id": self.name, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"lease_until": now + timedelta(seconds=SEAL_LEASE_SECONDS),
+                          "lease_owner": str(uuid.uuid4())}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Another worker holds the lease
+            return None
+
+    async def _release_lease(self, owner: str, chain_head: Dict[str, Any]):
+        result = await self.state.update_one(
+            {"_id": self.name, "lease_owner": owner},
+            {"$set": {**chain_head, "lease_until": None, "lease_owner": None}},
+        )
+        if not result.matched_count:
+            # The lease expired and another sealer took it; its chain head is authoritative
+            logger.warning("Audit seal lease for %s expired before release", self.name)
+
+    async def seal_all(self, force: bool = False) -> int:
+        """Seal batches until fewer than a batch of entries is pending; returns batches sealed"""
+        sealed = 0
+        while await self.seal_pending(force=force):
+            sealed += 1
+        self._unsealed_since_seal = 0
+        return sealed
+
+    async def seal_pending(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Seal the oldest pending entries into one batch, if one is due"""
+        state = await self._acquire_lease()
+        if state is None:
+            return None
+        chain_head: Dict[str, Any] = {}
+        try:
+            last_sequence = state.get("last_sequence", 0)
+            previous_root = state.get("last_batch_hash", GENESIS_ROOT)
+
+            # Finish a batch a crashed sealer inserted but did not record
+            orphan = await self.batches.find_one({"name": self.name, "sequence": last_sequence + 1})
+            if orphan:
+                await self._assign_entries(orphan)
+                chain_head = {"last_sequence": orphan["sequence"], "last_batch_hash": orphan["batch_hash"]}
+                return orphan
+
+            pending = await self.entries.find(
+                PENDING_FILTER, {"_id": 0, "id": 1, "entry_hash": 1, "timestamp": 1}
+            ).sort([("timestamp", ASCENDING), ("id", ASCENDING)]).limit(AUDIT_BATCH_SIZE).to_list(length=None)
+            if not pending:
+                return None
+            oldest = pending[0]["timestamp"]
+            oldest = oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc)
+            age = (datetime.now(timezone.utc) - oldest).total_seconds()
+            if not force and len(pending) < AUDIT_BATCH_SIZE and age < AUDIT_BATCH_MAX_SECONDS:
+                return None
+
+            leaves = [doc["entry_hash"] for doc in pending]
+            root = merkle_root(leaves)
+            sequence = last_sequence + 1
+            batch = {
+                "batch_id": str(uuid.uuid4()),
+                "name": self.name,
+                "sequence": sequence,
+                "merkle_root": root,
+                "previous_root": previous_root,
+                "batch_hash": batch_hash(sequence, previous_root, root),
+                "entry_ids": [doc["id"] for doc in pending],
+                "leaf_hashes": leaves,
+                "entry_count": len(pending),
+                "first_timestamp": pending[0]["timestamp"],
+                "last_timestamp": pending[-1]["timestamp"],
+                "sealed_at": datetime.now(timezone.utc),
+            }
+            await self.batches.insert_one(batch)
+            await self._assign_entries(batch)
+            chain_head = {"last_sequence": sequence, "last_batch_hash": batch["batch_hash"]}
+            return batch
+        finally:
+            await self._release_lease(state["lease_owner"], chain_head)
+
+    async def _assign_entries(self, batch: Dict[str, Any]):
+        await self.entries.bulk_write([
+            UpdateOne({"id": entry_id}, {"$set": {"batch_id": batch["batch_id"], "leaf_index": index}})
+            for index, entry_id in enumerate(batch["entry_ids"])
+        ], ordered=True)
+
+    async def get_inclusion_proof(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Proof that an entry is part of its sealed batch, or None while unsealed"""
+        if not entry.get("batch_id"):
+            return None
+        batch = await self.batches.find_one({"batch_id": entry["batch_id"]}, {"_id": 0})
+        if not batch:
+            return None
+        index = entry["leaf_index"]
+        return {
+            "batch_id": batch["batch_id"],
+            "sequence": batch["sequence"],
+            "leaf_index": index,
+            "entry_hash": batch["leaf_hashes"][index],
+            "merkle_root": batch["merkle_root"],
+            "previous_root": batch["previous_root"],
+            "batch_hash": batch["batch_hash"],
+            "proof": merkle_proof(batch["leaf_hashes"], index),
+        }
+
+    async def verify_chain(self) -> Dict[str, Any]:
+        """Walk every sealed batch, recomputing entry hashes, Merkle roots and batch links"""
+        errors = []
+        previous_root = GENESIS_ROOT
+        expected_sequence = 1
+        batches_verified = 0
+        entries_verified = 0
+
+        async for batch in self.batches.find({"name": self.name}).sort("sequence", ASCENDING):
+            sequence = batch["sequence"]
+            if sequence != expected_sequence:
+                errors.append({"sequence": sequence, "error": f"expected sequence {expected_sequence}"})
+            if batch["previous_root"] != previous_root:
+                errors.append({"sequence": sequence, "error": "previous_root does not match prior batch"})
+
+            entries = await self.entries.find({"batch_id": batch["batch_id"]}).sort(
+                "leaf_index", ASCENDING
+            ).to_list(length=None)
+            leaves = [entry_hash(entry) for entry in entries]
+            if [entry["id"] for entry in entries] != batch["entry_ids"]:
+                errors.append({"sequence": sequence, "error": "batch membership does not match entry_ids"})
+            elif merkle_root(leaves) != batch["merkle_root"]:
+                errors.append({"sequence": sequence, "error": "merkle root mismatch (entry tampered)"})
+            if batch_hash(sequence, batch["previous_root"], batch["merkle_root"]) != batch["batch_hash"]:
+                errors.append({"sequence": sequence, "error": "batch hash mismatch"})
+
+            previous_root = batch["batch_hash"]
+            expected_sequence = sequence + 1
+            batches_verified += 1
+            entries_verified += len(entries)
+
+        return {
+            "valid": not errors,
+            "batches_verified": batches_verified,
+            "entries_verified": entries_verified,
+            "unsealed_entries": await self.entries.count_documents(PENDING_FILTER),
+            "head": previous_root,
+            "errors": errors,
+        }
+
+    async def run_sealer(self):
+        """Background loop sealing time-bounded batches"""
+        while True:
+            try:
+                await self.seal_all()
+            except Exception as e:
+                logger.error(f"Audit batch sealing failed: {e}")
+            await asyncio.sleep(AUDIT_BATCH_MAX_SECONDS)
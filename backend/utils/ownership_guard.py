@@ -17,9 +17,12 @@ Protected fields:
 """
 
 import logging
+import time
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
+from pymongo import UpdateOne
+
 logger = logging.getLogger(__name__)
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -272,3 +275,90 @@ async def log_ownership_violation(db_instance, actor_id: str, action: str, detai
         })
     except Exception as e:
         logger.error(f"Failed to log ownership violation: {e}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  STARTUP RECONCILIATION: LABEL OWNERSHIP & BUSINESS IDENTIFIERS
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+
+def _identifiers_drifted(existing: Optional[Dict[str, Any]]) -> bool:
+    if not existing:
+        return True
+    if existing.get("owner_user_id") != PROTECTED_OWNER_USER_ID:
+        return True
+    return any(existing.get(field) != value for field, value in PROTECTED_BUSINESS_IDENTIFIERS.items())
+
+
+async def reconcile_label_ownership(db_instance) -> Dict[str, Any]:
+    """
+    Restore the owner role on every active label the protected owner belongs
+    to, and the protected business identifiers on every label they own.
+
+    One aggregation reads the owner's memberships joined with each label's
+    status and current identifiers; only drifted documents are written, in
+    one ordered bulk write per collection. Round trips stay constant however
+    many labels exist.
+    """
+    started = time.perf_counter()
+    memberships = await db_instance.label_members.aggregate([
+        {"$match": {"user_id": PROTECTED_OWNER_USER_ID}},
+        {"$lookup": {"from": "uln_labels", "localField": "label_id",
+                     "foreignField": "global_id.id", "as": "label"}},
+        {"$lookup": {"from": "business_identifiers", "localField": "label_id",
+                     "foreignField": "label_id", "as": "identifiers"}},
+        {"$project": {
+            "_id": 0,
+            "label_id": 1,
+            "role": 1,
+            "label_active": {"$in": ["active", "$label.status"]},
+            "identifiers": {"$arrayElemAt": ["$identifiers", 0]},
+        }},
+    ]).to_list(length=None)
+    round_trips = 1
+
+    restored, role_fixes, identifier_writes = [], [], []
+    identifiers_created = 0
+    now = _now_iso()
+    for membership in memberships:
+        label_id = membership.get("label_id")
+        if not label_id:
+            continue
+        owned = membership.get("role") == "owner"
+        if not owned and membership.get("label_active"):
+            role_fixes.append(UpdateOne(
+                {"label_id": label_id, "user_id": PROTECTED_OWNER_USER_ID},
+                {"$set": {"role": "owner"}},
+            ))
+            restored.append(label_id)
+            owned = True
+        existing = membership.get("identifiers")
+        if owned and _identifiers_drifted(existing):
+            identifiers_created += existing is None
+            identifier_writes.append(UpdateOne(
+                {"label_id": label_id},
+                {"$set": {
+                    **PROTECTED_BUSINESS_IDENTIFIERS,
+                    "label_id": label_id,
+                    "owner_user_id": PROTECTED_OWNER_USER_ID,
+                    "updated_at": now,
+                    "updated_by": "system_startup",
+                }, "$setOnInsert": {"created_at": now, "created_by": "system_startup"}},
+                upsert=True,
+            ))
+
+    if role_fixes:
+        await db_instance.label_members.bulk_write(role_fixes, ordered=True)
+        round_trips += 1
+    if identifier_writes:
+        await db_instance.business_identifiers.bulk_write(identifier_writes, ordered=True)
+        round_trips += 1
+
+    return {
+        "labels_checked": len(memberships),
+        "roles_restored": restored,
+        "identifiers_created": identifiers_created,
+        "identifiers_updated": len(identifier_writes) - identifiers_created,
+        "round_trips": round_trips,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
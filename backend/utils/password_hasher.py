@@ -0,0 +1,105 @@
+"""
+Password hashing off the event loop.
+
+bcrypt at the default cost takes a quarter of a second of CPU per hash or
+check. ``PasswordHasher`` runs that work on a dedicated thread pool (bcrypt
+releases the GIL while hashing) and admits at most ``max_pending`` jobs at
+a time, queued or running. Beyond that it raises ``PasswordHashingBusy``
+straight away, so a login storm gets fast 503s instead of an ever-growing
+queue, and the rest of the API keeps its latency.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import bcrypt
+
+from latency_histogram import LatencyHistogram
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+BCRYPT_IDENT = "2b"
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool already has ``max_pending`` jobs admitted"""
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded, dedicated thread pool"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, max_workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        # Only touched from the event loop thread
+        self._pending = 0
+        self._stats = {"hashes": 0, "verifications": 0, "rejected": 0}
+        self._queue_wait = LatencyHistogram()
+        self._run_time = LatencyHistogram()
+
+    async def _submit(self, fn: Callable[..., Any], *args) -> Any:
+        if self._pending >= self.max_pending:
+            self._stats["rejected"] += 1
+            raise PasswordHashingBusy(f"{self._pending} password hashing jobs already pending")
+        self._pending += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            return started, fn(*args), time.perf_counter()
+
+        try:
+            started, result, finished = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+        self._queue_wait.record(started - queued_at)
+        self._run_time.record(finished - started)
+        return result
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._submit(_hash, password, self.rounds)
+        self._stats["hashes"] += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        matches = await self._submit(_verify, password, hashed)
+        self._stats["verifications"] += 1
+        return matches
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True for hashes made with an older bcrypt variant or a lower cost than ``rounds``"""
+        try:
+            _, ident, cost, _ = hashed.split("$", 3)
+            return ident != BCRYPT_IDENT or int(cost) < self.rounds
+        except (AttributeError, ValueError):
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": max(self._pending - self.max_workers, 0),
+            **self._stats,
+            "queue_wait_p95": self._queue_wait.percentile(95),
+            "hash_time_p50": self._run_time.percentile(50),
+            "hash_time_p95": self._run_time.percentile(95),
+        }
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _verify(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
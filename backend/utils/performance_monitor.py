@@ -1,155 +1,305 @@
 """
 Performance monitoring utilities
 Tracks API response times and resource usage
+
+Request durations go into fixed-memory log-bucketed histograms, one per
+endpoint, method and status class, so recording a request costs one
+bisect and percentiles stay accurate however much traffic a route gets.
+System resources are sampled by a background task instead of on the
+request path. The same task can publish this worker's histograms to
+MongoDB so stats can be merged across workers; ``render_prometheus``
+exposes the local histograms in Prometheus text format.
 """
 import time
 import asyncio
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict
+import logging
+import os
+import socket
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, deque
 import psutil
 
+from latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Label combinations beyond this are folded into one "other" endpoint
+MAX_SERIES = 2000
+RESOURCE_SAMPLE_INTERVAL_SECONDS = 15
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+SeriesKey = Tuple[str, str, str]  # (endpoint, method, status class)
+
+
+def _status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_le(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:.6g}"
+
 
 class PerformanceMonitor:
     """Monitor API performance metrics"""
-    
-    def __init__(self, max_history: int = 1000):
-        self.max_history = max_history
-        self._request_times: Dict[str, List[float]] = defaultdict(list)
-        self._endpoint_calls: Dict[str, int] = defaultdict(int)
-        self._error_counts: Dict[str, int] = defaultdict(int)
-        self._slow_requests: List[Dict] = []
+
+    def __init__(self, max_series: int = MAX_SERIES):
+        self.max_series = max_series
+        self._series: Dict[SeriesKey, LatencyHistogram] = {}
+        self._slow_requests: deque = deque(maxlen=100)
+        self._slow_count = 0
+        self._resources: Dict = {}
         self.slow_threshold = 1.0  # 1 second
-    
+
     def record_request(
-        self, 
-        endpoint: str, 
-        duration: float, 
+        self,
+        endpoint: str,
+        duration: float,
         status_code: int,
         method: str = 'GET'
     ):
         """Record a request and its performance metrics"""
-        # Store request time
-        if len(self._request_times[endpoint]) >= self.max_history:
-            self._request_times[endpoint].pop(0)
-        self._request_times[endpoint].append(duration)
-        
-        # Increment call counter
-        self._endpoint_calls[endpoint] += 1
-        
-        # Track errors
-        if status_code >= 400:
-            self._error_counts[endpoint] += 1
-        
-        # Track slow requests
+        key = (endpoint, method, _status_class(status_code))
+        histogram = self._series.get(key)
+        if histogram is None:
+            if len(self._series) >= self.max_series:
+                key = ("other", method, key[2])
+                histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = LatencyHistogram()
+        histogram.record(duration)
+
+        # Track slow requests (the deque keeps only the last 100)
         if duration > self.slow_threshold:
+            self._slow_count += 1
             self._slow_requests.append({
                 'endpoint': endpoint,
                 'method': method,
                 'duration': duration,
                 'status_code': status_code,
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.now(timezone.utc).isoformat()
             })
-            # Keep only last 100 slow requests
-            if len(self._slow_requests) > 100:
-                self._slow_requests.pop(0)
-    
-    def get_endpoint_stats(self, endpoint: str) -> Dict:
-        """Get statistics for a specific endpoint"""
-        times = self._request_times.get(endpoint, [])
-        if not times:
-            return {
-                'endpoint': endpoint,
-                'call_count': 0,
-                'avg_response_time': 0,
-                'min_response_time': 0,
-                'max_response_time': 0,
-                'error_count': 0,
-                'error_rate': 0
-            }
-        
-        call_count = self._endpoint_calls[endpoint]
-        error_count = self._error_counts[endpoint]
-        
+
+    def _endpoint_histograms(self, series: Dict[SeriesKey, LatencyHistogram]) -> Dict[str, Tuple[LatencyHistogram, int]]:
+        """Per endpoint: all status classes merged, plus the count of 4xx/5xx responses"""
+        merged: Dict[str, Tuple[LatencyHistogram, int]] = {}
+        for (endpoint, _, status_class), histogram in series.items():
+            combined, errors = merged.get(endpoint) or (LatencyHistogram(), 0)
+            combined.merge(histogram)
+            if status_class in ("4xx", "5xx"):
+                errors += histogram.count
+            merged[endpoint] = (combined, errors)
+        return merged
+
+    @staticmethod
+    def _histogram_stats(endpoint: str, histogram: LatencyHistogram, error_count: int) -> Dict:
+        call_count = histogram.count
         return {
             'endpoint': endpoint,
             'call_count': call_count,
-            'avg_response_time': sum(times) / len(times),
-            'min_response_time': min(times),
-            'max_response_time': max(times),
-            'p95_response_time': sorted(times)[int(len(times) * 0.95)] if len(times) > 0 else 0,
+            'avg_response_time': histogram.mean,
+            'min_response_time': histogram.min or 0,
+            'max_response_time': histogram.max or 0,
+            'p50_response_time': histogram.percentile(50),
+            'p95_response_time': histogram.percentile(95),
+            'p99_response_time': histogram.percentile(99),
             'error_count': error_count,
             'error_rate': (error_count / call_count * 100) if call_count > 0 else 0
         }
-    
-    def get_all_stats(self) -> Dict:
-        """Get overall performance statistics"""
-        all_times = [t for times in self._request_times.values() for t in times]
-        total_calls = sum(self._endpoint_calls.values())
-        total_errors = sum(self._error_counts.values())
-        
-        # Get top 10 slowest endpoints
+
+    def get_endpoint_stats(self, endpoint: str) -> Dict:
+        """Get statistics for a specific endpoint"""
+        series = {k: h for k, h in self._series.items() if k[0] == endpoint}
+        histogram, errors = self._endpoint_histograms(series).get(endpoint) or (LatencyHistogram(), 0)
+        return self._histogram_stats(endpoint, histogram, errors)
+
+    def _summarize(self, series: Dict[SeriesKey, LatencyHistogram], slow_requests: List[Dict],
+                   slow_count: int, resources: Dict) -> Dict:
         endpoint_stats = [
-            self.get_endpoint_stats(endpoint)
-            for endpoint in self._endpoint_calls.keys()
+            self._histogram_stats(endpoint, histogram, errors)
+            for endpoint, (histogram, errors) in self._endpoint_histograms(series).items()
         ]
+        overall = LatencyHistogram()
+        for histogram in series.values():
+            overall.merge(histogram)
+        total_calls = overall.count
+        total_errors = sum(s['error_count'] for s in endpoint_stats)
+
+        # Get top 10 slowest endpoints
         slowest_endpoints = sorted(
-            endpoint_stats, 
-            key=lambda x: x['avg_response_time'], 
+            endpoint_stats,
+            key=lambda x: x['avg_response_time'],
             reverse=True
         )[:10]
-        
+
         # Get top 10 most called endpoints
         most_called = sorted(
             endpoint_stats,
             key=lambda x: x['call_count'],
             reverse=True
         )[:10]
-        
+
         return {
             'overview': {
                 'total_requests': total_calls,
                 'total_errors': total_errors,
                 'error_rate': (total_errors / total_calls * 100) if total_calls > 0 else 0,
-                'avg_response_time': sum(all_times) / len(all_times) if all_times else 0,
-                'slow_requests_count': len(self._slow_requests)
+                'avg_response_time': overall.mean,
+                'p95_response_time': overall.percentile(95),
+                'p99_response_time': overall.percentile(99),
+                'slow_requests_count': slow_count
             },
             'slowest_endpoints': slowest_endpoints,
             'most_called_endpoints': most_called,
-            'recent_slow_requests': self._slow_requests[-10:],
-            'system_resources': self.get_system_resources()
+            'recent_slow_requests': slow_requests[-10:],
+            'system_resources': resources
         }
-    
-    def get_system_resources(self) -> Dict:
-        """Get current system resource usage"""
+
+    def get_all_stats(self) -> Dict:
+        """Get overall performance statistics"""
+        return self._summarize(self._series, list(self._slow_requests), self._slow_count,
+                               self.get_system_resources())
+
+    def sample_system_resources(self) -> Dict:
+        """Read resource usage; cpu_percent is measured since the previous sample, without blocking"""
         try:
-            return {
-                'cpu_percent': psutil.cpu_percent(interval=0.1),
-                'memory_percent': psutil.virtual_memory().percent,
-                'memory_available_mb': psutil.virtual_memory().available / (1024 * 1024),
-                'disk_usage_percent': psutil.disk_usage('/').percent
+            memory = psutil.virtual_memory()
+            self._resources = {
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'memory_percent': memory.percent,
+                'memory_available_mb': memory.available / (1024 * 1024),
+                'disk_usage_percent': psutil.disk_usage('/').percent,
+                'sampled_at': datetime.now(timezone.utc).isoformat(),
             }
         except Exception as e:
-            return {'error': str(e)}
-    
+            self._resources = {'error': str(e)}
+        return self._resources
+
+    def get_system_resources(self) -> Dict:
+        """Get the most recent resource sample"""
+        return self._resources or self.sample_system_resources()
+
     def reset_stats(self):
         """Reset all statistics"""
-        self._request_times.clear()
-        self._endpoint_calls.clear()
-        self._error_counts.clear()
+        self._series.clear()
         self._slow_requests.clear()
+        self._slow_count = 0
+
+    # ── Cross-worker snapshots ─────────────────────────────────
+
+    def snapshot(self) -> Dict:
+        """Serializable copy of this worker's histograms"""
+        return {
+            'series': [
+                {'endpoint': e, 'method': m, 'status_class': s, 'histogram': h.to_dict()}
+                for (e, m, s), h in self._series.items()
+            ],
+            'slow_requests': list(self._slow_requests),
+            'slow_count': self._slow_count,
+            'system_resources': self._resources,
+        }
+
+    def merge_snapshots(self, snapshots: List[Dict]) -> Dict:
+        """Stats in the ``get_all_stats`` format over several workers' snapshots"""
+        series: Dict[SeriesKey, LatencyHistogram] = defaultdict(LatencyHistogram)
+        slow_requests: List[Dict] = []
+        for snap in snapshots:
+            for entry in snap.get('series', []):
+                key = (entry['endpoint'], entry['method'], entry['status_class'])
+                series[key].merge(LatencyHistogram.from_dict(entry['histogram']))
+            slow_requests.extend(snap.get('slow_requests', []))
+        slow_requests.sort(key=lambda r: r['timestamp'])
+        stats = self._summarize(series, slow_requests, sum(s.get('slow_count', 0) for s in snapshots), {})
+        stats['workers'] = len(snapshots)
+        stats['system_resources'] = {s.get('worker_id', str(i)): s.get('system_resources', {})
+                                     for i, s in enumerate(snapshots)}
+        return stats
+
+    async def publish_snapshot(self, collection):
+        await collection.replace_one(
+            {'_id': WORKER_ID},
+            {**self.snapshot(), 'worker_id': WORKER_ID, 'updated_at': datetime.now(timezone.utc)},
+            upsert=True,
+        )
+
+    async def get_cluster_stats(self, collection) -> Dict:
+        """Merge the snapshots of every worker that published recently"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=RESOURCE_SAMPLE_INTERVAL_SECONDS * 3)
+        snapshots = await collection.find({'updated_at': {'$gte': cutoff}}).to_list(length=None)
+        return self.merge_snapshots(snapshots)
+
+    # ── Prometheus exposition ──────────────────────────────────
+
+    def render_prometheus(self) -> str:
+        """This worker's metrics in Prometheus text exposition format"""
+        name = 'http_request_duration_seconds'
+        lines = [
+            f'# HELP {name} HTTP request latency by endpoint, method and status class.',
+            f'# TYPE {name} histogram',
+        ]
+        for (endpoint, method, status_class), histogram in sorted(self._series.items()):
+            labels = (f'endpoint="{_escape_label(endpoint)}",method="{_escape_label(method)}",'
+                      f'status_class="{status_class}"')
+            for bound, cumulative in histogram.cumulative_buckets():
+                lines.append(f'{name}_bucket{{{labels},le="{_format_le(bound)}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        lines += [
+            '# HELP http_slow_requests_total Requests slower than the slow threshold.',
+            '# TYPE http_slow_requests_total counter',
+            f'http_slow_requests_total {self._slow_count}',
+        ]
+        gauges = {
+            'cpu_percent': 'system_cpu_percent',
+            'memory_percent': 'system_memory_percent',
+            'memory_available_mb': 'system_memory_available_megabytes',
+            'disk_usage_percent': 'system_disk_usage_percent',
+        }
+        for field, metric in gauges.items():
+            if field in self._resources:
+                lines += [f'# TYPE {metric} gauge', f'{metric} {self._resources[field]}']
+        return '\n'.join(lines) + '\n'
 
 
 # Global performance monitor instance
 perf_monitor = PerformanceMonitor()
 
 
+async def _resource_sampler_loop(snapshot_collection):
+    if snapshot_collection is not None:
+        try:
+            # Snapshots of workers that went away are dropped after a day
+            await snapshot_collection.create_index("updated_at", expireAfterSeconds=86400)
+        except Exception as e:
+            logger.warning(f"Performance snapshot index creation failed: {e}")
+    while True:
+        perf_monitor.sample_system_resources()
+        if snapshot_collection is not None:
+            try:
+                await perf_monitor.publish_snapshot(snapshot_collection)
+            except Exception as e:
+                logger.warning(f"Performance snapshot publish failed: {e}")
+        await asyncio.sleep(RESOURCE_SAMPLE_INTERVAL_SECONDS)
+
+
+def start_resource_sampler(snapshot_collection=None):
+    """Launch background resource sampling and, given a collection, snapshot publishing."""
+    loop = asyncio.get_event_loop()
+    loop.create_task(_resource_sampler_loop(snapshot_collection))
+    logger.info("Performance resource sampler launched")
+
+
 # Decorator for timing async functions
 def monitor_performance(endpoint_name: str):
     """Decorator to monitor function performance"""
     def decorator(func):
         async def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             status_code = 200
             try:
                 result = await func(*args, **kwargs)
@@ -158,10 +308,10 @@ def monitor_performance(endpoint_name: str):
                 status_code = 500
                 raise
             finally:
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 perf_monitor.record_request(
-                    endpoint_name, 
-                    duration, 
+                    endpoint_name,
+                    duration,
                     status_code
                 )
         return wrapper
@@ -1,124 +1,281 @@
 """
 Rate limiting middleware for API endpoints
 Prevents abuse and ensures fair usage
+
+Limits use a sliding-window counter: each window keeps one counter for the
+current and one for the previous period, and usage is the current count
+plus the previous count weighted by how much of it still overlaps the
+window. A check is O(1) per window. Counters live in a store shared by
+every worker (Redis, checked and incremented atomically by a Lua script)
+or, without RATE_LIMIT_REDIS_URL / CACHE_REDIS_URL, in process memory.
+Idle identifiers expire after two window lengths in either store.
 """
-from fastapi import Request, HTTPException
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
-from collections import defaultdict
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import os
 import time
 
+logger = logging.getLogger(__name__)
+
+# Heavier endpoints consume more of the budget per request (longest matching prefix wins)
+DEFAULT_ROUTE_COSTS: Dict[str, int] = {
+    "/api/reports": 5,
+    "/api/music-reports": 5,
+    "/api/cve/reports": 5,
+    "/api/cve/reporting": 5,
+    "/api/analytics": 2,
+    "/api/media": 3,
+}
+
+
+class RateWindow:
+    __slots__ = ("name", "seconds", "limit")
+
+    def __init__(self, name: str, seconds: int, limit: int):
+        self.name = name
+        self.seconds = seconds
+        self.limit = limit
+
+
+class MemoryRateLimitStore:
+    """Per-process counters; used for tests and single-worker deployments"""
+
+    SWEEP_INTERVAL_SECONDS = 60
+
+    def __init__(self):
+        self._counters: Dict[str, Tuple[int, float]] = {}  # key -> (count, expires_at)
+        self._last_sweep = time.monotonic()
+
+    def _count(self, key: str, now: float) -> int:
+        entry = self._counters.get(key)
+        return entry[0] if entry and entry[1] > now else 0
+
+    def _sweep(self, now: float):
+        if now - self._last_sweep < self.SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        for key in [k for k, (_, expires_at) in self._counters.items() if expires_at <= now]:
+            del self._counters[key]
+
+    async def hit(self, keys: List[Tuple[str, str]], windows: List[RateWindow],
+                  weights: List[float], cost: int) -> Tuple[int, List[float]]:
+        """
+        Check every window and, if all have room for ``cost``, count it in each.
+        Returns (index of the first exceeded window or -1, usage before this hit).
+        """
+        now = time.monotonic()
+        self._sweep(now)
+        used = []
+        for (current, previous), window, weight in zip(keys, windows, weights):
+            usage = self._count(previous, now) * weight + self._count(current, now)
+            if usage + cost > window.limit:
+                return len(used), used + [usage]
+            used.append(usage)
+        for (current, _), window in zip(keys, windows):
+            self._counters[current] = (self._count(current, now) + cost, now + window.seconds * 2)
+        return -1, used
+
+    def __len__(self):
+        return len(self._counters)
+
+
+# KEYS: current and previous counter per window; ARGV: cost, then limit, seconds, weight per window
+_SLIDING_WINDOW_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local used = {}
+for i = 1, #KEYS / 2 do
+  local limit = tonumber(ARGV[i * 3 - 1])
+  local weight = tonumber(ARGV[i * 3 + 1])
+  local current = tonumber(redis.call('GET', KEYS[i * 2 - 1]) or '0')
+  local previous = tonumber(redis.call('GET', KEYS[i * 2]) or '0')
+  local usage = previous * weight + current
+  used[i] = tostring(usage)
+  if usage + cost > limit then
+    return {tostring(i - 1), unpack(used)}
+  end
+end
+for i = 1, #KEYS / 2 do
+  redis.call('INCRBY', KEYS[i * 2 - 1], cost)
+  redis.call('EXPIRE', KEYS[i * 2 - 1], tonumber(ARGV[i * 3]) * 2)
+end
+return {'-1', unpack(used)}
+"""
+
+
+class RedisRateLimitStore:
+    """Counters shared by all workers; the check and increment run as one Lua script"""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def hit(self, keys: List[Tuple[str, str]], windows: List[RateWindow],
+                  weights: List[float], cost: int) -> Tuple[int, List[float]]:
+        flat_keys = [k for pair in keys for k in pair]
+        args = [cost]
+        for window, weight in zip(windows, weights):
+            args.extend([window.limit, window.seconds, weight])
+        result = await self.client.eval(_SLIDING_WINDOW_SCRIPT, len(flat_keys), *flat_keys, *args)
+        values = [v.decode() if isinstance(v, bytes) else v for v in result]
+        return int(values[0]), [float(v) for v in values[1:]]
+
+
+def store_from_env():
+    """Redis store when a Redis URL is configured and redis is installed, else in-memory"""
+    url = os.environ.get("RATE_LIMIT_REDIS_URL") or os.environ.get("CACHE_REDIS_URL")
+    if url:
+        try:
+            import redis.asyncio as redis_asyncio
+            return RedisRateLimitStore(redis_asyncio.from_url(url))
+        except ImportError:
+            logger.warning("Rate limit Redis URL is set but redis is not installed; limits are per worker")
+    return MemoryRateLimitStore()
+
 
 class RateLimiter:
-    """Simple in-memory rate limiter"""
-    
-    def __init__(self, requests_per_minute: int = 60, requests_per_hour: int = 1000):
+    """Sliding-window-counter rate limiter over a pluggable counter store"""
+
+    def __init__(self, requests_per_minute: int = 60, requests_per_hour: int = 1000,
+                 store=None, route_costs: Optional[Dict[str, int]] = None):
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
-        
-        # Store: {ip: [(timestamp1, timestamp2, ...)]}
-        self._minute_buckets: Dict[str, list] = defaultdict(list)
-        self._hour_buckets: Dict[str, list] = defaultdict(list)
-    
-    def _cleanup_old_requests(self, bucket: list, time_window: timedelta):
-        """Remove requests older than time window"""
-        cutoff = datetime.utcnow() - time_window
-        return [ts for ts in bucket if ts > cutoff]
-    
-    def check_rate_limit(self, identifier: str) -> Tuple[bool, Dict[str, any]]:
+        self.windows = [
+            RateWindow("minute", 60, requests_per_minute),
+            RateWindow("hour", 3600, requests_per_hour),
+        ]
+        self.store = store if store is not None else MemoryRateLimitStore()
+        self.route_costs = dict(DEFAULT_ROUTE_COSTS if route_costs is None else route_costs)
+
+    def cost_for(self, path: str) -> int:
+        """Cost of one request to ``path``: the longest matching route prefix, else 1"""
+        matches = [prefix for prefix in self.route_costs if path.startswith(prefix)]
+        return self.route_costs[max(matches, key=len)] if matches else 1
+
+    async def check_rate_limit(self, identifier: str, cost: int = 1,
+                               now: Optional[float] = None) -> Tuple[bool, Dict[str, any]]:
         """
-        Check if request is within rate limits
+        Check if request is within rate limits, counting it if so
         Returns: (is_allowed, info_dict)
         """
-        now = datetime.utcnow()
-        
-        # Cleanup old requests
-        self._minute_buckets[identifier] = self._cleanup_old_requests(
-            self._minute_buckets[identifier], 
-            timedelta(minutes=1)
-        )
-        self._hour_buckets[identifier] = self._cleanup_old_requests(
-            self._hour_buckets[identifier], 
-            timedelta(hours=1)
-        )
-        
-        # Check minute limit
-        minute_count = len(self._minute_buckets[identifier])
-        if minute_count >= self.requests_per_minute:
-            return False, {
-                'limit_type': 'per_minute',
-                'limit': self.requests_per_minute,
-                'current': minute_count,
-                'retry_after': 60
-            }
-        
-        # Check hour limit
-        hour_count = len(self._hour_buckets[identifier])
-        if hour_count >= self.requests_per_hour:
+        now = time.time() if now is None else now
+        keys, weights, resets = [], [], []
+        for window in self.windows:
+            period = int(now // window.seconds)
+            keys.append((f"ratelimit:{identifier}:{window.name}:{period}",
+                         f"ratelimit:{identifier}:{window.name}:{period - 1}"))
+            elapsed = now - period * window.seconds
+            weights.append(1 - elapsed / window.seconds)
+            resets.append(window.seconds - elapsed)
+
+        exceeded, used = await self.store.hit(keys, self.windows, weights, cost)
+        if exceeded >= 0:
+            window = self.windows[exceeded]
             return False, {
-                'limit_type': 'per_hour',
-                'limit': self.requests_per_hour,
-                'current': hour_count,
-                'retry_after': 3600
+                'limit_type': f'per_{window.name}',
+                'limit': window.limit,
+                'current': math.ceil(used[exceeded]),
+                'cost': cost,
+                # The current period's count starts decaying once the next period begins
+                'retry_after': max(math.ceil(resets[exceeded]), 1),
             }
-        
-        # Add current request
-        self._minute_buckets[identifier].append(now)
-        self._hour_buckets[identifier].append(now)
-        
-        return True, {
-            'minute_remaining': self.requests_per_minute - minute_count - 1,
-            'hour_remaining': self.requests_per_hour - hour_count - 1
-        }
-    
+
+        info = {'cost': cost}
+        for window, usage, reset in zip(self.windows, used, resets):
+            info[f'{window.name}_remaining'] = max(window.limit - math.ceil(usage) - cost, 0)
+            info[f'{window.name}_reset'] = math.ceil(reset)
+        return True, info
+
     def get_identifier(self, request: Request) -> str:
         """Get unique identifier for rate limiting (IP address or user ID)"""
         # Try to get user ID from token if authenticated
         if hasattr(request.state, 'user_id'):
             return f"user:{request.state.user_id}"
-        
+
         # Fall back to IP address
         forwarded_for = request.headers.get('X-Forwarded-For')
         if forwarded_for:
             return forwarded_for.split(',')[0].strip()
-        
+
         client_host = request.client.host if request.client else 'unknown'
         return f"ip:{client_host}"
 
 
+def _route_costs_from_env() -> Dict[str, int]:
+    override = os.environ.get("RATE_LIMIT_ROUTE_COSTS")
+    if not override:
+        return DEFAULT_ROUTE_COSTS
+    try:
+        return {**DEFAULT_ROUTE_COSTS, **{k: int(v) for k, v in json.loads(override).items()}}
+    except (ValueError, AttributeError) as e:
+        logger.warning(f"Ignoring invalid RATE_LIMIT_ROUTE_COSTS: {e}")
+        return DEFAULT_ROUTE_COSTS
+
+
 # Global rate limiter instance
 rate_limiter = RateLimiter(
     requests_per_minute=100,  # 100 requests per minute
-    requests_per_hour=2000     # 2000 requests per hour
+    requests_per_hour=2000,    # 2000 requests per hour
+    store=store_from_env(),
+    route_costs=_route_costs_from_env(),
 )
 
 
+def rate_limit_headers(limiter: RateLimiter, info: Dict[str, any]) -> Dict[str, str]:
+    """RateLimit-* headers for the tightest window, plus the per-window X-RateLimit-* headers"""
+    headers = {}
+    tightest = None
+    for window in limiter.windows:
+        remaining = info.get(f'{window.name}_remaining', 0)
+        suffix = window.name.capitalize()
+        headers[f'X-RateLimit-Limit-{suffix}'] = str(window.limit)
+        headers[f'X-RateLimit-Remaining-{suffix}'] = str(remaining)
+        if tightest is None or remaining < tightest[1]:
+            tightest = (window, remaining)
+    window, remaining = tightest
+    headers['RateLimit-Limit'] = str(window.limit)
+    headers['RateLimit-Remaining'] = str(remaining)
+    headers['RateLimit-Reset'] = str(info.get(f'{window.name}_reset', window.seconds))
+    headers['RateLimit-Policy'] = ", ".join(f"{w.limit};w={w.seconds}" for w in limiter.windows)
+    return headers
+
+
 # Middleware function for FastAPI
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
     # Skip rate limiting for health checks
     if request.url.path.endswith('/health'):
         return await call_next(request)
-    
+
     identifier = rate_limiter.get_identifier(request)
-    is_allowed, info = rate_limiter.check_rate_limit(identifier)
-    
+    cost = rate_limiter.cost_for(request.url.path)
+    try:
+        is_allowed, info = await rate_limiter.check_rate_limit(identifier, cost)
+    except Exception as e:
+        # A shared store outage must not take the API down with it
+        logger.error(f"Rate limit check failed, allowing request: {e}")
+        return await call_next(request)
+
     if not is_allowed:
-        raise HTTPException(
+        return JSONResponse(
             status_code=429,
-            detail={
+            content={'detail': {
                 'error': 'Rate limit exceeded',
                 'message': f'Too many requests. Limit: {info["limit"]} requests {info["limit_type"]}',
-                'retry_after': info['retry_after'],
                 **info
-            }
+            }},
+            headers={
+                'Retry-After': str(info['retry_after']),
+                'RateLimit-Limit': str(info['limit']),
+                'RateLimit-Remaining': '0',
+                'RateLimit-Reset': str(info['retry_after']),
+            },
         )
-    
+
     # Add rate limit headers to response
     response = await call_next(request)
-    response.headers['X-RateLimit-Limit-Minute'] = str(rate_limiter.requests_per_minute)
-    response.headers['X-RateLimit-Remaining-Minute'] = str(info.get('minute_remaining', 0))
-    response.headers['X-RateLimit-Limit-Hour'] = str(rate_limiter.requests_per_hour)
-    response.headers['X-RateLimit-Remaining-Hour'] = str(info.get('hour_remaining', 0))
-    
+    response.headers.update(rate_limit_headers(rate_limiter, info))
+
     return response
@@ -12,19 +12,32 @@ from enum import Enum
 from decimal import Decimal, ROUND_HALF_UP
 from pydantic import BaseModel, Field, validator
 import uuid
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 from dataclasses import dataclass
 import hashlib
 import hmac
+from merkle_audit import MerkleAuditLedger
+from async_init import schedule_init
+from versioned_cache import VersionedLRUCache, MISSING, watch_change_stream
 
 logger = logging.getLogger(__name__)
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'royalty_engine')]
 
+# Events resolved and written together by process_transaction_batch
+BATCH_CHUNK_SIZE = 1000
+MAJOR_TERRITORIES = ["US", "CA", "GB", "DE", "FR", "AU", "JP"]
+
+# Per-asset cache of contract terms and contributor splits (0 disables it)
+TERMS_CACHE_MAX_ENTRIES = int(os.environ.get("ROYALTY_TERMS_CACHE_MAX_ENTRIES", "10000"))
+TERMS_CACHE_TTL_SECONDS = int(os.environ.get("ROYALTY_TERMS_CACHE_TTL_SECONDS", "300"))
+# Used while no change stream is active, since other workers' edits then go unseen until expiry
+TERMS_CACHE_UNWATCHED_TTL_SECONDS = int(os.environ.get("ROYALTY_TERMS_CACHE_UNWATCHED_TTL_SECONDS", "10"))
+
 class RevenueSource(str, Enum):
     STREAMING = "streaming"
     DOWNLOAD = "download"
@@ -122,6 +135,13 @@ class FraudDetectionResult(BaseModel):
     is_suspicious: bool
     recommended_action: str
 
+@dataclass
+class BatchEventResult:
+    """Outcome of one event within a batch ingestion"""
+    event: TransactionEvent
+    calculation: Optional[RoyaltyCalculation] = None
+    error: Optional[str] = None
+
 @dataclass
 class TaxCalculation:
     """Tax calculation result"""
@@ -132,6 +152,10 @@ class TaxCalculation:
     jurisdiction: str
     tax_type: str
 
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC, as MongoDB stores them"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
 class RoyaltyEngineCore:
     """Core royalty processing engine"""
     
@@ -142,6 +166,12 @@ class RoyaltyEngineCore:
         self.collection_calculations = db.royalty_calculations
         self.collection_audit = db.audit_trail
         self.collection_payouts = db.payout_queue
+        self.audit_ledger = MerkleAuditLedger(db, "audit_trail", name="royalty_audit")
+        schedule_init("Royalty audit ledger indexes", self.audit_ledger.ensure_indexes)
+        self.terms_cache = VersionedLRUCache("contract_terms", TERMS_CACHE_MAX_ENTRIES, TERMS_CACHE_TTL_SECONDS,
+                                             TERMS_CACHE_UNWATCHED_TTL_SECONDS)
+        self.splits_cache = VersionedLRUCache("contributor_splits", TERMS_CACHE_MAX_ENTRIES, TERMS_CACHE_TTL_SECONDS,
+                                              TERMS_CACHE_UNWATCHED_TTL_SECONDS)
         
     async def process_transaction_event(self, event: TransactionEvent) -> RoyaltyCalculation:
         """Process a transaction event and calculate royalties"""
@@ -186,42 +216,208 @@ class RoyaltyEngineCore:
             await self._log_error(event, str(e))
             raise
     
+    async def process_transaction_batch(self, events: List[TransactionEvent],
+                                        chunk_size: int = BATCH_CHUNK_SIZE) -> List[BatchEventResult]:
+        """Process many transaction events with a constant number of round trips per chunk.
+
+        Produces the same per-event calculations, fraud flags, audit entries and
+        payout rows as calling process_transaction_event for each event in order.
+        """
+        results = []
+        for start in range(0, len(events), chunk_size):
+            results.extend(await self._process_transaction_chunk(events[start:start + chunk_size]))
+        return results
+    
+    async def _process_transaction_chunk(self, events: List[TransactionEvent]) -> List[BatchEventResult]:
+        """Resolve terms, splits and fraud counters for a chunk, then write it with ordered bulk inserts"""
+        if not events:
+            return []
+        now = datetime.now(timezone.utc)
+        user_cutoff = now - timedelta(minutes=5)
+        territory_cutoff = now - timedelta(hours=24)
+        asset_ids = list({event.asset_id for event in events})
+        
+        # Fraud counters as they stood before this chunk was stored
+        user_counts = await self._count_recent_events(
+            "user_id", {event.user_id for event in events if event.user_id}, user_cutoff
+        )
+        territory_counts = await self._count_recent_events(
+            "territory",
+            {event.territory for event in events if event.territory not in MAJOR_TERRITORIES},
+            territory_cutoff
+        )
+        
+        # Store the transaction events
+        await self.collection_events.insert_many([event.dict() for event in events], ordered=True)
+        
+        terms_by_asset = await self._get_contract_terms_bulk(asset_ids, now)
+        splits_by_asset = await self._get_contributor_splits_bulk(asset_ids)
+        results = []
+        calculations = []
+        audit_entries = []
+        payout_records = []
+        flag_records = []
+        error_records = []
+        
+        for event in events:
+            # Counts include the event itself and earlier events of the chunk,
+            # exactly as the per-event path sees them after its insert
+            event_time = _as_utc(event.timestamp)
+            if event.user_id and event_time >= user_cutoff:
+                user_counts[event.user_id] = user_counts.get(event.user_id, 0) + 1
+            if event.territory not in MAJOR_TERRITORIES and event_time >= territory_cutoff:
+                territory_counts[event.territory] = territory_counts.get(event.territory, 0) + 1
+            
+            try:
+                contract_terms = terms_by_asset.get(event.asset_id)
+                if not contract_terms:
+                    raise ValueError(f"No contract terms found for asset {event.asset_id}")
+                
+                contributor_splits = splits_by_asset.get(event.asset_id, [])
+                if not contributor_splits:
+                    raise ValueError(f"No contributor splits found for asset {event.asset_id}")
+                
+                fraud_result = self._evaluate_fraud(
+                    event,
+                    user_counts.get(event.user_id, 0) if event.user_id else None,
+                    territory_counts.get(event.territory, 0) if event.territory not in MAJOR_TERRITORIES else None
+                )
+                if fraud_result.is_suspicious:
+                    flag_records.append(self._build_fraud_flag(event, fraud_result))
+                    if fraud_result.recommended_action == "BLOCK":
+                        raise ValueError(f"Transaction blocked due to fraud detection: {fraud_result.flags}")
+                
+                calculation = await self._calculate_royalties(event, contract_terms, contributor_splits)
+            except Exception as e:
+                logger.error(f"Error processing transaction event {event.id}: {str(e)}")
+                error_records.append(self._build_error_record(event, str(e)))
+                results.append(BatchEventResult(event=event, error=str(e)))
+                continue
+            
+            calculations.append(calculation.dict())
+            audit_entries.append(self._build_audit_entry(event, calculation))
+            payout_records.extend(
+                self._build_payout_record(calculation, payout) for payout in calculation.contributor_payouts
+            )
+            results.append(BatchEventResult(event=event, calculation=calculation))
+        
+        if flag_records:
+            await db.fraud_flags.insert_many(flag_records, ordered=True)
+        if calculations:
+            await self.collection_calculations.insert_many(calculations, ordered=True)
+            await self.audit_ledger.append(audit_entries)
+        if payout_records:
+            await self.collection_payouts.insert_many(payout_records, ordered=True)
+        if error_records:
+            await db.processing_errors.insert_many(error_records, ordered=True)
+        
+        logger.info(f"Processed batch of {len(events)} transactions ({len(error_records)} failed)")
+        return results
+    
+    async def _count_recent_events(self, field: str, values: set, since: datetime) -> Dict[str, int]:
+        """Count stored events per field value since a cutoff in a single aggregation"""
+        if not values:
+            return {}
+        pipeline = [
+            {"$match": {field: {"$in": list(values)}, "timestamp": {"$gte": since}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+        ]
+        rows = await self.collection_events.aggregate(pipeline).to_list(length=None)
+        return {row["_id"]: row["count"] for row in rows}
+    
+    async def _get_contract_terms_bulk(self, asset_ids: List[str], current_time: datetime) -> Dict[str, ContractTerm]:
+        """Get active contract terms for many assets; first match per asset wins, as with find_one"""
+        candidates = await self._load_cached_bulk(self.terms_cache, asset_ids, self._load_contract_terms)
+        terms = {}
+        for asset_id, asset_terms in candidates.items():
+            selected = self._select_active_terms(asset_terms, current_time)
+            if selected:
+                terms[asset_id] = selected
+        return terms
+    
+    async def _get_contributor_splits_bulk(self, asset_ids: List[str]) -> Dict[str, List[ContributorSplit]]:
+        """Get active contributor splits for many assets, grouped by asset"""
+        splits = await self._load_cached_bulk(self.splits_cache, asset_ids, self._load_contributor_splits)
+        return {asset_id: asset_splits for asset_id, asset_splits in splits.items() if asset_splits}
+    
     async def _get_contract_terms(self, asset_id: str) -> Optional[ContractTerm]:
         """Get active contract terms for an asset"""
         current_time = datetime.now(timezone.utc)
-        
-        contract_data = await self.collection_contracts.find_one({
-            "asset_id": asset_id,
-            "active": True,
-            "effective_date": {"$lte": current_time},
-            "$or": [
-                {"expiry_date": {"$gt": current_time}},
-                {"expiry_date": None}
-            ]
-        })
-        
-        if contract_data:
-            return ContractTerm(**contract_data)
+        candidates = await self._load_cached_bulk(self.terms_cache, [asset_id], self._load_contract_terms)
+        return self._select_active_terms(candidates[asset_id], current_time)
+    
+    @staticmethod
+    def _select_active_terms(candidates: List[ContractTerm], current_time: datetime) -> Optional[ContractTerm]:
+        """First candidate in effect at current_time (effective_date <= now < expiry_date)"""
+        for terms in candidates:
+            if _as_utc(terms.effective_date) <= current_time and (
+                terms.expiry_date is None or _as_utc(terms.expiry_date) > current_time
+            ):
+                return terms
         return None
     
     async def _get_contributor_splits(self, asset_id: str) -> List[ContributorSplit]:
         """Get active contributor splits for an asset"""
-        splits_data = await self.collection_splits.find({
-            "asset_id": asset_id,
-            "active": True
-        }).to_list(length=None)
-        
-        return [ContributorSplit(**split) for split in splits_data]
+        splits = await self._load_cached_bulk(self.splits_cache, [asset_id], self._load_contributor_splits)
+        return splits[asset_id]
+    
+    async def _load_cached_bulk(self, cache: VersionedLRUCache, asset_ids: List[str], loader) -> Dict[str, List[Any]]:
+        """Per-asset cache lookup; misses are loaded with one query and cached under a version token"""
+        found = {}
+        missing = []
+        for asset_id in dict.fromkeys(asset_ids):
+            cached = cache.get(asset_id)
+            if cached is MISSING:
+                missing.append(asset_id)
+            else:
+                found[asset_id] = cached
+        if missing:
+            token = cache.token()
+            loaded = await loader(missing)
+            for asset_id in missing:
+                found[asset_id] = loaded.get(asset_id, [])
+                cache.put(asset_id, found[asset_id], token)
+        return found
+    
+    async def _load_contract_terms(self, asset_ids: List[str]) -> Dict[str, List[ContractTerm]]:
+        """Active contract terms per asset regardless of dates, so cached entries stay valid over time"""
+        terms = {}
+        async for contract_data in self.collection_contracts.find({
+            "asset_id": {"$in": asset_ids},
+            "active": True,
+            "effective_date": {"$ne": None}
+        }):
+            terms.setdefault(contract_data["asset_id"], []).append(ContractTerm(**contract_data))
+        return terms
+    
+    async def _load_contributor_splits(self, asset_ids: List[str]) -> Dict[str, List[ContributorSplit]]:
+        splits = {}
+        async for split in self.collection_splits.find({"asset_id": {"$in": asset_ids}, "active": True}):
+            splits.setdefault(split["asset_id"], []).append(ContributorSplit(**split))
+        return splits
+    
+    def invalidate_contract_terms(self, *asset_ids: Optional[str]):
+        """Drop cached terms after a contract write; call once the write has completed"""
+        for asset_id in asset_ids:
+            if asset_id is not None:
+                self.terms_cache.invalidate(asset_id)
+    
+    def invalidate_contributor_splits(self, *asset_ids: Optional[str]):
+        """Drop cached splits after a split write; call once the write has completed"""
+        for asset_id in asset_ids:
+            if asset_id is not None:
+                self.splits_cache.invalidate(asset_id)
+    
+    def get_terms_cache_stats(self) -> Dict[str, Any]:
+        return {
+            "contract_terms": self.terms_cache.stats(),
+            "contributor_splits": self.splits_cache.stats()
+        }
     
     async def _detect_fraud(self, event: TransactionEvent) -> FraudDetectionResult:
         """Detect potential fraud in transaction events"""
-        flags = []
-        risk_score = 0.0
-        
-        # Check for suspicious revenue amounts
-        if event.gross_revenue > Decimal("10000"):  # Very high single transaction
-            flags.append("HIGH_REVENUE_SINGLE_TRANSACTION")
-            risk_score += 0.3
+        recent_count = None
+        territory_volume = None
         
         # Check for rapid successive transactions from same user/device
         if event.user_id:
@@ -229,19 +425,34 @@ class RoyaltyEngineCore:
                 "user_id": event.user_id,
                 "timestamp": {"$gte": datetime.now(timezone.utc) - timedelta(minutes=5)}
             })
-            if recent_count > 100:
-                flags.append("RAPID_USER_TRANSACTIONS")
-                risk_score += 0.4
         
         # Check for unusual territory patterns
-        if event.territory not in ["US", "CA", "GB", "DE", "FR", "AU", "JP"]:
+        if event.territory not in MAJOR_TERRITORIES:
             territory_volume = await self.collection_events.count_documents({
                 "territory": event.territory,
                 "timestamp": {"$gte": datetime.now(timezone.utc) - timedelta(hours=24)}
             })
-            if territory_volume > 1000:
-                flags.append("UNUSUAL_TERRITORY_VOLUME")
-                risk_score += 0.2
+        
+        return self._evaluate_fraud(event, recent_count, territory_volume)
+    
+    def _evaluate_fraud(self, event: TransactionEvent, recent_count: Optional[int],
+                        territory_volume: Optional[int]) -> FraudDetectionResult:
+        """Score an event from its recent user and territory volumes"""
+        flags = []
+        risk_score = 0.0
+        
+        # Check for suspicious revenue amounts
+        if event.gross_revenue > Decimal("10000"):  # Very high single transaction
+            flags.append("HIGH_REVENUE_SINGLE_TRANSACTION")
+            risk_score += 0.3
+        
+        if recent_count is not None and recent_count > 100:
+            flags.append("RAPID_USER_TRANSACTIONS")
+            risk_score += 0.4
+        
+        if territory_volume is not None and territory_volume > 1000:
+            flags.append("UNUSUAL_TERRITORY_VOLUME")
+            risk_score += 0.2
         
         # Determine if suspicious
         is_suspicious = risk_score > 0.5
@@ -356,50 +567,54 @@ class RoyaltyEngineCore:
         )
     
     async def _create_audit_trail(self, event: TransactionEvent, calculation: RoyaltyCalculation):
-        """Create immutable audit trail entry"""
-        audit_entry = {
+        """Create immutable audit trail entry, sealed later into a Merkle batch"""
+        await self.audit_ledger.append([self._build_audit_entry(event, calculation)])
+    
+    def _build_audit_entry(self, event: TransactionEvent, calculation: RoyaltyCalculation) -> Dict[str, Any]:
+        """Build an audit trail entry"""
+        return {
             "id": str(uuid.uuid4()),
             "transaction_event_id": event.id,
             "calculation_id": calculation.id,
             "timestamp": datetime.now(timezone.utc),
             "event_hash": self._hash_data(event.dict()),
             "calculation_hash": self._hash_data(calculation.dict()),
-            "previous_hash": await self._get_last_audit_hash(),
             "data": {
                 "event": event.dict(),
                 "calculation": calculation.dict(),
                 "system_version": "1.0.0"
             }
         }
-        
-        # Create chain hash
-        audit_entry["chain_hash"] = self._hash_data(audit_entry)
-        
-        await self.collection_audit.insert_one(audit_entry)
     
     def _hash_data(self, data: dict) -> str:
         """Create SHA-256 hash of data"""
         json_str = json.dumps(data, sort_keys=True, default=str)
         return hashlib.sha256(json_str.encode()).hexdigest()
     
-    async def _get_last_audit_hash(self) -> str:
-        """Get the hash of the last audit entry for chaining"""
-        last_entry = await self.collection_audit.find_one(
-            {}, sort=[("timestamp", -1)]
-        )
-        return last_entry["chain_hash"] if last_entry else "genesis"
+    async def get_audit_proof(self, transaction_event_id: str) -> Optional[Dict[str, Any]]:
+        """Audit entry for a transaction with its Merkle inclusion proof"""
+        entry = await self.collection_audit.find_one({"transaction_event_id": transaction_event_id}, {"_id": 0})
+        if not entry:
+            return None
+        entry["inclusion_proof"] = await self.audit_ledger.get_inclusion_proof(entry)
+        return entry
+    
+    async def verify_audit_trail(self) -> Dict[str, Any]:
+        """Verify the audit ledger batch by batch"""
+        return await self.audit_ledger.verify_chain()
     
     async def _trigger_payouts(self, calculation: RoyaltyCalculation):
         """Trigger payouts for contributors based on calculation"""
         for payout in calculation.contributor_payouts:
-            # Check if crypto instant payout
-            if payout["payout_method"] in ["crypto_instant", "stablecoin"]:
-                await self._queue_crypto_payout(calculation, payout)
-            else:
-                await self._queue_traditional_payout(calculation, payout)
+            await self._queue_payout(calculation, payout)
+    
+    async def _queue_payout(self, calculation: RoyaltyCalculation, payout: Dict[str, Any]):
+        """Queue a crypto (instant) or traditional (ACH, wire, PayPal batch) payout"""
+        await self.collection_payouts.insert_one(self._build_payout_record(calculation, payout))
     
-    async def _queue_crypto_payout(self, calculation: RoyaltyCalculation, payout: Dict[str, Any]):
-        """Queue cryptocurrency payout"""
+    def _build_payout_record(self, calculation: RoyaltyCalculation, payout: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the payout_queue row for one contributor payout"""
+        now = datetime.now(timezone.utc)
         payout_record = {
             "id": str(uuid.uuid4()),
             "calculation_id": calculation.id,
@@ -407,50 +622,36 @@ class RoyaltyEngineCore:
             "amount": payout["net_amount"],
             "currency": payout["currency"],
             "payout_method": payout["payout_method"],
-            "wallet_address": payout["wallet_address"],
-            "status": "pending_crypto",
-            "created_at": datetime.now(timezone.utc),
-            "scheduled_at": datetime.now(timezone.utc),  # Instant
+            "created_at": now,
             "metadata": {
                 "asset_id": calculation.asset_id,
                 "transaction_event_id": calculation.transaction_event_id
             }
         }
         
-        await self.collection_payouts.insert_one(payout_record)
-    
-    async def _queue_traditional_payout(self, calculation: RoyaltyCalculation, payout: Dict[str, Any]):
-        """Queue traditional payout (ACH, wire, PayPal)"""
+        if payout["payout_method"] in ["crypto_instant", "stablecoin"]:
+            payout_record["wallet_address"] = payout["wallet_address"]
+            payout_record["status"] = "pending_crypto"
+            payout_record["scheduled_at"] = now  # Instant
+            return payout_record
+        
         # Calculate next batch payout date (e.g., monthly on 15th)
-        now = datetime.now(timezone.utc)
         next_payout = now.replace(day=15, hour=0, minute=0, second=0, microsecond=0)
         if now.day >= 15:
             if now.month == 12:
                 next_payout = next_payout.replace(year=now.year + 1, month=1)
             else:
                 next_payout = next_payout.replace(month=now.month + 1)
-        
-        payout_record = {
-            "id": str(uuid.uuid4()),
-            "calculation_id": calculation.id,
-            "contributor_id": payout["contributor_id"],
-            "amount": payout["net_amount"],
-            "currency": payout["currency"],
-            "payout_method": payout["payout_method"],
-            "status": "pending_batch",
-            "created_at": datetime.now(timezone.utc),
-            "scheduled_at": next_payout,
-            "metadata": {
-                "asset_id": calculation.asset_id,
-                "transaction_event_id": calculation.transaction_event_id
-            }
-        }
-        
-        await self.collection_payouts.insert_one(payout_record)
+        payout_record["status"] = "pending_batch"
+        payout_record["scheduled_at"] = next_payout
+        return payout_record
     
     async def _flag_suspicious_transaction(self, event: TransactionEvent, fraud_result: FraudDetectionResult):
         """Flag suspicious transaction for review"""
-        flag_record = {
+        await db.fraud_flags.insert_one(self._build_fraud_flag(event, fraud_result))
+    
+    def _build_fraud_flag(self, event: TransactionEvent, fraud_result: FraudDetectionResult) -> Dict[str, Any]:
+        return {
             "id": str(uuid.uuid4()),
             "transaction_event_id": event.id,
             "fraud_score": fraud_result.risk_score,
@@ -462,12 +663,13 @@ class RoyaltyEngineCore:
             "reviewer_id": None,
             "resolution": None
         }
-        
-        await db.fraud_flags.insert_one(flag_record)
     
     async def _log_error(self, event: TransactionEvent, error: str):
         """Log processing errors"""
-        error_record = {
+        await db.processing_errors.insert_one(self._build_error_record(event, error))
+    
+    def _build_error_record(self, event: TransactionEvent, error: str) -> Dict[str, Any]:
+        return {
             "id": str(uuid.uuid4()),
             "transaction_event_id": event.id,
             "error_message": error,
@@ -476,8 +678,6 @@ class RoyaltyEngineCore:
             "retry_count": 0,
             "resolved": False
         }
-        
-        await db.processing_errors.insert_one(error_record)
 
 # Forecasting and Analytics Engine
 class RoyaltyForecaster:
@@ -542,4 +742,19 @@ class RoyaltyForecaster:
 
 # Initialize services
 royalty_engine = RoyaltyEngineCore()
-royalty_forecaster = RoyaltyForecaster()
\ No newline at end of file
+royalty_forecaster = RoyaltyForecaster()
+
+
+def start_audit_sealer():
+    """Launch the audit batch sealer background task."""
+    loop = asyncio.get_event_loop()
+    loop.create_task(royalty_engine.audit_ledger.run_sealer())
+    logger.info("Royalty audit sealer background task launched")
+
+
+def start_terms_cache_watchers():
+    """Launch change-stream invalidation for the contract terms and split caches."""
+    loop = asyncio.get_event_loop()
+    loop.create_task(watch_change_stream(royalty_engine.collection_contracts, royalty_engine.terms_cache, "asset_id"))
+    loop.create_task(watch_change_stream(royalty_engine.collection_splits, royalty_engine.splits_cache, "asset_id"))
+    logger.info("Royalty terms cache watchers launched")
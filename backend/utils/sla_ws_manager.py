@@ -2,35 +2,51 @@
 SLA WebSocket Manager — Real-time notifications for SLA breaches.
 Manages WebSocket connections and broadcasts SLA events to connected clients.
 Supports per-user notification preferences.
+Events are published on the WebSocket bus, so they reach sockets on every worker.
 """
 
-import asyncio
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, Set, Optional
 
 from fastapi import WebSocket
 
+from ws_fanout import ws_bus
+
 logger = logging.getLogger("sla_ws_manager")
 
 
+BROADCAST_CHANNEL = "sla:all"
+
+
+def _user_channel(user_id: str) -> str:
+    return f"sla:user:{user_id}"
+
+
 class SLAWebSocketManager:
     def __init__(self):
+        # This worker's connections
         self.connections: Dict[str, WebSocket] = {}  # user_id -> ws
         self.anonymous: Set[WebSocket] = set()
 
     async def connect(self, ws: WebSocket, user_id: Optional[str] = None):
         await ws.accept()
         if user_id:
+            previous = self.connections.get(user_id)
+            if previous is not None:
+                ws_bus.detach(previous)
             self.connections[user_id] = ws
+            channels = [BROADCAST_CHANNEL, _user_channel(user_id)]
         else:
             self.anonymous.add(ws)
+            channels = [BROADCAST_CHANNEL]
+        await ws_bus.attach(ws, channels, tag=user_id, on_drop=lambda: self.disconnect(ws, user_id))
         total = len(self.connections) + len(self.anonymous)
         logger.info(f"SLA WS connected (user={user_id or 'anon'}) — total: {total}")
 
     def disconnect(self, ws: WebSocket, user_id: Optional[str] = None):
-        if user_id and user_id in self.connections:
+        ws_bus.detach(ws)
+        if user_id and self.connections.get(user_id) is ws:
             del self.connections[user_id]
         self.anonymous.discard(ws)
         total = len(self.connections) + len(self.anonymous)
@@ -38,40 +54,13 @@ class SLAWebSocketManager:
 
     async def broadcast(self, event: Dict[str, Any]):
         """Broadcast to all connections (anonymous + user-keyed)."""
-        if not self.connections and not self.anonymous:
-            return
         event["timestamp"] = datetime.now(timezone.utc).isoformat()
-        payload = json.dumps(event)
-        stale_anon = []
-        stale_users = []
-
-        for ws in self.anonymous.copy():
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                stale_anon.append(ws)
-
-        for uid, ws in list(self.connections.items()):
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                stale_users.append(uid)
-
-        for ws in stale_anon:
-            self.anonymous.discard(ws)
-        for uid in stale_users:
-            self.connections.pop(uid, None)
+        await ws_bus.publish(BROADCAST_CHANNEL, event)
 
     async def send_to_user(self, user_id: str, event: Dict[str, Any]):
         """Send a notification to a specific user."""
-        ws = self.connections.get(user_id)
-        if not ws:
-            return
         event["timestamp"] = datetime.now(timezone.utc).isoformat()
-        try:
-            await ws.send_text(json.dumps(event))
-        except Exception:
-            self.connections.pop(user_id, None)
+        await ws_bus.publish(_user_channel(user_id), event)
 
     async def broadcast_escalation(self, result: Dict[str, Any]):
         await self.broadcast({
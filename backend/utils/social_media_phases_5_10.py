@@ -11,14 +11,14 @@ from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 from pydantic import BaseModel, Field
 import uuid
-from motor.motor_asyncio import AsyncIOMotorClient
+from config.mongo_pool import get_mongo_client
 import os
 
 logger = logging.getLogger(__name__)
 
 # Database connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
+client = get_mongo_client(mongo_url)
 db = client[os.environ.get('DB_NAME', 'social_media_strategy')]
 
 class CampaignStatus(str, Enum):
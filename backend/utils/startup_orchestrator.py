@@ -0,0 +1,206 @@
+"""
+Dependency-aware, concurrent service initialization for application startup.
+
+Each service is registered with the names of the services it needs. At
+startup every critical service starts as soon as its dependencies have
+succeeded, concurrently with everything else, so readiness takes as long
+as the slowest chain of critical services rather than the sum of all of
+them. Non-critical services run in the background once startup has
+returned and the app is serving requests.
+
+A service can be a plain function or return an awaitable. Awaitables get
+a per-service timeout; a service that overruns it is reported as timed
+out and its dependents are skipped, but the work itself keeps running in
+the background (index builds and seed writes are not safe to cancel
+half-way); if it then succeeds, the dependents it held back are started. Synchronous functions run on the event loop thread, because
+several service constructors schedule tasks on it; they are timed but
+cannot be interrupted.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SERVICE_TIMEOUT_SECONDS = float(os.environ.get("STARTUP_SERVICE_TIMEOUT_SECONDS", "30"))
+
+ServiceFn = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class StartupService:
+    __slots__ = ("name", "fn", "depends_on", "critical", "timeout",
+                 "status", "started_at", "duration", "error", "late")
+
+    def __init__(self, name: str, fn: ServiceFn, depends_on: Sequence[str], critical: bool, timeout: float):
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.critical = critical
+        self.timeout = timeout
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        # Finished after its timeout had already been reported
+        self.late = False
+
+
+class StartupOrchestrator:
+    """Runs registered startup services concurrently in dependency order"""
+
+    def __init__(self, announce: Callable[[str], None] = logger.info,
+                 default_timeout: float = STARTUP_SERVICE_TIMEOUT_SECONDS):
+        self.announce = announce
+        self.default_timeout = default_timeout
+        self._services: Dict[str, StartupService] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._origin: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self.deferred_seconds: Optional[float] = None
+
+    def service(self, name: str, fn: ServiceFn, depends_on: Sequence[str] = (),
+                critical: bool = True, timeout: Optional[float] = None):
+        if name in self._services:
+            raise ValueError(f"Startup service '{name}' registered twice")
+        self._services[name] = StartupService(
+            name, fn, depends_on, critical, self.default_timeout if timeout is None else timeout
+        )
+
+    def _ordered(self) -> List[StartupService]:
+        """Services in dependency order; rejects unknown dependencies, cycles and
+        critical services that depend on deferred ones"""
+        ordered: List[StartupService] = []
+        state: Dict[str, str] = {}
+
+        def visit(service: StartupService, path: tuple):
+            if state.get(service.name) == "done":
+                return
+            if state.get(service.name) == "visiting":
+                raise ValueError(f"Startup dependency cycle: {' -> '.join(path + (service.name,))}")
+            state[service.name] = "visiting"
+            for dep in service.depends_on:
+                if dep not in self._services:
+                    raise ValueError(f"Startup service '{service.name}' depends on unknown '{dep}'")
+                if service.critical and not self._services[dep].critical:
+                    raise ValueError(f"Critical startup service '{service.name}' depends on deferred '{dep}'")
+                visit(self._services[dep], path + (service.name,))
+            state[service.name] = "done"
+            ordered.append(service)
+
+        for service in self._services.values():
+            visit(service, ())
+        return ordered
+
+    async def run(self):
+        """Run every critical service; returns once they have all finished or timed out"""
+        ordered = self._ordered()
+        self._origin = time.perf_counter()
+        await self._run_all([s for s in ordered if s.critical])
+        self.ready_seconds = time.perf_counter() - self._origin
+        failed = [s.name for s in ordered if s.critical and s.status != "ok"]
+        self.announce(f"Critical startup services finished in {self.ready_seconds:.2f}s"
+                      + (f" (not ok: {', '.join(failed)})" if failed else ""))
+
+    def start_deferred(self):
+        """Launch the non-critical services in the background"""
+        asyncio.get_event_loop().create_task(self.run_deferred())
+
+    async def run_deferred(self):
+        deferred = [s for s in self._ordered() if not s.critical]
+        if self._origin is None:
+            self._origin = time.perf_counter()
+        started = time.perf_counter()
+        await self._run_all(deferred)
+        self.deferred_seconds = time.perf_counter() - started
+        self.announce(f"Deferred startup services finished in {self.deferred_seconds:.2f}s")
+
+    async def _run_all(self, services: List[StartupService]):
+        # Dependencies come first in ``services``, so their tasks exist when dependents need them
+        for service in services:
+            self._tasks[service.name] = asyncio.ensure_future(self._run_one(service))
+        await asyncio.gather(*(self._tasks[s.name] for s in services))
+
+    async def _run_one(self, service: StartupService):
+        await asyncio.gather(*(self._tasks[dep] for dep in service.depends_on))
+        for dep in service.depends_on:
+            if self._services[dep].status != "ok":
+                service.status = "skipped"
+                service.error = f"dependency '{dep}' {self._services[dep].status}"
+                self.announce(f"  {service.name} skipped: {service.error}")
+                return
+
+        service.status = "running"
+        started = time.perf_counter()
+        service.started_at = started - self._origin
+        try:
+            result = service.fn()
+            if inspect.isawaitable(result):
+                work = asyncio.ensure_future(result)
+                try:
+                    await asyncio.wait_for(asyncio.shield(work), service.timeout)
+                except asyncio.TimeoutError:
+                    service.status = "timeout"
+                    service.duration = time.perf_counter() - started
+                    work.add_done_callback(lambda t: self._finish_late(service, t, started))
+                    self.announce(f"  {service.name} timed out after {service.timeout:.0f}s; continuing in background")
+                    return
+        except Exception as e:
+            service.status = "failed"
+            service.error = str(e)
+            service.duration = time.perf_counter() - started
+            self.announce(f"  {service.name} failed: {service.error}")
+            return
+        service.status = "ok"
+        service.duration = time.perf_counter() - started
+        self.announce(f"  {service.name} initialized ({service.duration * 1000:.0f}ms)")
+        self._resume_dependents(service)
+
+    def _finish_late(self, service: StartupService, work: asyncio.Future, started: float):
+        service.late = True
+        service.duration = time.perf_counter() - started
+        if work.cancelled():
+            service.error = "cancelled"
+        elif work.exception() is not None:
+            service.status = "failed"
+            service.error = str(work.exception())
+        else:
+            service.status = "ok"
+        logger.info(f"Startup service {service.name} finished late ({service.duration:.1f}s): {service.status}")
+        if service.status == "ok":
+            self._resume_dependents(service)
+
+    def _resume_dependents(self, service: StartupService):
+        """Start the services that were skipped while ``service`` overran its timeout"""
+        for dependent in self._services.values():
+            if (dependent.status == "skipped" and service.name in dependent.depends_on
+                    and all(self._services[dep].status == "ok" for dep in dependent.depends_on)):
+                dependent.status = "pending"
+                dependent.error = None
+                logger.info(f"Starting {dependent.name} now that {service.name} has finished")
+                self._tasks[dependent.name] = asyncio.ensure_future(self._run_one(dependent))
+
+    def report(self) -> Dict[str, Any]:
+        """Per-service init timing; ``started_at`` is seconds after startup began"""
+        services = [
+            {
+                "name": s.name,
+                "critical": s.critical,
+                "depends_on": list(s.depends_on),
+                "status": s.status,
+                "started_at": round(s.started_at, 4) if s.started_at is not None else None,
+                "duration": round(s.duration, 4) if s.duration is not None else None,
+                "timeout": s.timeout,
+                "late": s.late,
+                "error": s.error,
+            }
+            for s in self._services.values()
+        ]
+        return {
+            "ready_seconds": round(self.ready_seconds, 4) if self.ready_seconds is not None else None,
+            "deferred_seconds": round(self.deferred_seconds, 4) if self.deferred_seconds is not None else None,
+            "sum_of_durations": round(sum(s["duration"] or 0 for s in services), 4),
+            "services": sorted(services, key=lambda s: s["duration"] or 0, reverse=True),
+        }
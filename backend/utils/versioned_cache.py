@@ -0,0 +1,164 @@
+"""
+Versioned, size-bounded in-process cache for rarely-changing documents.
+
+``VersionedLRUCache`` is an LRU map with a per-entry TTL. Loads are
+versioned: a caller takes a ``token()`` before reading from MongoDB and
+passes it to ``put``; if the key was invalidated while the read was in
+flight the stale value is dropped instead of cached. Invalidation comes
+from the write paths and, where the deployment is a replica set, from a
+MongoDB change stream (``watch_change_stream``). The TTL bounds staleness
+for writes that bypass both. Write-path invalidation only reaches the
+current process, so while no change stream is active entries are cached
+for the shorter ``unwatched_ttl_seconds`` instead.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+CACHE_DEFAULT_TTL_SECONDS = int(os.environ.get("CACHE_DEFAULT_TTL_SECONDS", "300"))
+CHANGE_STREAM_RETRY_SECONDS = 5
+
+# Returned by get() on a miss; None is a cacheable value ("asset has no terms")
+MISSING = object()
+
+# Server error codes meaning change streams will never work on this deployment
+_CHANGE_STREAM_UNSUPPORTED = {40573, 40324, 136}
+
+
+class VersionedLRUCache:
+    """LRU cache with TTL and load-versus-invalidation race protection"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: int = CACHE_DEFAULT_TTL_SECONDS,
+                 unwatched_ttl_seconds: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.unwatched_ttl_seconds = ttl_seconds if unwatched_ttl_seconds is None else unwatched_ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Invalidation clock; keys remember the tick they were last invalidated at
+        self._clock = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._floor = 0
+        self._stats = {"hits": 0, "misses": 0, "stale_loads": 0, "invalidations": 0,
+                       "evictions": 0, "expirations": 0, "clears": 0}
+        self.change_stream = "not started"
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def effective_ttl_seconds(self) -> int:
+        """TTL for new entries; other processes' writes only reach us through an active change stream"""
+        return self.ttl_seconds if self.change_stream == "active" else self.unwatched_ttl_seconds
+
+    def token(self) -> int:
+        """Version token to take before loading a value from the database"""
+        return self._clock
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return MISSING
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, token: int):
+        """Cache a loaded value unless the key was invalidated after ``token`` was taken"""
+        if not self.enabled:
+            return
+        if token < self._invalidated.get(key, self._floor):
+            self._stats["stale_loads"] += 1
+            return
+        self._entries[key] = (value, time.monotonic() + self.effective_ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable):
+        self._clock += 1
+        self._entries.pop(key, None)
+        self._invalidated[key] = self._clock
+        self._invalidated.move_to_end(key)
+        # Forgetting old stamps is safe: loads older than the floor are rejected for every key
+        while len(self._invalidated) > max(self.max_entries, 1024):
+            _, stamp = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, stamp)
+        self._stats["invalidations"] += 1
+
+    def clear(self):
+        self._clock += 1
+        self._floor = self._clock
+        self._entries.clear()
+        self._invalidated.clear()
+        self._stats["clears"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.effective_ttl_seconds,
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "change_stream": self.change_stream,
+            **self._stats,
+        }
+
+
+async def watch_change_stream(collection, cache: VersionedLRUCache, key_field: str):
+    """Invalidate ``cache`` entries keyed by ``key_field`` as documents in ``collection`` change.
+
+    Exits quietly on deployments without change streams (standalone mongod),
+    leaving write-path invalidation and the TTL in charge.
+    """
+    while True:
+        try:
+            async with collection.watch(full_document="updateLookup") as stream:
+                cache.change_stream = "active"
+                async for change in stream:
+                    _apply_change(cache, change, key_field)
+        except OperationFailure as e:
+            if e.code in _CHANGE_STREAM_UNSUPPORTED:
+                cache.change_stream = "unsupported"
+                # Entries cached while a stream was active carry the long TTL
+                cache.clear()
+                logger.info(f"{cache.name}: change streams unavailable, relying on write-path invalidation")
+                return
+            logger.warning(f"{cache.name}: change stream failed: {e}")
+        except asyncio.CancelledError:
+            cache.change_stream = "stopped"
+            raise
+        except Exception as e:
+            logger.warning(f"{cache.name}: change stream failed: {e}")
+        # Events may have been missed while the stream was down
+        cache.change_stream = "reconnecting"
+        cache.clear()
+        await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+
+def _apply_change(cache: VersionedLRUCache, change: Dict[str, Any], key_field: str):
+    operation = change.get("operationType")
+    document: Optional[Dict[str, Any]] = change.get("fullDocument")
+    moved = key_field in (change.get("updateDescription") or {}).get("updatedFields", {})
+    if operation in ("insert", "update") and document and not moved and key_field in document:
+        cache.invalidate(document[key_field])
+    else:
+        # Deletes, replaces, key moves and collection events don't tell us the old key
+        cache.clear()
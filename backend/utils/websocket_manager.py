@@ -1,18 +1,33 @@
 """
 WebSocket Manager for Real-Time Support Chat
 Handles WebSocket connections, message routing, and real-time features
+
+Messages are published on the WebSocket bus (user, session and agent
+channels), so they reach participants connected to any worker. Connection,
+session and agent bookkeeping here covers this worker's sockets.
 """
 
 import asyncio
-import json
 import logging
 import uuid
 from datetime import datetime, timezone
 from typing import Dict, Set, List, Optional, Any
 from fastapi import WebSocket, WebSocketDisconnect
 
+from ws_fanout import ws_bus
+
 logger = logging.getLogger(__name__)
 
+AGENTS_CHANNEL = "support:agents"
+
+
+def _user_channel(user_id: str) -> str:
+    return f"support:user:{user_id}"
+
+
+def _session_channel(session_id: str) -> str:
+    return f"support:session:{session_id}"
+
 class ConnectionInfo:
     """Information about an active WebSocket connection"""
     
@@ -77,6 +92,13 @@ class SupportWebSocketManager:
                 if user_id not in self.agent_workload:
                     self.agent_workload[user_id] = 0
             
+            channels = [_user_channel(user_id)]
+            if session_id:
+                channels.append(_session_channel(session_id))
+            if user_type == "agent":
+                channels.append(AGENTS_CHANNEL)
+            await ws_bus.attach(websocket, channels, tag=user_id, on_drop=lambda: self.disconnect(websocket))
+            
             # Start background tasks if this is the first connection
             if len(self.active_connections) == 1:
                 await self._start_background_tasks()
@@ -107,6 +129,7 @@ class SupportWebSocketManager:
         
         # Remove from all tracking structures
         del self.active_connections[websocket]
+        ws_bus.detach(websocket)
         
         if user_id in self.user_connections:
             self.user_connections[user_id].discard(websocket)
@@ -133,80 +156,15 @@ class SupportWebSocketManager:
     
     async def send_personal_message(self, user_id: str, message: Dict[str, Any]):
         """Send message to all connections for a specific user"""
-        if user_id not in self.user_connections:
-            return False
-        
-        message_json = json.dumps(message)
-        failed_connections = []
-        
-        for websocket in self.user_connections[user_id].copy():
-            try:
-                await websocket.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Failed to send personal message to {user_id}: {e}")
-                failed_connections.append(websocket)
-        
-        # Cleanup failed connections
-        for websocket in failed_connections:
-            await self.disconnect(websocket)
-        
-        return len(self.user_connections.get(user_id, [])) > 0
+        await ws_bus.publish(_user_channel(user_id), message)
     
     async def broadcast_to_session(self, session_id: str, message: Dict[str, Any], exclude_user: str = None):
         """Broadcast message to all participants in a session"""
-        if session_id not in self.session_connections:
-            return False
-        
-        message_json = json.dumps(message)
-        failed_connections = []
-        sent_count = 0
-        
-        for websocket in self.session_connections[session_id].copy():
-            connection_info = self.active_connections.get(websocket)
-            if not connection_info:
-                failed_connections.append(websocket)
-                continue
-                
-            if exclude_user and connection_info.user_id == exclude_user:
-                continue
-            
-            try:
-                await websocket.send_text(message_json)
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"Failed to broadcast to session {session_id}: {e}")
-                failed_connections.append(websocket)
-        
-        # Cleanup failed connections
-        for websocket in failed_connections:
-            await self.disconnect(websocket)
-        
-        return sent_count > 0
+        await ws_bus.publish(_session_channel(session_id), message, exclude=exclude_user)
     
     async def broadcast_to_agents(self, message: Dict[str, Any], exclude_agent: str = None):
         """Broadcast message to all available agents"""
-        message_json = json.dumps(message)
-        failed_connections = []
-        sent_count = 0
-        
-        for user_id in self.available_agents.copy():
-            if exclude_agent and user_id == exclude_agent:
-                continue
-                
-            if user_id in self.user_connections:
-                for websocket in self.user_connections[user_id].copy():
-                    try:
-                        await websocket.send_text(message_json)
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to broadcast to agent {user_id}: {e}")
-                        failed_connections.append(websocket)
-        
-        # Cleanup failed connections
-        for websocket in failed_connections:
-            await self.disconnect(websocket)
-        
-        return sent_count > 0
+        await ws_bus.publish(AGENTS_CHANNEL, message, exclude=exclude_agent)
     
     async def handle_typing_indicator(self, session_id: str, user_id: str, user_type: str, is_typing: bool):
         """Handle typing indicator updates"""
@@ -272,6 +230,12 @@ class SupportWebSocketManager:
             self.available_agents.add(agent_id)
         else:
             self.available_agents.discard(agent_id)
+        # Only available agents receive agent broadcasts
+        for websocket in self.user_connections.get(agent_id, set()):
+            if is_available:
+                ws_bus.subscribe(websocket, AGENTS_CHANNEL)
+            else:
+                ws_bus.unsubscribe(websocket, AGENTS_CHANNEL)
         
         # Broadcast availability change
         await self.broadcast_to_agents({
@@ -401,18 +365,11 @@ class SupportWebSocketManager:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
                 
-                failed_connections = []
-                
-                for websocket, connection_info in self.active_connections.items():
-                    try:
-                        await websocket.send_text(json.dumps(heartbeat_message))
-                        connection_info.last_activity = datetime.now(timezone.utc)
-                    except Exception:
-                        failed_connections.append(websocket)
-                
-                # Cleanup failed connections
-                for websocket in failed_connections:
-                    await self.disconnect(websocket)
+                # Sockets that cannot keep up are dropped by the bus, which disconnects them
+                ws_bus.send_local(self.active_connections.keys(), heartbeat_message)
+                now = datetime.now(timezone.utc)
+                for connection_info in self.active_connections.values():
+                    connection_info.last_activity = now
                     
             except asyncio.CancelledError:
                 break
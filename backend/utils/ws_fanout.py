@@ -0,0 +1,290 @@
+"""
+Cross-worker WebSocket fan-out.
+
+The WebSocket managers register each accepted socket on one or more
+channels (``delivery:user:<id>``, ``support:session:<id>``, ...) and
+publish events to a channel instead of writing to their own sockets. The
+bus hands every publish to a backend, which delivers it to the bus of
+every worker; each bus then writes it to its own sockets on that channel.
+With the in-memory backend (the default, and what tests use) that is just
+the local process; with ``WS_BUS_REDIS_URL`` (or ``CACHE_REDIS_URL``) and
+redis installed, Redis pub/sub carries it to every worker, so real-time
+features work with any number of API workers.
+
+An event is serialized once per publish, and that text is what every
+socket receives. Each socket has its own bounded send queue drained by its
+own task, so a broadcast never waits on a slow client: a socket whose
+queue is full, or whose send overruns ``WS_SEND_TIMEOUT_SECONDS``, is
+dropped, its manager's ``on_drop`` cleanup runs and it is closed with
+code 1013 (try again later) so the client reconnects.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Union
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+WS_SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "256"))
+WS_SEND_TIMEOUT_SECONDS = float(os.environ.get("WS_SEND_TIMEOUT_SECONDS", "5"))
+# "Try again later": the client should reconnect
+WS_DROP_CLOSE_CODE = 1013
+
+Deliver = Callable[[str, str], Awaitable[None]]
+
+
+class FanoutBackend:
+    """Carries ``(channel, message)`` pairs to the bus of every worker"""
+
+    async def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+    async def start(self, deliver: Deliver):
+        """Begin calling ``deliver`` for every message published by any worker"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryFanoutBackend(FanoutBackend):
+    """Single-process delivery"""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def publish(self, channel: str, message: str):
+        if self._deliver is not None:
+            await self._deliver(channel, message)
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+
+class RedisFanoutBackend(FanoutBackend):
+    """Redis pub/sub over any client exposing the redis-py asyncio API"""
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, client, namespace: str = "ws-bus"):
+        self.client = client
+        self.namespace = namespace
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(f"{self.namespace}:{channel}", message)
+
+    async def start(self, deliver: Deliver):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver):
+        strip = len(self.namespace) + 1
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.namespace}:*")
+                async for item in pubsub.listen():
+                    if item.get("type") != "pmessage":
+                        continue
+                    channel, data = item["channel"], item["data"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    data = data.decode() if isinstance(data, bytes) else data
+                    await deliver(channel[strip:], data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket bus subscription lost ({e}); reconnecting")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def backend_from_env() -> FanoutBackend:
+    """Redis backend when a Redis URL is configured and redis is installed, else in-memory"""
+    url = os.environ.get("WS_BUS_REDIS_URL") or os.environ.get("CACHE_REDIS_URL")
+    if url:
+        try:
+            import redis.asyncio as redis_asyncio
+            return RedisFanoutBackend(redis_asyncio.from_url(url))
+        except ImportError:
+            logger.warning("WebSocket bus Redis URL is set but redis is not installed; fan-out is per worker")
+    return MemoryFanoutBackend()
+
+
+class SocketSender:
+    """One socket's bounded send queue and the task that drains it"""
+
+    def __init__(self, bus: "WebSocketBus", ws: WebSocket, tag: Optional[str],
+                 on_drop: Optional[Callable[[], Any]]):
+        self.bus = bus
+        self.ws = ws
+        self.tag = tag
+        self.on_drop = on_drop
+        self.channels: Set[str] = set()
+        self.closed = False
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=bus.queue_size)
+        self.task = asyncio.ensure_future(self._drain())
+
+    def offer(self, text: str):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.bus._stats["dropped_slow"] += 1
+            self.drop("send queue full")
+
+    async def _drain(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.ws.send_text(text), self.bus.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.bus._stats["send_failures"] += 1
+                self.drop(f"send failed: {type(e).__name__}")
+                return
+            self.bus._stats["delivered"] += 1
+
+    def drop(self, reason: str):
+        """Stop sending, detach from the bus, run the manager's cleanup and close the socket"""
+        if self.closed:
+            return
+        logger.info(f"WebSocket dropped from bus ({reason}); channels: {sorted(self.channels)}")
+        self.bus.detach(self.ws)
+        asyncio.ensure_future(self._close_socket())
+        if self.on_drop is not None:
+            try:
+                result = self.on_drop()
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"WebSocket on_drop cleanup failed: {e}")
+
+    async def _close_socket(self):
+        try:
+            await asyncio.wait_for(self.ws.close(code=WS_DROP_CLOSE_CODE), self.bus.send_timeout)
+        except Exception as e:
+            logger.debug(f"Closing dropped WebSocket failed: {e}")
+
+    def close(self):
+        self.closed = True
+        if self.task is not asyncio.current_task():
+            self.task.cancel()
+
+
+class WebSocketBus:
+    """Channel-addressed publish to every worker's local sockets"""
+
+    def __init__(self, backend: Optional[FanoutBackend] = None, queue_size: int = WS_SEND_QUEUE_SIZE,
+                 send_timeout: float = WS_SEND_TIMEOUT_SECONDS):
+        self.backend = backend if backend is not None else MemoryFanoutBackend()
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self._senders: Dict[WebSocket, SocketSender] = {}
+        self._channels: Dict[str, Set[SocketSender]] = {}
+        self._started = False
+        self._stats = {"published": 0, "received": 0, "delivered": 0, "dropped_slow": 0, "send_failures": 0}
+
+    async def _ensure_started(self):
+        if not self._started:
+            self._started = True
+            await self.backend.start(self._deliver)
+
+    async def attach(self, ws: WebSocket, channels: Iterable[str], tag: Optional[str] = None,
+                     on_drop: Optional[Callable[[], Any]] = None) -> SocketSender:
+        """Receive the events published to ``channels`` on the (accepted) socket ``ws``.
+
+        ``tag`` identifies the socket's user for ``publish(exclude=...)``;
+        ``on_drop`` runs if the bus drops the socket as slow or broken."""
+        await self._ensure_started()
+        sender = self._senders.get(ws)
+        if sender is None:
+            sender = self._senders[ws] = SocketSender(self, ws, tag, on_drop)
+        for channel in channels:
+            self.subscribe(ws, channel)
+        return sender
+
+    def subscribe(self, ws: WebSocket, channel: str):
+        sender = self._senders.get(ws)
+        if sender is not None:
+            sender.channels.add(channel)
+            self._channels.setdefault(channel, set()).add(sender)
+
+    def unsubscribe(self, ws: WebSocket, channel: str):
+        sender = self._senders.get(ws)
+        if sender is None:
+            return
+        sender.channels.discard(channel)
+        members = self._channels.get(channel)
+        if members is not None:
+            members.discard(sender)
+            if not members:
+                del self._channels[channel]
+
+    def detach(self, ws: WebSocket):
+        """Forget ``ws``; safe to call more than once"""
+        sender = self._senders.get(ws)
+        if sender is None:
+            return
+        for channel in list(sender.channels):
+            self.unsubscribe(ws, channel)
+        del self._senders[ws]
+        sender.close()
+
+    async def publish(self, channel: str, event: Union[Dict[str, Any], str], exclude: Optional[str] = None):
+        """Send ``event`` to every socket on ``channel`` in every worker, except those tagged ``exclude``"""
+        payload = event if isinstance(event, str) else json.dumps(event, default=str)
+        header = json.dumps({"exclude": exclude}) if exclude else ""
+        self._stats["published"] += 1
+        try:
+            await self.backend.publish(channel, f"{header}\n{payload}")
+        except Exception as e:
+            logger.error(f"WebSocket bus publish to {channel} failed: {e}")
+
+    def send_local(self, sockets: Iterable[WebSocket], event: Union[Dict[str, Any], str]):
+        """Queue ``event`` on specific sockets of this worker, e.g. heartbeats"""
+        payload = event if isinstance(event, str) else json.dumps(event, default=str)
+        for ws in list(sockets):
+            sender = self._senders.get(ws)
+            if sender is not None:
+                sender.offer(payload)
+
+    async def _deliver(self, channel: str, message: str):
+        self._stats["received"] += 1
+        members = self._channels.get(channel)
+        if not members:
+            return
+        header, _, payload = message.partition("\n")
+        exclude = json.loads(header).get("exclude") if header else None
+        for sender in list(members):
+            if exclude is None or sender.tag != exclude:
+                sender.offer(payload)
+
+    def local_sockets(self, channel: str) -> int:
+        return len(self._channels.get(channel, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "sockets": len(self._senders),
+            "channels": len(self._channels),
+            "queued": sum(s.queue.qsize() for s in self._senders.values()),
+            **self._stats,
+        }
+
+
+ws_bus = WebSocketBus(backend_from_env())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark Royalty Terms Cache
+=============================
+
+Measures royalty calculation throughput (terms lookup + splits lookup +
+calculation) with the contract terms / contributor split cache disabled
+and enabled, and checks that every Decimal result is identical.
+
+Seeds a scratch database (BENCHMARK_DB_NAME) and drops it afterwards.
+Usage: MONGO_URL=mongodb://localhost:27017 python scripts/benchmark_royalty_terms_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+
+os.environ['DB_NAME'] = os.environ.get('BENCHMARK_DB_NAME', 'royalty_engine_benchmark')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'utils'))
+
+from royalty_engine_core import (  # noqa: E402
+    TERMS_CACHE_MAX_ENTRIES,
+    TERMS_CACHE_TTL_SECONDS,
+    ContractTerm,
+    ContractType,
+    ContributorSplit,
+    MonetizationType,
+    RevenueSource,
+    RoyaltyEngineCore,
+    TransactionEvent,
+    db,
+)
+from versioned_cache import VersionedLRUCache  # noqa: E402
+
+ASSETS = int(os.environ.get('BENCHMARK_ASSETS', '50'))
+EVENTS = int(os.environ.get('BENCHMARK_EVENTS', '5000'))
+TERRITORIES = ["US", "GB", "DE", "JP", "BR"]
+
+
+def storable(doc):
+    """Decimals as strings and enums as values, which is what the engine reads back"""
+    if isinstance(doc, dict):
+        return {key: storable(value) for key, value in doc.items()}
+    if isinstance(doc, Decimal):
+        return str(doc)
+    if isinstance(doc, Enum):
+        return doc.value
+    return doc
+
+
+async def seed():
+    await db.contract_terms.delete_many({})
+    await db.contributor_splits.delete_many({})
+    effective = datetime.now(timezone.utc) - timedelta(days=30)
+    for i in range(ASSETS):
+        asset_id = f"bench-asset-{i}"
+        await db.contract_terms.insert_one(storable(ContractTerm(
+            asset_id=asset_id,
+            contract_type=ContractType.PERCENTAGE,
+            base_rate=Decimal("0.15"),
+            territory_modifiers={"GB": Decimal("1.1"), "JP": Decimal("0.9")},
+            platform_modifiers={"spotify": Decimal("1.05")},
+            effective_date=effective,
+        ).dict()))
+        await db.contributor_splits.insert_many([
+            storable(ContributorSplit(asset_id=asset_id, contributor_id="artist", contributor_type="artist",
+                                      split_percentage=Decimal("60")).dict()),
+            storable(ContributorSplit(asset_id=asset_id, contributor_id="producer", contributor_type="producer",
+                                      split_percentage=Decimal("40"), tax_jurisdiction="GB").dict()),
+        ])
+
+
+def make_events():
+    return [
+        TransactionEvent(
+            asset_id=f"bench-asset-{i % ASSETS}",
+            platform="spotify" if i % 3 else "apple_music",
+            territory=TERRITORIES[i % len(TERRITORIES)],
+            revenue_source=RevenueSource.STREAMING,
+            monetization_type=MonetizationType.SUBSCRIPTION,
+            gross_revenue=Decimal("0.004") * (i % 17 + 1),
+            platform_fee_rate=Decimal("0.3"),
+        )
+        for i in range(EVENTS)
+    ]
+
+
+def fingerprint(calculation):
+    """Decimal results as exact strings; ids and timestamps excluded"""
+    return (
+        repr(calculation.gross_revenue), repr(calculation.platform_fee), repr(calculation.tax_withholding),
+        repr(calculation.net_revenue), repr(calculation.total_royalty),
+        repr(calculation.contributor_payouts), repr(calculation.audit_trail),
+    )
+
+
+async def run(engine, events):
+    results = []
+    started = time.perf_counter()
+    for event in events:
+        terms = await engine._get_contract_terms(event.asset_id)
+        splits = await engine._get_contributor_splits(event.asset_id)
+        results.append(fingerprint(await engine._calculate_royalties(event, terms, splits)))
+    return results, time.perf_counter() - started
+
+
+async def main():
+    await seed()
+    events = make_events()
+
+    uncached = RoyaltyEngineCore()
+    uncached.terms_cache = VersionedLRUCache("contract_terms", 0)
+    uncached.splits_cache = VersionedLRUCache("contributor_splits", 0)
+    cached = RoyaltyEngineCore()
+    cached.terms_cache = VersionedLRUCache("contract_terms", TERMS_CACHE_MAX_ENTRIES, TERMS_CACHE_TTL_SECONDS)
+    cached.splits_cache = VersionedLRUCache("contributor_splits", TERMS_CACHE_MAX_ENTRIES, TERMS_CACHE_TTL_SECONDS)
+
+    try:
+        baseline, baseline_seconds = await run(uncached, events)
+        results, cached_seconds = await run(cached, events)
+    finally:
+        await db.client.drop_database(db.name)
+
+    print(f"events: {EVENTS}, assets: {ASSETS}")
+    print(f"uncached: {EVENTS / baseline_seconds:10.1f} calc/s")
+    print(f"cached:   {EVENTS / cached_seconds:10.1f} calc/s  ({baseline_seconds / cached_seconds:.1f}x)")
+    print(f"terms cache hit ratio:  {cached.terms_cache.stats()['hit_ratio']}")
+    print(f"splits cache hit ratio: {cached.splits_cache.stats()['hit_ratio']}")
+    identical = results == baseline
+    print(f"decimal results identical: {identical}")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())